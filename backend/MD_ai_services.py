@@ -12,6 +12,7 @@ import re # 匯入正規表達式模組
 
 # 從專案的其他模組導入必要的模型
 from .MD_models import Monster, PlayerGameData, ChatHistoryEntry, GameConfigs
+from .MD_config_services import get_config_index
 
 
 # 設定日誌記錄器
@@ -349,12 +350,13 @@ def generate_chat_response(monster: Monster, chat_history: List[ChatHistoryEntry
         return f"({monster.get('nickname')}好像在想些什麼...)"
     return "（牠好像不想說話...）"
 
-def generate_monster_ai_details(monster: Monster) -> Dict[str, str]:
+def generate_monster_ai_details(monster: Monster, game_configs: Optional[GameConfigs] = None) -> Dict[str, str]:
     """
     一個統一的函式，同時生成介紹和評價。
     """
-    from .MD_config_services import load_all_game_configs_from_firestore
-    game_configs = load_all_game_configs_from_firestore()
+    if game_configs is None:
+        from .MD_config_services import get_game_configs
+        game_configs = get_game_configs()
 
     skill_details = []
     for skill_info in monster.get("skills", []):
@@ -420,8 +422,7 @@ def _get_world_knowledge_context(player_message: str, game_configs: GameConfigs,
         if len(found_elements) >= 2:
             attacker = found_elements[0]
             defender = found_elements[1]
-            chart = game_configs.get("elemental_advantage_chart", {})
-            multiplier = chart.get(attacker, {}).get(defender, 1.0)
+            multiplier = get_config_index(game_configs).elemental_matrix.multiplier(attacker, defender)
             
             if multiplier > 1.0:
                 verdict = f"效果絕佳，有 {multiplier} 倍的加成！"
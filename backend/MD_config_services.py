@@ -1,71 +1,518 @@
 # backend/MD_config_services.py
 # 負責載入所有遊戲設定檔
 
+import json
 import logging
-from typing import Dict, Any
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, Any, Callable, List, Mapping, Optional, Tuple
+from firebase_admin import firestore
 from . import MD_firebase_config
 
 config_services_logger = logging.getLogger(__name__)
 
-def load_all_game_configs_from_firestore() -> Dict[str, Any]:
+
+class ElementalMatrix:
+    """
+    屬性相剋表編譯成的元素索引矩陣。
+    單一屬性的倍率以兩次索引取得；多屬性防守方的連乘結果依 (攻擊屬性, 防守屬性組合) 快取。
+    """
+    __slots__ = ("elements", "element_index", "rows", "counter_pairs", "_combination_cache")
+
+    def __init__(self, chart: Mapping[str, Mapping[str, float]]):
+        elements: List[str] = []
+        for attacker, defender_map in chart.items():
+            for element in (attacker, *(defender_map or {})):
+                if element not in elements:
+                    elements.append(element)
+        element_index = {element: i for i, element in enumerate(elements)}
+
+        rows = [[1.0] * len(elements) for _ in elements]
+        counter_pairs: List[Tuple[str, str]] = []
+        for attacker, defender_map in chart.items():
+            for defender, multiplier in (defender_map or {}).items():
+                rows[element_index[attacker]][element_index[defender]] = multiplier
+                if multiplier > 1.0:
+                    counter_pairs.append((attacker, defender))
+
+        self.elements = tuple(elements)
+        self.element_index = MappingProxyType(element_index)
+        self.rows = tuple(tuple(row) for row in rows)
+        # 克制關係 (強勢屬性, 弱勢屬性)，順序與相剋表中的排列相同
+        self.counter_pairs = tuple(counter_pairs)
+        self._combination_cache: Dict[Tuple[str, Tuple[str, ...]], float] = {}
+
+    def multiplier(self, attacker: str, defender: str) -> float:
+        attacker_i = self.element_index.get(attacker)
+        defender_i = self.element_index.get(defender)
+        if attacker_i is None or defender_i is None:
+            return 1.0
+        return self.rows[attacker_i][defender_i]
+
+    def against(self, attacker: str, defender_elements: Any) -> float:
+        """攻擊屬性對防守方全部屬性的總倍率（依防守屬性順序連乘）。"""
+        key = (attacker, tuple(defender_elements))
+        total = self._combination_cache.get(key)
+        if total is None:
+            total = 1.0
+            for defender in key[1]:
+                total *= self.multiplier(attacker, defender)
+            self._combination_cache[key] = total
+        return total
+
+
+class GameConfigIndex:
+    """
+    遊戲設定的唯讀索引，於設定載入時一次建好。
+    讓戰鬥、合成、治療等服務以 O(1) 查找技能、DNA、狀態、稱號與稀有度，
+    不必在每回合、每次請求中線性掃描整份設定。
+    """
+    __slots__ = (
+        "skills_by_name",
+        "dna_by_id", "dna_by_rarity", "dna_by_element", "dna_by_rarity_element",
+        "status_effects_by_id",
+        "titles_by_id", "titles_by_name", "titles_by_condition_type",
+        "rarity_by_name", "rarity_key_by_name",
+        "elemental_matrix",
+    )
+
+    def __init__(self, configs: Mapping[str, Any]):
+        skills_by_name: Dict[str, Dict[str, Any]] = {}
+        for element_skills in (configs.get("skills") or {}).values():
+            for skill in element_skills or []:
+                if skill and skill.get("name"):
+                    # 與舊的線性掃描一致：同名技能以第一個出現的為準
+                    skills_by_name.setdefault(skill["name"], skill)
+
+        dna_by_id: Dict[str, Dict[str, Any]] = {}
+        dna_by_rarity: Dict[str, List[Dict[str, Any]]] = {}
+        dna_by_element: Dict[str, List[Dict[str, Any]]] = {}
+        dna_by_rarity_element: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for dna in configs.get("dna_fragments") or []:
+            if not dna:
+                continue
+            if dna.get("id"):
+                dna_by_id.setdefault(dna["id"], dna)
+            rarity, element = dna.get("rarity"), dna.get("type")
+            dna_by_rarity.setdefault(rarity, []).append(dna)
+            dna_by_element.setdefault(element, []).append(dna)
+            dna_by_rarity_element.setdefault((rarity, element), []).append(dna)
+
+        status_effects_by_id: Dict[str, Dict[str, Any]] = {}
+        for status in configs.get("status_effects") or []:
+            if status and status.get("id"):
+                status_effects_by_id.setdefault(status["id"], status)
+
+        titles_by_id: Dict[str, Dict[str, Any]] = {}
+        titles_by_name: Dict[str, Dict[str, Any]] = {}
+        titles_by_condition_type: Dict[str, List[Dict[str, Any]]] = {}
+        for title in configs.get("titles") or []:
+            if not isinstance(title, dict):
+                continue
+            if title.get("id"):
+                titles_by_id.setdefault(title["id"], title)
+            if title.get("name"):
+                titles_by_name.setdefault(title["name"], title)
+            cond_type = (title.get("condition") or {}).get("type")
+            titles_by_condition_type.setdefault(cond_type, []).append(title)
+
+        rarity_by_name: Dict[str, Dict[str, Any]] = {}
+        rarity_key_by_name: Dict[str, str] = {}
+        for rarity_key, rarity_detail in (configs.get("rarities") or {}).items():
+            if isinstance(rarity_detail, dict) and rarity_detail.get("name"):
+                rarity_by_name.setdefault(rarity_detail["name"], rarity_detail)
+                rarity_key_by_name.setdefault(rarity_detail["name"], rarity_key)
+
+        self.skills_by_name = MappingProxyType(skills_by_name)
+        self.dna_by_id = MappingProxyType(dna_by_id)
+        self.dna_by_rarity = MappingProxyType({k: tuple(v) for k, v in dna_by_rarity.items()})
+        self.dna_by_element = MappingProxyType({k: tuple(v) for k, v in dna_by_element.items()})
+        self.dna_by_rarity_element = MappingProxyType({k: tuple(v) for k, v in dna_by_rarity_element.items()})
+        self.status_effects_by_id = MappingProxyType(status_effects_by_id)
+        self.titles_by_id = MappingProxyType(titles_by_id)
+        self.titles_by_name = MappingProxyType(titles_by_name)
+        self.titles_by_condition_type = MappingProxyType({k: tuple(v) for k, v in titles_by_condition_type.items()})
+        self.rarity_by_name = MappingProxyType(rarity_by_name)
+        self.rarity_key_by_name = MappingProxyType(rarity_key_by_name)
+        self.elemental_matrix = ElementalMatrix(configs.get("elemental_advantage_chart") or {})
+
+
+class GameConfigSnapshot(dict):
+    """
+    不可變的遊戲設定快照。
+    仍是 dict，既有的 `game_configs.get(...)` 與 jsonify 用法不受影響；
+    另外附帶建好的 `index` 供各服務做 O(1) 查找。
+    """
+
+    def __init__(self, configs: Optional[Mapping[str, Any]] = None):
+        super().__init__(configs or {})
+        self.index = GameConfigIndex(self)
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("GameConfigSnapshot 為唯讀快照，請重新載入設定以產生新的快照。")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    update = setdefault = pop = popitem = clear = _readonly
+
+    def __reduce__(self):
+        # pickle/deepcopy 時以建構子重建，避免走到被封鎖的 __setitem__
+        return (self.__class__, (dict(self),))
+
+
+def get_config_index(game_configs: Mapping[str, Any]) -> GameConfigIndex:
+    """
+    取得設定的索引。快照會直接回傳預先建好的索引；
+    其他普通 dict（例如各模組的預設設定）則臨時建立一份。
+    """
+    index = getattr(game_configs, "index", None)
+    if isinstance(index, GameConfigIndex):
+        return index
+    return GameConfigIndex(game_configs or {})
+
+
+# 後台修改設定後會遞增此文件的版本號，各 worker 透過監看它得知需要重新載入
+CONFIG_VERSION_COLLECTION = "MD_SystemData"
+CONFIG_VERSION_DOCUMENT = "ConfigVersion"
+# 設定來源："firestore"（預設）或 "local"
+CONFIG_SOURCE = os.environ.get("MD_CONFIG_SOURCE", "firestore").strip().lower()
+# 唯一存放在本地的設定檔，由後台直接覆寫檔案
+LOCAL_GAME_MECHANICS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game_mechanics.json")
+
+
+def _load_local_game_mechanics() -> Dict[str, Any]:
+    """讀取本地的 game_mechanics.json，讀不到時回傳空字典。"""
+    try:
+        with open(LOCAL_GAME_MECHANICS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        config_services_logger.error(f"讀取本地遊戲機制設定 '{LOCAL_GAME_MECHANICS_PATH}' 時發生錯誤: {e}", exc_info=True)
+        return {}
+
+
+def get_published_config_version() -> Optional[int]:
     """
-    從 Firestore 的 MD_GameConfigs 集合中載入所有遊戲設定。
+    讀取 Firestore 上目前發佈的設定版本號。
+    文件不存在時視為版本 0；資料庫不可用或讀取失敗時回傳 None。
+    """
+    db = MD_firebase_config.db
+    if not db:
+        return None
+    try:
+        doc = db.collection(CONFIG_VERSION_COLLECTION).document(CONFIG_VERSION_DOCUMENT).get()
+        if not doc.exists:
+            return 0
+        return int((doc.to_dict() or {}).get("version", 0))
+    except Exception as e:
+        config_services_logger.error(f"讀取設定版本號時發生錯誤: {e}", exc_info=True)
+        return None
+
+
+def publish_config_version() -> Optional[int]:
+    """
+    遞增 Firestore 上的設定版本號，通知所有 worker 重新載入設定。
+    回傳遞增後的版本號；失敗時回傳 None。
+    """
+    db = MD_firebase_config.db
+    if not db:
+        config_services_logger.error("Firestore 資料庫未初始化，無法發佈設定版本。")
+        return None
+    try:
+        doc_ref = db.collection(CONFIG_VERSION_COLLECTION).document(CONFIG_VERSION_DOCUMENT)
+        doc_ref.set({"version": firestore.Increment(1), "updated_at": firestore.SERVER_TIMESTAMP}, merge=True)
+        return get_published_config_version()
+    except Exception as e:
+        config_services_logger.error(f"發佈設定版本時發生錯誤: {e}", exc_info=True)
+        return None
+
+
+# 這個映射表定義了 Firestore 文件名、它在最終 configs 字典中對應的鍵名，以及需要提取的特定欄位
+GAME_CONFIG_DOCUMENT_MAP = {
+    "DNAFragments": ("dna_fragments", "all_fragments"),
+    "Skills": ("skills", "skill_database"),
+    "Personalities": ("personalities", "types"),
+    "Titles": ("titles", "player_titles"),
+    "NewbieGuide": ("newbie_guide", "guide_entries"),
+    "StatusEffects": ("status_effects", "effects_list"),
+    "ElementNicknames": ("element_nicknames", "nicknames"),
+    "MonsterAchievementsList": ("monster_achievements_list", "achievements"),
+    "CultivationStories": ("cultivation_stories", "story_library"),
+    "ChampionGuardians": ("champion_guardians", "guardians"),
+    # === 修改：確保讀取 islands 欄位 ===
+    "AdventureIslands": ("adventure_islands", "islands"),
+    "AdventureEvents": ("adventure_events", None),
+    "AdventureBosses": ("adventure_bosses", None),
+    "Rarities": ("rarities", "dna_rarities"),
+    "NamingConstraints": ("naming_constraints", None),
+    "ValueSettings": ("value_settings", None),
+    "AbsorptionSettings": ("absorption_settings", None),
+    "CultivationSettings": ("cultivation_settings", None),
+    "ElementalAdvantageChart": ("elemental_advantage_chart", None),
+    "BattleHighlights": ("battle_highlights", None),
+    "AdventureSettings": ("adventure_settings", None),
+    "AdventureGrowthSettings": ("adventure_growth_settings", None),
+    "TournamentConfig": ("tournament_config", None),
+    "NpcMonsters": ("npc_monsters", "npc_list")
+}
+
+
+def assemble_game_configs(documents: Mapping[str, Any], source_name: str = "Firestore 的 MD_GameConfigs") -> Dict[str, Any]:
+    """依 GAME_CONFIG_DOCUMENT_MAP 將設定文件（文件名 -> 內容）組合成 configs 字典。"""
+    configs: Dict[str, Any] = {}
+    for doc_name, (config_key, field_name) in GAME_CONFIG_DOCUMENT_MAP.items():
+        if doc_name in documents:
+            doc_content = documents[doc_name]
+            if doc_content: 
+                if field_name:
+                    configs[config_key] = doc_content.get(field_name, {})
+                else:
+                    configs[config_key] = doc_content
+        else:
+            config_services_logger.warning(f"在{source_name}中找不到文件: '{doc_name}'，將跳過此項設定。")
+    return configs
+
+
+def load_all_game_configs_from_firestore() -> GameConfigSnapshot:
+    """
+    從 Firestore 的 MD_GameConfigs 集合中載入所有遊戲設定，並建立索引快照。
     """
     db = MD_firebase_config.db
     if not db:
         config_services_logger.error("Firestore 資料庫未初始化，無法載入遊戲設定。")
-        return {}
+        return GameConfigSnapshot()
 
     config_services_logger.info("正在從 Firestore 載入遊戲核心設定...")
-    configs: Dict[str, Any] = {}
-    
-    # 這個映射表定義了 Firestore 文件名、它在最終 configs 字典中對應的鍵名，以及需要提取的特定欄位
-    doc_to_key_map = {
-        "DNAFragments": ("dna_fragments", "all_fragments"),
-        "Skills": ("skills", "skill_database"),
-        "Personalities": ("personalities", "types"),
-        "Titles": ("titles", "player_titles"),
-        "NewbieGuide": ("newbie_guide", "guide_entries"),
-        "StatusEffects": ("status_effects", "effects_list"),
-        "ElementNicknames": ("element_nicknames", "nicknames"),
-        "MonsterAchievementsList": ("monster_achievements_list", "achievements"),
-        "CultivationStories": ("cultivation_stories", "story_library"),
-        "ChampionGuardians": ("champion_guardians", "guardians"),
-        # === 修改：確保讀取 islands 欄位 ===
-        "AdventureIslands": ("adventure_islands", "islands"),
-        "AdventureEvents": ("adventure_events", None),
-        "AdventureBosses": ("adventure_bosses", None),
-        "Rarities": ("rarities", "dna_rarities"),
-        "NamingConstraints": ("naming_constraints", None),
-        "ValueSettings": ("value_settings", None),
-        "AbsorptionSettings": ("absorption_settings", None),
-        "CultivationSettings": ("cultivation_settings", None),
-        "ElementalAdvantageChart": ("elemental_advantage_chart", None),
-        "BattleHighlights": ("battle_highlights", None),
-        "AdventureSettings": ("adventure_settings", None),
-        "AdventureGrowthSettings": ("adventure_growth_settings", None),
-        "TournamentConfig": ("tournament_config", None),
-        "NpcMonsters": ("npc_monsters", "npc_list")
-    }
 
     try:
         docs = db.collection('MD_GameConfigs').stream()
         firestore_data = {doc.id: doc.to_dict() for doc in docs}
+        configs = assemble_game_configs(firestore_data)
 
-        for doc_name, (config_key, field_name) in doc_to_key_map.items():
-            if doc_name in firestore_data:
-                doc_content = firestore_data[doc_name]
-                if doc_content: 
-                    if field_name:
-                        configs[config_key] = doc_content.get(field_name, {})
-                    else:
-                        configs[config_key] = doc_content
-            else:
-                config_services_logger.warning(f"在 Firestore 的 MD_GameConfigs 中找不到文件: '{doc_name}'，將跳過此項設定。")
+        local_mechanics = _load_local_game_mechanics()
+        if local_mechanics:
+            configs["game_mechanics"] = local_mechanics
 
         config_services_logger.info("已成功從 Firestore 組合遊戲設定。")
-        return configs
+        return GameConfigSnapshot(configs)
 
     except Exception as e:
         config_services_logger.error(f"從 Firestore 載入遊戲設定時發生嚴重錯誤: {e}", exc_info=True)
-        return {}
+        return GameConfigSnapshot()
+
+
+def load_game_configs() -> GameConfigSnapshot:
+    """
+    依環境變數 MD_CONFIG_SOURCE 選擇設定來源：
+    預設為 "firestore"；設為 "local" 時直接從 backend 內的原始檔（及其二進位快取）載入，可完全離線執行。
+    """
+    if CONFIG_SOURCE == "local":
+        from .MD_local_config_services import load_all_game_configs_from_local_files
+        return load_all_game_configs_from_local_files()
+    return load_all_game_configs_from_firestore()
+
+
+class ConfigLoadError(RuntimeError):
+    """載入結果為空或載入失敗；目前使用中的快照與來源版本保持不變。"""
+
+
+class GameConfigProvider:
+    """
+    行程內共用、帶版本號的遊戲設定提供者。
+    所有路由與服務都從這裡取得同一份快照；新快照一律在背景或啟動時載入好後才整份替換，
+    玩家請求永遠不會同步等待 Firestore。
+    `version` 為本行程換上快照的次數，`source_version` 為載入時 Firestore 上發佈的版本號。
+    """
+
+    # 尚未載入時，兩次背景載入之間至少間隔的秒數，避免資料庫故障時每個請求都觸發載入
+    BACKGROUND_RETRY_SECONDS = 5.0
+
+    def __init__(
+        self,
+        loader: Callable[[], GameConfigSnapshot] = load_game_configs,
+        version_reader: Callable[[], Optional[int]] = get_published_config_version
+    ):
+        self._loader = loader
+        self._version_reader = version_reader
+        self._lock = threading.Lock()
+        self._snapshot: Optional[GameConfigSnapshot] = None
+        self._version = 0
+        self._source_version: Optional[int] = None
+        self._loaded_at: Optional[float] = None
+        self._background_reload_running = False
+        self._last_background_attempt = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def source_version(self) -> Optional[int]:
+        return self._source_version
+
+    @property
+    def is_loaded(self) -> bool:
+        return bool(self._snapshot)
+
+    def get(self) -> GameConfigSnapshot:
+        """
+        取得目前的設定快照。
+        尚未載入時不會阻塞請求，而是排程背景載入並先回傳空快照。
+        """
+        snapshot = self._snapshot
+        if snapshot:
+            # 計數僅供觀察用，不為此加鎖
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        self._schedule_background_reload()
+        return snapshot if snapshot is not None else _EMPTY_SNAPSHOT
+
+    def set_configs(self, configs: Mapping[str, Any], source_version: Optional[int] = None) -> int:
+        """以指定的設定內容換上新快照，回傳新的版本號。"""
+        with self._lock:
+            return self._install(configs, source_version)
+
+    def reload(self) -> int:
+        """
+        重新從來源載入設定並換上新快照，回傳新的版本號。
+        載入失敗（載入函式回傳空快照）時拋出 ConfigLoadError，保留原本的快照與來源版本，下次檢查會再重試。
+        """
+        # 先讀版本號再載入內容，確保快照的內容不會比標記的版本舊
+        source_version = self._version_reader()
+        new_configs = self._loader()
+        if not new_configs:
+            config_services_logger.error(f"重新載入遊戲設定失敗（結果為空），保留目前的版本 {self._version} (來源版本 {self._source_version})。")
+            raise ConfigLoadError("遊戲設定載入結果為空。")
+        return self.set_configs(new_configs, source_version)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self._version,
+            "source_version": self._source_version,
+            "loaded": self.is_loaded,
+            "loaded_at": self._loaded_at,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _install(self, configs: Mapping[str, Any], source_version: Optional[int]) -> int:
+        snapshot = configs if isinstance(configs, GameConfigSnapshot) else GameConfigSnapshot(configs)
+        if not snapshot:
+            # 空設定一律不換上，避免一次讀取錯誤把所有請求的設定清空
+            raise ConfigLoadError("拒絕換上空的遊戲設定快照。")
+        self._version += 1
+        self._source_version = source_version
+        self._loaded_at = time.time()
+        # 單一參照的替換是原子的，讀取端不會看到半套設定
+        self._snapshot = snapshot
+        config_services_logger.info(f"遊戲設定快照已更新至版本 {self._version} (來源版本 {source_version})。")
+        return self._version
+
+    def _schedule_background_reload(self):
+        with self._lock:
+            now = time.time()
+            if self._background_reload_running or now - self._last_background_attempt < self.BACKGROUND_RETRY_SECONDS:
+                return
+            self._background_reload_running = True
+            self._last_background_attempt = now
+
+        def _run():
+            try:
+                config_services_logger.warning("遊戲設定尚未載入，已於背景執行載入。")
+                self.reload()
+            except Exception as e:
+                config_services_logger.error(f"背景載入遊戲設定時發生錯誤: {e}", exc_info=True)
+            finally:
+                self._background_reload_running = False
+
+        threading.Thread(target=_run, name="game-config-loader", daemon=True).start()
+
+
+class ConfigReloadWatcher:
+    """
+    背景監看設定是否變更的執行緒：每隔固定秒數比對 Firestore 上發佈的版本號與本地設定檔的修改時間，
+    有變動就在背景重新載入並原子替換快照。每個 worker 各自執行一個，後台的修改因此能在數秒內傳到所有 worker。
+    """
+
+    def __init__(self, provider: GameConfigProvider, interval_seconds: float = 5.0, watched_paths: Optional[List[str]] = None):
+        self.provider = provider
+        self.interval_seconds = interval_seconds
+        self.watched_paths = list(watched_paths or [])
+        self._file_mtimes = self._read_file_mtimes()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="game-config-watcher", daemon=True)
+        self._thread.start()
+        config_services_logger.info(f"設定監看執行緒已啟動，每 {self.interval_seconds} 秒檢查一次。")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def check_once(self) -> bool:
+        """檢查一次設定是否變更；有變更並完成重新載入時回傳 True。"""
+        reasons = []
+        published_version = self.provider._version_reader()
+        if published_version is not None and published_version != self.provider.source_version:
+            reasons.append(f"發佈版本 {self.provider.source_version} -> {published_version}")
+
+        current_mtimes = self._read_file_mtimes()
+        if current_mtimes != self._file_mtimes:
+            reasons.append("本地設定檔已變更")
+
+        if not reasons:
+            return False
+
+        config_services_logger.info(f"偵測到設定變更（{'；'.join(reasons)}），開始背景重新載入。")
+        self.provider.reload()
+        self._file_mtimes = current_mtimes
+        return True
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                self.check_once()
+            except Exception as e:
+                config_services_logger.error(f"設定監看執行緒檢查時發生錯誤: {e}", exc_info=True)
+
+    def _read_file_mtimes(self) -> Dict[str, Optional[float]]:
+        mtimes: Dict[str, Optional[float]] = {}
+        for path in self.watched_paths:
+            try:
+                mtimes[path] = os.path.getmtime(path)
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+
+_EMPTY_SNAPSHOT = GameConfigSnapshot()
+game_config_provider = GameConfigProvider()
+_config_watcher: Optional[ConfigReloadWatcher] = None
+
+
+def get_game_configs() -> GameConfigSnapshot:
+    """取得行程內共用的遊戲設定快照。"""
+    return game_config_provider.get()
+
+
+def start_config_watcher(interval_seconds: float = 5.0) -> ConfigReloadWatcher:
+    """啟動本行程的設定監看執行緒（重複呼叫只會啟動一次）。"""
+    global _config_watcher
+    if _config_watcher is None:
+        watched_paths = [LOCAL_GAME_MECHANICS_PATH]
+        if CONFIG_SOURCE == "local":
+            from .MD_local_config_services import list_local_config_watch_paths
+            watched_paths = list_local_config_watch_paths()
+        _config_watcher = ConfigReloadWatcher(game_config_provider, interval_seconds, watched_paths)
+    _config_watcher.start()
+    return _config_watcher
@@ -0,0 +1,373 @@
+# backend/MD_local_config_services.py
+# 直接從 backend 內的 JSON/CSV 原始檔組出遊戲設定，並以內容雜湊為鍵快取成二進位快照，供離線執行與快速冷啟動使用
+
+import os
+import csv
+import json
+import pickle
+import hashlib
+import logging
+import tempfile
+from typing import Dict, Any, List, Optional
+
+from .MD_config_services import (
+    GameConfigSnapshot, assemble_game_configs, LOCAL_GAME_MECHANICS_PATH, _load_local_game_mechanics
+)
+
+local_config_logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 設定原始檔所在的資料夾（相對於 backend）
+LOCAL_CONFIG_SOURCE_DIRS = ("monster", "adventure", "battle", "system", "game_configs_data")
+LOCAL_CONFIG_SOURCE_EXTENSIONS = (".json", ".csv")
+
+# 快照格式有變動時遞增，讓舊的快取檔自動失效
+CONFIG_CACHE_FORMAT_VERSION = 1
+DEFAULT_CONFIG_CACHE_DIR = os.environ.get("MD_CONFIG_CACHE_DIR", os.path.join(BACKEND_DIR, ".config_cache"))
+CONFIG_CACHE_FILE_PREFIX = "game_configs_"
+CONFIG_CACHE_FILE_SUFFIX = ".pickle"
+
+# 缺少這些文件時，MD_populate_gamedata 會中止寫入
+REQUIRED_CONFIG_DOCUMENTS = ("DNAFragments", "Skills", "Personalities", "StatusEffects", "Titles", "ElementNicknames")
+
+ELEMENT_TYPES = ["火", "水", "木", "金", "土", "光", "暗", "毒", "風", "無", "混"]
+SKILL_CATEGORIES = ["近戰", "遠程", "魔法", "輔助", "物理", "特殊", "變化", "其他"]
+SKILL_FILE_ELEMENT_MAP = {
+    "fire": "火", "water": "水", "wood": "木", "gold": "金", "earth": "土",
+    "light": "光", "dark": "暗", "poison": "毒", "wind": "風", "none": "無", "mix": "混"
+}
+
+# --- 以下為沒有獨立原始檔、直接寫在程式中的設定 ---
+
+DNA_RARITIES_DATA = {
+    "COMMON": { "name": "普通", "textVarKey": "--rarity-common-text", "statMultiplier": 1.0, "skillLevelBonus": 0, "resistanceBonus": 1, "value_factor": 10 },
+    "RARE": { "name": "稀有", "textVarKey": "--rarity-rare-text", "statMultiplier": 1.15, "skillLevelBonus": 0, "resistanceBonus": 3, "value_factor": 30 },
+    "ELITE": { "name": "菁英", "textVarKey": "--rarity-elite-text", "statMultiplier": 1.3, "skillLevelBonus": 1, "resistanceBonus": 5, "value_factor": 75 },
+    "LEGENDARY": { "name": "傳奇", "textVarKey": "--rarity-legendary-text", "statMultiplier": 1.5, "skillLevelBonus": 2, "resistanceBonus": 8, "value_factor": 150 },
+    "MYTHICAL": { "name": "神話", "textVarKey": "--rarity-mythical-text", "statMultiplier": 1.75, "skillLevelBonus": 3, "resistanceBonus": 12, "value_factor": 300 },
+}
+
+MONSTER_ACHIEVEMENTS_DATA = [
+    "初戰星", "百戰將", "常勝軍", "不死鳥", "速攻手", "重炮手", "守護神", "控場師", "元素核", "進化者",
+    "稀有種", "菁英級", "傳奇級", "神話級", "無名者", "幸運星", "破壞王", "戰術家", "治癒者", "潛力股"
+]
+
+NAMING_CONSTRAINTS_DATA = {
+    "max_player_title_len": 5, "max_monster_achievement_len": 5,
+    "max_element_nickname_len": 5, "max_monster_full_nickname_len": 15
+}
+
+VALUE_SETTINGS_DATA = {
+    "element_value_factors": {
+        "火": 1.2, "水": 1.1, "木": 1.0, "金": 1.3, "土": 0.9,
+        "光": 1.5, "暗": 1.4, "毒": 0.8, "風": 1.0, "無": 0.7, "混": 0.6
+    },
+    "dna_recharge_conversion_factor": 0.15,
+    "max_farm_slots": 10,
+    "max_monster_skills": 3,
+    "max_battle_turns": 30,
+    "max_inventory_slots": 12,
+    "max_temp_backpack_slots": 9,
+    "max_cultivation_time_seconds": 3600,
+    "starting_gold": 500,
+    "cultivation_diminishing_return_window_seconds": 3600
+}
+
+ABSORPTION_SETTINGS_DATA = {
+    "base_stat_gain_factor": 0.03, "score_diff_exponent": 0.3,
+    "max_stat_gain_percentage": 0.015, "min_stat_gain": 1,
+    "dna_extraction_chance_base": 0.75,
+    "dna_extraction_rarity_modifier": {
+        "普通": 1.0, "稀有": 0.9, "菁英":0.75, "傳奇":0.6, "神話":0.45
+    }
+}
+
+_DEFAULT_STAT_WEIGHTS = { "hp": 30, "mp": 25, "attack": 20, "defense": 20, "speed": 15, "crit": 10 }
+CULTIVATION_SETTINGS_DATA = {
+    "skill_exp_base_multiplier": 100, "new_skill_chance": 0.1,
+    # Firestore 會把 tuple 存成陣列，這裡直接使用 list 讓本地與雲端的結果一致
+    "skill_exp_gain_range": [15, 75], "max_skill_level": 10,
+    "new_skill_rarity_bias": { "普通": 0.6, "稀有": 0.3, "菁英": 0.1 },
+    "stat_growth_weights": _DEFAULT_STAT_WEIGHTS,
+    "stat_growth_duration_divisor": 900, "dna_find_chance": 0.5,
+    "dna_find_duration_divisor": 1200,
+    "dna_find_loot_table": {
+        "普通": {"普通": 0.3, "稀有": 0.7},
+        "稀有": {"普通": 0.3, "稀有": 0.6, "菁英": 0.1},
+        "菁英": {"普通": 0.2, "稀有": 0.5, "菁英": 0.3, "傳奇": 0.0},
+        "傳奇": {"稀有": 0.4, "菁英": 0.4, "傳奇": 0.15, "神話": 0.05},
+        "神話": {"菁英": 0.5, "傳奇": 0.4, "神話": 0.1}
+    },
+    "location_biases": {
+        "gaia": {
+            "name": "蓋亞的搖籃",
+            "stat_growth_weights": _DEFAULT_STAT_WEIGHTS,
+            "element_bias": ["木", "水", "土", "毒"]
+        },
+        "sky": {
+            "name": "天空的怒火",
+            "stat_growth_weights": _DEFAULT_STAT_WEIGHTS,
+            "element_bias": ["火", "風", "光"]
+        },
+        "crystal": {
+            "name": "人智的結晶",
+            "stat_growth_weights": _DEFAULT_STAT_WEIGHTS,
+            "element_bias": ["金", "暗", "混"]
+        }
+    }
+}
+
+_BASE_ELEMENTAL_ADVANTAGE_CHART = {
+    "火": {"木": 1.5, "水": 0.5, "金": 1.2, "土": 0.8},
+    "水": {"火": 1.5, "土": 1.2, "木": 0.5, "金": 0.8},
+    "木": {"水": 1.5, "土": 0.5, "金": 0.8, "火": 0.8, "毒": 1.2},
+    "金": {"木": 1.5, "風": 1.2, "火": 0.5, "土": 1.2, "水": 0.8, "毒": 0.8},
+    "土": {"火": 1.2, "金": 0.5, "水": 0.5, "木": 1.5, "風": 0.8, "毒": 1.2},
+    "光": {"暗": 1.75, "毒": 0.7},
+    "暗": {"光": 1.75, "風": 0.7},
+    "毒": {"木": 1.4, "土": 1.2, "光": 0.7, "金": 0.7, "風": 0.8},
+    "風": {"土": 1.4, "木": 1.4, "暗": 0.7, "金": 0.7, "毒": 0.8},
+}
+
+
+def build_default_elemental_advantage_chart() -> Dict[str, Dict[str, float]]:
+    """產生補齊所有屬性組合（未定義者為 1.0）的屬性克制表。"""
+    chart = {attacker: dict(row) for attacker, row in _BASE_ELEMENTAL_ADVANTAGE_CHART.items()}
+    for el in ELEMENT_TYPES:
+        row = chart.setdefault(el, {})
+        for defender_el in ELEMENT_TYPES:
+            row.setdefault(defender_el, 1.0)
+    return chart
+
+
+# --- 讀取原始檔 ---
+
+def _read_json(path: str) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _read_dna_fragments(base_dir: str) -> List[Dict[str, Any]]:
+    dna_fragments_dir = os.path.join(base_dir, 'monster', 'DNA')
+    all_dna_fragments: List[Dict[str, Any]] = []
+    for filename in sorted(os.listdir(dna_fragments_dir)):
+        if not filename.endswith('.json'):
+            continue
+        dna_data = _read_json(os.path.join(dna_fragments_dir, filename))
+        if isinstance(dna_data, list):
+            all_dna_fragments.extend(dna_data)
+        else:
+            local_config_logger.warning(f"警告: {filename} 格式不正確，應為 JSON 列表。")
+    return all_dna_fragments
+
+
+def _read_skill_database(base_dir: str) -> Dict[str, List[Dict[str, Any]]]:
+    skills_dir = os.path.join(base_dir, 'monster', 'skills')
+    skill_database: Dict[str, List[Dict[str, Any]]] = {}
+    for filename in sorted(os.listdir(skills_dir)):
+        if not filename.endswith('.json'):
+            continue
+        element_zh = SKILL_FILE_ELEMENT_MAP.get(filename[:-5])
+        if not element_zh:
+            local_config_logger.warning(f"跳過未知的技能檔名: {filename}")
+            continue
+        skill_database[element_zh] = _read_json(os.path.join(skills_dir, filename))
+    return skill_database
+
+
+def _read_personalities(base_dir: str) -> List[Dict[str, Any]]:
+    personalities_path = os.path.join(base_dir, 'monster', 'personalities.csv')
+    personalities_data: List[Dict[str, Any]] = []
+    with open(personalities_path, mode='r', encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile):
+            skill_prefs = {}
+            for key in SKILL_CATEGORIES:
+                try:
+                    skill_prefs[key] = float(row.get(key, 1.0))
+                except (ValueError, TypeError):
+                    skill_prefs[key] = 1.0
+            personalities_data.append({
+                "name": row.get("name", "未知"),
+                "description": row.get("description", ""),
+                "colorDark": row.get("colorDark", "#FFFFFF"),
+                "colorLight": row.get("colorLight", "#000000"),
+                "skill_preferences": skill_prefs
+            })
+    return personalities_data
+
+
+def _read_prefixed_json_files(directory: str, prefix: str) -> Dict[str, Any]:
+    data: Dict[str, Any] = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.startswith(prefix) and filename.endswith('.json'):
+            data[filename] = _read_json(os.path.join(directory, filename))
+    return data
+
+
+def _read_elemental_advantage_chart(base_dir: str) -> Dict[str, Dict[str, float]]:
+    # 後台儲存屬性克制表時會寫出此檔；尚未存在時使用內建的預設表
+    chart_path = os.path.join(base_dir, 'battle', 'elemental_advantage_chart.json')
+    if os.path.exists(chart_path):
+        return _read_json(chart_path)
+    return build_default_elemental_advantage_chart()
+
+
+def build_game_config_documents(base_dir: str = BACKEND_DIR, include_uploaded_configs: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    從本地原始檔組出與 Firestore `MD_GameConfigs` 集合相同結構的文件（文件名 -> 文件內容）。
+    `include_uploaded_configs` 為 True 時，會再以 game_configs_data 中由 upload_config.py 上傳的檔案覆蓋同名文件，
+    與先執行 MD_populate_gamedata.py 再執行 upload_config.py 的結果相同。
+    讀取失敗的文件會記錄錯誤並略過。
+    """
+    documents: Dict[str, Dict[str, Any]] = {}
+
+    builders = [
+        ("DNAFragments", lambda: {'all_fragments': _read_dna_fragments(base_dir)}),
+        ("Skills", lambda: {'skill_database': _read_skill_database(base_dir)}),
+        ("Personalities", lambda: {'types': _read_personalities(base_dir)}),
+        ("CultivationStories", lambda: {'story_library': _read_json(os.path.join(base_dir, 'system', 'cultivation_stories.json'))}),
+        ("ChampionGuardians", lambda: {'guardians': _read_json(os.path.join(base_dir, 'system', 'champion_guardians.json'))}),
+        ("StatusEffects", lambda: {'effects_list': _read_json(os.path.join(base_dir, 'battle', 'status_effects.json'))}),
+        ("BattleHighlights", lambda: _read_json(os.path.join(base_dir, 'battle', 'battle_highlights.json'))),
+        ("AdventureIslands", lambda: {'islands': _read_json(os.path.join(base_dir, 'adventure', 'adventure_islands.json'))}),
+        ("AdventureSettings", lambda: _read_json(os.path.join(base_dir, 'adventure', 'adventure_settings.json'))),
+        ("AdventureGrowthSettings", lambda: _read_json(os.path.join(base_dir, 'adventure', 'adventure_growth_settings.json'))),
+        ("AdventureEvents", lambda: _read_prefixed_json_files(os.path.join(base_dir, 'adventure', 'events'), 'adventure_events_')),
+        ("AdventureBosses", lambda: _read_prefixed_json_files(os.path.join(base_dir, 'adventure', 'bosses'), 'bosses_')),
+        ("Rarities", lambda: {'dna_rarities': DNA_RARITIES_DATA}),
+        ("Titles", lambda: {'player_titles': _read_json(os.path.join(base_dir, 'system', 'titles.json'))}),
+        ("MonsterAchievementsList", lambda: {'achievements': MONSTER_ACHIEVEMENTS_DATA}),
+        ("ElementNicknames", lambda: {'nicknames': _read_json(os.path.join(base_dir, 'monster', 'element_nicknames.json'))}),
+        ("NamingConstraints", lambda: NAMING_CONSTRAINTS_DATA),
+        ("NewbieGuide", lambda: {'guide_entries': _read_json(os.path.join(base_dir, 'system', 'newbie_guide.json'))}),
+        ("ValueSettings", lambda: VALUE_SETTINGS_DATA),
+        ("AbsorptionSettings", lambda: ABSORPTION_SETTINGS_DATA),
+        ("CultivationSettings", lambda: CULTIVATION_SETTINGS_DATA),
+        ("ElementalAdvantageChart", lambda: _read_elemental_advantage_chart(base_dir)),
+    ]
+    if include_uploaded_configs:
+        uploaded_dir = os.path.join(base_dir, 'game_configs_data')
+        builders += [
+            ("TournamentConfig", lambda: _read_json(os.path.join(uploaded_dir, 'tournament_config.json'))),
+            ("NpcMonsters", lambda: _read_json(os.path.join(uploaded_dir, 'npc_monsters.json'))),
+            ("ChampionGuardians", lambda: _read_json(os.path.join(uploaded_dir, 'champion_guardians.json'))),
+        ]
+
+    for doc_name, builder in builders:
+        try:
+            documents[doc_name] = builder()
+        except FileNotFoundError as e:
+            local_config_logger.error(f"錯誤: 找不到設定原始檔 {e.filename}，將略過文件 '{doc_name}'。")
+        except Exception as e:
+            local_config_logger.error(f"處理設定文件 '{doc_name}' 的原始檔失敗: {e}", exc_info=True)
+
+    return documents
+
+
+# --- 二進位快照快取 ---
+
+def list_local_config_source_files(base_dir: str = BACKEND_DIR) -> List[str]:
+    """列出所有會影響本地設定結果的原始檔（已排序）。"""
+    paths: List[str] = []
+    for source_dir in LOCAL_CONFIG_SOURCE_DIRS:
+        for root, dirs, files in os.walk(os.path.join(base_dir, source_dir)):
+            dirs.sort()
+            for filename in sorted(files):
+                if filename.endswith(LOCAL_CONFIG_SOURCE_EXTENSIONS):
+                    paths.append(os.path.join(root, filename))
+    if os.path.exists(LOCAL_GAME_MECHANICS_PATH):
+        paths.append(LOCAL_GAME_MECHANICS_PATH)
+    return paths
+
+
+def list_local_config_watch_paths(base_dir: str = BACKEND_DIR) -> List[str]:
+    """設定監看執行緒要追蹤修改時間的路徑：所有原始檔，加上各資料夾本身（用來察覺新增或刪除的檔案）。"""
+    directories: List[str] = []
+    for source_dir in LOCAL_CONFIG_SOURCE_DIRS:
+        for root, dirs, _ in os.walk(os.path.join(base_dir, source_dir)):
+            dirs.sort()
+            directories.append(root)
+    return directories + list_local_config_source_files(base_dir)
+
+
+def compute_local_config_hash(base_dir: str = BACKEND_DIR) -> str:
+    """以所有原始檔的路徑與內容（加上本模組自身的程式碼）計算雜湊，作為快取的鍵。"""
+    digest = hashlib.sha256()
+    digest.update(f"format:{CONFIG_CACHE_FORMAT_VERSION}".encode('utf-8'))
+    # 內建的預設設定寫在本模組中，程式碼改變時快取也必須失效
+    for path in [os.path.abspath(__file__)] + list_local_config_source_files(base_dir):
+        digest.update(os.path.relpath(path, base_dir).encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _cache_file_path(cache_dir: str, content_hash: str) -> str:
+    return os.path.join(cache_dir, f"{CONFIG_CACHE_FILE_PREFIX}{content_hash}{CONFIG_CACHE_FILE_SUFFIX}")
+
+
+def _read_cached_snapshot(cache_path: str) -> Optional[GameConfigSnapshot]:
+    try:
+        with open(cache_path, 'rb') as f:
+            snapshot = pickle.load(f)
+        if isinstance(snapshot, GameConfigSnapshot):
+            return snapshot
+        local_config_logger.warning(f"設定快取 '{cache_path}' 內容格式不符，將重新建立。")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        local_config_logger.warning(f"讀取設定快取 '{cache_path}' 失敗，將重新建立: {e}")
+    return None
+
+
+def _write_cached_snapshot(cache_dir: str, cache_path: str, snapshot: GameConfigSnapshot):
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # 先寫入暫存檔再替換，避免其他 worker 讀到寫到一半的快取
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+        for filename in os.listdir(cache_dir):
+            stale_path = os.path.join(cache_dir, filename)
+            if filename.startswith(CONFIG_CACHE_FILE_PREFIX) and filename.endswith(CONFIG_CACHE_FILE_SUFFIX) and stale_path != cache_path:
+                os.remove(stale_path)
+    except Exception as e:
+        local_config_logger.warning(f"寫入設定快取 '{cache_path}' 失敗（不影響本次載入）: {e}")
+
+
+def load_all_game_configs_from_local_files(base_dir: str = BACKEND_DIR, cache_dir: Optional[str] = None) -> GameConfigSnapshot:
+    """
+    從本地原始檔載入所有遊戲設定。
+    原始檔內容未變時，直接讀取以內容雜湊命名的二進位快照；否則重新組合並寫入新的快照。
+    """
+    cache_dir = cache_dir or DEFAULT_CONFIG_CACHE_DIR
+    try:
+        content_hash = compute_local_config_hash(base_dir)
+    except Exception as e:
+        local_config_logger.error(f"計算本地設定雜湊時發生錯誤: {e}", exc_info=True)
+        return GameConfigSnapshot()
+
+    cache_path = _cache_file_path(cache_dir, content_hash)
+    snapshot = _read_cached_snapshot(cache_path)
+    if snapshot is not None:
+        local_config_logger.info(f"已從設定快取載入遊戲設定 ({content_hash[:12]})。")
+        return snapshot
+
+    local_config_logger.info("設定快取不存在或已過期，正在從本地原始檔組合遊戲設定...")
+    configs = assemble_game_configs(build_game_config_documents(base_dir), source_name="本地設定原始檔")
+    local_mechanics = _load_local_game_mechanics()
+    if local_mechanics:
+        configs["game_mechanics"] = local_mechanics
+    snapshot = GameConfigSnapshot(configs)
+    _write_cached_snapshot(cache_dir, cache_path, snapshot)
+    local_config_logger.info(f"已從本地原始檔組合遊戲設定並寫入快取 ({content_hash[:12]})。")
+    return snapshot
+
+
+if __name__ == '__main__':
+    # 可在部署的建置階段執行，預先產生快取：python -m backend.MD_local_config_services
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    loaded_configs = load_all_game_configs_from_local_files()
+    local_config_logger.info(f"共載入 {len(loaded_configs)} 項設定：{', '.join(sorted(loaded_configs.keys()))}")
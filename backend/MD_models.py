@@ -352,12 +352,41 @@ class BattleAction(TypedDict):
     is_crit: NotRequired[bool]
     is_miss: NotRequired[bool]
 
+BattleSide = Literal["player", "opponent"]
+
+class BattleEvent(TypedDict):
+    # 戰鬥引擎輸出的結構化事件；文字日誌與亮點皆由事件推導而來
+    turn: int
+    type: Literal[
+        "turn_start", "skip_turn", "status_hp", "status_expired", "action", "miss", "crit",
+        "ignore_defense", "damage", "status_applied", "stat_change", "recoil",
+        "weather_start", "weather_tick", "weather_damage", "weather_end", "unknown_special", "battle_end"
+    ]
+    actor: NotRequired[BattleSide]
+    target: NotRequired[BattleSide]
+    skill: NotRequired[str]
+    level: NotRequired[int]
+    amount: NotRequired[int]
+    element_multiplier: NotRequired[float]
+    crit: NotRequired[bool]
+    status_id: NotRequired[str]
+    status: NotRequired[str]
+    duration: NotRequired[int]
+    stats: NotRequired[List[str]]
+    amounts: NotRequired[List[float]]
+    weather: NotRequired[str]
+    special_id: NotRequired[str]
+    message: NotRequired[str]
+    sides: NotRequired[Dict[str, Dict[str, Any]]]
+    winner: NotRequired[Optional[BattleSide]]
+
 class BattleLogEntry(TypedDict):
     turn: int
     raw_log_messages: List[str]
     styled_log_message: str
 
 class BattleResult(TypedDict):
+    battle_id: str
     log_entries: List[BattleLogEntry]
     winner_id: str
     loser_id: str
@@ -371,6 +400,11 @@ class BattleResult(TypedDict):
     opponent_activity_log: Optional[MonsterActivityLogEntry]
     battle_highlights: List[str]
     ai_battle_report_content: Dict[str, Any]
+    battle_events: NotRequired[List[BattleEvent]]
+    seed: NotRequired[int]
+    engine_version: NotRequired[str]
+    input_hash: NotRequired[str]
+    highlight_style: NotRequired[Optional[str]]
     absorption_details: NotRequired[Dict[str, Any]]
 
 class ChampionSlot(TypedDict):
@@ -12,7 +12,6 @@ import time
 import random
 import json
 import logging
-import csv 
 
 # 導入 Firebase Admin SDK
 import firebase_admin
@@ -20,6 +19,7 @@ from firebase_admin import credentials, firestore
 
 # 將原本的相對導入改成從 backend 開始的絕對導入
 from backend.MD_firebase_config import set_firestore_client
+from backend.MD_local_config_services import build_game_config_documents, REQUIRED_CONFIG_DOCUMENTS
 
 
 # 設定日誌記錄器
@@ -32,11 +32,6 @@ if not script_logger.handlers:
     script_logger.addHandler(handler)
 
 
-# 輔助用列表 (與 MD_models.py 中的 Literal 一致)
-ELEMENT_TYPES = ["火", "水", "木", "金", "土", "光", "暗", "毒", "風", "無", "混"]
-RARITY_NAMES = ["普通", "稀有", "菁英", "傳奇", "神話"]
-SKILL_CATEGORIES = ["近戰", "遠程", "魔法", "輔助", "物理", "特殊", "變化", "其他"]
-
 # 服務帳戶金鑰檔案的路徑 (作為本地開發的備用)
 SERVICE_ACCOUNT_KEY_PATH = 'serviceAccountKey.json'
 
@@ -96,6 +91,7 @@ def initialize_firebase_for_script():
 def populate_game_configs():
     """
     將遊戲設定資料一次性匯入到 Firestore 的 MD_GameConfigs 集合。
+    各文件的內容由 MD_local_config_services 從本地原始檔組合，與本地設定來源模式使用同一套邏輯。
     """
     if not initialize_firebase_for_script():
         script_logger.error("錯誤：Firebase 未成功初始化。無法執行資料填充。")
@@ -111,375 +107,23 @@ def populate_game_configs():
     
     base_dir = os.path.dirname(__file__)
 
-    # --- 載入 DNA 碎片資料 (已修正) ---
-    all_dna_fragments = []
-    try:
-        dna_fragments_dir = os.path.join(base_dir, 'monster', 'DNA')
-        if not os.path.exists(dna_fragments_dir):
-            script_logger.error(f"錯誤: 找不到 DNA 資料夾: {dna_fragments_dir}")
-            return
-
-        for filename in os.listdir(dna_fragments_dir):
-            if filename.endswith('.json'):
-                file_path = os.path.join(dna_fragments_dir, filename)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    dna_data = json.load(f)
-                    if isinstance(dna_data, list):
-                        all_dna_fragments.extend(dna_data)
-                    else:
-                        script_logger.warning(f"警告: {filename} 格式不正確，應為 JSON 列表。")
-                script_logger.info(f"成功從 {filename} 載入 {len(dna_data)} 筆 DNA 資料。")
-
-        script_logger.info(f"總共載入 {len(all_dna_fragments)} 種 DNA 碎片資料。")
-        db_client.collection('MD_GameConfigs').document('DNAFragments').set({'all_fragments': all_dna_fragments})
-        script_logger.info("成功寫入 DNAFragments 資料。")
-    except Exception as e:
-        script_logger.error(f"處理 DNAFragments 資料夾失敗: {e}", exc_info=True)
-        return
-    
-    dna_fragments_data = all_dna_fragments
-
-    # --- 載入技能資料 (從拆分檔案) ---
-    try:
-        skills_dir = os.path.join(base_dir, 'monster', 'skills')
-        if not os.path.exists(skills_dir):
-            os.makedirs(skills_dir)
-            script_logger.warning(f"技能資料夾 'skills' 不存在，已自動建立於: {skills_dir}。請將技能檔案放入此處。")
-
-        skill_database_data = {}
-        element_map = {
-            "fire": "火", "water": "水", "wood": "木", "gold": "金", "earth": "土",
-            "light": "光", "dark": "暗", "poison": "毒", "wind": "風", "none": "無", "mix": "混"
-        }
-
-        for filename in os.listdir(skills_dir):
-            if filename.endswith('.json'):
-                element_en = filename[:-5] # 移除 .json
-                element_zh = element_map.get(element_en)
-                if not element_zh:
-                    script_logger.warning(f"跳過未知的技能檔名: {filename}")
-                    continue
-                
-                file_path = os.path.join(skills_dir, filename)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    skills = json.load(f)
-                    skill_database_data[element_zh] = skills
-                    script_logger.info(f"成功載入 {element_zh} 屬性技能 ({len(skills)}個) 從 {filename}")
-
-        if not skill_database_data:
-             script_logger.warning("技能資料庫為空，可能是 'skills' 資料夾中沒有有效的 .json 檔案。")
-
-        db_client.collection('MD_GameConfigs').document('Skills').set({'skill_database': skill_database_data})
-        script_logger.info("成功將組合後的技能資料寫入 Firestore 的 Skills 文件。")
-    except Exception as e:
-        script_logger.error(f"處理 Skills 資料夾失敗: {e}", exc_info=True)
-        return
-
-
-    # --- 載入個性資料 (從CSV) ---
-    personalities_data = []
-    try:
-        personalities_path = os.path.join(base_dir, 'monster', 'personalities.csv')
-        with open(personalities_path, mode='r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            skill_preference_keys = SKILL_CATEGORIES
-            for row in reader:
-                skill_prefs = {}
-                for key in skill_preference_keys:
-                    try:
-                        skill_prefs[key] = float(row.get(key, 1.0))
-                    except (ValueError, TypeError):
-                        skill_prefs[key] = 1.0
-                
-                personality = {
-                    "name": row.get("name", "未知"),
-                    "description": row.get("description", ""),
-                    "colorDark": row.get("colorDark", "#FFFFFF"),
-                    "colorLight": row.get("colorLight", "#000000"),
-                    "skill_preferences": skill_prefs
-                }
-                personalities_data.append(personality)
-        script_logger.info(f"成功從 {personalities_path} 載入 {len(personalities_data)} 種個性資料。")
-        db_client.collection('MD_GameConfigs').document('Personalities').set({'types': personalities_data})
-        script_logger.info("成功寫入 Personalities 資料。")
-    except FileNotFoundError:
-        script_logger.error(f"錯誤: 找不到個性設定檔 {personalities_path}。請確認檔案已放置在 'backend/monster/' 資料夾中並命名為 'personalities.csv'。")
-        return
-    except Exception as e:
-        script_logger.error(f"處理 Personalities 資料失敗: {e}")
-        return
-
-    # --- 載入修煉故事資料 ---
-    try:
-        stories_path = os.path.join(base_dir, 'system', 'cultivation_stories.json')
-        with open(stories_path, 'r', encoding='utf-8') as f:
-            stories_data = json.load(f)
-        script_logger.info(f"成功從 {stories_path} 載入 {len(stories_data)} 個地點的修煉故事資料。")
-        db_client.collection('MD_GameConfigs').document('CultivationStories').set({'story_library': stories_data})
-        script_logger.info("成功寫入 CultivationStories 資料。")
-    except FileNotFoundError:
-        script_logger.error(f"錯誤: 找不到修煉故事設定檔 {stories_path}。")
-    except Exception as e:
-        script_logger.error(f"處理 CultivationStories 資料失敗: {e}")
-
-    # --- 載入冠軍守門員資料 ---
-    try:
-        guardians_path = os.path.join(base_dir, 'system', 'champion_guardians.json')
-        with open(guardians_path, 'r', encoding='utf-8') as f:
-            guardians_data = json.load(f)
-        script_logger.info(f"成功從 {guardians_path} 載入冠軍守門員資料。")
-        db_client.collection('MD_GameConfigs').document('ChampionGuardians').set({'guardians': guardians_data})
-        script_logger.info("成功寫入 ChampionGuardians 資料。")
-    except FileNotFoundError:
-        script_logger.error(f"錯誤: 找不到冠軍守門員設定檔 {guardians_path}。")
-    except Exception as e:
-        script_logger.error(f"處理 ChampionGuardians 資料失敗: {e}")
-
-    # --- 載入狀態效果資料 (從 status_effects.json) ---
-    try:
-        status_effects_path = os.path.join(base_dir, 'battle', 'status_effects.json')
-        with open(status_effects_path, 'r', encoding='utf-8') as f:
-            status_effects_data = json.load(f)
-        script_logger.info(f"成功從 {status_effects_path} 載入 {len(status_effects_data)} 個狀態效果資料。")
-        db_client.collection('MD_GameConfigs').document('StatusEffects').set({'effects_list': status_effects_data})
-        script_logger.info("成功將 status_effects.json 的內容寫入 Firestore 的 StatusEffects 文件。")
-    except FileNotFoundError:
-        script_logger.error(f"錯誤: 找不到狀態效果設定檔 {status_effects_path}。請確認檔案已建立。")
-        return
-    except Exception as e:
-        script_logger.error(f"處理 StatusEffects 資料失敗: {e}")
-        return
-        
-    # --- 載入戰鬥亮點資料 (從 battle_highlights.json) ---
-    try:
-        highlights_path = os.path.join(base_dir, 'battle', 'battle_highlights.json')
-        with open(highlights_path, 'r', encoding='utf-8') as f:
-            highlights_data = json.load(f)
-        script_logger.info(f"成功從 {highlights_path} 載入戰鬥亮點資料。")
-        db_client.collection('MD_GameConfigs').document('BattleHighlights').set(highlights_data)
-        script_logger.info("成功將 battle_highlights.json 的內容寫入 Firestore 的 BattleHighlights 文件。")
-    except FileNotFoundError:
-        script_logger.error(f"錯誤: 找不到戰鬥亮點設定檔 {highlights_path}。")
-    except Exception as e:
-        script_logger.error(f"處理 BattleHighlights 資料失敗: {e}")
-
-    # --- 載入冒險島資料 ---
-    try:
-        islands_path = os.path.join(base_dir, 'adventure', 'adventure_islands.json')
-        with open(islands_path, 'r', encoding='utf-8') as f:
-            islands_data = json.load(f)
-        script_logger.info(f"成功從 {islands_path} 載入冒險島資料。")
-        db_client.collection('MD_GameConfigs').document('AdventureIslands').set({'islands': islands_data})
-        script_logger.info("成功寫入 AdventureIslands 資料。")
-    except FileNotFoundError:
-        script_logger.warning(f"提示: 找不到冒險島設定檔 {islands_path}，將跳過此項。")
-    except Exception as e:
-        script_logger.error(f"處理 AdventureIslands 資料失敗: {e}")
-
-    # --- 載入並寫入冒險島通用與成長設定 ---
-    try:
-        adv_settings_path = os.path.join(base_dir, 'adventure', 'adventure_settings.json')
-        with open(adv_settings_path, 'r', encoding='utf-8') as f:
-            adv_settings_data = json.load(f)
-        db_client.collection('MD_GameConfigs').document('AdventureSettings').set(adv_settings_data)
-        script_logger.info(f"成功從 {adv_settings_path} 載入並寫入 AdventureSettings 資料。")
-
-        growth_settings_path = os.path.join(base_dir, 'adventure', 'adventure_growth_settings.json')
-        with open(growth_settings_path, 'r', encoding='utf-8') as f:
-            growth_settings_data = json.load(f)
-        db_client.collection('MD_GameConfigs').document('AdventureGrowthSettings').set(growth_settings_data)
-        script_logger.info(f"成功從 {growth_settings_path} 載入並寫入 AdventureGrowthSettings 資料。")
-    except FileNotFoundError as e:
-        script_logger.error(f"錯誤: 找不到冒險島相關設定檔 ({e.filename})，請確認檔案存在。")
-    except Exception as e:
-        script_logger.error(f"處理冒險島詳細設定時發生錯誤: {e}", exc_info=True)
-
-    # --- 載入冒險事件資料 ---
-    try:
-        adventure_events_data = {}
-        events_dir = os.path.join(base_dir, 'adventure', 'events')
-        for filename in os.listdir(events_dir):
-            if filename.startswith('adventure_events_') and filename.endswith('.json'):
-                file_path = os.path.join(events_dir, filename)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    adventure_events_data[filename] = json.load(f)
-                    script_logger.info(f"成功從 {filename} 載入 {len(adventure_events_data[filename])} 個冒險事件。")
-        db_client.collection('MD_GameConfigs').document('AdventureEvents').set(adventure_events_data)
-        script_logger.info("成功將所有冒險事件資料寫入 Firestore 的 AdventureEvents 文件。")
-    except Exception as e:
-        script_logger.error(f"處理 AdventureEvents 資料夾失敗: {e}", exc_info=True)
-
-    # --- 載入冒險BOSS資料 ---
-    try:
-        adventure_bosses_data = {}
-        bosses_dir = os.path.join(base_dir, 'adventure', 'bosses')
-        for filename in os.listdir(bosses_dir):
-            if filename.startswith('bosses_') and filename.endswith('.json'):
-                file_path = os.path.join(bosses_dir, filename)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    adventure_bosses_data[filename] = json.load(f)
-                    script_logger.info(f"成功從 {filename} 載入 {len(adventure_bosses_data[filename])} 個冒險BOSS。")
-        db_client.collection('MD_GameConfigs').document('AdventureBosses').set(adventure_bosses_data)
-        script_logger.info("成功將所有冒險BOSS資料寫入 Firestore 的 AdventureBosses 文件。")
-    except Exception as e:
-        script_logger.error(f"處理 AdventureBosses 資料夾失敗: {e}", exc_info=True)
-
-
-    # --- 寫入其他設定 ---
-    
-    # DNA 稀有度資料 (Rarities)
-    dna_rarities_data = {
-        "COMMON": { "name": "普通", "textVarKey": "--rarity-common-text", "statMultiplier": 1.0, "skillLevelBonus": 0, "resistanceBonus": 1, "value_factor": 10 },
-        "RARE": { "name": "稀有", "textVarKey": "--rarity-rare-text", "statMultiplier": 1.15, "skillLevelBonus": 0, "resistanceBonus": 3, "value_factor": 30 },
-        "ELITE": { "name": "菁英", "textVarKey": "--rarity-elite-text", "statMultiplier": 1.3, "skillLevelBonus": 1, "resistanceBonus": 5, "value_factor": 75 },
-        "LEGENDARY": { "name": "傳奇", "textVarKey": "--rarity-legendary-text", "statMultiplier": 1.5, "skillLevelBonus": 2, "resistanceBonus": 8, "value_factor": 150 },
-        "MYTHICAL": { "name": "神話", "textVarKey": "--rarity-mythical-text", "statMultiplier": 1.75, "skillLevelBonus": 3, "resistanceBonus": 12, "value_factor": 300 },
-    }
-    db_client.collection('MD_GameConfigs').document('Rarities').set({'dna_rarities': dna_rarities_data})
-
-    # --- 載入並寫入稱號資料 (從 titles.json) ---
-    try:
-        titles_path = os.path.join(base_dir, 'system', 'titles.json')
-        with open(titles_path, 'r', encoding='utf-8') as f:
-            titles_data_from_json = json.load(f)
-        script_logger.info(f"成功從 {titles_path} 載入 {len(titles_data_from_json)} 個稱號資料。")
-        db_client.collection('MD_GameConfigs').document('Titles').set({'player_titles': titles_data_from_json})
-        script_logger.info("成功將 titles.json 的內容寫入 Firestore 的 Titles 文件。")
-    except FileNotFoundError:
-        script_logger.error(f"錯誤: 找不到稱號設定檔 {titles_path}。請確認檔案已建立。")
-        return
-    except Exception as e:
-        script_logger.error(f"處理 Titles 資料失敗: {e}")
+    # game_configs_data 中的檔案由 upload_config.py 另外上傳，這裡不包含
+    documents = build_game_config_documents(base_dir, include_uploaded_configs=False)
+    missing_documents = [doc_name for doc_name in REQUIRED_CONFIG_DOCUMENTS if doc_name not in documents]
+    if missing_documents:
+        script_logger.error(f"錯誤: 必要的設定文件載入失敗 ({', '.join(missing_documents)})，中止資料填充。")
         return
 
-    # 怪物成就列表 (MonsterAchievementsList)
-    monster_achievements_data = [
-        "初戰星", "百戰將", "常勝軍", "不死鳥", "速攻手", "重炮手", "守護神", "控場師", "元素核", "進化者",
-        "稀有種", "菁英級", "傳奇級", "神話級", "無名者", "幸運星", "破壞王", "戰術家", "治癒者", "潛力股"
-    ]
-    db_client.collection('MD_GameConfigs').document('MonsterAchievementsList').set({'achievements': monster_achievements_data})
-
-    # --- 載入並寫入元素預設名 (從 element_nicknames.json) ---
-    try:
-        nicknames_path = os.path.join(base_dir, 'monster', 'element_nicknames.json')
-        with open(nicknames_path, 'r', encoding='utf-8') as f:
-            element_nicknames_data = json.load(f)
-        script_logger.info(f"成功從 {nicknames_path} 載入元素暱稱資料。")
-        db_client.collection('MD_GameConfigs').document('ElementNicknames').set({'nicknames': element_nicknames_data})
-        script_logger.info("成功將 element_nicknames.json 的內容寫入 Firestore 的 ElementNicknames 文件。")
-    except FileNotFoundError:
-        script_logger.error(f"錯誤: 找不到元素暱稱設定檔 {nicknames_path}。請確認檔案已建立。")
-        return
-    except Exception as e:
-        script_logger.error(f"處理 ElementNicknames 資料失敗: {e}")
-        return
-
-    # 命名限制設定 (NamingConstraints)
-    naming_constraints_data = {
-        "max_player_title_len": 5, "max_monster_achievement_len": 5,
-        "max_element_nickname_len": 5, "max_monster_full_nickname_len": 15
-    }
-    db_client.collection('MD_GameConfigs').document('NamingConstraints').set(naming_constraints_data)
-
-    # 新手指南資料 (NewbieGuide)
-    try:
-        guide_path = os.path.join(base_dir, 'system', 'newbie_guide.json')
-        with open(guide_path, 'r', encoding='utf-8') as f:
-            newbie_guide_data = json.load(f)
-        script_logger.info(f"成功從 {guide_path} 載入新手指南資料。")
-        db_client.collection('MD_GameConfigs').document('NewbieGuide').set({'guide_entries': newbie_guide_data})
-        script_logger.info("成功寫入 NewbieGuide 資料。")
-    except FileNotFoundError:
-        script_logger.error(f"錯誤: 找不到新手指南設定檔 {guide_path}。")
-    except Exception as e:
-        script_logger.error(f"處理 NewbieGuide 資料失敗: {e}")
-
-    # 價值設定資料 (ValueSettings)
-    value_settings_data = {
-        "element_value_factors": {
-            "火": 1.2, "水": 1.1, "木": 1.0, "金": 1.3, "土": 0.9,
-            "光": 1.5, "暗": 1.4, "毒": 0.8, "風": 1.0, "無": 0.7, "混": 0.6
-        },
-        "dna_recharge_conversion_factor": 0.15,
-        "max_farm_slots": 10, 
-        "max_monster_skills": 3,
-        "max_battle_turns": 30,
-        "max_inventory_slots": 12,
-        "max_temp_backpack_slots": 9,
-        "max_cultivation_time_seconds": 3600,
-        "starting_gold": 500,
-        "cultivation_diminishing_return_window_seconds": 3600
-    }
-    db_client.collection('MD_GameConfigs').document('ValueSettings').set(value_settings_data)
-
-    # 吸收效果設定 (AbsorptionSettings)
-    absorption_settings_data = {
-        "base_stat_gain_factor": 0.03, "score_diff_exponent": 0.3,
-        "max_stat_gain_percentage": 0.015, "min_stat_gain": 1,
-        "dna_extraction_chance_base": 0.75,
-        "dna_extraction_rarity_modifier": {
-            "普通": 1.0, "稀有": 0.9, "菁英":0.75, "傳奇":0.6, "神話":0.45
-        }
-    }
-    db_client.collection('MD_GameConfigs').document('AbsorptionSettings').set(absorption_settings_data)
-
-    # 修煉系統設定 (CultivationSettings)
-    default_stat_weights = { "hp": 30, "mp": 25, "attack": 20, "defense": 20, "speed": 15, "crit": 10 }
-    cultivation_settings_data = {
-        "skill_exp_base_multiplier": 100, "new_skill_chance": 0.1,
-        "skill_exp_gain_range": (15, 75), "max_skill_level": 10,
-        "new_skill_rarity_bias": { "普通": 0.6, "稀有": 0.3, "菁英": 0.1 },
-        "stat_growth_weights": default_stat_weights,
-        "stat_growth_duration_divisor": 900, "dna_find_chance": 0.5,
-        "dna_find_duration_divisor": 1200,
-        "dna_find_loot_table": {
-            "普通": {"普通": 0.3, "稀有": 0.7},
-            "稀有": {"普通": 0.3, "稀有": 0.6, "菁英": 0.1},
-            "菁英": {"普通": 0.2, "稀有": 0.5, "菁英": 0.3, "傳奇": 0.0},
-            "傳奇": {"稀有": 0.4, "菁英": 0.4, "傳奇": 0.15, "神話": 0.05},
-            "神話": {"菁英": 0.5, "傳奇": 0.4, "神話": 0.1}
-        },
-        "location_biases": {
-            "gaia": {
-                "name": "蓋亞的搖籃",
-                "stat_growth_weights": default_stat_weights,
-                "element_bias": ["木", "水", "土", "毒"]
-            },
-            "sky": {
-                "name": "天空的怒火",
-                "stat_growth_weights": default_stat_weights,
-                "element_bias": ["火", "風", "光"]
-            },
-            "crystal": {
-                "name": "人智的結晶",
-                "stat_growth_weights": default_stat_weights,
-                "element_bias": ["金", "暗", "混"]
-            }
-        }
-    }
-    db_client.collection('MD_GameConfigs').document('CultivationSettings').set(cultivation_settings_data)
-
-    # 元素克制表 (ElementalAdvantageChart)
-    elemental_advantage_chart_data = {
-        "火": {"木": 1.5, "水": 0.5, "金": 1.2, "土": 0.8},
-        "水": {"火": 1.5, "土": 1.2, "木": 0.5, "金": 0.8},
-        "木": {"水": 1.5, "土": 0.5, "金": 0.8, "火": 0.8, "毒": 1.2},
-        "金": {"木": 1.5, "風": 1.2, "火": 0.5, "土": 1.2, "水": 0.8, "毒": 0.8},
-        "土": {"火": 1.2, "金": 0.5, "水": 0.5, "木": 1.5, "風": 0.8, "毒": 1.2},
-        "光": {"暗": 1.75, "毒": 0.7},
-        "暗": {"光": 1.75, "風": 0.7},
-        "毒": {"木": 1.4, "土": 1.2, "光": 0.7, "金": 0.7, "風": 0.8},
-        "風": {"土": 1.4, "木": 1.4, "暗": 0.7, "金": 0.7, "毒": 0.8},
-    }
-    for el in ELEMENT_TYPES:
-        if el not in elemental_advantage_chart_data: elemental_advantage_chart_data[el] = {}
-        for defender_el in ELEMENT_TYPES:
-            if defender_el not in elemental_advantage_chart_data[el]: elemental_advantage_chart_data[el][defender_el] = 1.0
-    db_client.collection('MD_GameConfigs').document('ElementalAdvantageChart').set(elemental_advantage_chart_data)
+    for doc_name, doc_content in documents.items():
+        db_client.collection('MD_GameConfigs').document(doc_name).set(doc_content)
+        script_logger.info(f"成功寫入 {doc_name} 資料。")
 
     # NPC 怪獸資料 (NPCMonsters)
-    _monster_achievements = monster_achievements_data
-    _element_nicknames = element_nicknames_data
+    dna_fragments_data = documents["DNAFragments"]["all_fragments"]
+    skill_database_data = documents["Skills"]["skill_database"]
+    personalities_data = documents["Personalities"]["types"]
+    _monster_achievements = documents["MonsterAchievementsList"]["achievements"]
+    _element_nicknames = documents["ElementNicknames"]["nicknames"]
 
     if not skill_database_data:
         script_logger.error("技能資料庫為空，無法為 NPC 生成技能。")
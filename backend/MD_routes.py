@@ -1,7 +1,7 @@
 # backend/MD_routes.py
 # 定義怪獸養成遊戲 (MD) 的 API 路由
 
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
 import firebase_admin
 from firebase_admin import auth
 import logging
@@ -9,11 +9,12 @@ import random
 import copy 
 import time 
 import math
+import json
 from typing import List, Dict, Any, Tuple
 
 from flask_cors import cross_origin
 
-from .player_services import get_player_data_service, save_player_data_service, draw_free_dna, get_friends_statuses_service, add_note_service
+from .player_services import get_player_data_service, save_player_data_service, draw_free_dna, get_friends_statuses_service, add_note_service, player_cache, ALL_PLAYER_SECTIONS, with_player_unit_of_work
 from .friend_services import send_friend_request_service, respond_to_friend_request_service, remove_friend_service
 from .monster_combination_services import combine_dna_service 
 from .monster_nickname_services import update_monster_custom_element_nickname_service
@@ -21,14 +22,21 @@ from .monster_healing_services import heal_monster_service, recharge_monster_wit
 from .monster_disassembly_services import disassemble_monster_service
 from .monster_cultivation_services import complete_cultivation_service, replace_monster_skill_service
 from .monster_absorption_services import absorb_defeated_monster_service
-from .battle_services import simulate_battle_full
+from .battle_services import simulate_battle_full, iter_battle_simulation, render_battle_log
+from .battle_report_services import get_battle_report, can_view_battle_report, battle_report_queue
+from .battle_simulation_services import run_monte_carlo_battles, acquire_player_simulation_slot, MAX_PLAYER_SIMULATION_BATTLES
+from .battle_replay_services import (
+    attach_battle_replay, get_replay_record, render_replay, can_view_replay
+)
 from .monster_chat_services import generate_monster_chat_response_service, generate_monster_interaction_response_service, handle_skill_toggle_request_service
 from .leaderboard_search_services import (
     get_player_leaderboard_service,
+    get_monster_leaderboard_service,
     search_players_service,
-    get_all_player_selected_monsters_service
+    get_leaderboard_page_service,
+    get_leaderboard_rank_service
 )
-from .MD_config_services import load_all_game_configs_from_firestore
+from .MD_config_services import get_game_configs, game_config_provider
 from .MD_models import PlayerGameData, Monster, BattleResult, GameConfigs
 from .post_battle_services import process_battle_results
 
@@ -37,11 +45,8 @@ md_bp = Blueprint('md_bp', __name__, url_prefix='/api/MD')
 routes_logger = logging.getLogger(__name__)
 
 def _get_game_configs_data_from_app_context():
-    if 'MD_GAME_CONFIGS' not in current_app.config:
-        routes_logger.warning("MD_GAME_CONFIGS 未在 current_app.config 中找到，將嘗試即時載入。")
-        from .MD_config_services import load_all_game_configs_from_firestore as load_configs_inner
-        current_app.config['MD_GAME_CONFIGS'] = load_configs_inner()
-    return current_app.config['MD_GAME_CONFIGS']
+    # 所有請求共用行程內的設定快照，不再逐次讀取 Firestore
+    return get_game_configs()
 
 def _get_authenticated_user_id():
     auth_header = request.headers.get('Authorization')
@@ -68,7 +73,12 @@ def _get_authenticated_user_id():
 
 @md_bp.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "ok", "message": "MD API 運作中！"})
+    return jsonify({
+        "status": "ok", "message": "MD API 運作中！",
+        "config": game_config_provider.stats(),
+        "battle_reports": battle_report_queue.stats(),
+        "player_cache": player_cache.stats()
+    })
 
 @md_bp.route('/game-configs', methods=['GET'])
 def get_game_configs_route():
@@ -85,7 +95,7 @@ def draw_free_dna_route():
         return error_response
 
     try:
-        drawn_dna_templates = draw_free_dna()
+        drawn_dna_templates = draw_free_dna(_get_game_configs_data_from_app_context())
         if drawn_dna_templates is not None:
             routes_logger.info(f"玩家 {user_id} 成功抽取 {len(drawn_dna_templates)} 個DNA。")
             return jsonify({"success": True, "drawn_dna": drawn_dna_templates}), 200
@@ -97,6 +107,7 @@ def draw_free_dna_route():
         return jsonify({"error": "伺服器內部錯誤，無法完成DNA抽取。"}), 500
 
 @md_bp.route('/player/equip-title', methods=['POST'])
+@with_player_unit_of_work
 def equip_title_route():
     user_id, nickname_from_token, error_response = _get_authenticated_user_id()
     if error_response:
@@ -131,6 +142,7 @@ def equip_title_route():
         return jsonify({"error": "儲存失敗，請稍後再試。"}), 500
 
 @md_bp.route('/player/<path:requested_player_id>', methods=['GET'])
+@with_player_unit_of_work
 def get_player_info_route(requested_player_id: str):
     from .post_battle_services import _check_and_award_titles as check_titles_utility
 
@@ -169,10 +181,13 @@ def get_player_info_route(requested_player_id: str):
     else:
         routes_logger.info(f"公開查詢玩家 {target_player_id_to_fetch} 的資料。")
 
+    # 公開查詢只讀取 gameData/main；本人才一併載入信箱、紀錄與遠征等子文件
     player_data, is_new_player = get_player_data_service(
         player_id=target_player_id_to_fetch,
         nickname_from_auth=nickname_for_init,
-        game_configs=game_configs
+        game_configs=game_configs,
+        sections=ALL_PLAYER_SECTIONS if is_self_request else (),
+        for_update=is_self_request
     )
 
     if player_data:
@@ -269,6 +284,7 @@ def respond_to_friend_request_route():
         return jsonify({"error": "處理好友請求回應時發生錯誤。"}), 500
         
 @md_bp.route('/notes', methods=['POST'])
+@with_player_unit_of_work
 def add_note_route():
     user_id, nickname_from_token, error_response = _get_authenticated_user_id()
     if error_response:
@@ -303,6 +319,7 @@ def add_note_route():
         return jsonify({"error": "新增註記失敗，請檢查請求參數。"}), 400
 
 @md_bp.route('/monster/<monster_id>/chat', methods=['POST'])
+@with_player_unit_of_work
 def chat_with_monster_route(monster_id: str):
     user_id, _, error_response = _get_authenticated_user_id()
     if error_response:
@@ -337,6 +354,7 @@ def chat_with_monster_route(monster_id: str):
 
 
 @md_bp.route('/combine', methods=['POST'])
+@with_player_unit_of_work
 def combine_dna_api_route():
     user_id, nickname_from_token, error_response = _get_authenticated_user_id()
     if error_response:
@@ -453,34 +471,29 @@ def _update_pvp_tier(player_stats: Dict[str, Any]) -> Dict[str, Any]:
     player_stats["pvp_tier"] = current_tier
     return player_stats
 
-@md_bp.route('/battle/simulate', methods=['POST'])
-def simulate_battle_api_route():
-    user_id, nickname_from_token, error_response = _get_authenticated_user_id()
-    if error_response:
-        return error_response
-
-    data = request.json
+def _prepare_battle_request(user_id: str, nickname_from_token: str):
+    """
+    解析並驗證戰鬥請求，取得雙方玩家資料。
+    回傳 (戰鬥參數, 錯誤回應)；一般與串流版的模擬戰鬥共用。
+    """
+    data = request.json or {}
     routes_logger.info(f"接收到的 /battle/simulate 請求 body: {data}") # 【最終除錯日誌】
 
     player_monster_data_req = data.get('player_monster_data')
     opponent_monster_data_req = data.get('opponent_monster_data')
     opponent_owner_id_req = data.get('opponent_owner_id')
     opponent_owner_nickname_req = data.get('opponent_owner_nickname')
-    is_champion_challenge = data.get('is_champion_challenge', False)
-    challenged_rank = data.get('challenged_rank', None)
-    is_ladder_match = data.get('is_ladder_match', False)
-    challenge_type = data.get('challenge_type', None)
 
     if not player_monster_data_req or not opponent_monster_data_req:
-        return jsonify({"error": "請求中必須包含兩隻怪獸的資���。"}), 400
+        return None, (jsonify({"error": "請求中必須包含兩隻怪獸的資料。"}), 400)
 
     game_configs = _get_game_configs_data_from_app_context()
     if not game_configs:
-        return jsonify({"error": "遊戲設定載入失敗，無法模擬戰鬥。"}), 500
+        return None, (jsonify({"error": "遊戲設定載入失敗，無法模擬戰鬥。"}), 500)
 
     player_data, _ = get_player_data_service(user_id, nickname_from_token, game_configs)
     if not player_data:
-        return jsonify({"error": "無法獲取您的玩家資料以開始戰鬥。"}), 404
+        return None, (jsonify({"error": "無法獲取您的玩家資料以開始戰鬥。"}), 404)
 
     opponent_player_data = None
     if not opponent_monster_data_req.get('isNPC') and opponent_owner_id_req:
@@ -488,15 +501,35 @@ def simulate_battle_api_route():
         if not opponent_player_data:
             routes_logger.warning(f"無法獲取對手玩家 {opponent_owner_id_req} 的資料。")
 
-    battle_result: BattleResult = simulate_battle_full( 
-        player_monster_data=player_monster_data_req,
-        opponent_monster_data=opponent_monster_data_req,
-        game_configs=game_configs,
-        player_data=player_data,
-        opponent_player_data=opponent_player_data
+    return {
+        "user_id": user_id,
+        "player_monster_data": player_monster_data_req,
+        "opponent_monster_data": opponent_monster_data_req,
+        "opponent_owner_id": opponent_owner_id_req,
+        "participant_ids": [pid for pid in (user_id, opponent_owner_id_req) if pid],
+        "is_champion_challenge": data.get('is_champion_challenge', False),
+        "challenged_rank": data.get('challenged_rank', None),
+        "is_ladder_match": data.get('is_ladder_match', False),
+        "challenge_type": data.get('challenge_type', None),
+        "game_configs": game_configs,
+        "player_data": player_data,
+        "opponent_player_data": opponent_player_data,
+    }, None
+
+
+def _finalize_battle(battle: Dict[str, Any], battle_result: BattleResult) -> Dict[str, Any]:
+    """保存重播、計算天梯積分並進行戰後處理，回傳要給前端的回應內容。"""
+    user_id = battle["user_id"]
+    player_data = battle["player_data"]
+    opponent_player_data = battle["opponent_player_data"]
+
+    # 事件流與完整日誌只保存在重播紀錄中，回應只帶 replay_id；重播在背景寫入，不等待完成
+    attach_battle_replay(
+        battle_result, battle["player_monster_data"], battle["opponent_monster_data"],
+        participant_ids=battle["participant_ids"]
     )
 
-    if is_ladder_match and player_data and opponent_player_data:
+    if battle["is_ladder_match"] and player_data and opponent_player_data:
         from .tournament_services import calculate_pvp_points_update
         winner_id = battle_result.get("winner_id")
         
@@ -519,16 +552,16 @@ def simulate_battle_api_route():
     if battle_result.get("battle_end"):
         post_battle_data = process_battle_results(
             player_id=user_id,
-            opponent_id=opponent_owner_id_req,
+            opponent_id=battle["opponent_owner_id"],
             player_data=player_data,
             opponent_player_data=opponent_player_data,
-            player_monster_data=player_monster_data_req,
-            opponent_monster_data=opponent_monster_data_req,
+            player_monster_data=battle["player_monster_data"],
+            opponent_monster_data=battle["opponent_monster_data"],
             battle_result=battle_result,
-            game_configs=game_configs,
-            is_champion_challenge=is_champion_challenge,
-            challenged_rank=challenged_rank,
-            challenge_type=challenge_type
+            game_configs=battle["game_configs"],
+            is_champion_challenge=battle["is_champion_challenge"],
+            challenged_rank=battle["challenged_rank"],
+            challenge_type=battle["challenge_type"]
         )
         
         updated_player_data = post_battle_data.get("updated_player_data")
@@ -537,13 +570,165 @@ def simulate_battle_api_route():
         if newly_awarded_titles:
             battle_result["newly_awarded_titles"] = newly_awarded_titles
         
-        return jsonify({
+        response = {
             "success": True, 
             "battle_result": battle_result,
             "updated_player_data": updated_player_data,
-        }), 200
-    
-    return jsonify({"success": True, "battle_result": battle_result}), 200
+        }
+    else:
+        response = {"success": True, "battle_result": battle_result}
+    return response
+
+
+@md_bp.route('/battle/simulate', methods=['POST'])
+def simulate_battle_api_route():
+    user_id, nickname_from_token, error_response = _get_authenticated_user_id()
+    if error_response:
+        return error_response
+
+    battle, error_response = _prepare_battle_request(user_id, nickname_from_token)
+    if error_response:
+        return error_response
+
+    battle_result: BattleResult = simulate_battle_full( 
+        player_monster_data=battle["player_monster_data"],
+        opponent_monster_data=battle["opponent_monster_data"],
+        game_configs=battle["game_configs"],
+        player_data=battle["player_data"],
+        opponent_player_data=battle["opponent_player_data"],
+        participant_ids=battle["participant_ids"]
+    )
+    return jsonify(_finalize_battle(battle, battle_result)), 200
+
+
+@md_bp.route('/battle/simulate/stream', methods=['POST'])
+def simulate_battle_stream_route():
+    """
+    串流版的模擬戰鬥，以 NDJSON（每行一個 JSON 物件）逐步回傳：
+    start（battle_id、種子、雙方名稱）→ 每回合一筆 turn（事件與該回合的日誌文字）→ 最後一筆 result（與 /battle/simulate 的回應相同）。
+    戰後處理與存檔在所有回合送出後才進行，前端可先開始播放戰鬥。
+    """
+    user_id, nickname_from_token, error_response = _get_authenticated_user_id()
+    if error_response:
+        return error_response
+
+    battle, error_response = _prepare_battle_request(user_id, nickname_from_token)
+    if error_response:
+        return error_response
+
+    def generate():
+        names: Dict[str, str] = {}
+        try:
+            for chunk in iter_battle_simulation(
+                battle["player_monster_data"], battle["opponent_monster_data"], battle["game_configs"],
+                battle["player_data"], battle["opponent_player_data"],
+                participant_ids=battle["participant_ids"]
+            ):
+                if chunk["type"] == "start":
+                    names = chunk["names"]
+                elif chunk["type"] == "turn":
+                    chunk = dict(chunk, log=render_battle_log(chunk["events"], names, battle["game_configs"])[0])
+                elif chunk["type"] == "result":
+                    chunk = dict(_finalize_battle(battle, chunk["battle_result"]), type="result")
+                yield json.dumps(chunk, ensure_ascii=False, default=str) + "\n"
+        except Exception as e:
+            routes_logger.error(f"玩家 {user_id} 的串流戰鬥失敗: {e}", exc_info=True)
+            yield json.dumps({"type": "error", "error": "模擬戰鬥時發生錯誤。"}, ensure_ascii=False) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@md_bp.route('/battle/monte-carlo', methods=['POST'])
+def monte_carlo_battle_route():
+    """
+    批次模擬戰鬥以預估勝率：一隻怪獸對上一隻或多隻對手，各打 num_battles 場。
+    玩家請求的總場數以 MAX_PLAYER_SIMULATION_BATTLES 為上限、有冷卻時間，且只在目前的 worker 內執行；
+    更大量的模擬請使用後台的 /admin/battle/monte-carlo。
+    """
+    user_id, _, error_response = _get_authenticated_user_id()
+    if error_response:
+        return error_response
+
+    data = request.json or {}
+    monster_data = data.get('player_monster_data')
+    opponents = data.get('opponent_monsters') or data.get('opponent_monster_data')
+    if not monster_data or not opponents:
+        return jsonify({"error": "請求中必須包含 player_monster_data 以及 opponent_monster_data 或 opponent_monsters。"}), 400
+
+    opponent_count = 1 if isinstance(opponents, dict) else max(1, len(opponents))
+    try:
+        num_battles = int(data.get('num_battles', max(1, MAX_PLAYER_SIMULATION_BATTLES // opponent_count)))
+        seed = int(data.get('seed', 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "num_battles 與 seed 必須是整數。"}), 400
+    if num_battles * opponent_count > MAX_PLAYER_SIMULATION_BATTLES:
+        return jsonify({"error": f"單次模擬最多 {MAX_PLAYER_SIMULATION_BATTLES} 場。"}), 400
+
+    game_configs = _get_game_configs_data_from_app_context()
+    if not game_configs:
+        return jsonify({"error": "遊戲設定載入失敗，無法模擬戰鬥。"}), 500
+
+    retry_after = acquire_player_simulation_slot(user_id)
+    if retry_after is not None:
+        seconds = int(retry_after) + 1
+        return jsonify({"error": f"模擬過於頻繁，請於 {seconds} 秒後再試。"}), 429, {"Retry-After": str(seconds)}
+
+    try:
+        report = run_monte_carlo_battles(
+            monster_data, opponents, game_configs,
+            num_battles=num_battles, seed=seed,
+            max_workers=1, max_battles=MAX_PLAYER_SIMULATION_BATTLES
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        routes_logger.error(f"玩家 {user_id} 的批次模擬失敗: {e}", exc_info=True)
+        return jsonify({"error": "批次模擬時發生錯誤。"}), 500
+
+    return jsonify({"success": True, "simulation": report}), 200
+
+
+@md_bp.route('/battle/replay/<battle_id>', methods=['GET'])
+def get_battle_replay_route(battle_id: str):
+    """依重播紀錄重新產生整場戰鬥的文字日誌與亮點，只有參戰的玩家可以查看。"""
+    user_id, _, error_response = _get_authenticated_user_id()
+    if error_response:
+        return error_response
+
+    record = get_replay_record(battle_id)
+    if not record:
+        return jsonify({"error": "找不到此場戰鬥的重播紀錄。"}), 404
+    if not can_view_replay(record, user_id):
+        return jsonify({"error": "您沒有權限查看此場戰鬥的重播。"}), 403
+
+    game_configs = _get_game_configs_data_from_app_context()
+    replay = render_replay(record, game_configs)
+    replay.update({
+        "seed": record.get("seed"),
+        "engine_version": record.get("engine_version"),
+        "input_hash": record.get("input_hash"),
+    })
+    return jsonify({"success": True, "replay": replay}), 200
+
+
+@md_bp.route('/battle/report/<battle_id>', methods=['GET'])
+def get_battle_report_route(battle_id: str):
+    """取回背景產生的 AI 戰報；尚未完成時回傳 pending 狀態，前端可稍後再查詢。只有參戰的玩家可以查看。"""
+    user_id, _, error_response = _get_authenticated_user_id()
+    if error_response:
+        return error_response
+
+    report_entry = get_battle_report(battle_id)
+    if not report_entry:
+        return jsonify({"error": "找不到此場戰鬥的戰報。"}), 404
+    if not can_view_battle_report(report_entry, user_id):
+        return jsonify({"error": "您沒有權限查看此場戰鬥的戰報。"}), 403
+
+    return jsonify({"success": True, "battle_id": battle_id, "status": report_entry["status"], "report": report_entry["report"]}), 200
 
 
 @md_bp.route('/generate-ai-descriptions', methods=['POST'])
@@ -558,7 +743,7 @@ def generate_ai_descriptions_route():
 
     try:
         from .MD_ai_services import generate_monster_ai_details as generate_ai_details_inner
-        ai_details = generate_ai_details_inner(monster_data)
+        ai_details = generate_ai_details_inner(monster_data, _get_game_configs_data_from_app_context())
         return jsonify(ai_details), 200
     except Exception as e:
         routes_logger.error(f"生成AI描述時發生錯誤: {e}", exc_info=True)
@@ -566,6 +751,7 @@ def generate_ai_descriptions_route():
 
 
 @md_bp.route('/monster/<monster_id>/update-nickname', methods=['POST'])
+@with_player_unit_of_work
 def update_monster_nickname_route(monster_id: str):
     user_id, nickname_from_token, error_response = _get_authenticated_user_id()
     if error_response: return error_response
@@ -600,6 +786,7 @@ def update_monster_nickname_route(monster_id: str):
 
 
 @md_bp.route('/monster/<monster_id>/heal', methods=['POST'])
+@with_player_unit_of_work
 def heal_monster_route(monster_id: str):
     user_id, nickname_from_token, error_response = _get_authenticated_user_id()
     if error_response: return error_response
@@ -629,6 +816,7 @@ def heal_monster_route(monster_id: str):
 
 
 @md_bp.route('/monster/<monster_id>/disassemble', methods=['POST'])
+@with_player_unit_of_work
 def disassemble_monster_route(monster_id: str):
     user_id, nickname_from_token, error_response = _get_authenticated_user_id()
     if error_response: return error_response
@@ -660,6 +848,7 @@ def disassemble_monster_route(monster_id: str):
 
 
 @md_bp.route('/monster/<monster_id>/recharge', methods=['POST'])
+@with_player_unit_of_work
 def recharge_monster_route(monster_id: str):
     user_id, nickname_from_token, error_response = _get_authenticated_user_id()
     if error_response: return error_response
@@ -691,6 +880,7 @@ def recharge_monster_route(monster_id: str):
 
 
 @md_bp.route('/monster/<monster_id>/cultivation/complete', methods=['POST'])
+@with_player_unit_of_work
 def complete_cultivation_route(monster_id: str):
     user_id, _, error_response = _get_authenticated_user_id()
     if error_response: return error_response
@@ -716,6 +906,7 @@ def complete_cultivation_route(monster_id: str):
 
 
 @md_bp.route('/monster/<monster_id>/skill/replace', methods=['POST'])
+@with_player_unit_of_work
 def replace_monster_skill_route(monster_id: str):
     user_id, nickname_from_token, error_response = _get_authenticated_user_id()
     if error_response: return error_response
@@ -771,13 +962,8 @@ def get_monster_leaderboard_route():
     if not game_configs:
         return jsonify({"error": "遊戲設定載入失敗，無法獲取排行榜。"}), 500
 
-    all_player_selected_monsters = get_all_player_selected_monsters_service(game_configs)
-
-    all_player_selected_monsters.sort(key=lambda m: m.get("score", 0), reverse=True)
-    
-    final_leaderboard = all_player_selected_monsters[:top_n]
-
-    return jsonify(final_leaderboard), 200
+    leaderboard = get_monster_leaderboard_service(game_configs, top_n)
+    return jsonify(leaderboard), 200
 
 @md_bp.route('/leaderboard/players', methods=['GET'])
 def get_player_leaderboard_route():
@@ -791,6 +977,30 @@ def get_player_leaderboard_route():
     leaderboard = get_player_leaderboard_service(game_configs, top_n)
     return jsonify(leaderboard), 200
 
+@md_bp.route('/leaderboard/<board>/page', methods=['GET'])
+def get_leaderboard_page_route(board: str):
+    try:
+        limit = int(request.args.get('limit', '20'))
+    except ValueError:
+        limit = 20
+    page, error = get_leaderboard_page_service(board, limit, request.args.get('cursor'))
+    if error:
+        return jsonify({"error": error}), 400
+    return jsonify(page), 200
+
+@md_bp.route('/leaderboard/<board>/rank', methods=['GET'])
+def get_leaderboard_rank_route(board: str):
+    target_uid = request.args.get('uid')
+    if not target_uid:
+        user_id, _, error_response = _get_authenticated_user_id()
+        if error_response:
+            return error_response
+        target_uid = user_id
+    rank_info, error = get_leaderboard_rank_service(board, target_uid)
+    if error:
+        return jsonify({"error": error}), 404
+    return jsonify(rank_info), 200
+
 @md_bp.route('/friends/statuses', methods=['POST'])
 def get_friends_statuses_route():
     user_id, _, error_response = _get_authenticated_user_id()
@@ -807,6 +1017,7 @@ def get_friends_statuses_route():
     return jsonify({"success": True, "statuses": statuses}), 200
 
 @md_bp.route('/monster/<monster_id>/interact', methods=['POST'])
+@with_player_unit_of_work
 def interact_with_monster_route(monster_id: str):
     user_id, _, error_response = _get_authenticated_user_id()
     if error_response:
@@ -840,6 +1051,7 @@ def interact_with_monster_route(monster_id: str):
     return jsonify({"success": True, "reply": ai_reply}), 200
 
 @md_bp.route('/monster/<monster_id>/toggle-skill', methods=['POST'])
+@with_player_unit_of_work
 def toggle_skill_route(monster_id: str):
     user_id, _, error_response = _get_authenticated_user_id()
     if error_response:
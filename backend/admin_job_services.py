@@ -0,0 +1,101 @@
+# backend/admin_job_services.py
+# 後台的長時間工作（全服錦標賽、玩家資料遷移等）：由路由在背景執行緒啟動後立即回傳工作 ID，
+# 工作狀態與結果寫入 Firestore，任何 worker 都能查詢；同樣的工作也可以用各服務模組的命令列入口離線執行
+
+import time
+import uuid
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple, Callable
+
+from firebase_admin import firestore
+
+from . import MD_firebase_config
+
+admin_job_logger = logging.getLogger(__name__)
+
+ADMIN_JOB_COLLECTION = "MD_AdminJobs"
+
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_SUCCEEDED = "succeeded"
+JOB_STATUS_FAILED = "failed"
+
+# 工作函式回傳 (結果, 錯誤訊息)，結果必須能寫入 Firestore
+AdminJobTarget = Callable[[], Tuple[Optional[Dict[str, Any]], Optional[str]]]
+
+# 本行程正在執行的工作類型，避免同一個 worker 重複啟動同類工作；不同 worker 之間不互相阻擋
+_running_job_types: Dict[str, str] = {}
+_running_lock = threading.Lock()
+
+
+def _write_job(job_id: str, data: Dict[str, Any], merge: bool = False):
+    db = MD_firebase_config.db
+    if not db:
+        return
+    try:
+        db.collection(ADMIN_JOB_COLLECTION).document(job_id).set(data, merge=merge)
+    except Exception as e:
+        admin_job_logger.error(f"寫入後台工作 {job_id} 的狀態時發生錯誤: {e}", exc_info=True)
+
+
+def _run_job(job_id: str, job_type: str, target: AdminJobTarget):
+    started_at = time.perf_counter()
+    try:
+        result, error = target()
+    except Exception as e:
+        admin_job_logger.error(f"後台工作 {job_type} ({job_id}) 執行失敗: {e}", exc_info=True)
+        result, error = None, "工作執行時發生錯誤。"
+    finally:
+        with _running_lock:
+            _running_job_types.pop(job_type, None)
+
+    status = JOB_STATUS_FAILED if error else JOB_STATUS_SUCCEEDED
+    admin_job_logger.info(f"後台工作 {job_type} ({job_id}) 結束：{status}，耗時 {time.perf_counter() - started_at:.1f} 秒。")
+    _write_job(job_id, {
+        "status": status,
+        "result": result,
+        "error": error,
+        "finished_at": firestore.SERVER_TIMESTAMP,
+    }, merge=True)
+
+
+def start_admin_job(job_type: str, params: Dict[str, Any], target: AdminJobTarget) -> Tuple[Optional[str], Optional[str]]:
+    """
+    在背景執行緒啟動後台工作並立即回傳 (工作 ID, 錯誤訊息)。
+    本行程已有同類工作在執行時不會再啟動，回傳該工作的 ID 與錯誤訊息。
+    """
+    if not MD_firebase_config.db:
+        return None, "Firestore 資料庫未初始化，無法啟動後台工作。"
+
+    with _running_lock:
+        running_job_id = _running_job_types.get(job_type)
+        if running_job_id:
+            return running_job_id, "已有相同的後台工作正在執行。"
+        job_id = uuid.uuid4().hex
+        _running_job_types[job_type] = job_id
+
+    _write_job(job_id, {
+        "job_type": job_type,
+        "status": JOB_STATUS_RUNNING,
+        "params": params,
+        "result": None,
+        "error": None,
+        "created_at": firestore.SERVER_TIMESTAMP,
+    })
+    threading.Thread(target=_run_job, args=(job_id, job_type, target), name=f"admin-job-{job_type}", daemon=True).start()
+    admin_job_logger.info(f"後台工作 {job_type} ({job_id}) 已啟動，參數: {params}")
+    return job_id, None
+
+
+def get_admin_job(job_id: str) -> Optional[Dict[str, Any]]:
+    db = MD_firebase_config.db
+    if not db:
+        return None
+    try:
+        doc = db.collection(ADMIN_JOB_COLLECTION).document(job_id).get()
+        if not doc.exists:
+            return None
+        return {"job_id": job_id, **(doc.to_dict() or {})}
+    except Exception as e:
+        admin_job_logger.error(f"讀取後台工作 {job_id} 時發生錯誤: {e}", exc_info=True)
+        return None
@@ -86,12 +86,13 @@ def save_game_mechanics_route():
 @admin_bp.route('/player_data', methods=['GET', 'OPTIONS'])
 @token_required
 def get_admin_player_data_route():
-    from .player_services import get_player_data_service
+    from .player_services import get_player_data_service, ALL_PLAYER_SECTIONS
     uid = request.args.get('uid')
     if not uid:
         return jsonify({"error": "請求中缺少玩家 UID"}), 400
-    game_configs = current_app.config.get('MD_GAME_CONFIGS', {})
-    player_data, _ = get_player_data_service(uid, None, game_configs)
+    from .MD_config_services import get_game_configs
+    game_configs = get_game_configs()
+    player_data, _ = get_player_data_service(uid, None, game_configs, sections=ALL_PLAYER_SECTIONS, for_update=False)
     if player_data:
         player_data['uid'] = uid
         return jsonify(player_data), 200
@@ -302,7 +303,8 @@ def grant_exclusive_title_route():
     except json.JSONDecodeError as e:
         return jsonify({"error": f"稱號加成 (Buffs) 的 JSON 格式不正確: {e}"}), 400
 
-    game_configs = current_app.config.get('MD_GAME_CONFIGS', {})
+    from .MD_config_services import get_game_configs
+    game_configs = get_game_configs()
     player_data, _ = get_player_data_service(player_uid, None, game_configs)
 
     if not player_data:
@@ -359,3 +361,128 @@ def admin_search_players_route():
     results = search_players_service(nickname_query, limit)
     return jsonify({"players": results}), 200
 # --- 核心修改處 END ---
+
+@admin_bp.route('/tournaments/run', methods=['POST', 'OPTIONS'])
+@token_required
+def run_server_tournament_route():
+    """
+    (Admin) 在背景啟動全服錦標賽，立即回傳工作 ID，之後以 /jobs/<job_id> 查詢結果。
+    body: { "format": "round_robin" | "single_elimination", "seed": 0, "seed_list": [玩家或怪獸 ID...] }
+    也可以離線執行：python -m backend.tournament_runner_services
+    """
+    from .MD_config_services import get_game_configs
+    from .admin_job_services import start_admin_job
+    from .tournament_runner_services import run_server_tournament_job, TOURNAMENT_FORMATS, TOURNAMENT_FORMAT_ROUND_ROBIN
+
+    data = request.get_json() or {}
+    try:
+        seed = int(data.get('seed', 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "seed 必須是整數。"}), 400
+    tournament_format = data.get('format', TOURNAMENT_FORMAT_ROUND_ROBIN)
+    if tournament_format not in TOURNAMENT_FORMATS:
+        return jsonify({"error": f"不支援的賽制：{tournament_format}。"}), 400
+    seed_list = data.get('seed_list')
+
+    game_configs = get_game_configs()
+    job_id, error = start_admin_job(
+        "server_tournament",
+        {"format": tournament_format, "seed": seed, "seed_list": seed_list},
+        lambda: run_server_tournament_job(game_configs, tournament_format, seed_list, seed)
+    )
+    if error:
+        return jsonify({"error": error, "job_id": job_id}), 409 if job_id else 500
+    return jsonify({"success": True, "job_id": job_id}), 202
+
+@admin_bp.route('/jobs/<string:job_id>', methods=['GET', 'OPTIONS'])
+@token_required
+def get_admin_job_route(job_id):
+    """(Admin) 查詢背景工作的狀態與結果。"""
+    from .admin_job_services import get_admin_job
+
+    job = get_admin_job(job_id)
+    if not job:
+        return jsonify({"error": "找不到此後台工作。"}), 404
+    return jsonify({"success": True, "job": job}), 200
+
+@admin_bp.route('/battle/monte-carlo', methods=['POST', 'OPTIONS'])
+@token_required
+def admin_monte_carlo_battle_route():
+    """
+    (Admin) 在背景啟動大量批次模擬，場數夠多時使用行程池平行執行；立即回傳工作 ID，之後以 /jobs/<job_id> 查詢結果。
+    body: { "player_monster_data": {...}, "opponent_monsters": [...], "num_battles": 1000, "seed": 0, "workers": 4 }
+    """
+    from .MD_config_services import get_game_configs
+    from .admin_job_services import start_admin_job
+    from .battle_simulation_services import run_monte_carlo_battles, validate_simulation_request
+
+    data = request.get_json(silent=True) or {}
+    monster_data = data.get('player_monster_data')
+    opponents = data.get('opponent_monsters') or data.get('opponent_monster_data')
+    if not monster_data or not opponents:
+        return jsonify({"error": "請求中必須包含 player_monster_data 以及 opponent_monster_data 或 opponent_monsters。"}), 400
+    try:
+        num_battles = int(data.get('num_battles', 1000))
+        seed = int(data.get('seed', 0))
+        workers = int(data['workers']) if data.get('workers') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "num_battles、seed 與 workers 必須是整數。"}), 400
+    try:
+        validate_simulation_request(opponents, num_battles)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    game_configs = get_game_configs()
+
+    def _simulate():
+        return run_monte_carlo_battles(monster_data, opponents, game_configs, num_battles=num_battles, seed=seed, max_workers=workers), None
+
+    job_id, error = start_admin_job(
+        "monte_carlo_simulation",
+        {"monster_id": monster_data.get("id"), "num_battles": num_battles, "seed": seed, "workers": workers},
+        _simulate
+    )
+    if error:
+        return jsonify({"error": error, "job_id": job_id}), 409 if job_id else 500
+    return jsonify({"success": True, "job_id": job_id}), 202
+
+@admin_bp.route('/leaderboard/rebuild', methods=['POST', 'OPTIONS'])
+@token_required
+def rebuild_leaderboard_route():
+    """(Admin) 以所有玩家目前的資料重建排行榜集合。"""
+    from .MD_config_services import get_game_configs
+    from .leaderboard_search_services import rebuild_leaderboard_service
+
+    written, error = rebuild_leaderboard_service(get_game_configs())
+    if error:
+        return jsonify({"error": error, "written": written}), 500
+    return jsonify({"success": True, "written": written}), 200
+
+@admin_bp.route('/migrations/player_storage', methods=['POST', 'OPTIONS'])
+@token_required
+def migrate_player_storage_route():
+    """
+    (Admin) 在背景啟動玩家資料遷移（升級 schema_version 並轉換為分檔格式），立即回傳工作 ID，之後以 /jobs/<job_id> 查詢結果。
+    body: { "workers": 8 }（選填，同時處理的玩家數）
+    也可以離線執行：python -m backend.player_migration_services
+    """
+    from .MD_config_services import get_game_configs
+    from .admin_job_services import start_admin_job
+    from .player_migration_services import migrate_all_players_service, PLAYER_SCHEMA_VERSION
+
+    data = request.get_json(silent=True) or {}
+    try:
+        workers = int(data['workers']) if data.get('workers') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "workers 必須是整數。"}), 400
+
+    game_configs = get_game_configs()
+
+    def _migrate():
+        counts, error = migrate_all_players_service(game_configs, max_workers=workers)
+        return {"schema_version": PLAYER_SCHEMA_VERSION, **counts}, error
+
+    job_id, error = start_admin_job("player_migration", {"workers": workers, "schema_version": PLAYER_SCHEMA_VERSION}, _migrate)
+    if error:
+        return jsonify({"error": error, "job_id": job_id}), 409 if job_id else 500
+    return jsonify({"success": True, "job_id": job_id}), 202
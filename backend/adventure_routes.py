@@ -12,6 +12,7 @@ from .adventure_services import (
     complete_floor_service, resolve_event_choice_service, switch_captain_service, _sync_and_finalize_expedition
 )
 from .battle_services import simulate_battle_full
+from .battle_replay_services import attach_battle_replay
 from .MD_models import PlayerGameData
 
 
@@ -60,7 +61,7 @@ def start_adventure_route():
         adventure_routes_logger.info(f"玩家 {user_id} 請求開始遠征：島嶼 {island_id}, 設施 {facility_id}")
         
         game_configs = _get_game_configs_data_from_app_context()
-        player_data, _ = get_player_data_service(user_id, nickname, game_configs)
+        player_data, _ = get_player_data_service(user_id, nickname, game_configs, sections=("adventure_progress",))
         
         if not player_data:
             return jsonify({"error": "找不到玩家資料。"}), 404
@@ -99,7 +100,7 @@ def abandon_adventure_route():
         return error_response
 
     game_configs = _get_game_configs_data_from_app_context()
-    player_data, _ = get_player_data_service(user_id, nickname, game_configs)
+    player_data, _ = get_player_data_service(user_id, nickname, game_configs, sections=("adventure_progress",))
     if not player_data:
         return jsonify({"error": "找不到玩家資料。"}), 404
 
@@ -135,7 +136,7 @@ def get_adventure_progress_route():
         return error_response
 
     game_configs = _get_game_configs_data_from_app_context()
-    player_data, _ = get_player_data_service(user_id, nickname, game_configs)
+    player_data, _ = get_player_data_service(user_id, nickname, game_configs, sections=("adventure_progress",))
     if not player_data:
         return jsonify({"error": "找不到玩家資料。"}), 404
 
@@ -157,7 +158,7 @@ def advance_route():
         return error_response
 
     game_configs = _get_game_configs_data_from_app_context()
-    player_data, _ = get_player_data_service(user_id, nickname, game_configs)
+    player_data, _ = get_player_data_service(user_id, nickname, game_configs, sections=("adventure_progress",))
     if not player_data:
         return jsonify({"error": "找不到玩家資料。"}), 404
 
@@ -192,7 +193,7 @@ def complete_floor_route():
         return error_response
         
     game_configs = _get_game_configs_data_from_app_context()
-    player_data, _ = get_player_data_service(user_id, nickname, game_configs)
+    player_data, _ = get_player_data_service(user_id, nickname, game_configs, sections=("adventure_progress",))
     if not player_data:
         return jsonify({"error": "找不到玩家資料。"}), 404
         
@@ -228,7 +229,7 @@ def resolve_choice_route():
         return jsonify({"error": "請求中缺少 'choice_id'。"}), 400
 
     game_configs = _get_game_configs_data_from_app_context()
-    player_data, _ = get_player_data_service(user_id, nickname, game_configs)
+    player_data, _ = get_player_data_service(user_id, nickname, game_configs, sections=("adventure_progress",))
     if not player_data:
         return jsonify({"error": "找不到玩家資料。"}), 404
         
@@ -273,7 +274,9 @@ def resolve_choice_route():
         player_monster = next((m for m in player_data.get("farmedMonsters", []) if m["id"] == captain_id), None)
         if not player_monster: return jsonify({"error": "找不到您的遠征隊長資料。"}), 404
 
-        battle_result = simulate_battle_full(player_monster, boss_data, game_configs, player_data)
+        battle_result = simulate_battle_full(player_monster, boss_data, game_configs, player_data, participant_ids=[user_id])
+        # 與一般對戰相同：事件流與完整日誌存成重播，回應只帶 replay_id
+        attach_battle_replay(battle_result, player_monster, boss_data, participant_ids=[user_id])
         
         captain_in_team = next((member for member in team if member["monster_id"] == captain_id), None)
         if captain_in_team:
@@ -329,7 +332,7 @@ def switch_captain_route():
         return jsonify({"error": "請求中缺少 'monster_id'。"}), 400
 
     game_configs = _get_game_configs_data_from_app_context()
-    player_data, _ = get_player_data_service(user_id, nickname, game_configs)
+    player_data, _ = get_player_data_service(user_id, nickname, game_configs, sections=("adventure_progress",))
     if not player_data:
         return jsonify({"error": "找不到玩家資料。"}), 404
 
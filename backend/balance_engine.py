@@ -0,0 +1,456 @@
+# backend/balance_engine.py
+# 平衡性分析用的向量化戰鬥引擎：以 NumPy 陣列同時推進大量戰鬥（每場戰鬥佔一條 lane），產生勝率矩陣
+# 使用方式：python -m backend.balance_engine --battles 2000 --seed 42 [--monsters-file extra_monsters.json]
+#
+# 與 battle_services.simulate_battle_full 使用相同的傷害公式、battle_formulas 參數、技能選擇權重、
+# 命中/會心判定、能力變化、異常狀態（回合開始扣血、無法行動、能力增減、持續回合）與反作用力傷害。
+# 亂數序列與逐場模擬不同，因此結果是統計上等價，而非逐場相同。
+# 天氣類特殊效果目前沒有任何技能使用，此引擎不模擬。
+
+import argparse
+import json
+import logging
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from .MD_models import Monster, GameConfigs
+from .MD_config_services import get_config_index
+from .battle_services import BASIC_ATTACK
+from .utils_services import get_effective_skill_with_level
+
+balance_logger = logging.getLogger(__name__)
+
+# 戰鬥中會影響結果的能力值欄位，順序即陣列中的索引
+COMBAT_STATS = ("attack", "defense", "speed", "crit")
+STAT_INDEX = {name: i for i, name in enumerate(COMBAT_STATS)}
+# 只有攻擊、防禦、速度有倍率型的暫時增減益，與 CombatMonster 相同
+MULTIPLIER_STATS = 3
+STAT_NAME_MAP = {"攻擊": "attack", "防禦": "defense", "速度": "speed", "特攻": "special_attack", "特防": "special_defense", "爆擊": "crit", "命中": "accuracy"}
+
+EFFECT_NONE, EFFECT_DAMAGE, EFFECT_STATUS, EFFECT_STAT_CHANGE, EFFECT_RECOIL = 0, 1, 2, 3, 4
+MAX_STATS_PER_EFFECT = 3
+UNTIL_BATTLE_END_DURATION = 99
+
+
+def _parse_duration(duration_value: Any) -> Tuple[int, int]:
+    """與戰鬥引擎相同的持續回合解析方式，回傳 (最小, 最大) 回合。"""
+    duration_str = str(duration_value)
+    if "-" in duration_str:
+        min_t, max_t = map(int, duration_str.split('-'))
+        return min_t, max_t
+    try:
+        turns = int(duration_str)
+    except (ValueError, TypeError):
+        turns = UNTIL_BATTLE_END_DURATION
+    return turns, turns
+
+
+class BalanceRoster:
+    """
+    將一組怪獸、牠們的技能與屬性克制表編碼成陣列。
+    每隻怪獸有 K+1 個技能欄位，最後一欄固定是普通攻擊；每個技能最多 E 個效果。
+    """
+
+    def __init__(self, monsters: List[Monster], game_configs: GameConfigs):
+        if len(monsters) < 2:
+            raise ValueError("平衡分析至少需要兩隻怪獸。")
+        self.monsters = monsters
+        index = get_config_index(game_configs)
+        formulas = game_configs.get("game_mechanics", {}).get("battle_formulas", {})
+        self.base_multiplier = formulas.get("damage_formula_base_multiplier", 0.5)
+        self.attack_scaling = formulas.get("damage_formula_attack_scaling", 0.1)
+        self.crit_multiplier = formulas.get("crit_multiplier", 1.5)
+        self.max_turns = game_configs.get("value_settings", {}).get("max_battle_turns", 30)
+
+        statuses = game_configs.get("status_effects", []) or []
+        self.status_ids = [s["id"] for s in statuses if s.get("id")]
+        status_pos = {sid: i for i, sid in enumerate(self.status_ids)}
+        n_status = max(1, len(self.status_ids))
+        self.status_skip_chance = np.zeros(n_status)
+        self.status_hp_per_turn = np.zeros(n_status)
+        self.status_stat_effects = np.zeros((n_status, len(COMBAT_STATS)))
+        self.status_min_duration = np.ones(n_status, dtype=np.int64)
+        self.status_max_duration = np.ones(n_status, dtype=np.int64)
+        for sid, i in status_pos.items():
+            template = index.status_effects_by_id[sid]
+            self.status_skip_chance[i] = template.get("chance_to_skip_turn", 0) or 0
+            effects = template.get("effects", {}) or {}
+            self.status_hp_per_turn[i] = effects.get("hp_per_turn", 0) or 0
+            for stat, value in effects.items():
+                if stat in STAT_INDEX and isinstance(value, (int, float)):
+                    self.status_stat_effects[i, STAT_INDEX[stat]] = value
+            self.status_min_duration[i], self.status_max_duration[i] = _parse_duration(template.get("duration_turns", "1"))
+        # 只逐一處理真正有作用的狀態欄位
+        self.skip_status_columns = np.nonzero(self.status_skip_chance)[0]
+        self.hp_status_columns = np.nonzero(self.status_hp_per_turn)[0]
+        self.status_stat_columns = [np.nonzero(self.status_stat_effects[:, i])[0] for i in range(len(COMBAT_STATS))]
+
+        resolved_skills = [self._resolve_skills(m, index) for m in monsters]
+        n_monsters = len(monsters)
+        n_slots = max(len(skills) for skills in resolved_skills)
+        n_effects = max(1, max(len(s.get("effects", [])) for skills in resolved_skills for s in skills))
+        self.n_slots = n_slots
+        self.n_effects = n_effects
+
+        self.base_stats = np.zeros((n_monsters, len(COMBAT_STATS)))
+        self.raw_defense = np.zeros(n_monsters)
+        self.max_hp = np.zeros(n_monsters)
+        self.start_hp = np.zeros(n_monsters)
+        self.start_mp = np.zeros(n_monsters)
+        self.start_status = np.zeros((n_monsters, n_status), dtype=np.int64)
+
+        self.slot_valid = np.zeros((n_monsters, n_slots), dtype=bool)
+        self.slot_active = np.zeros((n_monsters, n_slots), dtype=bool)
+        self.slot_mp_cost = np.zeros((n_monsters, n_slots))
+        self.slot_accuracy = np.full((n_monsters, n_slots), 95.0)
+        self.slot_auto_hit = np.zeros((n_monsters, n_slots), dtype=bool)
+        self.slot_weight = np.zeros((n_monsters, n_slots))
+        self.slot_weight_low_hp = np.zeros((n_monsters, n_slots))
+        self.slot_ignore_defense = np.zeros((n_monsters, n_slots), dtype=bool)
+        self.slot_element_multiplier = np.ones((n_monsters, n_slots, n_monsters))
+
+        shape = (n_monsters, n_slots, n_effects)
+        self.effect_type = np.zeros(shape, dtype=np.int64)
+        self.effect_self = np.zeros(shape, dtype=bool)
+        self.effect_chance = np.ones(shape)
+        self.effect_power = np.zeros(shape)
+        self.effect_status = np.zeros(shape, dtype=np.int64)
+        self.effect_duration_min = np.ones(shape, dtype=np.int64)
+        self.effect_duration_max = np.ones(shape, dtype=np.int64)
+        self.effect_is_multiplier = np.zeros(shape, dtype=bool)
+        self.effect_stat = np.full(shape + (MAX_STATS_PER_EFFECT,), -1, dtype=np.int64)
+        self.effect_amount = np.zeros(shape + (MAX_STATS_PER_EFFECT,))
+        self.effect_recoil = np.zeros(shape)
+
+        elemental_matrix = index.elemental_matrix
+        for m, monster in enumerate(monsters):
+            cult_gains = monster.get("cultivation_gains", {})
+            adv_gains = monster.get("adventure_gains", {})
+            for stat, i in STAT_INDEX.items():
+                self.base_stats[m, i] = monster.get(stat, 0) + cult_gains.get(stat, 0) + adv_gains.get(stat, 0)
+            self.raw_defense[m] = monster.get("defense", 1)
+            self.max_hp[m] = monster.get("initial_max_hp", 0) + cult_gains.get("hp", 0) + adv_gains.get("hp", 0)
+            self.start_hp[m] = monster.get("current_hp", monster.get("hp", 0))
+            self.start_mp[m] = monster.get("current_mp", monster.get("mp", 0))
+            for condition in monster.get("healthConditions", []) or []:
+                if condition.get("id") in status_pos:
+                    self.start_status[m, status_pos[condition["id"]]] = condition.get("duration", UNTIL_BATTLE_END_DURATION)
+
+            prefs = monster.get("personality", {}).get("skill_preferences", {})
+            for k, skill in enumerate(resolved_skills[m]):
+                is_basic = skill is BASIC_ATTACK
+                self.slot_valid[m, k] = True
+                self.slot_active[m, k] = not is_basic and skill.get("is_active", True)
+                self.slot_mp_cost[m, k] = skill.get("mp_cost", 0)
+                accuracy = skill.get("accuracy", 95)
+                self.slot_auto_hit[m, k] = accuracy == "auto"
+                self.slot_accuracy[m, k] = 100 if accuracy == "auto" else accuracy
+                category = skill.get("skill_category", "其他")
+                base_weight = prefs.get(category, 1.0)
+                low_hp_multiplier = 2.5 if category == "輔助" else 1.5 if category == "變化" else 1.0
+                self.slot_weight[m, k] = int(base_weight * 10)
+                self.slot_weight_low_hp[m, k] = int(base_weight * low_hp_multiplier * 10)
+                self.slot_ignore_defense[m, k] = any(e.get("special_logic_id") == "ignore_defense_buffs" for e in skill.get("effects", []))
+                for d, defender in enumerate(monsters):
+                    self.slot_element_multiplier[m, k, d] = elemental_matrix.against(skill.get("type"), defender.get("elements", []))
+
+                for e, effect in enumerate(skill.get("effects", [])):
+                    self._encode_effect(m, k, e, effect, status_pos)
+
+        # 最後一個有效欄位即普通攻擊
+        self.basic_slot = np.array([len(skills) - 1 for skills in resolved_skills])
+
+    def _resolve_skills(self, monster: Monster, index) -> List[Dict[str, Any]]:
+        skills = []
+        for skill_stub in monster.get("skills", []):
+            template = index.skills_by_name.get(skill_stub.get("name"))
+            if not template:
+                continue
+            full_skill = dict(template)
+            full_skill.update(skill_stub)
+            skills.append(get_effective_skill_with_level(full_skill, full_skill.get("level", 1)))
+        skills.append(BASIC_ATTACK)
+        return skills
+
+    def _encode_effect(self, m: int, k: int, e: int, effect: Dict[str, Any], status_pos: Dict[str, int]):
+        effect_type = effect.get("type")
+        self.effect_self[m, k, e] = effect.get("target") == "self"
+        self.effect_chance[m, k, e] = effect.get("chance", 1.0)
+        if effect_type == "damage":
+            self.effect_type[m, k, e] = EFFECT_DAMAGE
+            self.effect_power[m, k, e] = effect.get("power", 0)
+        elif effect_type == "apply_status" and effect.get("status_id") in status_pos:
+            s = status_pos[effect["status_id"]]
+            self.effect_type[m, k, e] = EFFECT_STATUS
+            self.effect_status[m, k, e] = s
+            if "duration" in effect:
+                self.effect_duration_min[m, k, e], self.effect_duration_max[m, k, e] = _parse_duration(effect["duration"])
+            else:
+                self.effect_duration_min[m, k, e] = self.status_min_duration[s]
+                self.effect_duration_max[m, k, e] = self.status_max_duration[s]
+        elif effect_type == "stat_change":
+            self.effect_type[m, k, e] = EFFECT_STAT_CHANGE
+            self.effect_is_multiplier[m, k, e] = effect.get("is_multiplier", False)
+            stats = [effect["stat"]] if isinstance(effect["stat"], str) else effect["stat"]
+            amounts = [effect["amount"]] if isinstance(effect["amount"], (int, float)) else effect["amount"]
+            for j, (stat_zh, amount) in enumerate(list(zip(stats, amounts))[:MAX_STATS_PER_EFFECT]):
+                stat_en = STAT_NAME_MAP.get(stat_zh, stat_zh.lower())
+                if stat_en in STAT_INDEX:
+                    self.effect_stat[m, k, e, j] = STAT_INDEX[stat_en]
+                    self.effect_amount[m, k, e, j] = amount
+        elif effect_type == "special" and effect.get("special_logic_id") == "recoil":
+            self.effect_type[m, k, e] = EFFECT_RECOIL
+            self.effect_recoil[m, k, e] = effect.get("recoil_factor", 0.25)
+
+
+class _LaneState:
+    """所有 lane 的戰鬥狀態，第二維 0 為挑戰方、1 為防守方。"""
+
+    def __init__(self, roster: BalanceRoster, lane_monsters: np.ndarray):
+        self.monsters = lane_monsters
+        self.hp = roster.start_hp[lane_monsters].copy()
+        self.mp = roster.start_mp[lane_monsters].copy()
+        lanes = lane_monsters.shape[0]
+        self.multiplier = np.ones((lanes, 2, MULTIPLIER_STATS))
+        self.modifier = np.zeros((lanes, 2, len(COMBAT_STATS)))
+        self.status = roster.start_status[lane_monsters].copy()
+
+
+def _current_stat(roster: BalanceRoster, state: _LaneState, side: int, stat: str, lanes: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    等同 CombatMonster._derive_stats 中的單一能力值：基礎值套用倍率與加減值，會心上限 50，最後疊加異常狀態的能力變化。
+    lanes 為 None 時計算所有 lane。
+    """
+    i = STAT_INDEX[stat]
+    lanes = slice(None) if lanes is None else lanes
+    value = roster.base_stats[state.monsters[lanes, side], i]
+    if i < MULTIPLIER_STATS:
+        value = value * state.multiplier[lanes, side, i]
+    value = value + state.modifier[lanes, side, i]
+    if stat == "crit":
+        value = np.minimum(value, 50)
+    status_columns = roster.status_stat_columns[i]
+    if status_columns.size:
+        active = state.status[lanes, side][:, status_columns] > 0
+        value = value + active @ roster.status_stat_effects[status_columns, i]
+    return value
+
+
+def _turn_start_effects(roster: BalanceRoster, state: _LaneState, side: int, alive: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    active = (state.status[:, side] > 0) & alive[:, None]
+    skip = np.zeros(alive.shape[0], dtype=bool)
+    for s in roster.skip_status_columns:
+        affected = active[:, s]
+        skip |= affected & (rng.random(affected.shape[0]) < roster.status_skip_chance[s])
+    for s in roster.hp_status_columns:
+        affected = active[:, s]
+        state.hp[affected] = np.maximum(0, state.hp[affected] + roster.status_hp_per_turn[s])
+    # 剩餘 1 回合的狀態減 1 後歸零即為解除
+    state.status[:, side] -= active
+    return skip
+
+
+def _choose_slots(roster: BalanceRoster, state: _LaneState, side: int, lanes: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    monsters = state.monsters[lanes, side]
+    basic = roster.basic_slot[monsters]
+    available = roster.slot_valid[monsters] & roster.slot_active[monsters] & (state.mp[lanes, side, None] >= roster.slot_mp_cost[monsters])
+    use_skill = (rng.random(lanes.shape[0]) <= 0.50) & available.any(axis=1)
+
+    max_hp = roster.max_hp[monsters]
+    hp_ratio = np.divide(state.hp[lanes, side], max_hp, out=np.zeros_like(max_hp), where=max_hp > 0)
+    low_hp = hp_ratio < 0.4
+    weights = np.where(low_hp[:, None], roster.slot_weight_low_hp[monsters], roster.slot_weight[monsters]) * available
+    # 所有權重皆為 0 時改為在可用技能中平均挑選
+    weights = np.where(weights.sum(axis=1, keepdims=True) > 0, weights, available.astype(float))
+
+    cumulative = np.cumsum(weights, axis=1)
+    picks = rng.random(lanes.shape[0]) * cumulative[:, -1]
+    chosen = (cumulative <= picks[:, None]).sum(axis=1)
+    chosen = np.minimum(chosen, roster.n_slots - 1)
+    return np.where(use_skill, chosen, basic)
+
+
+def _perform_actions(roster: BalanceRoster, state: _LaneState, side: int, lanes: np.ndarray, rng: np.random.Generator):
+    if lanes.size == 0:
+        return
+    target_side = 1 - side
+    attacker = state.monsters[lanes, side]
+    defender = state.monsters[lanes, target_side]
+    slots = _choose_slots(roster, state, side, lanes, rng)
+    state.mp[lanes, side] -= roster.slot_mp_cost[attacker, slots]
+
+    hit = roster.slot_auto_hit[attacker, slots] | (rng.integers(1, 101, lanes.shape[0]) <= roster.slot_accuracy[attacker, slots])
+    crit_stat = _current_stat(roster, state, side, "crit", lanes)
+    is_crit = rng.integers(1, 101, lanes.shape[0]) <= crit_stat
+    element_multiplier = roster.slot_element_multiplier[attacker, slots, defender]
+    damage_dealt = np.zeros(lanes.shape[0])
+
+    for e in range(roster.n_effects):
+        effect_type = roster.effect_type[attacker, slots, e]
+        on_self = roster.effect_self[attacker, slots, e]
+        effect_side = np.where(on_self, side, target_side)
+
+        is_damage = hit & (effect_type == EFFECT_DAMAGE)
+        if is_damage.any():
+            attack = _current_stat(roster, state, side, "attack", lanes)
+            defense = np.where(
+                roster.slot_ignore_defense[attacker, slots],
+                np.maximum(1, roster.raw_defense[defender]),
+                np.maximum(1, _current_stat(roster, state, target_side, "defense", lanes))
+            )
+            power = roster.effect_power[attacker, slots, e]
+            raw_damage = np.maximum(1, power * (attack / defense) * roster.base_multiplier + attack * roster.attack_scaling)
+            final_damage = np.floor(raw_damage * element_multiplier)
+            final_damage = np.where(is_crit, np.floor(final_damage * roster.crit_multiplier), final_damage)
+            final_damage = np.where(is_damage, final_damage, 0)
+            state.hp[lanes, effect_side] = np.maximum(0, state.hp[lanes, effect_side] - final_damage)
+            damage_dealt += final_damage
+
+        rolls = rng.random(lanes.shape[0])
+        passed = hit & (rolls <= roster.effect_chance[attacker, slots, e])
+
+        is_status = passed & (effect_type == EFFECT_STATUS)
+        if is_status.any():
+            status_idx = roster.effect_status[attacker, slots, e]
+            already = state.status[lanes, effect_side, status_idx] > 0
+            apply = is_status & ~already
+            durations = rng.integers(roster.effect_duration_min[attacker, slots, e], roster.effect_duration_max[attacker, slots, e] + 1)
+            idx = np.nonzero(apply)[0]
+            state.status[lanes[idx], effect_side[idx], status_idx[idx]] = durations[idx]
+
+        is_stat_change = passed & (effect_type == EFFECT_STAT_CHANGE)
+        if is_stat_change.any():
+            is_multiplier = roster.effect_is_multiplier[attacker, slots, e]
+            for j in range(MAX_STATS_PER_EFFECT):
+                stat = roster.effect_stat[attacker, slots, e, j]
+                amount = roster.effect_amount[attacker, slots, e, j]
+                apply = is_stat_change & (stat >= 0)
+                mult_idx = np.nonzero(apply & is_multiplier & (stat < MULTIPLIER_STATS))[0]
+                state.multiplier[lanes[mult_idx], effect_side[mult_idx], stat[mult_idx]] *= 1 + amount[mult_idx]
+                add_idx = np.nonzero(apply & ~is_multiplier)[0]
+                state.modifier[lanes[add_idx], effect_side[add_idx], stat[add_idx]] += amount[add_idx]
+
+        is_recoil = hit & (effect_type == EFFECT_RECOIL)
+        if is_recoil.any():
+            recoil = np.floor(damage_dealt * roster.effect_recoil[attacker, slots, e])
+            recoil = np.where(is_recoil, recoil, 0)
+            state.hp[lanes, side] = np.maximum(0, state.hp[lanes, side] - recoil)
+
+
+def simulate_lanes(roster: BalanceRoster, lane_monsters: np.ndarray, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """
+    同時推進每條 lane 的戰鬥，直到全部分出勝負或達到回合上限。
+    回傳每條 lane 的結果（1 挑戰方勝、-1 防守方勝、0 平手）與回合數。
+    """
+    state = _LaneState(roster, lane_monsters)
+    n_lanes = lane_monsters.shape[0]
+    turns = np.zeros(n_lanes, dtype=np.int64)
+    running = np.ones(n_lanes, dtype=bool)
+
+    for _ in range(roster.max_turns):
+        running &= (state.hp[:, 0] > 0) & (state.hp[:, 1] > 0)
+        if not running.any():
+            break
+        turns += running
+
+        skip_challenger = _turn_start_effects(roster, state, 0, running, rng)
+        skip_defender = _turn_start_effects(roster, state, 1, running, rng)
+        running &= (state.hp[:, 0] > 0) & (state.hp[:, 1] > 0)
+
+        speed_challenger = _current_stat(roster, state, 0, "speed")
+        speed_defender = _current_stat(roster, state, 1, "speed")
+        # 速度相同時挑戰方先行，與穩定排序的結果一致
+        challenger_first = speed_challenger >= speed_defender
+        skips = (skip_challenger, skip_defender)
+        for first in (True, False):
+            for side in (0, 1):
+                order_matches = challenger_first if (side == 0) == first else ~challenger_first
+                can_act = running & order_matches & ~skips[side] & (state.hp[:, 0] > 0) & (state.hp[:, 1] > 0)
+                _perform_actions(roster, state, side, np.nonzero(can_act)[0], rng)
+
+    challenger_alive = state.hp[:, 0] > 0
+    defender_alive = state.hp[:, 1] > 0
+    outcome = np.where(challenger_alive & ~defender_alive, 1, np.where(defender_alive & ~challenger_alive, -1, 0))
+    return {"outcome": outcome, "turns": turns}
+
+
+def compute_win_rate_matrix(
+    monsters: List[Monster], game_configs: GameConfigs, battles_per_pair: int = 1000, seed: int = 0
+) -> Dict[str, Any]:
+    """
+    讓名單中每隻怪獸以挑戰方身分與其他每隻怪獸各打 battles_per_pair 場。
+    win_rate[i][j] 為 i 挑戰 j 的勝率；所有對戰組合在同一批陣列中一起推進。
+    """
+    roster = BalanceRoster(monsters, game_configs)
+    n = len(monsters)
+    pairs = np.array([(i, j) for i in range(n) for j in range(n) if i != j], dtype=np.int64)
+    lane_monsters = np.repeat(pairs, battles_per_pair, axis=0)
+    rng = np.random.default_rng(seed)
+
+    result = simulate_lanes(roster, lane_monsters, rng)
+    outcome = result["outcome"].reshape(len(pairs), battles_per_pair)
+    turns = result["turns"].reshape(len(pairs), battles_per_pair)
+
+    win_rate = np.full((n, n), np.nan)
+    draw_rate = np.full((n, n), np.nan)
+    average_turns = np.full((n, n), np.nan)
+    win_rate[pairs[:, 0], pairs[:, 1]] = (outcome == 1).mean(axis=1)
+    draw_rate[pairs[:, 0], pairs[:, 1]] = (outcome == 0).mean(axis=1)
+    average_turns[pairs[:, 0], pairs[:, 1]] = turns.mean(axis=1)
+
+    return {
+        "monster_ids": [m.get("id") for m in monsters],
+        "monster_nicknames": [m.get("nickname") for m in monsters],
+        "battles_per_pair": battles_per_pair,
+        "seed": seed,
+        "win_rate": win_rate,
+        "draw_rate": draw_rate,
+        "average_turns": average_turns,
+    }
+
+
+def get_balance_roster_monsters(game_configs: GameConfigs, extra_monsters: Optional[List[Monster]] = None) -> List[Monster]:
+    """預設的分析名單：所有 NPC、冠軍守護者，再加上額外指定的怪獸（例如抽樣的玩家怪獸）。"""
+    monsters = list(game_configs.get("npc_monsters") or [])
+    guardians = game_configs.get("champion_guardians") or {}
+    monsters.extend(guardians.values() if isinstance(guardians, dict) else guardians)
+    monsters.extend(extra_monsters or [])
+    return monsters
+
+
+if __name__ == '__main__':
+    from .MD_local_config_services import load_all_game_configs_from_local_files
+
+    parser = argparse.ArgumentParser(description="向量化平衡性分析：計算怪獸兩兩對戰的勝率矩陣")
+    parser.add_argument("--battles", type=int, default=2000, help="每組對戰模擬的場數")
+    parser.add_argument("--seed", type=int, default=42, help="亂數種子")
+    parser.add_argument("--monsters-file", help="額外加入分析的怪獸 JSON 檔（怪獸物件的陣列）")
+    parser.add_argument("--output", help="將結果輸出為 JSON 檔")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    game_configs = load_all_game_configs_from_local_files()
+    extra_monsters = None
+    if args.monsters_file:
+        with open(args.monsters_file, 'r', encoding='utf-8') as f:
+            extra_monsters = json.load(f)
+
+    roster_monsters = get_balance_roster_monsters(game_configs, extra_monsters)
+    started_at = time.perf_counter()
+    report = compute_win_rate_matrix(roster_monsters, game_configs, args.battles, args.seed)
+    elapsed = time.perf_counter() - started_at
+    total_battles = len(roster_monsters) * (len(roster_monsters) - 1) * args.battles
+
+    names = report["monster_nicknames"]
+    width = max(len(name) for name in names)
+    for i, name in enumerate(names):
+        cells = " ".join("  -  " if i == j else f"{report['win_rate'][i, j]:5.2f}" for j in range(len(names)))
+        print(f"{name:<{width}} {cells}")
+    print(f"共模擬 {total_battles} 場，耗時 {elapsed:.2f} 秒 ({total_battles / elapsed if elapsed > 0 else 0:.0f} 場/秒)")
+
+    if args.output:
+        serializable = {k: (v.tolist() if isinstance(v, np.ndarray) else v) for k, v in report.items()}
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(serializable, f, ensure_ascii=False, indent=2)
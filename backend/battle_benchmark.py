@@ -0,0 +1,305 @@
+# backend/battle_benchmark.py
+# 戰鬥引擎效能基準測試：只讀取本地設定檔（monster、battle、game_configs_data），不連 Firestore，
+# 以各稀有度與技能配置的代表性怪獸重複模擬戰鬥，量測吞吐量、各階段耗時與記憶體配置，並與保存的基準值比較
+# 使用方式：python -m backend.battle_benchmark --battles 1000 --seed 42 [--save-baseline] [--fail-on-regression]
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from typing import Dict, Any, List, Tuple, Optional, Callable
+
+from .MD_config_services import get_config_index
+from .MD_local_config_services import load_all_game_configs_from_local_files
+from . import battle_services
+from .battle_services import simulate_battle_full, CombatMonster
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BACKEND_DIR, "battle_benchmark_baseline.json")
+
+# 代表性怪獸的技能配置：單一技能、同屬性技能滿格、主屬性加「無」屬性的混合配置
+SKILL_LOADOUTS = ("single", "full", "mixed")
+DNA_PER_MONSTER = 5
+# 與基準值相比，變差超過此比例即視為效能退化
+DEFAULT_REGRESSION_THRESHOLD = 0.15
+
+# 各階段對應到戰鬥引擎中的函式；以獨佔時間計算，巢狀呼叫的時間只算在最內層的階段
+PHASES: Dict[str, List[Tuple[Any, str]]] = {
+    "setup": [(CombatMonster, "__init__")],
+    "stat_calc": [(CombatMonster, "stats")],
+    "action_choice": [(battle_services, "_choose_action")],
+    "effects": [
+        (battle_services, "_apply_skill_effects"),
+        (battle_services, "_process_turn_start_effects"),
+        (battle_services, "_process_end_of_turn_effects"),
+    ],
+    "log_formatting": [(battle_services, "_render_battle_events")],
+}
+
+# 基準值比較時，哪些指標越高越好、哪些越低越好
+HIGHER_IS_BETTER = ("battles_per_second", "turns_per_second")
+LOWER_IS_BETTER = ("phase_us_per_turn", "peak_kib_per_battle")
+
+
+def _build_matchups(game_configs: Dict[str, Any]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    npc_list = game_configs.get("npc_monsters") or []
+    return list(itertools.permutations(npc_list, 2))
+
+
+def build_fixture_monsters(game_configs: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    依合成規則建立代表性怪獸：每個有 DNA 的稀有度 × 每種技能配置各一隻，屬性輪替。
+    能力值為同稀有度 DNA 的總和乘上稀有度倍率，技能等級套用稀有度的技能等級加成；結果固定，不使用亂數。
+    """
+    index = get_config_index(game_configs)
+    all_skills = game_configs.get("skills", {})
+    personalities = game_configs.get("personalities") or [{}]
+    max_skills = game_configs.get("value_settings", {}).get("max_monster_skills", 3)
+    elements = [element for element in all_skills if element != "無" and all_skills.get(element)] or ["無"]
+
+    fixtures: List[Dict[str, Any]] = []
+    for rarity_key, rarity in (game_configs.get("rarities") or {}).items():
+        rarity_name = rarity.get("name", "普通")
+        stat_multiplier = rarity.get("statMultiplier", 1.0)
+        skill_level = 1 + rarity.get("skillLevelBonus", 0)
+        for loadout in SKILL_LOADOUTS:
+            serial = len(fixtures)
+            element = elements[serial % len(elements)]
+            dna_pool = index.dna_by_rarity_element.get((rarity_name, element)) or index.dna_by_rarity.get(rarity_name)
+            if not dna_pool:
+                break
+            dna_list = [dna_pool[i % len(dna_pool)] for i in range(DNA_PER_MONSTER)]
+
+            stats = {stat: sum(dna.get(stat, 0) for dna in dna_list) for stat in ("hp", "mp", "attack", "defense", "speed", "crit")}
+            element_skills = list(all_skills.get(element, []))
+            if loadout == "single":
+                templates = element_skills[:1]
+            elif loadout == "full":
+                templates = element_skills[:max_skills]
+            else:
+                templates = (element_skills[:1] + list(all_skills.get("無", [])))[:max_skills]
+
+            max_hp = int(stats["hp"] * stat_multiplier)
+            max_mp = int(stats["mp"] * stat_multiplier)
+            fixtures.append({
+                "id": f"bench_{rarity_key.lower()}_{loadout}",
+                "nickname": f"{rarity_name}{element}{loadout}",
+                "elements": [element, "無"] if loadout == "mixed" and element != "無" else [element],
+                "rarity": rarity_name,
+                "initial_max_hp": max_hp, "initial_max_mp": max_mp,
+                "hp": max_hp, "mp": max_mp, "current_hp": max_hp, "current_mp": max_mp,
+                "attack": int(stats["attack"] * stat_multiplier),
+                "defense": int(stats["defense"] * stat_multiplier),
+                "speed": int(stats["speed"] * stat_multiplier),
+                "crit": int(stats["crit"] * stat_multiplier),
+                "skills": [{"name": template["name"], "level": skill_level} for template in templates if template.get("name")],
+                "personality": personalities[serial % len(personalities)],
+                "healthConditions": [],
+            })
+    return fixtures
+
+
+def _count_turns(result: Dict[str, Any]) -> int:
+    return sum(1 for event in result.get("battle_events", []) if event["type"] == "turn_start")
+
+
+def _run_battles(game_configs: Dict[str, Any], matchups: List[Tuple[Dict[str, Any], Dict[str, Any]]], num_battles: int, seed: int,
+                 per_battle: Optional[Callable[[], None]] = None) -> int:
+    total_turns = 0
+    for i in range(num_battles):
+        monster_a, monster_b = matchups[i % len(matchups)]
+        result = simulate_battle_full(monster_a, monster_b, game_configs, generate_ai_report=False, seed=seed + i)
+        total_turns += _count_turns(result)
+        if per_battle:
+            per_battle()
+    return total_turns
+
+
+class _PhaseTimer:
+    """暫時替換引擎函式，記錄各階段的獨佔耗時；離開時還原原本的函式。"""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+        self._stack: List[List[Any]] = []
+        self._originals: List[Tuple[Any, str, Any]] = []
+
+    def _wrap(self, phase: str, func: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            frame = [phase, time.perf_counter(), 0.0]
+            self._stack.append(frame)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._stack.pop()
+                elapsed = time.perf_counter() - frame[1]
+                self.totals[phase] += elapsed - frame[2]
+                if self._stack:
+                    self._stack[-1][2] += elapsed
+        return timed
+
+    def __enter__(self) -> "_PhaseTimer":
+        for phase, targets in PHASES.items():
+            for owner, name in targets:
+                original = getattr(owner, name)
+                self._originals.append((owner, name, original))
+                setattr(owner, name, self._wrap(phase, original))
+        return self
+
+    def __exit__(self, *exc_info):
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals.clear()
+
+
+def run_battle_benchmark(num_battles: int = 300, seed: int = 42, use_fixtures: bool = False) -> Dict[str, Any]:
+    """
+    量測吞吐量：以固定種子輪流讓怪獸兩兩對戰，回傳總戰鬥數、總回合數、耗時、每秒場數與每秒回合數。
+    use_fixtures 為 True 時使用 build_fixture_monsters 的代表性怪獸，否則使用 NPC 怪獸。
+    """
+    game_configs = load_all_game_configs_from_local_files()
+    matchups = list(itertools.permutations(build_fixture_monsters(game_configs), 2)) if use_fixtures else _build_matchups(game_configs)
+    if not matchups:
+        raise RuntimeError("本地設定中沒有足夠的怪獸可供對戰。")
+
+    started_at = time.perf_counter()
+    total_turns = _run_battles(game_configs, matchups, num_battles, seed)
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "battles": num_battles,
+        "turns": total_turns,
+        "seconds": elapsed,
+        "battles_per_second": num_battles / elapsed if elapsed > 0 else 0.0,
+        "turns_per_second": total_turns / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def run_benchmark_suite(num_battles: int = 300, seed: int = 42) -> Dict[str, Any]:
+    """
+    完整的基準測試：代表性怪獸加上 NPC 怪獸兩兩對戰，量測吞吐量、各階段每回合耗時（微秒）與每場戰鬥的記憶體配置峰值。
+    三項量測分開執行，計時與記憶體追蹤的額外開銷不會影響吞吐量數字。
+    """
+    game_configs = load_all_game_configs_from_local_files()
+    fixtures = build_fixture_monsters(game_configs) + list(game_configs.get("npc_monsters") or [])
+    matchups = list(itertools.permutations(fixtures, 2))
+    if not matchups:
+        raise RuntimeError("本地設定中沒有足夠的怪獸可供對戰。")
+
+    # 先暖機一輪，讓設定索引與技能決策表等快取就緒
+    _run_battles(game_configs, matchups, min(num_battles, len(matchups)), seed)
+
+    started_at = time.perf_counter()
+    total_turns = _run_battles(game_configs, matchups, num_battles, seed)
+    elapsed = time.perf_counter() - started_at
+
+    with _PhaseTimer() as timer:
+        phase_turns = _run_battles(game_configs, matchups, num_battles, seed)
+    phase_us_per_turn = {phase: round(seconds * 1e6 / max(phase_turns, 1), 3) for phase, seconds in timer.totals.items()}
+
+    peaks: List[int] = []
+    tracemalloc.start()
+    try:
+        def record_peak():
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        tracemalloc.reset_peak()
+        _run_battles(game_configs, matchups, num_battles, seed, per_battle=record_peak)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "monsters": len(fixtures),
+        "battles": num_battles,
+        "seed": seed,
+        "turns": total_turns,
+        "seconds": round(elapsed, 4),
+        "battles_per_second": round(num_battles / elapsed, 1) if elapsed > 0 else 0.0,
+        "turns_per_second": round(total_turns / elapsed, 1) if elapsed > 0 else 0.0,
+        "phase_us_per_turn": phase_us_per_turn,
+        "peak_kib_per_battle": round(sum(peaks) / 1024 / max(len(peaks), 1), 2),
+    }
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(report: Dict[str, Any], path: str = BASELINE_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    逐項比較報告與基準值，回傳每個指標的變化；regression 為 True 表示變差超過門檻。
+    """
+    def flatten(data: Dict[str, Any]) -> Dict[str, float]:
+        flat: Dict[str, float] = {}
+        for key in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            value = data.get(key)
+            if isinstance(value, dict):
+                flat.update({f"{key}.{sub_key}": sub_value for sub_key, sub_value in value.items()})
+            elif value is not None:
+                flat[key] = value
+        return flat
+
+    current, previous = flatten(report), flatten(baseline)
+    comparisons = []
+    for metric, value in current.items():
+        base_value = previous.get(metric)
+        if not base_value:
+            continue
+        change = (value - base_value) / base_value
+        higher_is_better = metric.split(".")[0] in HIGHER_IS_BETTER
+        comparisons.append({
+            "metric": metric,
+            "baseline": base_value,
+            "current": value,
+            "change": round(change, 4),
+            "regression": (-change if higher_is_better else change) > threshold,
+        })
+    return comparisons
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="戰鬥引擎效能基準測試")
+    parser.add_argument("--battles", type=int, default=1000, help="要模擬的戰鬥場數")
+    parser.add_argument("--seed", type=int, default=42, help="亂數種子")
+    parser.add_argument("--save-baseline", action="store_true", help="將本次結果存為新的基準值")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基準值檔案路徑")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD, help="判定效能退化的變化比例")
+    parser.add_argument("--fail-on-regression", action="store_true", help="有指標退化時以非零狀態碼結束")
+    args = parser.parse_args()
+
+    # 基準測試時不需要戰鬥過程的日誌與未設定 AI 金鑰的警告
+    logging.disable(logging.WARNING)
+    report = run_benchmark_suite(args.battles, args.seed)
+    print(
+        f"參戰怪獸 {report['monsters']} 隻，戰鬥 {report['battles']} 場，共 {report['turns']} 回合，耗時 {report['seconds']:.3f} 秒 "
+        f"({report['battles_per_second']:.1f} 場/秒，{report['turns_per_second']:.1f} 回合/秒)"
+    )
+    print("各階段每回合耗時 (微秒)：" + "，".join(f"{phase} {us:.2f}" for phase, us in report["phase_us_per_turn"].items()))
+    print(f"每場戰鬥的記憶體配置峰值 {report['peak_kib_per_battle']:.2f} KiB")
+
+    regressions = []
+    baseline = load_baseline(args.baseline)
+    if baseline and not args.save_baseline:
+        for item in compare_with_baseline(report, baseline, args.threshold):
+            mark = "  <-- 退化" if item["regression"] else ""
+            print(f"  {item['metric']}: {item['baseline']} -> {item['current']} ({item['change']:+.1%}){mark}")
+            if item["regression"]:
+                regressions.append(item)
+    if args.save_baseline:
+        save_baseline(report, args.baseline)
+        print(f"已將基準值寫入 {args.baseline}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
@@ -0,0 +1,201 @@
+# backend/battle_replay_services.py
+# 戰鬥重播服務：每場戰鬥只保存精簡的重播紀錄（種子、引擎版本、輸入雜湊、事件流），需要時再重新產生完整日誌
+
+import os
+import json
+import time
+import zlib
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from . import MD_firebase_config
+from .MD_models import Monster, GameConfigs, BattleResult, BattleEvent
+from .battle_services import render_battle_log, BATTLE_ENGINE_VERSION
+
+replay_logger = logging.getLogger(__name__)
+
+BATTLE_REPLAY_COLLECTION = "MD_BattleReplays"
+# 重播紀錄交由背景執行緒寫入，回應不等待寫入完成
+REPLAY_SAVE_WORKERS = int(os.environ.get("MD_REPLAY_SAVE_WORKERS", "4"))
+
+_replay_save_executor = ThreadPoolExecutor(max_workers=REPLAY_SAVE_WORKERS, thread_name_prefix="replay-save")
+
+# 已排入背景但尚未寫入完成的重播紀錄，讓同一個 worker 在寫入完成前也能讀到
+_pending_replays: Dict[str, Dict[str, Any]] = {}
+_pending_lock = threading.Lock()
+
+# 各事件類型在壓縮格式中的欄位順序；事件以 [類型代碼, 欄位值...] 的陣列保存
+EVENT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "turn_start": ("turn", "sides"),
+    "skip_turn": ("actor", "status_id", "status"),
+    "status_hp": ("actor", "status_id", "status", "amount"),
+    "status_expired": ("actor", "status_id", "status"),
+    "action": ("actor", "skill", "level"),
+    "miss": ("actor", "target"),
+    "crit": ("actor",),
+    "ignore_defense": ("target",),
+    "damage": ("actor", "target", "amount", "element_multiplier", "crit"),
+    "status_applied": ("target", "status_id", "status", "duration", "message"),
+    "stat_change": ("target", "stats", "amounts", "message"),
+    "recoil": ("actor", "amount"),
+    "weather_start": ("weather", "duration", "message"),
+    "weather_tick": ("weather",),
+    "weather_damage": ("weather", "target", "amount"),
+    "weather_end": ("weather",),
+    "unknown_special": ("special_id",),
+    "battle_end": ("winner",),
+}
+EVENT_TYPE_CODES = {event_type: code for code, event_type in enumerate(EVENT_FIELDS)}
+EVENT_TYPES_BY_CODE = list(EVENT_FIELDS)
+SIDES = ("player", "opponent")
+SIDE_FIELDS = ("actor", "target", "winner")
+SNAPSHOT_FIELDS = ("name", "hp", "max_hp", "mp", "max_mp", "status")
+
+
+def pack_battle_events(events: List[BattleEvent]) -> bytes:
+    """
+    將事件流壓縮成位元組：省略可由前後文推得的回合數，雙方以 0/1 表示，再以 zlib 壓縮。
+    """
+    packed = []
+    for event in events:
+        event_type = event["type"]
+        row: List[Any] = [EVENT_TYPE_CODES[event_type]]
+        for field in EVENT_FIELDS[event_type]:
+            value = event.get(field)
+            if field in SIDE_FIELDS:
+                value = SIDES.index(value) if value in SIDES else None
+            elif field == "sides":
+                value = [[value[side][key] for key in SNAPSHOT_FIELDS] for side in SIDES]
+            row.append(value)
+        packed.append(row)
+    return zlib.compress(json.dumps(packed, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def unpack_battle_events(blob: bytes) -> List[BattleEvent]:
+    events: List[BattleEvent] = []
+    turn = 0
+    for row in json.loads(zlib.decompress(blob).decode("utf-8")):
+        event_type = EVENT_TYPES_BY_CODE[row[0]]
+        event: Dict[str, Any] = {"turn": turn, "type": event_type}
+        for field, value in zip(EVENT_FIELDS[event_type], row[1:]):
+            if field == "turn":
+                turn = event["turn"] = value
+                continue
+            if field in SIDE_FIELDS:
+                value = SIDES[value] if value is not None else None
+            elif field == "sides":
+                value = {side: dict(zip(SNAPSHOT_FIELDS, snapshot)) for side, snapshot in zip(SIDES, value)}
+            event[field] = value
+        events.append(event)
+    return events
+
+
+def build_replay_record(
+    battle_result: BattleResult,
+    player_monster: Monster,
+    opponent_monster: Monster,
+    participant_ids: List[str]
+) -> Dict[str, Any]:
+    """從戰鬥結果擷取重播所需的最少資料；participant_ids 為可以查看此重播的玩家。"""
+    return {
+        "battle_id": battle_result["battle_id"],
+        "seed": battle_result.get("seed"),
+        "engine_version": battle_result.get("engine_version", BATTLE_ENGINE_VERSION),
+        "input_hash": battle_result.get("input_hash"),
+        "highlight_style": battle_result.get("highlight_style"),
+        "names": {
+            "player": player_monster.get("nickname", "您的怪獸"),
+            "opponent": opponent_monster.get("nickname", "對手"),
+        },
+        "player_monster_id": player_monster.get("id"),
+        "opponent_monster_id": opponent_monster.get("id"),
+        "participant_ids": [pid for pid in participant_ids if pid],
+        "winner_id": battle_result.get("winner_id"),
+        "loser_id": battle_result.get("loser_id"),
+        "events_blob": pack_battle_events(battle_result.get("battle_events", [])),
+        "created_at": int(time.time()),
+    }
+
+
+def save_replay_record(record: Dict[str, Any]) -> bool:
+    db = MD_firebase_config.db
+    if not db:
+        replay_logger.error("Firestore 資料庫未初始化，無法儲存戰鬥重播。")
+        return False
+    try:
+        db.collection(BATTLE_REPLAY_COLLECTION).document(record["battle_id"]).set(record)
+        return True
+    except Exception as e:
+        replay_logger.error(f"儲存戰鬥重播 {record.get('battle_id')} 時發生錯誤: {e}", exc_info=True)
+        return False
+
+
+def _save_pending_replay(record: Dict[str, Any]) -> bool:
+    try:
+        return save_replay_record(record)
+    finally:
+        with _pending_lock:
+            _pending_replays.pop(record["battle_id"], None)
+
+
+def submit_replay_record(record: Dict[str, Any]) -> "Future[bool]":
+    """在背景寫入重播紀錄，回傳的 Future 結果為是否寫入成功。"""
+    with _pending_lock:
+        _pending_replays[record["battle_id"]] = record
+    return _replay_save_executor.submit(_save_pending_replay, record)
+
+
+def attach_battle_replay(
+    battle_result: BattleResult,
+    player_monster: Monster,
+    opponent_monster: Monster,
+    participant_ids: List[str]
+) -> "Future[bool]":
+    """
+    在背景保存重播，並把回應改為只帶 replay_id：事件流與完整日誌由前端透過重播 API 取得。
+    重播 ID 即戰鬥 ID，不需等待寫入完成即可回傳。
+    """
+    future = submit_replay_record(build_replay_record(battle_result, player_monster, opponent_monster, participant_ids))
+    battle_result["replay_id"] = battle_result["battle_id"]
+    battle_result.pop("battle_events", None)
+    battle_result.pop("raw_full_log", None)
+    return future
+
+
+def get_replay_record(battle_id: str) -> Optional[Dict[str, Any]]:
+    """先查本行程尚未寫入完成的重播，再讀取 Firestore；其他 worker 的重播在寫入完成前會回傳 None。"""
+    with _pending_lock:
+        pending = _pending_replays.get(battle_id)
+    if pending is not None:
+        return pending
+    db = MD_firebase_config.db
+    if not db:
+        replay_logger.error("Firestore 資料庫未初始化，無法讀取戰鬥重播。")
+        return None
+    try:
+        doc = db.collection(BATTLE_REPLAY_COLLECTION).document(battle_id).get()
+        return doc.to_dict() if doc.exists else None
+    except Exception as e:
+        replay_logger.error(f"讀取戰鬥重播 {battle_id} 時發生錯誤: {e}", exc_info=True)
+        return None
+
+
+def can_view_replay(record: Dict[str, Any], user_id: str) -> bool:
+    """重播只開放給參戰的玩家；沒有 participant_ids 的舊紀錄一律不開放。"""
+    return user_id in record.get("participant_ids", [])
+
+
+def render_replay(record: Dict[str, Any], game_configs: GameConfigs) -> Dict[str, Any]:
+    """由重播紀錄的事件流重新產生完整的文字日誌與亮點。"""
+    events = unpack_battle_events(record["events_blob"])
+    raw_full_log, battle_highlights = render_battle_log(events, record.get("names", {}), game_configs, record.get("highlight_style"))
+    return {
+        "battle_id": record.get("battle_id"),
+        "winner_id": record.get("winner_id"),
+        "loser_id": record.get("loser_id"),
+        "raw_full_log": raw_full_log,
+        "battle_highlights": battle_highlights,
+        "battle_events": events,
+    }
@@ -0,0 +1,155 @@
+# backend/battle_report_services.py
+# AI 戰報的背景產生服務：戰鬥結果先行回傳，戰報交由背景執行緒池撰寫，前端再以戰鬥 ID 取回
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Iterable
+
+from . import MD_firebase_config
+from .MD_ai_services import generate_battle_report_content
+
+battle_report_logger = logging.getLogger(__name__)
+
+# 完成的戰報會寫入此集合，讓其他 worker 收到查詢時也能取得
+BATTLE_REPORT_COLLECTION = "MD_BattleReports"
+# 同時撰寫戰報的執行緒數量；AI 服務回應緩慢時，多出來的工作會在佇列中等待
+BATTLE_REPORT_WORKERS = int(os.environ.get("MD_BATTLE_REPORT_WORKERS", "4"))
+# 行程內最多保留的戰報數量與保留秒數
+MAX_CACHED_REPORTS = 1000
+REPORT_TTL_SECONDS = 60 * 60
+
+REPORT_STATUS_PENDING = "pending"
+REPORT_STATUS_READY = "ready"
+REPORT_STATUS_FAILED = "failed"
+
+PENDING_REPORT_CONTENT: Dict[str, Any] = {
+    "status": REPORT_STATUS_PENDING,
+    "battle_summary": "戰地記者正在撰寫戰報，請稍候...",
+    "loot_info": "",
+    "growth_info": "",
+}
+
+
+class BattleReportQueue:
+    """
+    以執行緒池在背景呼叫 AI 產生戰報。
+    工作狀態保存在行程內的 LRU 字典中；完成或失敗的結果另外寫入 Firestore，供其他 worker 查詢。
+    """
+
+    def __init__(self, max_workers: int = BATTLE_REPORT_WORKERS, max_cached: int = MAX_CACHED_REPORTS, ttl_seconds: float = REPORT_TTL_SECONDS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="battle-report")
+        self._lock = threading.Lock()
+        self._reports: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._max_cached = max_cached
+        self._ttl_seconds = ttl_seconds
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, battle_id: str, report_kwargs: Dict[str, Any], participant_ids: Iterable[Optional[str]] = ()) -> Dict[str, Any]:
+        """排入一份戰報撰寫工作，立即回傳「撰寫中」的佔位內容；participant_ids 為可以查看此戰報的玩家。"""
+        participants = [pid for pid in participant_ids if pid]
+        with self._lock:
+            self._store(battle_id, {"status": REPORT_STATUS_PENDING, "report": None, "participant_ids": participants})
+            self.submitted += 1
+        self._executor.submit(self._run, battle_id, report_kwargs, participants)
+        return dict(PENDING_REPORT_CONTENT)
+
+    def get(self, battle_id: str) -> Optional[Dict[str, Any]]:
+        """
+        查詢戰報。回傳 {"status": ..., "report": ..., "participant_ids": [...]}；找不到時回傳 None。
+        """
+        with self._lock:
+            entry = self._reports.get(battle_id)
+            if entry and time.time() - entry["created_at"] > self._ttl_seconds:
+                del self._reports[battle_id]
+                entry = None
+        if entry:
+            return {"status": entry["status"], "report": entry["report"], "participant_ids": entry["participant_ids"]}
+        return _load_persisted_report(battle_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = sum(1 for entry in self._reports.values() if entry["status"] == REPORT_STATUS_PENDING)
+            cached = len(self._reports)
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "pending": pending,
+            "cached": cached,
+        }
+
+    def _store(self, battle_id: str, entry: Dict[str, Any]):
+        entry["created_at"] = time.time()
+        self._reports[battle_id] = entry
+        self._reports.move_to_end(battle_id)
+        while len(self._reports) > self._max_cached:
+            self._reports.popitem(last=False)
+
+    def _run(self, battle_id: str, report_kwargs: Dict[str, Any], participant_ids: List[str]):
+        try:
+            report = generate_battle_report_content(**report_kwargs)
+            report["status"] = REPORT_STATUS_READY
+            with self._lock:
+                self._store(battle_id, {"status": REPORT_STATUS_READY, "report": report, "participant_ids": participant_ids})
+                self.completed += 1
+            _persist_report(battle_id, REPORT_STATUS_READY, report, participant_ids)
+        except Exception as e:
+            battle_report_logger.error(f"背景撰寫戰報 {battle_id} 時發生錯誤: {e}", exc_info=True)
+            with self._lock:
+                self._store(battle_id, {"status": REPORT_STATUS_FAILED, "report": None, "participant_ids": participant_ids})
+                self.failed += 1
+            # 失敗狀態同樣寫入 Firestore，其他 worker 收到查詢時才不會一直回應找不到
+            _persist_report(battle_id, REPORT_STATUS_FAILED, None, participant_ids)
+
+
+def _persist_report(battle_id: str, status: str, report: Optional[Dict[str, Any]], participant_ids: List[str]):
+    db = MD_firebase_config.db
+    if not db:
+        return
+    try:
+        db.collection(BATTLE_REPORT_COLLECTION).document(battle_id).set({
+            "status": status,
+            "report": report,
+            "participant_ids": participant_ids,
+            "created_at": int(time.time()),
+        })
+    except Exception as e:
+        battle_report_logger.error(f"寫入戰報 {battle_id} 到 Firestore 時發生錯誤: {e}", exc_info=True)
+
+
+def _load_persisted_report(battle_id: str) -> Optional[Dict[str, Any]]:
+    db = MD_firebase_config.db
+    if not db:
+        return None
+    try:
+        doc = db.collection(BATTLE_REPORT_COLLECTION).document(battle_id).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict() or {}
+        return {"status": data.get("status", REPORT_STATUS_READY), "report": data.get("report"), "participant_ids": data.get("participant_ids", [])}
+    except Exception as e:
+        battle_report_logger.error(f"從 Firestore 讀取戰報 {battle_id} 時發生錯誤: {e}", exc_info=True)
+        return None
+
+
+battle_report_queue = BattleReportQueue()
+
+
+def submit_battle_report(battle_id: str, participant_ids: Iterable[Optional[str]] = (), **report_kwargs: Any) -> Dict[str, Any]:
+    """排入戰報撰寫工作，其餘參數與 generate_battle_report_content 相同。"""
+    return battle_report_queue.submit(battle_id, report_kwargs, participant_ids)
+
+
+def get_battle_report(battle_id: str) -> Optional[Dict[str, Any]]:
+    return battle_report_queue.get(battle_id)
+
+
+def can_view_battle_report(entry: Dict[str, Any], user_id: str) -> bool:
+    """戰報只開放給參戰的玩家；沒有 participant_ids 的舊戰報一律不開放。"""
+    return user_id in entry.get("participant_ids", [])
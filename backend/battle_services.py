@@ -5,22 +5,30 @@ import random
 import logging
 import math
 import copy
+import bisect
 import time
-from typing import List, Dict, Optional, Any, Tuple, Literal, Union
+import uuid
+import json
+import hashlib
+from typing import List, Dict, Optional, Any, Tuple, Literal, Union, Iterator
 from datetime import datetime, timedelta, timezone
 
 from .MD_models import (
     Monster, Skill, HealthCondition, ElementTypes, RarityDetail, GameConfigs,
-    BattleLogEntry, BattleAction, BattleResult, Personality, ValueSettings, SkillCategory, MonsterActivityLogEntry,
+    BattleLogEntry, BattleAction, BattleResult, BattleEvent, Personality, ValueSettings, SkillCategory, MonsterActivityLogEntry,
     SkillEffect, SkillPhase, PlayerGameData
 )
-from .MD_ai_services import generate_battle_report_content
+from .battle_report_services import submit_battle_report
 from .utils_services import get_effective_skill_with_level
 from .tournament_services import calculate_pvp_points_update
+from .MD_config_services import get_config_index
 
 
 battle_logger = logging.getLogger(__name__)
 
+# 戰鬥規則有任何會改變結果的修改時都要遞增，舊版本的重播紀錄才不會被誤判為可重現
+BATTLE_ENGINE_VERSION = "1"
+
 BASIC_ATTACK: Skill = {
     "name": "普通攻擊",
     "description": "基礎的物理攻擊。",
@@ -39,50 +47,177 @@ BASIC_ATTACK: Skill = {
     ]
 }
 
-def _extract_battle_highlights(raw_log: List[str], chosen_style: Dict[str, str]) -> List[str]:
-    """從原始戰鬥日誌中提取關鍵事件作為亮點。"""
-    highlights = []
-    
-    keyword_to_event_map = {
-        "是會心一擊！": "crit",
-        "效果絕佳！": "super_effective",
-        "閃過了！": "dodge",
-        "中毒了！": "poison",
-        "陷入了麻痺！": "paralysis",
-        "陷入了混亂！": "confusion",
-        "睡著了！": "sleep",
-        "凍結了！": "freeze",
-        "燒傷！": "burn",
-        "能力大幅提升": "stat_up",
-        "能力大幅下降": "stat_down"
-    }
+# 亮點判定的優先順序：同一行日誌中有多個事件時，依此順序取第一個尚未使用的亮點
+HIGHLIGHT_PRIORITY = (
+    "crit", "super_effective", "dodge", "poison", "paralysis", "confusion",
+    "sleep", "freeze", "burn", "stat_up", "stat_down"
+)
+
+STATUS_HIGHLIGHT_KEYS = {
+    "poison": "poison",
+    "badly_poisoned": "poison",
+    "paralysis": "paralysis",
+    "confusion": "confusion",
+    "sleep": "sleep",
+    "freeze": "freeze",
+    "burn": "burn",
+    "badly_burned": "burn",
+}
 
+# 這些事件屬於同一次行動，文字會接在「使用了技能」那一行之後
+INLINE_EVENT_TYPES = frozenset({
+    "miss", "crit", "ignore_defense", "damage", "status_applied",
+    "stat_change", "recoil", "weather_start", "unknown_special"
+})
+
+MAX_BATTLE_HIGHLIGHTS = 5
+
+# AI 選擇技能：HP 低於此比例時，依技能類別提高輔助與變化技能的權重
+LOW_HP_RATIO = 0.4
+LOW_HP_SKILL_MULTIPLIERS = {"輔助": 2.5, "變化": 1.5}
+
+
+def _battle_rng(battle_state: Optional[Dict[str, Any]]) -> Any:
+    """取得本場戰鬥專屬的亂數產生器；沒有戰鬥狀態時退回全域 random 模組。"""
+    if battle_state and "rng" in battle_state:
+        return battle_state["rng"]
+    return random
+
+
+def _emit_event(battle_state: Dict[str, Any], event_type: str, **fields: Any):
+    """記錄一筆戰鬥事件。"""
+    event: BattleEvent = {"turn": battle_state["turn"], "type": event_type}
+    event.update(fields)
+    battle_state["events"].append(event)
+
+
+def _event_highlight_key(event: BattleEvent) -> Optional[str]:
+    event_type = event["type"]
+    if event_type == "crit":
+        return "crit"
+    if event_type == "miss":
+        return "dodge"
+    if event_type == "damage" and event.get("element_multiplier", 1.0) > 1.0:
+        return "super_effective"
+    if event_type == "status_applied":
+        return STATUS_HIGHLIGHT_KEYS.get(event.get("status_id", ""))
+    if event_type == "stat_change" and event.get("amounts"):
+        return "stat_up" if event["amounts"][0] > 0 else "stat_down"
+    return None
+
+
+def _render_event_text(event: BattleEvent, names: Dict[str, str]) -> List[str]:
+    """將單一事件轉為日誌文字；行內事件回傳要接在行動行後面的片段。"""
+    event_type = event["type"]
+    actor = names.get(event.get("actor", ""), "")
+    target = names.get(event.get("target", ""), "")
+
+    if event_type == "turn_start":
+        lines = [f"--- 回合 {event['turn']} 開始 ---"]
+        for side, prefix in (("player", "Player"), ("opponent", "Opponent")):
+            snapshot = event["sides"][side]
+            status_text = ", ".join(snapshot["status"]) if snapshot["status"] else "良好"
+            lines.extend([
+                f"{prefix}Name:{snapshot['name']}",
+                f"{prefix}HP:{snapshot['hp']}/{snapshot['max_hp']}",
+                f"{prefix}MP:{snapshot['mp']}/{snapshot['max_mp']}",
+                f"{prefix}Status:{status_text}",
+            ])
+        return lines
+    if event_type == "skip_turn":
+        return [f"- **{actor}** 因**{event['status']}**狀態而無法行動！"]
+    if event_type == "status_hp":
+        hp_change = event["amount"]
+        return [f"- **{actor}** 因**{event['status']}**狀態{'損失' if hp_change < 0 else '恢復'}了 <damage>{abs(hp_change)}</damage> 點HP。"]
+    if event_type == "status_expired":
+        return [f"- **{actor}** 的**{event['status']}**狀態解除了。"]
+    if event_type == "action":
+        return [f"- **{actor}** 使用了 Lv{event['level']} **{event['skill']}**！"]
+    if event_type == "miss":
+        return [f" 但是攻擊被 **{target}** 閃過了！"]
+    if event_type == "crit":
+        return [" **是會心一擊！**"]
+    if event_type == "ignore_defense":
+        return [f" 攻擊無視了 **{target}** 的防禦提升！"]
+    if event_type == "damage":
+        multiplier = event.get("element_multiplier", 1.0)
+        advantage_text = ""
+        if multiplier > 1.0: advantage_text = " 效果絕佳！"
+        elif multiplier < 1.0: advantage_text = " 效果不太好..."
+        return [f"對 **{target}** 造成了 <damage>{event['amount']}</damage> 點傷害。{advantage_text}"]
+    if event_type in ("status_applied", "stat_change", "weather_start"):
+        return [f" {event['message']}"] if event.get("message") else []
+    if event_type == "recoil":
+        return [f" **{actor}**也因反作用力受到了 <damage>{event['amount']}</damage> 點傷害！"]
+    if event_type == "unknown_special":
+        return [f" 發動了未知的特殊效果「{event['special_id']}」！"]
+    if event_type == "weather_tick":
+        return ["- 猛烈的沙塵暴持續肆虐！"]
+    if event_type == "weather_damage":
+        return [f"- **{target}** 被沙塵暴捲入，受到了 <damage>{event['amount']}</damage> 點傷害。"]
+    if event_type == "weather_end":
+        return [f"- {event['weather']} 停止了。"]
+    if event_type == "battle_end":
+        return ["--- 戰鬥結束 ---"]
+    return []
+
+
+def _render_battle_events(
+    events: List[BattleEvent], names: Dict[str, str], chosen_style: Dict[str, str]
+) -> Tuple[List[str], List[bool], List[str]]:
+    """
+    一次走訪事件流，同時產生文字日誌、每行是否為亮點的標記，以及亮點描述列表。
+    """
+    raw_log: List[str] = []
+    line_is_highlight: List[bool] = []
+    highlights: List[str] = []
     added_highlights = set()
 
-    for log_line in raw_log:
-        for keyword, event_key in keyword_to_event_map.items():
-            if keyword in log_line:
-                description = chosen_style.get(event_key)
+    current_parts: List[str] = []
+    current_keys: List[str] = []
+
+    def flush_line():
+        if not current_parts:
+            return
+        raw_log.append("".join(current_parts))
+        line_is_highlight.append(bool(current_keys))
+        if current_keys:
+            for key in HIGHLIGHT_PRIORITY:
+                if key not in current_keys:
+                    continue
+                description = chosen_style.get(key)
                 if description and description not in added_highlights:
                     highlights.append(description)
                     added_highlights.add(description)
-                    break 
+                    break
+            current_keys.clear()
+        current_parts.clear()
+
+    for event in events:
+        if event["type"] not in INLINE_EVENT_TYPES:
+            flush_line()
+        texts = _render_event_text(event, names)
+        highlight_key = _event_highlight_key(event)
+        if highlight_key:
+            current_keys.append(highlight_key)
+        if event["type"] in INLINE_EVENT_TYPES or event["type"] == "action":
+            current_parts.extend(texts)
+        else:
+            raw_log.extend(texts)
+            line_is_highlight.extend([False] * len(texts))
+    flush_line()
 
     if not highlights:
-        default_highlight = chosen_style.get("default", "這是一場值得記錄的戰鬥。")
-        highlights.append(default_highlight)
-        
-    return highlights[:5]
+        highlights.append(chosen_style.get("default", "這是一場值得記錄的戰鬥。"))
+
+    return raw_log, line_is_highlight, highlights[:MAX_BATTLE_HIGHLIGHTS]
 
 
 def _calculate_elemental_advantage(attacker_element: ElementTypes, defender_elements: List[ElementTypes], game_configs: GameConfigs) -> float:
-    chart = game_configs.get("elemental_advantage_chart", {})
-    total_multiplier = 1.0
-    for def_el in defender_elements:
-        total_multiplier *= chart.get(attacker_element, {}).get(def_el, 1.0)
-    return total_multiplier
+    return get_config_index(game_configs).elemental_matrix.against(attacker_element, defender_elements)
 
-def _get_monster_current_stats(monster: Monster, player_data: Optional[PlayerGameData], game_configs: GameConfigs) -> Dict[str, Any]:
+def _get_monster_base_stats(monster: Monster, player_data: Optional[PlayerGameData]) -> Dict[str, Any]:
+    """計算怪獸在戰鬥中不會變動的基礎能力值（本體 + 修煉 + 冒險 + 稱號加成）。"""
     cult_gains = monster.get("cultivation_gains", {})
     adv_gains = monster.get("adventure_gains", {})
     title_buffs = {}
@@ -105,132 +240,210 @@ def _get_monster_current_stats(monster: Monster, player_data: Optional[PlayerGam
         "initial_max_hp": monster.get("initial_max_hp", 0) + cult_gains.get("hp", 0) + adv_gains.get("hp", 0) + title_buffs.get("hp", 0),
         "initial_max_mp": monster.get("initial_max_mp", 0) + cult_gains.get("mp", 0) + adv_gains.get("mp", 0) + title_buffs.get("mp", 0),
     }
+    return base_stats
 
-    final_attack = (base_stats["attack"] * monster.get("temp_attack_multiplier", 1.0)) + monster.get("temp_attack_modifier", 0)
-    final_defense = (base_stats["defense"] * monster.get("temp_defense_multiplier", 1.0)) + monster.get("temp_defense_modifier", 0)
-    final_speed = (base_stats["speed"] * monster.get("temp_speed_multiplier", 1.0)) + monster.get("temp_speed_modifier", 0)
-    final_crit = base_stats["crit"] + monster.get("temp_crit_modifier", 0)
-
-    stats = {
-        "hp": monster.get("current_hp", monster.get("hp", 0)),
-        "mp": monster.get("current_mp", monster.get("mp", 0)),
-        "attack": final_attack,
-        "defense": final_defense,
-        "speed": final_speed,
-        "crit": min(final_crit, 50),
-        "initial_max_hp": base_stats["initial_max_hp"],
-        "initial_max_mp": base_stats["initial_max_mp"],
-        "accuracy": monster.get("temp_accuracy_modifier", 0),
-        "evasion": monster.get("temp_evasion_modifier", 0)
-    }
 
-    if monster.get("healthConditions"):
-        all_conditions = game_configs.get("status_effects", [])
-        for condition in monster["healthConditions"]:
-            condition_template = next((c for c in all_conditions if c.get("id") == condition.get("id")), None)
-            if condition_template:
-                effects = condition_template.get("effects", {})
-                for stat, value in effects.items():
-                    if stat in stats and "per_turn" not in stat:
-                        stats[stat] += value
-    return stats
+# 能力變化效果對應的暫時性加成欄位；沒有列出的能力值不參與戰鬥計算
+STAT_MULTIPLIER_SLOTS = {"attack": "attack_multiplier", "defense": "defense_multiplier", "speed": "speed_multiplier"}
+STAT_MODIFIER_SLOTS = {
+    "attack": "attack_modifier", "defense": "defense_modifier", "speed": "speed_modifier",
+    "crit": "crit_modifier", "accuracy": "accuracy_modifier", "evasion": "evasion_modifier",
+}
 
 
-def _get_active_skills(monster: Monster, current_mp: int, game_configs: GameConfigs) -> List[Skill]:
-    available_skills: List[Skill] = []
-    all_skills_db = game_configs.get("skills", {})
-    
+def _resolve_combat_skills(monster: Monster, skills_by_name: Dict[str, Skill]) -> List[Skill]:
+    """開戰時將怪獸的技能與設定範本合併並套用等級，之後每次行動直接使用，不再重複複製範本。"""
+    combat_skills: List[Skill] = []
     for skill_stub in monster.get("skills", []):
         skill_name = skill_stub.get("name")
         if not skill_name:
             continue
 
-        skill_template = None
-        for element_skills in all_skills_db.values():
-            found = next((s for s in element_skills if s.get("name") == skill_name), None)
-            if found:
-                skill_template = found
-                break
-        
+        skill_template = skills_by_name.get(skill_name)
         if not skill_template:
             battle_logger.warning(f"怪獸 {monster.get('nickname')} 的技能 '{skill_name}' 在遊戲設定中找不到範本。")
             continue
-            
-        full_skill_data = copy.deepcopy(skill_template)
+
+        full_skill_data = dict(skill_template)
         full_skill_data.update(skill_stub)
-        
-        effective_skill = get_effective_skill_with_level(full_skill_data, full_skill_data.get("level", 1))
-        
-        mp_cost = effective_skill.get("mp_cost", 0)
+        combat_skills.append(get_effective_skill_with_level(full_skill_data, full_skill_data.get("level", 1)))
+    return combat_skills
+
+
+class SkillDecisionTable:
+    """
+    一組可用技能的累積權重表，分為一般與低 HP 兩份。
+    抽選時以 randrange(總權重) 配合二分搜尋取得技能，與在展開的加權列表上 choice 的結果完全相同，但不需配置列表。
+    """
+    __slots__ = ("skills", "cumulative_weights", "low_hp_cumulative_weights")
+
+    def __init__(self, skills: List[Skill], skill_preferences: Dict[str, float]):
+        self.skills = skills
+        self.cumulative_weights: List[int] = []
+        self.low_hp_cumulative_weights: List[int] = []
+        total = low_hp_total = 0
+        for skill in skills:
+            skill_category = skill.get("skill_category", "其他")
+            base_weight = skill_preferences.get(skill_category, 1.0)
+            total += max(0, int(base_weight * 10))
+            low_hp_total += max(0, int(base_weight * LOW_HP_SKILL_MULTIPLIERS.get(skill_category, 1.0) * 10))
+            self.cumulative_weights.append(total)
+            self.low_hp_cumulative_weights.append(low_hp_total)
+
+    def pick(self, rng: Any, is_low_hp: bool) -> Skill:
+        cumulative = self.low_hp_cumulative_weights if is_low_hp else self.cumulative_weights
+        total = cumulative[-1]
+        if total <= 0:
+            return rng.choice(self.skills)
+        return self.skills[bisect.bisect_right(cumulative, rng.randrange(total))]
+
+
+class CombatMonster:
+    """
+    單場戰鬥中一隻怪獸的狀態，開戰時由怪獸資料與設定索引建立一次，不修改也不複製原本的怪獸字典。
+    基礎能力值只算一次；衍生能力值只有在能力變化、附加狀態或狀態解除時才重算，
+    HP/MP 則每次讀取時直接套用目前值。
+    """
+    __slots__ = (
+        "id", "nickname", "side", "elements", "raw_defense", "initial_max_hp", "skill_preferences", "skills",
+        "_skill_mp_costs", "_decision_tables",
+        "current_hp", "current_mp", "health_conditions",
+        "attack_multiplier", "defense_multiplier", "speed_multiplier",
+        "attack_modifier", "defense_modifier", "speed_modifier", "crit_modifier", "accuracy_modifier", "evasion_modifier",
+        "base_stats", "status_effects_by_id", "_derived", "_hp_offset", "_mp_offset",
+    )
 
-        is_skill_active = effective_skill.get('is_active', True)
-        if current_mp >= mp_cost and is_skill_active:
-            available_skills.append(full_skill_data)
-            
-    return available_skills
+    def __init__(self, monster: Monster, player_data: Optional[PlayerGameData], side: str, game_configs: GameConfigs):
+        config_index = get_config_index(game_configs)
+        self.id = monster.get("id")
+        self.nickname = monster.get("nickname")
+        self.side = side
+        self.elements = monster.get("elements", [])
+        # 無視防禦提升與天氣傷害使用怪獸本身的數值，不含修煉與稱號加成
+        self.raw_defense = monster.get("defense", 1)
+        self.initial_max_hp = monster.get("initial_max_hp", 100)
+        self.skill_preferences = monster.get("personality", {}).get("skill_preferences", {})
+        self.skills = _resolve_combat_skills(monster, config_index.skills_by_name)
+        # 可用技能只取決於目前 MP 跨過了幾個技能的消耗門檻，決策表依門檻數快取
+        self._skill_mp_costs = sorted(skill.get("mp_cost", 0) for skill in self.skills if skill.get("is_active", True))
+        self._decision_tables: Dict[int, Optional[SkillDecisionTable]] = {}
+        self.health_conditions: List[HealthCondition] = [dict(c) for c in monster.get("healthConditions") or []]
+        for stat, slot in STAT_MULTIPLIER_SLOTS.items():
+            setattr(self, slot, monster.get(f"temp_{stat}_multiplier", 1.0))
+        for stat, slot in STAT_MODIFIER_SLOTS.items():
+            setattr(self, slot, monster.get(f"temp_{stat}_modifier", 0))
+        self.base_stats = _get_monster_base_stats(monster, player_data)
+        self.status_effects_by_id = config_index.status_effects_by_id
+        self._derived: Optional[Dict[str, Any]] = None
+        self._hp_offset = 0
+        self._mp_offset = 0
+        self.current_hp = monster.get("current_hp", monster.get("hp", 0))
+        self.current_mp = monster.get("current_mp", monster.get("mp", 0))
+        # 開戰時的 HP/MP 已包含異常狀態的增減
+        initial_stats = self.stats()
+        self.current_hp = initial_stats["hp"]
+        self.current_mp = initial_stats["mp"]
+        self._derived = None
+
+    def mark_dirty(self):
+        self._derived = None
+
+    def _derive_stats(self) -> Dict[str, Any]:
+        """在基礎能力值上套用暫時性增減益與異常狀態，得出當下的能力值。"""
+        base_stats = self.base_stats
+        stats = {
+            "hp": self.current_hp,
+            "mp": self.current_mp,
+            "attack": (base_stats["attack"] * self.attack_multiplier) + self.attack_modifier,
+            "defense": (base_stats["defense"] * self.defense_multiplier) + self.defense_modifier,
+            "speed": (base_stats["speed"] * self.speed_multiplier) + self.speed_modifier,
+            "crit": min(base_stats["crit"] + self.crit_modifier, 50),
+            "initial_max_hp": base_stats["initial_max_hp"],
+            "initial_max_mp": base_stats["initial_max_mp"],
+            "accuracy": self.accuracy_modifier,
+            "evasion": self.evasion_modifier,
+        }
+        for condition in self.health_conditions:
+            condition_template = self.status_effects_by_id.get(condition.get("id"))
+            if condition_template:
+                for stat, value in condition_template.get("effects", {}).items():
+                    if stat in stats and "per_turn" not in stat:
+                        stats[stat] += value
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        derived = self._derived
+        if derived is None:
+            derived = self._derive_stats()
+            # 異常狀態也可能直接增減 hp/mp，記下偏移量，之後只需套用在最新的 HP/MP 上
+            self._hp_offset = derived["hp"] - self.current_hp
+            self._mp_offset = derived["mp"] - self.current_mp
+            self._derived = derived
+        else:
+            derived["hp"] = self.current_hp + self._hp_offset
+            derived["mp"] = self.current_mp + self._mp_offset
+        return derived
+
+    def decision_table(self, current_mp: float) -> Optional["SkillDecisionTable"]:
+        """取得目前 MP 下可用技能的決策表；MP 沒有跨過任何消耗門檻時沿用同一份表。"""
+        tier = bisect.bisect_right(self._skill_mp_costs, current_mp)
+        table = self._decision_tables.get(tier, False)
+        if table is False:
+            available = [
+                skill for skill in self.skills
+                if current_mp >= skill.get("mp_cost", 0) and skill.get("is_active", True)
+            ]
+            table = SkillDecisionTable(available, self.skill_preferences) if available else None
+            self._decision_tables[tier] = table
+        return table
+
+    def apply_stat_change(self, stat: str, amount: float, is_multiplier: bool):
+        slot = (STAT_MULTIPLIER_SLOTS if is_multiplier else STAT_MODIFIER_SLOTS).get(stat)
+        if slot is None:
+            return
+        if is_multiplier:
+            setattr(self, slot, getattr(self, slot) * (1 + amount))
+        else:
+            setattr(self, slot, getattr(self, slot) + amount)
+        self._derived = None
 
-def _choose_action(attacker: Monster, defender: Monster, game_configs: GameConfigs, player_data: Optional[PlayerGameData]) -> Skill:
-    attacker_current_stats = _get_monster_current_stats(attacker, player_data, game_configs)
-    all_mp_available_skills = _get_active_skills(attacker, attacker_current_stats["mp"], game_configs)
 
-    sensible_skills = []
-    for skill in all_mp_available_skills:
-        sensible_skills.append(skill)
+def _choose_action(attacker: CombatMonster, defender: CombatMonster, battle_state: Optional[Dict[str, Any]] = None) -> Skill:
+    attacker_current_stats = attacker.stats()
+    decision_table = attacker.decision_table(attacker_current_stats["mp"])
 
-    if sensible_skills and random.random() <= 0.50:
-        personality_prefs = attacker.get("personality", {}).get("skill_preferences", {})
+    rng = _battle_rng(battle_state)
+    if decision_table is not None and rng.random() <= 0.50:
         hp_percentage = attacker_current_stats["hp"] / attacker_current_stats["initial_max_hp"] if attacker_current_stats["initial_max_hp"] > 0 else 0
-        is_low_hp = hp_percentage < 0.4
-
-        weighted_skills = []
-        for skill in sensible_skills:
-            skill_category = skill.get("skill_category", "其他")
-            base_weight = personality_prefs.get(skill_category, 1.0)
-            
-            situational_multiplier = 1.0
-            if is_low_hp:
-                if skill_category == "輔助":
-                    situational_multiplier = 2.5
-                elif skill_category == "變化":
-                    situational_multiplier = 1.5
-            
-            final_weight = int(base_weight * situational_multiplier * 10)
-            weighted_skills.extend([skill] * final_weight)
-        
-        if weighted_skills:
-            return random.choice(weighted_skills)
-        elif sensible_skills:
-            return random.choice(sensible_skills)
+        return decision_table.pick(rng, hp_percentage < LOW_HP_RATIO)
 
     return BASIC_ATTACK
 
-def _apply_skill_effects(performer: Monster, target: Monster, skill: Skill, effects: List[SkillEffect], game_configs: GameConfigs, action_details: Dict, log_parts: List[str], battle_state: Dict[str, Any]):
-    performer_pd = action_details.get('performer_data')
-    target_pd = action_details.get('target_data')
-    
+def _apply_skill_effects(performer: CombatMonster, target: CombatMonster, skill: Skill, effects: List[SkillEffect], game_configs: GameConfigs, action_details: Dict, battle_state: Dict[str, Any]):
     battle_formulas = game_configs.get("game_mechanics", {}).get("battle_formulas", {})
     base_multiplier = battle_formulas.get("damage_formula_base_multiplier", 0.5)
     attack_scaling = battle_formulas.get("damage_formula_attack_scaling", 0.1)
     crit_multiplier = battle_formulas.get("crit_multiplier", 1.5)
+    rng = _battle_rng(battle_state)
 
     for effect in effects:
         effect_target_monster = performer if effect.get("target") == "self" else target
         
         if effect.get("type") == "damage":
-            attacker_stats = _get_monster_current_stats(performer, performer_pd, game_configs)
-            defender_stats = _get_monster_current_stats(target, target_pd, game_configs)
+            attacker_stats = performer.stats()
+            defender_stats = target.stats()
             
             special_logic_id = next((e.get("special_logic_id") for e in skill.get("effects", []) if "special_logic_id" in e), None)
             
             if special_logic_id == "ignore_defense_buffs":
-                defense_stat = max(1, target.get("defense", 1))
-                log_parts.append(f" 攻擊無視了 **{target['nickname']}** 的防禦提升！")
+                defense_stat = max(1, target.raw_defense)
+                _emit_event(battle_state, "ignore_defense", target=target.side)
             else:
                 defense_stat = max(1, defender_stats.get("defense", 1))
 
             power = effect.get("power", 0)
             attack_stat = attacker_stats.get("attack", 1)
-            element_multiplier = _calculate_elemental_advantage(skill["type"], target.get("elements", []), game_configs)
+            element_multiplier = battle_state["elemental_matrix"].against(skill["type"], target.elements)
 
             raw_damage = max(1, (power * (attack_stat / defense_stat) * base_multiplier) + (attack_stat * attack_scaling))
             final_damage = int(raw_damage * element_multiplier)
@@ -238,37 +451,41 @@ def _apply_skill_effects(performer: Monster, target: Monster, skill: Skill, effe
             if action_details.get("is_crit"):
                 final_damage = int(final_damage * crit_multiplier)
 
-            effect_target_monster["current_hp"] = max(0, effect_target_monster.get("current_hp", 0) - final_damage)
+            effect_target_monster.current_hp = max(0, effect_target_monster.current_hp - final_damage)
             action_details["damage_dealt"] = action_details.get("damage_dealt", 0) + final_damage
-            
-            advantage_text = ""
-            if element_multiplier > 1.0: advantage_text = " 效果絕佳！"
-            elif element_multiplier < 1.0: advantage_text = " 效果不太好..."
 
-            log_parts.append(f"對 **{target['nickname']}** 造成了 <damage>{final_damage}</damage> 點傷害。{advantage_text}")
+            _emit_event(
+                battle_state, "damage",
+                actor=performer.side, target=target.side,
+                amount=final_damage, element_multiplier=element_multiplier, crit=bool(action_details.get("is_crit"))
+            )
 
         elif effect.get("type") == "apply_status":
-            if random.random() <= effect.get("chance", 1.0):
-                all_conditions_templates = game_configs.get("status_effects", [])
-                status_template = next((s for s in all_conditions_templates if s.get("id") == effect.get("status_id")), None)
-                if status_template and not any(cond.get("id") == effect.get("status_id") for cond in effect_target_monster.get("healthConditions", [])):
+            if rng.random() <= effect.get("chance", 1.0):
+                status_template = get_config_index(game_configs).status_effects_by_id.get(effect.get("status_id"))
+                if status_template and not any(cond.get("id") == effect.get("status_id") for cond in effect_target_monster.health_conditions):
                     duration_str = str(effect.get("duration", status_template.get("duration_turns", "1")))
                     turn_duration = 1
                     if "-" in duration_str:
                         min_t, max_t = map(int, duration_str.split('-'))
-                        turn_duration = random.randint(min_t, max_t)
+                        turn_duration = rng.randint(min_t, max_t)
                     else:
                         try: turn_duration = int(duration_str)
                         except (ValueError, TypeError): turn_duration = 99
                     
                     new_status = {"id": status_template["id"], "name": status_template["name"], "duration": turn_duration}
-                    effect_target_monster.setdefault("healthConditions", []).append(new_status)
+                    effect_target_monster.health_conditions.append(new_status)
+                    effect_target_monster.mark_dirty()
                     action_details["status_applied"] = status_template["name"]
-                    if effect.get("log_success"):
-                        log_parts.append(f" {effect['log_success'].format(target=effect_target_monster['nickname'])}")
+                    _emit_event(
+                        battle_state, "status_applied",
+                        target=effect_target_monster.side,
+                        status_id=status_template["id"], status=status_template["name"], duration=turn_duration,
+                        message=effect['log_success'].format(target=effect_target_monster.nickname) if effect.get("log_success") else ""
+                    )
         
         elif effect.get("type") == "stat_change":
-            if random.random() <= effect.get("chance", 1.0):
+            if rng.random() <= effect.get("chance", 1.0):
                 is_multiplier = effect.get("is_multiplier", False)
                 stat_map = {"攻擊":"attack", "防禦":"defense", "速度":"speed", "特攻":"special_attack", "特防":"special_defense", "爆擊":"crit", "命中": "accuracy"}
 
@@ -276,26 +493,24 @@ def _apply_skill_effects(performer: Monster, target: Monster, skill: Skill, effe
                 amounts = [effect["amount"]] if isinstance(effect["amount"], (int, float)) else effect["amount"]
                 
                 for stat_zh, amount in zip(stats_to_change_zh, amounts):
-                    stat_en = stat_map.get(stat_zh, stat_zh.lower())
-                    
-                    modifier_key_mult = f"temp_{stat_en}_multiplier"
-                    modifier_key_add = f"temp_{stat_en}_modifier"
-
-                    if is_multiplier:
-                        effect_target_monster[modifier_key_mult] = effect_target_monster.get(modifier_key_mult, 1.0) * (1 + amount)
-                    else:
-                        effect_target_monster[modifier_key_add] = effect_target_monster.get(modifier_key_add, 0) + amount
+                    effect_target_monster.apply_stat_change(stat_map.get(stat_zh, stat_zh.lower()), amount, is_multiplier)
                 
+                formatted_log = ""
                 if effect.get("log_success"):
                     amount_str = f"{abs(amounts[0]*100):.0f}%" if is_multiplier else str(abs(amounts[0]))
                     formatted_log = effect['log_success'].format(
-                        performer=performer['nickname'], 
-                        target=target['nickname'],
+                        performer=performer.nickname,
+                        target=target.nickname,
                         stat=stats_to_change_zh[0],
                         amount=amount_str,
                         duration=effect.get("duration", 0)
                     )
-                    log_parts.append(f" {formatted_log}")
+                _emit_event(
+                    battle_state, "stat_change",
+                    target=effect_target_monster.side,
+                    stats=[stat_map.get(stat_zh, stat_zh.lower()) for stat_zh in stats_to_change_zh],
+                    amounts=list(amounts), message=formatted_log
+                )
 
         elif effect.get("type") == "special":
             special_id = effect.get("special_logic_id")
@@ -304,52 +519,54 @@ def _apply_skill_effects(performer: Monster, target: Monster, skill: Skill, effe
                 damage_dealt = action_details.get("damage_dealt", 0)
                 recoil_damage = int(damage_dealt * recoil_factor)
                 if recoil_damage > 0:
-                    performer["current_hp"] = max(0, performer.get("current_hp", 0) - recoil_damage)
-                    log_parts.append(f" **{performer['nickname']}**也因反作用力受到了 <damage>{recoil_damage}</damage> 點傷害！")
+                    performer.current_hp = max(0, performer.current_hp - recoil_damage)
+                    _emit_event(battle_state, "recoil", actor=performer.side, amount=recoil_damage)
             
             elif special_id == "sandstorm":
                 duration = effect.get("duration", 5)
                 battle_state["weather"] = {"type": "sandstorm", "duration": duration}
-                if effect.get("log_success"):
-                    log_parts.append(f" {effect['log_success']}")
+                _emit_event(battle_state, "weather_start", weather="sandstorm", duration=duration, message=effect.get("log_success") or "")
             
             elif special_id == "ignore_defense_buffs":
                 pass
             else:
-                log_parts.append(f" 發動了未知的特殊效果「{special_id}」！")
+                _emit_event(battle_state, "unknown_special", special_id=special_id)
 
-def _process_turn_start_effects(monster: Monster, game_configs: GameConfigs) -> Tuple[bool, List[str]]:
-    log_messages: List[str] = []
+def _process_turn_start_effects(monster: CombatMonster, battle_state: Dict[str, Any]) -> bool:
     skip_turn = False
-    if not monster.get("healthConditions"):
-        return skip_turn, log_messages
+    if not monster.health_conditions:
+        return skip_turn
 
-    all_conditions_templates = game_configs.get("status_effects", [])
+    side = monster.side
+    status_effects_by_id = monster.status_effects_by_id
+    rng = _battle_rng(battle_state)
     new_conditions = []
-    for active_condition in monster.get("healthConditions", []):
-        condition_template = next((c for c in all_conditions_templates if c.get("id") == active_condition.get("id")), None)
+    for active_condition in monster.health_conditions:
+        condition_template = status_effects_by_id.get(active_condition.get("id"))
         if not condition_template: continue
 
-        if condition_template.get("chance_to_skip_turn", 0) > 0 and random.random() < condition_template["chance_to_skip_turn"]:
+        if condition_template.get("chance_to_skip_turn", 0) > 0 and rng.random() < condition_template["chance_to_skip_turn"]:
             skip_turn = True
-            log_messages.append(f"- **{monster['nickname']}** 因**{condition_template['name']}**狀態而無法行動！")
+            _emit_event(battle_state, "skip_turn", actor=side, status_id=condition_template["id"], status=condition_template["name"])
 
         effects = condition_template.get("effects", {})
         if effects.get("hp_per_turn", 0) != 0:
             hp_change = effects["hp_per_turn"]
-            monster["current_hp"] = max(0, monster.get("current_hp", 0) + hp_change)
-            log_messages.append(f"- **{monster['nickname']}** 因**{condition_template['name']}**狀態{'損失' if hp_change < 0 else '恢復'}了 <damage>{abs(hp_change)}</damage> 點HP。")
+            monster.current_hp = max(0, monster.current_hp + hp_change)
+            _emit_event(battle_state, "status_hp", actor=side, status_id=condition_template["id"], status=condition_template["name"], amount=hp_change)
             
         if active_condition.get("duration", 99) > 1:
             active_condition["duration"] -= 1
             new_conditions.append(active_condition)
         else:
-            log_messages.append(f"- **{monster['nickname']}** 的**{condition_template['name']}**狀態解除了。")
+            _emit_event(battle_state, "status_expired", actor=side, status_id=condition_template["id"], status=condition_template["name"])
             
-    monster["healthConditions"] = new_conditions
-    return skip_turn, log_messages
+    if len(new_conditions) != len(monster.health_conditions):
+        monster.mark_dirty()
+    monster.health_conditions = new_conditions
+    return skip_turn
 
-def _process_end_of_turn_effects(battle_state: Dict[str, Any], player_monster: Monster, opponent_monster: Monster, log_parts: List[str]):
+def _process_end_of_turn_effects(battle_state: Dict[str, Any], player_monster: CombatMonster, opponent_monster: CombatMonster):
     weather = battle_state.get("weather")
     if not weather:
         return
@@ -357,143 +574,178 @@ def _process_end_of_turn_effects(battle_state: Dict[str, Any], player_monster: M
     weather_type = weather.get("type")
     
     if weather_type == "sandstorm":
-        log_parts.append("- 猛烈的沙塵暴持續肆虐！")
+        _emit_event(battle_state, "weather_tick", weather=weather_type)
         for monster in [player_monster, opponent_monster]:
-            if "土" not in monster.get("elements", []) and "金" not in monster.get("elements", []):
-                damage = math.floor(monster.get("initial_max_hp", 100) / 16)
-                monster["current_hp"] = max(0, monster.get("current_hp", 0) - damage)
-                log_parts.append(f"- **{monster['nickname']}** 被沙塵暴捲入，受到了 <damage>{damage}</damage> 點傷害。")
+            if "土" not in monster.elements and "金" not in monster.elements:
+                damage = math.floor(monster.initial_max_hp / 16)
+                monster.current_hp = max(0, monster.current_hp - damage)
+                _emit_event(battle_state, "weather_damage", weather=weather_type, target=monster.side, amount=damage)
 
     if weather.get("duration", 0) > 0:
         weather["duration"] -= 1
         if weather["duration"] <= 0:
-            log_parts.append(f"- {weather_type} 停止了。")
+            _emit_event(battle_state, "weather_end", weather=weather_type)
             battle_state["weather"] = None
 
 
-def simulate_battle_full(
+def _choose_highlight_style(game_configs: GameConfigs, rng: Optional[Any] = None) -> Tuple[Optional[str], Dict[str, str]]:
+    all_styles = game_configs.get("battle_highlights", {}).get("highlight_styles", {})
+    if all_styles:
+        chosen_style_name = (rng or random).choice(list(all_styles.keys()))
+        battle_logger.info(f"本次戰鬥亮點風格已選定為: {chosen_style_name}")
+        return chosen_style_name, all_styles[chosen_style_name]
+    battle_logger.warning("在遊戲設定中找不到戰鬥亮點風格，將使用預設值。")
+    return None, {"default": "一場激烈的戰鬥發生了。"}
+
+
+def compute_battle_input_hash(
+    player_monster: Monster,
+    opponent_monster: Monster,
+    player_data: Optional[PlayerGameData] = None,
+    opponent_player_data: Optional[PlayerGameData] = None
+) -> str:
+    """
+    計算戰鬥輸入的雜湊：雙方怪獸的完整資料，加上玩家稱號等會影響能力值的基礎數值。
+    用於確認重播時的輸入與當初相同。
+    """
+    payload = [
+        player_monster, opponent_monster,
+        _get_monster_base_stats(player_monster, player_data),
+        _get_monster_base_stats(opponent_monster, opponent_player_data),
+    ]
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def render_battle_log(
+    events: List[BattleEvent], names: Dict[str, str], game_configs: GameConfigs, highlight_style: Optional[str] = None
+) -> Tuple[List[str], List[str]]:
+    """由事件流重新產生文字日誌與亮點，供重播使用。"""
+    all_styles = game_configs.get("battle_highlights", {}).get("highlight_styles", {})
+    style_dict = all_styles.get(highlight_style) if highlight_style else None
+    raw_log, _, highlights = _render_battle_events(events, names, style_dict or {"default": "一場激烈的戰鬥發生了。"})
+    return raw_log, highlights
+
+
+def _turn_chunk(battle_state: Dict[str, Any], start: int) -> Dict[str, Any]:
+    return {"type": "turn", "turn": battle_state["turn"], "events": battle_state["events"][start:]}
+
+
+def iter_battle_simulation(
     player_monster_data: Monster,
     opponent_monster_data: Monster,
     game_configs: GameConfigs,
     player_data: Optional[PlayerGameData] = None,
-    opponent_player_data: Optional[PlayerGameData] = None
-) -> BattleResult:
-    player_monster = copy.deepcopy(player_monster_data)
-    opponent_monster = copy.deepcopy(opponent_monster_data)
+    opponent_player_data: Optional[PlayerGameData] = None,
+    generate_ai_report: bool = True,
+    include_log: bool = True,
+    seed: Optional[int] = None,
+    participant_ids: Optional[List[str]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    逐回合模擬一場戰鬥，邊模擬邊產出：
+    先產出 {"type": "start", ...}，每回合結束時產出該回合的事件 {"type": "turn", "turn": n, "events": [...]}，
+    最後產出 {"type": "result", "battle_result": ...}。參數與 simulate_battle_full 相同。
+    """
+    battle_id = uuid.uuid4().hex
+    if seed is None:
+        seed = random.getrandbits(32)
+    rng = random.Random(seed)
+    input_hash = compute_battle_input_hash(player_monster_data, opponent_monster_data, player_data, opponent_player_data)
+    player_monster = CombatMonster(player_monster_data, player_data, "player", game_configs)
+    opponent_monster = CombatMonster(opponent_monster_data, opponent_player_data, "opponent", game_configs)
     
-    all_styles = game_configs.get("battle_highlights", {}).get("highlight_styles", {})
-    if all_styles:
-        chosen_style_name = random.choice(list(all_styles.keys()))
-        chosen_style_dict = all_styles[chosen_style_name]
-        battle_logger.info(f"本次戰鬥亮點風格已選定為: {chosen_style_name}")
-    else:
-        chosen_style_dict = {"default": "一場激烈的戰鬥發生了。"}
-        battle_logger.warning("在遊戲設定中找不到戰鬥亮點風格，將使用預設值。")
-
-    for m in [player_monster, opponent_monster]:
-        current_stats = _get_monster_current_stats(m, player_data if m['id'] == player_monster['id'] else opponent_player_data, game_configs)
-        m["current_hp"] = current_stats["hp"]
-        m["current_mp"] = current_stats["mp"]
-        m.setdefault("healthConditions", [])
-        m.setdefault("temp_attack_modifier", 0)
-        m.setdefault("temp_defense_modifier", 0)
-        m.setdefault("temp_speed_modifier", 0)
-        m.setdefault("temp_crit_modifier", 0)
-        m.setdefault("temp_accuracy_modifier", 0)
-        m.setdefault("temp_evasion_modifier", 0)
-        m.setdefault("temp_attack_multiplier", 1.0)
-        m.setdefault("temp_defense_multiplier", 1.0)
-        m.setdefault("temp_speed_multiplier", 1.0)
-
-    battle_state: Dict[str, Any] = {"weather": None}
+    chosen_style_name, chosen_style_dict = _choose_highlight_style(game_configs, rng)
+
+    battle_state: Dict[str, Any] = {
+        "weather": None,
+        "rng": rng,
+        "elemental_matrix": get_config_index(game_configs).elemental_matrix,
+        "events": [],
+        "turn": 0,
+    }
+
+    yield {
+        "type": "start", "battle_id": battle_id, "seed": seed,
+        "names": {"player": player_monster.nickname, "opponent": opponent_monster.nickname},
+    }
+    emitted = 0
 
-    all_raw_log_messages: List[str] = []
     gmt8 = timezone(timedelta(hours=8))
     
     for turn_num in range(1, game_configs.get("value_settings", {}).get("max_battle_turns", 30) + 1):
-        if player_monster["current_hp"] <= 0 or opponent_monster["current_hp"] <= 0: break
-
-        turn_log = [f"--- 回合 {turn_num} 開始 ---"]
+        if player_monster.current_hp <= 0 or opponent_monster.current_hp <= 0: break
+
+        battle_state["turn"] = turn_num
+        _emit_event(battle_state, "turn_start", sides={
+            m.side: {
+                "name": m.nickname,
+                "hp": m.current_hp, "max_hp": stats['initial_max_hp'],
+                "mp": m.current_mp, "max_mp": stats['initial_max_mp'],
+                "status": [c.get('name', '未知') for c in m.health_conditions],
+            }
+            for m, stats in ((player_monster, player_monster.stats()), (opponent_monster, opponent_monster.stats()))
+        })
         
-        player_status_text = "良好"
-        if player_monster.get("healthConditions"): player_status_text = ", ".join([c.get('name', '未知') for c in player_monster["healthConditions"]])
-        opponent_status_text = "良好"
-        if opponent_monster.get("healthConditions"): opponent_status_text = ", ".join([c.get('name', '未知') for c in opponent_monster["healthConditions"]])
-
-        turn_log.extend([
-            f"PlayerName:{player_monster['nickname']}",
-            f"PlayerHP:{player_monster['current_hp']}/{_get_monster_current_stats(player_monster, player_data, game_configs)['initial_max_hp']}",
-            f"PlayerMP:{player_monster['current_mp']}/{_get_monster_current_stats(player_monster, player_data, game_configs)['initial_max_mp']}",
-            f"PlayerStatus:{player_status_text}",
-            f"OpponentName:{opponent_monster['nickname']}",
-            f"OpponentHP:{opponent_monster['current_hp']}/{_get_monster_current_stats(opponent_monster, opponent_player_data, game_configs)['initial_max_hp']}",
-            f"OpponentMP:{opponent_monster['current_mp']}/{_get_monster_current_stats(opponent_monster, opponent_player_data, game_configs)['initial_max_mp']}",
-            f"OpponentStatus:{opponent_status_text}"
-        ])
-        
-        player_skip, p_logs = _process_turn_start_effects(player_monster, game_configs)
-        turn_log.extend(p_logs)
-        opponent_skip, o_logs = _process_turn_start_effects(opponent_monster, game_configs)
-        turn_log.extend(o_logs)
+        player_skip = _process_turn_start_effects(player_monster, battle_state)
+        opponent_skip = _process_turn_start_effects(opponent_monster, battle_state)
 
-        if player_monster["current_hp"] <= 0 or opponent_monster["current_hp"] <= 0:
-            all_raw_log_messages.extend(turn_log)
+        if player_monster.current_hp <= 0 or opponent_monster.current_hp <= 0:
             break
 
         acting_order = sorted(
-            [(player_monster, opponent_monster, player_skip, player_data, opponent_player_data), 
-             (opponent_monster, player_monster, opponent_skip, opponent_player_data, player_data)], 
-            key=lambda x: _get_monster_current_stats(x[0], x[3], game_configs)["speed"], 
+            [(player_monster, opponent_monster, player_skip), 
+             (opponent_monster, player_monster, opponent_skip)], 
+            key=lambda x: x[0].stats()["speed"], 
             reverse=True
         )
 
-        for performer, target, is_skipped, performer_pd, target_pd in acting_order:
-            if performer["current_hp"] <= 0 or target["current_hp"] <= 0: continue
+        for performer, target, is_skipped in acting_order:
+            if performer.current_hp <= 0 or target.current_hp <= 0: continue
             if is_skipped: continue
 
-            chosen_skill_template = _choose_action(performer, target, game_configs, performer_pd)
-            effective_skill = get_effective_skill_with_level(chosen_skill_template, chosen_skill_template.get("level", 1))
+            effective_skill = _choose_action(performer, target, battle_state)
 
-            performer["current_mp"] -= effective_skill.get("mp_cost", 0)
-            log_parts = [f"- **{performer['nickname']}** 使用了 Lv{effective_skill.get('level', 1)} **{effective_skill['name']}**！"]
-            action_details = {"performer_data": performer_pd, "target_data": target_pd}
+            performer.current_mp -= effective_skill.get("mp_cost", 0)
+            _emit_event(battle_state, "action", actor=performer.side, skill=effective_skill['name'], level=effective_skill.get('level', 1))
+            action_details: Dict[str, Any] = {}
 
             accuracy = effective_skill.get("accuracy", 95)
-            if accuracy != "auto" and random.randint(1, 100) > accuracy:
-                log_parts.append(f" 但是攻擊被 **{target['nickname']}** 閃過了！")
+            if accuracy != "auto" and rng.randint(1, 100) > accuracy:
+                _emit_event(battle_state, "miss", actor=performer.side, target=target.side)
             else:
-                is_crit = random.randint(1, 100) <= _get_monster_current_stats(performer, performer_pd, game_configs)["crit"]
+                is_crit = rng.randint(1, 100) <= performer.stats()["crit"]
                 action_details["is_crit"] = is_crit
-                if is_crit: log_parts.append(" **是會心一擊！**")
-
-                _apply_skill_effects(performer, target, effective_skill, effective_skill.get("effects", []), game_configs, action_details, log_parts, battle_state)
+                if is_crit: _emit_event(battle_state, "crit", actor=performer.side)
 
-            turn_log.append("".join(log_parts))
+                _apply_skill_effects(performer, target, effective_skill, effective_skill.get("effects", []), game_configs, action_details, battle_state)
         
-        _process_end_of_turn_effects(battle_state, player_monster, opponent_monster, turn_log)
-
-        all_raw_log_messages.extend(turn_log)
+        _process_end_of_turn_effects(battle_state, player_monster, opponent_monster)
+        yield _turn_chunk(battle_state, emitted)
+        emitted = len(battle_state["events"])
 
     winner_id: Optional[str] = None
     loser_id: Optional[str] = None
-    if player_monster["current_hp"] <= 0 and opponent_monster["current_hp"] > 0:
-        winner_id, loser_id = opponent_monster["id"], player_monster["id"]
-    elif opponent_monster["current_hp"] <= 0 and player_monster["current_hp"] > 0:
-        winner_id, loser_id = player_monster["id"], opponent_monster["id"]
+    if player_monster.current_hp <= 0 and opponent_monster.current_hp > 0:
+        winner_id, loser_id = opponent_monster.id, player_monster.id
+    elif opponent_monster.current_hp <= 0 and player_monster.current_hp > 0:
+        winner_id, loser_id = player_monster.id, opponent_monster.id
     else:
         winner_id, loser_id = "平手", "平手"
 
-    all_raw_log_messages.append("--- 戰鬥結束 ---")
+    winner_side = {player_monster.id: "player", opponent_monster.id: "opponent"}.get(winner_id) if winner_id != "平手" else None
+    _emit_event(battle_state, "battle_end", winner=winner_side)
+    yield _turn_chunk(battle_state, emitted)
 
     now_gmt8_str = datetime.now(gmt8).strftime("%Y-%m-%d %H:%M:%S")
     
-    player_monster_nickname = player_monster.get('nickname', '您的怪獸')
-    opponent_monster_nickname = opponent_monster.get('nickname', '對手')
+    player_monster_nickname = player_monster_data.get('nickname', '您的怪獸')
+    opponent_monster_nickname = opponent_monster_data.get('nickname', '對手')
 
-    if winner_id == player_monster['id']:
+    if winner_id == player_monster.id:
         player_message = f"挑戰「{opponent_monster_nickname}」，您獲勝了！"
         opponent_message = f"「{player_monster_nickname}」向您發起挑戰，防禦失敗！"
-    elif winner_id == opponent_monster['id']:
+    elif winner_id == opponent_monster.id:
         player_message = f"挑戰「{opponent_monster_nickname}」，您戰敗了。"
         opponent_message = f"您擊敗了前來挑戰的「{player_monster_nickname}」！"
     else: # Draw
@@ -503,35 +755,79 @@ def simulate_battle_full(
     player_activity_log = {"time": now_gmt8_str, "message": player_message}
     opponent_activity_log = {"time": now_gmt8_str, "message": opponent_message}
 
-    battle_highlights = _extract_battle_highlights(all_raw_log_messages, chosen_style_dict)
+    battle_events: List[BattleEvent] = battle_state["events"]
+    all_raw_log_messages: List[str] = []
+    line_highlight_flags: List[bool] = []
+    battle_highlights: List[str] = []
+    if include_log:
+        all_raw_log_messages, line_highlight_flags, battle_highlights = _render_battle_events(
+            battle_events,
+            {"player": player_monster.nickname, "opponent": opponent_monster.nickname},
+            chosen_style_dict
+        )
     
-    temp_battle_result_for_ai = {"winner_name": player_monster_nickname if winner_id == player_monster['id'] else opponent_monster_nickname,
-                                 "loser_name": opponent_monster_nickname if winner_id == player_monster['id'] else player_monster_nickname,
+    temp_battle_result_for_ai = {"winner_name": player_monster_nickname if winner_id == player_monster.id else opponent_monster_nickname,
+                                 "loser_name": opponent_monster_nickname if winner_id == player_monster.id else player_monster_nickname,
                                  "total_rounds": turn_num,
-                                 "log": [{"message": msg} for msg in all_raw_log_messages]}
+                                 "log": [{"message": msg, "highlight": is_highlight} for msg, is_highlight in zip(all_raw_log_messages, line_highlight_flags)]}
 
     player1_name_for_ai = player_data.get('nickname', '玩家') if player_data else '玩家'
     player2_name_for_ai = opponent_player_data.get('nickname', '對手') if opponent_player_data else '對手'
 
-    ai_report = generate_battle_report_content(
-        battle_result=temp_battle_result_for_ai,
-        monster1_name=player_monster_nickname,
-        monster2_name=opponent_monster_nickname,
-        player1_name=player1_name_for_ai,
-        player2_name=player2_name_for_ai
-    )
+    ai_report: Dict[str, Any] = {}
+    if generate_ai_report and include_log:
+        ai_report = submit_battle_report(
+            battle_id,
+            participant_ids=participant_ids or (),
+            battle_result=temp_battle_result_for_ai,
+            monster1_name=player_monster_nickname,
+            monster2_name=opponent_monster_nickname,
+            player1_name=player1_name_for_ai,
+            player2_name=player2_name_for_ai
+        )
 
     final_battle_result: BattleResult = {
+        "battle_id": battle_id,
         "winner_id": winner_id, "loser_id": loser_id, "raw_full_log": all_raw_log_messages,
-        "player_monster_final_hp": player_monster["current_hp"], "player_monster_final_mp": player_monster["current_mp"],
-        "player_monster_final_skills": player_monster.get("skills", []), "player_monster_final_resume": player_monster.get("resume", {"wins": 0, "losses": 0}),
+        "player_monster_final_hp": player_monster.current_hp, "player_monster_final_mp": player_monster.current_mp,
+        "player_monster_final_skills": copy.deepcopy(player_monster_data.get("skills", [])),
+        "player_monster_final_resume": copy.deepcopy(player_monster_data.get("resume", {"wins": 0, "losses": 0})),
         "player_activity_log": player_activity_log, "opponent_activity_log": opponent_activity_log,
         "battle_highlights": battle_highlights,
+        "battle_events": battle_events,
+        "seed": seed,
+        "engine_version": BATTLE_ENGINE_VERSION,
+        "input_hash": input_hash,
+        "highlight_style": chosen_style_name,
         "log_entries": [],
         "battle_end": True,
-        "ai_battle_report_content": ai_report,
-        "player_monster": player_monster,
-        "opponent_monster": opponent_monster
+        "ai_battle_report_content": ai_report
     }
 
-    return final_battle_result
+    yield {"type": "result", "battle_result": final_battle_result}
+
+
+def simulate_battle_full(
+    player_monster_data: Monster,
+    opponent_monster_data: Monster,
+    game_configs: GameConfigs,
+    player_data: Optional[PlayerGameData] = None,
+    opponent_player_data: Optional[PlayerGameData] = None,
+    generate_ai_report: bool = True,
+    include_log: bool = True,
+    seed: Optional[int] = None,
+    participant_ids: Optional[List[str]] = None
+) -> BattleResult:
+    """
+    完整模擬一場戰鬥。AI 戰報不在此同步產生，而是排入背景佇列，
+    結果中的 battle_id 可由 participant_ids 中的玩家稍後取回；generate_ai_report 為 False 時則完全不產生戰報。
+    include_log 為 False 時只保留結構化事件，不產生文字日誌、亮點與戰報，供大量模擬使用。
+    每場戰鬥使用自己的亂數產生器；相同的 seed、輸入與引擎版本必定產生相同的戰鬥過程。
+    """
+    for chunk in iter_battle_simulation(
+        player_monster_data, opponent_monster_data, game_configs, player_data, opponent_player_data,
+        generate_ai_report=generate_ai_report, include_log=include_log, seed=seed, participant_ids=participant_ids
+    ):
+        if chunk["type"] == "result":
+            return chunk["battle_result"]
+    raise RuntimeError("戰鬥模擬未產生結果。")
@@ -0,0 +1,197 @@
+# backend/battle_simulation_services.py
+# 批次戰鬥模擬 (Monte Carlo)：以固定種子在多個行程上大量模擬戰鬥，統計勝率、平均回合數與傷害分佈
+
+import os
+import time
+import logging
+import statistics
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Union, Tuple
+
+from .MD_models import Monster, GameConfigs, BattleEvent
+from .battle_services import simulate_battle_full
+
+simulation_logger = logging.getLogger(__name__)
+
+# 單次請求允許的最大模擬場數（後台與離線平衡工具）
+MAX_SIMULATION_BATTLES = 50000
+# 玩家請求的場數上限；玩家的模擬只在目前的 web worker 內執行，不建立行程池
+MAX_PLAYER_SIMULATION_BATTLES = int(os.environ.get("MD_PLAYER_SIMULATION_BATTLES", "300"))
+# 同一玩家兩次模擬之間至少間隔的秒數；記錄只存在各 worker 的記憶體中，多 worker 時為各自計算的近似限制
+PLAYER_SIMULATION_COOLDOWN_SECONDS = float(os.environ.get("MD_PLAYER_SIMULATION_COOLDOWN_SECONDS", "10"))
+# 每個工作單位包含的場數，用來攤平行程間傳遞資料的成本
+SIMULATION_CHUNK_SIZE = 500
+# 場數少於此值時直接在目前行程執行，省下建立行程池的開銷
+MIN_BATTLES_FOR_POOL = 1000
+SIMULATION_WORKERS = int(os.environ.get("MD_SIMULATION_WORKERS", "0")) or (os.cpu_count() or 1)
+
+_player_simulation_last_run: Dict[str, float] = {}
+_player_simulation_lock = threading.Lock()
+
+# 行程池中每個 worker 各自持有一份設定，避免每個工作單位重複傳送
+_worker_game_configs: Optional[GameConfigs] = None
+
+
+def _init_simulation_worker(game_configs: GameConfigs):
+    global _worker_game_configs
+    _worker_game_configs = game_configs
+    # 大量模擬時不需要逐場的戰鬥日誌
+    logging.disable(logging.WARNING)
+
+
+def acquire_player_simulation_slot(user_id: str) -> Optional[float]:
+    """
+    登記玩家的一次模擬請求；仍在冷卻中時不登記，回傳需要再等待的秒數，可執行時回傳 None。
+    """
+    now = time.monotonic()
+    with _player_simulation_lock:
+        last_run = _player_simulation_last_run.get(user_id)
+        if last_run is not None and now - last_run < PLAYER_SIMULATION_COOLDOWN_SECONDS:
+            return PLAYER_SIMULATION_COOLDOWN_SECONDS - (now - last_run)
+        # 順便清掉已過冷卻期的紀錄，避免字典隨玩家數無限成長
+        for stale_id in [uid for uid, t in _player_simulation_last_run.items() if now - t >= PLAYER_SIMULATION_COOLDOWN_SECONDS]:
+            del _player_simulation_last_run[stale_id]
+        _player_simulation_last_run[user_id] = now
+    return None
+
+
+def _summarize_battle_events(events: List[BattleEvent]) -> Tuple[int, int, int]:
+    """從事件流統計回合數，以及雙方各自造成的總傷害。"""
+    turns = 0
+    damage_by_side = {"player": 0, "opponent": 0}
+    for event in events:
+        event_type = event["type"]
+        if event_type == "turn_start":
+            turns += 1
+        elif event_type == "damage":
+            damage_by_side[event["actor"]] += event["amount"]
+    return turns, damage_by_side["player"], damage_by_side["opponent"]
+
+
+def _run_battle_chunk(
+    monster: Monster, opponent: Monster, seeds: List[int], game_configs: Optional[GameConfigs] = None
+) -> Dict[str, Any]:
+    """執行一批戰鬥，每場使用各自的種子，結果與切分方式和 worker 數量無關。"""
+    game_configs = game_configs if game_configs is not None else _worker_game_configs
+    wins = losses = draws = 0
+    turns: List[int] = []
+    damage_dealt: List[int] = []
+    damage_taken: List[int] = []
+
+    for seed in seeds:
+        result = simulate_battle_full(monster, opponent, game_configs, generate_ai_report=False, include_log=False, seed=seed)
+        if result["winner_id"] == monster["id"]:
+            wins += 1
+        elif result["winner_id"] == opponent["id"]:
+            losses += 1
+        else:
+            draws += 1
+        battle_turns, dealt, taken = _summarize_battle_events(result.get("battle_events", []))
+        turns.append(battle_turns)
+        damage_dealt.append(dealt)
+        damage_taken.append(taken)
+
+    return {"wins": wins, "losses": losses, "draws": draws, "turns": turns, "damage_dealt": damage_dealt, "damage_taken": damage_taken}
+
+
+def _distribution(values: List[int]) -> Dict[str, float]:
+    if not values:
+        return {"mean": 0.0, "min": 0, "p10": 0.0, "p50": 0.0, "p90": 0.0, "max": 0}
+    if len(values) > 1:
+        deciles = statistics.quantiles(values, n=10)
+        p10, p50, p90 = deciles[0], deciles[4], deciles[8]
+    else:
+        p10 = p50 = p90 = float(values[0])
+    return {
+        "mean": round(statistics.fmean(values), 2),
+        "min": min(values),
+        "p10": round(p10, 2),
+        "p50": round(p50, 2),
+        "p90": round(p90, 2),
+        "max": max(values),
+    }
+
+
+def _build_matchup_report(monster: Monster, opponent: Monster, chunk_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    wins = sum(r["wins"] for r in chunk_results)
+    losses = sum(r["losses"] for r in chunk_results)
+    draws = sum(r["draws"] for r in chunk_results)
+    turns = [t for r in chunk_results for t in r["turns"]]
+    damage_dealt = [d for r in chunk_results for d in r["damage_dealt"]]
+    damage_taken = [d for r in chunk_results for d in r["damage_taken"]]
+    total = wins + losses + draws
+
+    return {
+        "opponent_id": opponent.get("id"),
+        "opponent_nickname": opponent.get("nickname"),
+        "battles": total,
+        "wins": wins,
+        "losses": losses,
+        "draws": draws,
+        "win_rate": wins / total if total else 0.0,
+        "loss_rate": losses / total if total else 0.0,
+        "draw_rate": draws / total if total else 0.0,
+        "average_turns": round(statistics.fmean(turns), 2) if turns else 0.0,
+        "damage_dealt": _distribution(damage_dealt),
+        "damage_taken": _distribution(damage_taken),
+    }
+
+
+def validate_simulation_request(
+    opponents: Union[Monster, List[Monster]], num_battles: int, max_battles: int = MAX_SIMULATION_BATTLES
+) -> List[Monster]:
+    """檢查對手與場數，回傳對手列表；不合法時拋出 ValueError。"""
+    opponent_list = [opponents] if isinstance(opponents, dict) else list(opponents)
+    if not opponent_list:
+        raise ValueError("至少需要一個對手才能進行模擬。")
+    if num_battles <= 0:
+        raise ValueError("模擬場數必須大於 0。")
+    if num_battles * len(opponent_list) > max_battles:
+        raise ValueError(f"單次模擬最多 {max_battles} 場。")
+    return opponent_list
+
+
+def run_monte_carlo_battles(
+    monster: Monster,
+    opponents: Union[Monster, List[Monster]],
+    game_configs: GameConfigs,
+    num_battles: int = 1000,
+    seed: int = 0,
+    max_workers: Optional[int] = None,
+    max_battles: int = MAX_SIMULATION_BATTLES
+) -> Dict[str, Any]:
+    """
+    讓 monster 與每個對手各打 num_battles 場，第 i 場使用種子 seed + i，總場數不可超過 max_battles。
+    不產生文字日誌與 AI 戰報；場數夠多且 max_workers 不為 1 時分成多個工作單位交給行程池平行執行。
+    """
+    opponent_list = validate_simulation_request(opponents, num_battles, max_battles)
+
+    seeds = [seed + i for i in range(num_battles)]
+    chunks = [seeds[i:i + SIMULATION_CHUNK_SIZE] for i in range(0, num_battles, SIMULATION_CHUNK_SIZE)]
+    total_battles = num_battles * len(opponent_list)
+    workers = max(1, min(max_workers or SIMULATION_WORKERS, len(chunks) * len(opponent_list)))
+
+    if total_battles < MIN_BATTLES_FOR_POOL or workers == 1:
+        matchups = [
+            _build_matchup_report(monster, opponent, [_run_battle_chunk(monster, opponent, chunk, game_configs) for chunk in chunks])
+            for opponent in opponent_list
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_simulation_worker, initargs=(game_configs,)) as executor:
+            futures = [
+                [executor.submit(_run_battle_chunk, monster, opponent, chunk) for chunk in chunks]
+                for opponent in opponent_list
+            ]
+            matchups = [
+                _build_matchup_report(monster, opponent, [future.result() for future in opponent_futures])
+                for opponent, opponent_futures in zip(opponent_list, futures)
+            ]
+
+    simulation_logger.info(f"完成 {total_battles} 場批次模擬 (怪獸 {monster.get('id')}，對手 {len(opponent_list)} 隻，worker {workers} 個)。")
+    return {
+        "monster_id": monster.get("id"),
+        "battles_per_opponent": num_battles,
+        "seed": seed,
+        "matchups": matchups,
+    }
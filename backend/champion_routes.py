@@ -7,7 +7,7 @@ from flask import Blueprint, jsonify, request
 # 從專案的其他模組導入
 from .champion_services import get_full_champion_details_service
 # 為了驗證玩家身分，我們需要從現有的路由檔案中導入驗證函式
-from .MD_routes import _get_authenticated_user_id 
+from .MD_routes import _get_authenticated_user_id, _get_game_configs_data_from_app_context
 
 champion_bp = Blueprint('champion_bp', __name__, url_prefix='/api/MD')
 champion_routes_logger = logging.getLogger(__name__)
@@ -20,7 +20,7 @@ def get_champions_route():
     """
     champion_routes_logger.info("收到獲取冠軍殿堂資料的請求。")
     try:
-        champion_details = get_full_champion_details_service()
+        champion_details = get_full_champion_details_service(_get_game_configs_data_from_app_context())
         if champion_details is None:
              # 如果服務層在處理過程中出錯，會返回 None
              return jsonify({"error": "獲取冠軍資料時發生伺服器內部錯誤。"}), 500
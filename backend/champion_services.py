@@ -7,18 +7,14 @@ from typing import Optional, Dict, List, Any
 
 # 從專案的其他模組導入
 from . import MD_firebase_config
-from .MD_models import ChampionsData, ChampionSlot, Monster
+from .MD_models import ChampionsData, ChampionSlot, Monster, GameConfigs
+from .MD_config_services import get_config_index
 
 champion_logger = logging.getLogger(__name__)
 
 # Firestore 中的集合與文件名稱
 CHAMPIONS_COLLECTION = "MD_SystemData"
 CHAMPIONS_DOCUMENT = "Champions"
-# --- 核心修改處 START ---
-# 新增：定義冠軍守衛設定檔在 Firestore 中的位置
-GUARDIANS_CONFIG_COLLECTION = "MD_GameConfigs"
-GUARDIANS_CONFIG_DOCUMENT = "ChampionGuardians"
-# --- 核心修改處 END ---
 
 def get_champions_data() -> ChampionsData:
     """
@@ -54,11 +50,11 @@ def get_champions_data() -> ChampionsData:
         champion_logger.error(f"獲取冠軍殿堂資料時發生錯誤: {e}", exc_info=True)
         return default_data
 
-def get_full_champion_details_service() -> List[Optional[Dict[str, Any]]]:
+def get_full_champion_details_service(game_configs: GameConfigs) -> List[Optional[Dict[str, Any]]]:
     """
     獲取四個冠軍席位的完整資料。
     如果席位被玩家佔領，則返回玩家怪獸資料。
-    如果席位為空，則從 Firestore 讀取對應的 NPC 守衛資料。
+    如果席位為空，則從已載入的遊戲設定中取出對應的 NPC 守衛資料。
     """
     champions_info = get_champions_data()
     
@@ -69,23 +65,9 @@ def get_full_champion_details_service() -> List[Optional[Dict[str, Any]]]:
 
     full_details: List[Optional[Dict[str, Any]]] = [None] * 4
     
-    try:
-        dna_templates_doc = db.collection('MD_GameConfigs').document('DNAFragments').get()
-        all_dna_templates = dna_templates_doc.to_dict().get('all_fragments', []) if dna_templates_doc.exists else []
-    except Exception as e:
-        champion_logger.error(f"無法從 Firestore 載入 DNA 範本: {e}")
-        all_dna_templates = []
-
-    # --- 核心修改處 START ---
-    # 預先載入守衛資料
-    try:
-        guardians_doc = db.collection(GUARDIANS_CONFIG_COLLECTION).document(GUARDIANS_CONFIG_DOCUMENT).get()
-        guardians_data = guardians_doc.to_dict().get("guardians", {}) if guardians_doc.exists else {}
-        champion_logger.info("成功預先載入冠軍守衛資料。")
-    except Exception as e:
-        champion_logger.error(f"無法從 Firestore 載入冠軍守衛資料: {e}")
-        guardians_data = {}
-    # --- 核心修改處 END ---
+    # DNA 範本與守衛資料皆取自已載入的設定快照，不再每次請求都讀取 Firestore
+    dna_templates_by_id = get_config_index(game_configs).dna_by_id
+    guardians_data = game_configs.get("champion_guardians", {}) or {}
     
     owners_to_fetch: Dict[str, List[Dict[str, Any]]] = {}
     for i in range(1, 5):
@@ -135,7 +117,7 @@ def get_full_champion_details_service() -> List[Optional[Dict[str, Any]]]:
                             constituent_ids = found_monster.get("constituent_dna_ids", [])
                             if constituent_ids:
                                 head_dna_id = constituent_ids[0]
-                                head_dna_template = next((dna for dna in all_dna_templates if dna.get("id") == head_dna_id), None)
+                                head_dna_template = dna_templates_by_id.get(head_dna_id)
                                 if head_dna_template:
                                     head_dna_info["type"] = head_dna_template.get("type", "無")
                                     head_dna_info["rarity"] = head_dna_template.get("rarity", "普通")
@@ -4,7 +4,6 @@
 import os
 import json
 import logging
-from flask import current_app
 from typing import Optional, Dict, Any, List, Union
 import re # 新增：導入正規表示式模組
 
@@ -382,9 +381,14 @@ def save_cultivation_settings_service(settings_data: Dict[str, Any]) -> tuple[bo
         return False, "儲存修煉設定時發生伺服器內部錯誤。"
 
 def reload_main_app_configs():
+    """
+    發佈新的設定版本號，讓所有 worker 的監看執行緒在背景重新載入；
+    處理本次請求的 worker 則立即重新載入，讓後台馬上看到修改結果。
+    """
     try:
-        from .MD_config_services import load_all_game_configs_from_firestore
-        current_app.config['MD_GAME_CONFIGS'] = load_all_game_configs_from_firestore()
-        config_editor_logger.info("主應用程式的遊戲設定已從 Firestore 重新載入。")
+        from .MD_config_services import game_config_provider, publish_config_version
+        published_version = publish_config_version()
+        new_version = game_config_provider.reload()
+        config_editor_logger.info(f"主應用程式的遊戲設定已重新載入 (本地版本 {new_version}，發佈版本 {published_version})。")
     except Exception as e:
         config_editor_logger.error(f"重新載入遊戲設定時失敗: {e}", exc_info=True)
@@ -7,7 +7,7 @@ from typing import Dict, Any, Optional
 from google.cloud import firestore
 
 from .MD_models import PlayerGameData
-from .player_services import save_player_data_service, _add_player_log
+from .player_services import save_player_data_service, _add_player_log, invalidate_player_cache, append_player_entries, PendingEntries
 from . import MD_firebase_config
 
 exchange_logger = logging.getLogger(__name__)
@@ -180,6 +180,10 @@ def purchase_item_service(buyer_id: str, buyer_data: PlayerGameData, listing_id:
     listing_ref = db.collection("ExchangeListings").document(listing_id)
     buyer_ref = db.collection("users").document(buyer_id).collection("gameData").document("main")
 
+    # 交易可能重試，記錄實際讀到的賣家以便交易後讓快取失效
+    seller_ids = []
+    pending_logs = []
+
     @firestore.transactional
     def process_purchase(transaction):
         # 1. 讀取所有需要的文檔
@@ -189,6 +193,7 @@ def purchase_item_service(buyer_id: str, buyer_data: PlayerGameData, listing_id:
         
         listing_data = listing_doc.to_dict()
         seller_id = listing_data.get("sellerId")
+        seller_ids.append(seller_id)
 
         if seller_id == buyer_id:
             raise Exception("您不能購買自己上架的商品。")
@@ -224,23 +229,37 @@ def purchase_item_service(buyer_id: str, buyer_data: PlayerGameData, listing_id:
         current_buyer_data["playerStats"]["gold"] -= price
         dna_to_receive = listing_data.get("dna")
         current_buyer_data["playerOwnedDNA"][free_slot_index] = dna_to_receive
-        _add_player_log(current_buyer_data, "交易所", f"成功購買了「{dna_to_receive.get('name')}」，花費了 {price} 🪙。")
+        buyer_logs = {"playerLogs": PendingEntries()}
+        _add_player_log(buyer_logs, "交易所", f"成功購買了「{dna_to_receive.get('name')}」，花費了 {price} 🪙。")
 
         # 更新賣家
         seller_data["playerStats"]["gold"] += price
-        _add_player_log(seller_data, "交易所", f"您上架的「{dna_to_receive.get('name')}」已售出，獲得了 {price} 🪙。")
-
-        # 4. 在交易中更新文檔
-        transaction.set(buyer_ref, current_buyer_data)
-        transaction.set(seller_ref, seller_data)
+        seller_logs = {"playerLogs": PendingEntries()}
+        _add_player_log(seller_logs, "交易所", f"您上架的「{dna_to_receive.get('name')}」已售出，獲得了 {price} 🪙。")
+
+        # 4. 在交易中只更新 gameData/main 中變動的欄位；紀錄存放在獨立的子文件，交易完成後再寫入
+        transaction.update(buyer_ref, {
+            "playerStats.gold": current_buyer_data["playerStats"]["gold"],
+            "playerOwnedDNA": current_buyer_data["playerOwnedDNA"],
+        })
+        transaction.update(seller_ref, {"playerStats.gold": seller_data["playerStats"]["gold"]})
         transaction.delete(listing_ref)
+        pending_logs[:] = [(buyer_id, buyer_logs["playerLogs"]), (seller_id, seller_logs["playerLogs"])]
         
         return {"success": True, "item_name": dna_to_receive.get('name')}
 
     try:
         result = process_purchase(db.transaction())
         exchange_logger.info(f"玩家 {buyer_id} 成功購買商品 {listing_id}。")
+        for player_id, entries in pending_logs:
+            invalidate_player_cache(player_id)
+            append_player_entries(player_id, "playerLogs", list(entries))
         return result
     except Exception as e:
         exchange_logger.error(f"購買商品 {listing_id} 的交易失敗: {e}", exc_info=True)
         return {"success": False, "error": str(e)}
+    finally:
+        # 交易直接寫入雙方的 gameData 文件，讓玩家資料快取失效
+        invalidate_player_cache(buyer_id)
+        if seller_ids:
+            invalidate_player_cache(seller_ids[-1])
@@ -80,7 +80,7 @@ def respond_to_friend_request_service(
         操作是否成功。
     """
     # 獲取回應者的資料
-    responder_data, _ = get_player_data_service(responder_id, None, {})
+    responder_data, _ = get_player_data_service(responder_id, None, {}, sections=("mailbox",))
     if not responder_data:
         friend_services_logger.error(f"回應好友請求失敗：找不到回應者 {responder_id} 的資料。")
         return False
@@ -1,9 +1,19 @@
 # backend/leaderboard_search_services.py
 # 處理排行榜和玩家搜尋的服務
 
+import os
+import json
+import time
+import heapq
+import base64
+import bisect
 import logging
-from typing import List, Dict, Optional, Any
+import threading
+import unicodedata
+from collections import Counter
+from typing import List, Dict, Optional, Any, Tuple
 import copy # 用於深拷貝怪獸數據
+from firebase_admin import firestore
 
 # 從 MD_models 導入相關的 TypedDict 定義
 from .MD_models import (
@@ -12,6 +22,11 @@ from .MD_models import (
 
 # 從 MD_firebase_config 導入 db 實例，因為這裡的服務需要與 Firestore 互動
 from . import MD_firebase_config
+from .MD_config_services import get_config_index
+from .tournament_services import (
+    ladder_index, apply_leaderboard_entry_to_ladder, ladder_opponent_from_entry,
+    LADDER_POINTS_FIELD, LADDER_MONSTER_FIELD, DEFAULT_PVP_POINTS
+)
 
 leaderboard_search_services_logger = logging.getLogger(__name__)
 
@@ -36,11 +51,547 @@ DEFAULT_GAME_CONFIGS_FOR_LEADERBOARD: GameConfigs = {
 }
 
 
+# --- 排行榜彙整集合 ---
+# 每位玩家一份文件，保存排行榜所需的玩家戰績與出戰怪獸；在存檔時同步更新，讀取排行榜時只需查詢前 N 名
+LEADERBOARD_COLLECTION = "Leaderboard"
+# 玩家排行榜只保留畫面需要的戰績欄位，金幣等與排名無關的數值變動不會觸發寫入
+LEADERBOARD_PLAYER_FIELDS = ("nickname", "score", "wins", "losses", "rank", "titles", "equipped_title_id", "pvp_points", "pvp_tier")
+# 出戰怪獸中體積大且排行榜用不到的欄位
+LEADERBOARD_MONSTER_EXCLUDED_FIELDS = ("chatHistory", "monsterNotes")
+# 排行榜文件的最後寫入時間（伺服器時間），各 worker 以此只重新載入有變動的文件
+LEADERBOARD_UPDATED_AT_FIELD = "updated_at"
+
+
+def _build_selected_monster_entry(player_id: str, player_game_data: Dict[str, Any], dna_templates_map: Any) -> Optional[Monster]:
+    """取出玩家的出戰怪獸並附上擁有者與頭像 DNA 資訊；沒有出戰怪獸時回傳 None。"""
+    selected_monster_id = player_game_data.get("selectedMonsterId")
+    if not selected_monster_id:
+        return None
+    monster_dict = next((m for m in player_game_data.get("farmedMonsters", []) if m and m.get("id") == selected_monster_id), None)
+    if not monster_dict:
+        return None
+
+    monster_copy = {k: copy.deepcopy(v) for k, v in monster_dict.items() if k not in LEADERBOARD_MONSTER_EXCLUDED_FIELDS}
+    monster_copy["owner_nickname"] = player_game_data.get("nickname", player_id)
+    monster_copy["owner_id"] = player_id
+
+    head_dna_info = { "type": "無", "rarity": "普通" } 
+    constituent_ids = monster_copy.get("constituent_dna_ids", [])
+    if constituent_ids:
+        head_dna_template = dna_templates_map.get(constituent_ids[0])
+        if head_dna_template:
+            head_dna_info["type"] = head_dna_template.get("type", "無")
+            head_dna_info["rarity"] = head_dna_template.get("rarity", "普通")
+    monster_copy["head_dna_info"] = head_dna_info
+
+    if "farmStatus" not in monster_copy:
+        monster_copy["farmStatus"] = {"isTraining": False, "isBattling": False}
+    return monster_copy # type: ignore
+
+
+def build_leaderboard_entry(player_id: str, player_game_data: Optional[Dict[str, Any]], game_configs: GameConfigs) -> Dict[str, Any]:
+    """
+    由玩家遊戲資料產生排行榜文件。
+    有 playerStats 時才帶 player_score、有出戰怪獸時才帶 monster_score 與天梯配對用的積分欄位，
+    Firestore 依欄位排序或範圍查詢時會自動略過缺少該欄位的文件。
+    """
+    entry: Dict[str, Any] = {"uid": player_id}
+    if not player_game_data:
+        return entry
+
+    player_stats = player_game_data.get("playerStats")
+    if player_stats:
+        stats = {key: player_stats[key] for key in LEADERBOARD_PLAYER_FIELDS if key in player_stats}
+        if not stats.get("nickname"):
+            stats["nickname"] = player_game_data.get("nickname", player_id)
+        stats["uid"] = player_id
+        entry["player_stats"] = stats
+        entry["player_score"] = stats.get("score", 0)
+
+    monster = _build_selected_monster_entry(player_id, player_game_data, get_config_index(game_configs).dna_by_id)
+    if monster:
+        entry["monster"] = monster
+        entry["monster_score"] = monster.get("score", 0)
+        entry[LADDER_POINTS_FIELD] = (player_stats or {}).get("pvp_points", DEFAULT_PVP_POINTS)
+        entry[LADDER_MONSTER_FIELD] = monster["id"]
+    return entry
+
+
+def _stamped_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {**entry, LEADERBOARD_UPDATED_AT_FIELD: firestore.SERVER_TIMESTAMP}
+
+
+def sync_leaderboard_entry(player_id: str, new_data: Dict[str, Any], game_configs: Optional[GameConfigs] = None) -> bool:
+    """
+    存檔後同步排行榜文件；與目前保存的排行榜文件相同時不寫入。
+    以保存的文件而非本次讀到的玩家資料比對，其他 worker 或先前失敗的同步造成的差異也會在這次補上。
+    回傳是否有寫入。
+    """
+    db = MD_firebase_config.db
+    if not db:
+        return False
+    if game_configs is None:
+        from .MD_config_services import get_game_configs
+        game_configs = get_game_configs()
+
+    new_entry = build_leaderboard_entry(player_id, new_data, game_configs)
+    entry_ref = db.collection(LEADERBOARD_COLLECTION).document(player_id)
+    stored_doc = entry_ref.get()
+    if stored_doc.exists:
+        stored_entry = stored_doc.to_dict() or {}
+        stored_entry.pop(LEADERBOARD_UPDATED_AT_FIELD, None)
+        if stored_entry == new_entry:
+            return False
+    entry_ref.set(_stamped_entry(new_entry))
+    _apply_entry_to_rankings(new_entry)
+    return True
+
+
+def rebuild_leaderboard_service(game_configs: GameConfigs) -> Tuple[int, Optional[str]]:
+    """
+    以所有玩家目前的資料重建排行榜集合，供首次啟用或資料修復時使用。
+    回傳 (寫入的文件數, 錯誤訊息)。
+    """
+    db = MD_firebase_config.db
+    if not db:
+        return 0, "Firestore 資料庫未初始化。"
+    written = 0
+    try:
+        batch = db.batch()
+        pending = 0
+        for user_doc in db.collection('users').stream():
+            game_data_doc = user_doc.reference.collection('gameData').document('main').get()
+            if not game_data_doc.exists:
+                continue
+            entry = build_leaderboard_entry(user_doc.id, game_data_doc.to_dict(), game_configs)
+            batch.set(db.collection(LEADERBOARD_COLLECTION).document(user_doc.id), _stamped_entry(entry))
+            pending += 1
+            written += 1
+            if pending >= 500:
+                batch.commit()
+                batch, pending = db.batch(), 0
+        if pending:
+            batch.commit()
+        leaderboard_search_services_logger.info(f"排行榜集合重建完成，共寫入 {written} 份文件。")
+        warm_leaderboard_rankings()
+        return written, None
+    except Exception as e:
+        leaderboard_search_services_logger.error(f"重建排行榜集合時發生錯誤: {e}", exc_info=True)
+        return written, "重建排行榜時發生錯誤。"
+
+
+# --- 行程內排名結構 ---
+# 單次分頁查詢的最大筆數
+MAX_LEADERBOARD_PAGE_SIZE = 100
+# 每個 worker 各自持有一份排名：自己處理的存檔會立即反映，其他 worker 的寫入則要等下次重新載入，
+# 因此不同 worker 回應的排名最多可能相差此秒數；0 表示不自動重新載入
+LEADERBOARD_REFRESH_SECONDS = float(os.environ.get("MD_LEADERBOARD_REFRESH_SECONDS", "60"))
+# 定期重新載入只查詢 updated_at 不早於上次看到的最大值的文件；每隔此秒數才整份重新載入一次，
+# 以納入沒有 updated_at 的舊文件與已刪除的文件
+LEADERBOARD_FULL_RELOAD_SECONDS = float(os.environ.get("MD_LEADERBOARD_FULL_RELOAD_SECONDS", "3600"))
+
+
+def encode_leaderboard_cursor(score: Any, uid: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, uid], ensure_ascii=False).encode("utf-8")).decode("ascii")
+
+
+def decode_leaderboard_cursor(cursor: str) -> Optional[Tuple[Any, str]]:
+    try:
+        score, uid = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+    except Exception:
+        return None
+    if not isinstance(score, (int, float)) or not isinstance(uid, str):
+        return None
+    return score, uid
+
+
+class RankedLeaderboard:
+    """
+    依分數排序的行程內排行榜。
+    排序鍵為 (-分數, uid) 的有序陣列，以二分搜尋完成插入、刪除、名次查詢與游標分頁；
+    同分時依 uid 排序，讓分頁順序穩定。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._keys: List[Tuple[Any, str]] = []
+        self._entries: Dict[str, Tuple[Tuple[Any, str], Dict[str, Any]]] = {}
+        self.loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def _remove_locked(self, uid: str):
+        existing = self._entries.pop(uid, None)
+        if existing:
+            i = bisect.bisect_left(self._keys, existing[0])
+            if i < len(self._keys) and self._keys[i] == existing[0]:
+                del self._keys[i]
+
+    def upsert(self, uid: str, score: Any, payload: Dict[str, Any]):
+        key = (-score, uid)
+        with self._lock:
+            self._remove_locked(uid)
+            bisect.insort(self._keys, key)
+            self._entries[uid] = (key, payload)
+
+    def remove(self, uid: str):
+        with self._lock:
+            self._remove_locked(uid)
+
+    def replace_all(self, items: List[Tuple[str, Any, Dict[str, Any]]]):
+        """以 (uid, 分數, 內容) 清單整份替換排名。"""
+        entries = {uid: ((-score, uid), payload) for uid, score, payload in items}
+        keys = sorted(key for key, _ in entries.values())
+        with self._lock:
+            self._keys = keys
+            self._entries = entries
+            self.loaded_at = time.time()
+
+    def page(self, limit: int, cursor: Optional[Tuple[Any, str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        取出 cursor（上一頁最後一筆的分數與 uid）之後的 limit 筆。
+        回傳 (內容清單, 下一頁游標)；已無下一頁時游標為 None。
+        """
+        with self._lock:
+            start = bisect.bisect_right(self._keys, (-cursor[0], cursor[1])) if cursor else 0
+            keys = self._keys[start:start + limit]
+            payloads = [self._entries[uid][1] for _, uid in keys]
+            has_more = start + limit < len(self._keys)
+        next_cursor = encode_leaderboard_cursor(-keys[-1][0], keys[-1][1]) if keys and has_more else None
+        return payloads, next_cursor
+
+    def rank_of(self, uid: str) -> Optional[Dict[str, Any]]:
+        """查詢玩家的名次（從 1 起算）；不在排行榜上時回傳 None。"""
+        with self._lock:
+            existing = self._entries.get(uid)
+            if not existing:
+                return None
+            key, payload = existing
+            rank = bisect.bisect_left(self._keys, key) + 1
+            total = len(self._keys)
+        return {"rank": rank, "total": total, "score": -key[0], "entry": payload}
+
+
+player_rankings = RankedLeaderboard("player")
+monster_rankings = RankedLeaderboard("monster")
+_rankings_refresh_lock = threading.Lock()
+# 已載入文件中最大的 updated_at，以及上次整份載入的時間
+_rankings_watermark: Optional[Any] = None
+_rankings_full_loaded_at = 0.0
+
+
+def _advance_watermark(watermark: Optional[Any], entry: Dict[str, Any]) -> Optional[Any]:
+    updated_at = entry.get(LEADERBOARD_UPDATED_AT_FIELD)
+    if updated_at is None:
+        return watermark
+    return updated_at if watermark is None or updated_at > watermark else watermark
+
+
+def _apply_entry_to_rankings(entry: Dict[str, Any]):
+    uid = entry["uid"]
+    if entry.get("player_stats"):
+        player_rankings.upsert(uid, entry.get("player_score", 0), entry["player_stats"])
+    else:
+        player_rankings.remove(uid)
+    if entry.get("monster"):
+        monster_rankings.upsert(uid, entry.get("monster_score", 0), entry["monster"])
+    else:
+        monster_rankings.remove(uid)
+    apply_leaderboard_entry_to_ladder(entry)
+
+
+def warm_leaderboard_rankings() -> Tuple[int, Optional[str]]:
+    """
+    從排行榜集合載入所有文件，整份替換行程內的玩家與怪獸排名。
+    回傳 (載入的文件數, 錯誤訊息)。
+    """
+    global _rankings_watermark, _rankings_full_loaded_at
+    db = MD_firebase_config.db
+    if not db:
+        return 0, "Firestore 資料庫未初始化。"
+    player_items: List[Tuple[str, Any, Dict[str, Any]]] = []
+    monster_items: List[Tuple[str, Any, Dict[str, Any]]] = []
+    ladder_opponents: List[Dict[str, Any]] = []
+    watermark = None
+    count = 0
+    started_at = time.time()
+    try:
+        for doc in db.collection(LEADERBOARD_COLLECTION).stream():
+            entry = doc.to_dict() or {}
+            count += 1
+            watermark = _advance_watermark(watermark, entry)
+            if entry.get("player_stats"):
+                player_items.append((doc.id, entry.get("player_score", 0), entry["player_stats"]))
+            if entry.get("monster"):
+                monster_items.append((doc.id, entry.get("monster_score", 0), entry["monster"]))
+            opponent = ladder_opponent_from_entry({**entry, "uid": doc.id})
+            if opponent:
+                ladder_opponents.append(opponent)
+    except Exception as e:
+        leaderboard_search_services_logger.error(f"載入排行榜排名時發生錯誤: {e}", exc_info=True)
+        return count, "載入排行榜排名時發生錯誤。"
+    player_rankings.replace_all(player_items)
+    monster_rankings.replace_all(monster_items)
+    ladder_index.replace_all(ladder_opponents)
+    _rankings_watermark, _rankings_full_loaded_at = watermark, started_at
+    leaderboard_search_services_logger.info(f"排行榜排名已載入：玩家 {len(player_items)} 位、怪獸 {len(monster_items)} 隻。")
+    return count, None
+
+
+def _load_updated_leaderboard_entries() -> Tuple[int, Optional[str]]:
+    """
+    只載入 updated_at 不早於水位的排行榜文件並逐筆套用到行程內排名。
+    以 >= 比較，同一時間寫入的文件不會漏掉；重複套用同一份文件不影響結果。
+    """
+    global _rankings_watermark
+    db = MD_firebase_config.db
+    if not db:
+        return 0, "Firestore 資料庫未初始化。"
+    watermark = _rankings_watermark
+    count = 0
+    try:
+        query = db.collection(LEADERBOARD_COLLECTION).where(LEADERBOARD_UPDATED_AT_FIELD, '>=', watermark)
+        for doc in query.stream():
+            entry = doc.to_dict() or {}
+            count += 1
+            watermark = _advance_watermark(watermark, entry)
+            _apply_entry_to_rankings({**entry, "uid": doc.id})
+    except Exception as e:
+        leaderboard_search_services_logger.error(f"增量載入排行榜排名時發生錯誤: {e}", exc_info=True)
+        return count, "增量載入排行榜排名時發生錯誤。"
+    _rankings_watermark = watermark
+    now = time.time()
+    for structure in (player_rankings, monster_rankings, ladder_index):
+        structure.loaded_at = now
+    return count, None
+
+
+def refresh_leaderboard_rankings() -> Tuple[int, Optional[str]]:
+    """定期重新載入排名：還沒有水位或超過整份重新載入的間隔時整份載入，否則只載入有變動的文件。"""
+    if _rankings_watermark is None or time.time() - _rankings_full_loaded_at > LEADERBOARD_FULL_RELOAD_SECONDS:
+        return warm_leaderboard_rankings()
+    return _load_updated_leaderboard_entries()
+
+
+def _refresh_in_background(loader: Any, lock: threading.Lock):
+    try:
+        loader()
+    finally:
+        lock.release()
+
+
+def _ensure_fresh(structure: Any, loader: Any, lock: threading.Lock, thread_name: str) -> bool:
+    """
+    行程內結構已載入時回傳 True；超過重新載入間隔時在背景重新載入，本次請求仍直接使用目前的內容。
+    尚未載入時回傳 False，由呼叫端改查 Firestore。
+    """
+    stale = (
+        not structure.is_loaded
+        or (LEADERBOARD_REFRESH_SECONDS > 0 and time.time() - structure.loaded_at > LEADERBOARD_REFRESH_SECONDS)
+    )
+    if stale and MD_firebase_config.db and lock.acquire(blocking=False):
+        threading.Thread(target=_refresh_in_background, args=(loader, lock), name=thread_name, daemon=True).start()
+    return structure.is_loaded
+
+
+def _ensure_rankings_fresh(rankings: Any) -> bool:
+    return _ensure_fresh(rankings, refresh_leaderboard_rankings, _rankings_refresh_lock, "leaderboard-rankings-refresh")
+
+
+def ensure_ladder_index_fresh() -> bool:
+    """天梯索引與排行榜排名一起載入；回傳索引是否可用。"""
+    return _ensure_rankings_fresh(ladder_index)
+
+
+# --- 玩家暱稱搜尋索引 ---
+# 每個暱稱只索引前 N 個字元，限制索引的記憶體用量
+NICKNAME_INDEX_MAX_CHARS = 32
+# 模糊比對時，雙字元組的 Dice 相似度至少要達到此值
+NICKNAME_FUZZY_MIN_SIMILARITY = 0.4
+# 模糊比對最多檢查的候選人數，避免常見字元組拖慢查詢
+NICKNAME_FUZZY_MAX_CANDIDATES = 2000
+
+
+def normalize_nickname(nickname: str) -> str:
+    """NFKC 正規化（全形轉半形等）後轉小寫，讓搜尋不分大小寫與全半形。"""
+    return unicodedata.normalize("NFKC", nickname or "").casefold()[:NICKNAME_INDEX_MAX_CHARS]
+
+
+def _nickname_bigrams(text: str) -> List[str]:
+    return [text[i:i + 2] for i in range(len(text) - 1)] if len(text) > 1 else [text]
+
+
+class NicknameSearchIndex:
+    """
+    玩家暱稱的 n-gram 倒排索引，中文等不以空白分詞的暱稱也能搜尋中間的字。
+    單字查詢使用單字元索引；其餘以雙字元組的交集找出候選再確認子字串，
+    子字串結果不足時再以雙字元組相似度補上模糊比對結果。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._doc_ids: Dict[str, int] = {}
+        self._uids: List[Optional[str]] = []
+        self._nicknames: List[str] = []
+        self._normalized: List[str] = []
+        self._free_ids: List[int] = []
+        self._unigrams: Dict[str, set] = {}
+        self._bigrams: Dict[str, set] = {}
+        self.loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def _postings_for(self, normalized: str) -> List[Tuple[Dict[str, set], str]]:
+        return [(self._unigrams, ch) for ch in set(normalized)] + [(self._bigrams, gram) for gram in set(_nickname_bigrams(normalized)) if len(gram) == 2]
+
+    def _remove_locked(self, uid: str):
+        doc_id = self._doc_ids.pop(uid, None)
+        if doc_id is None:
+            return
+        for postings, gram in self._postings_for(self._normalized[doc_id]):
+            ids = postings.get(gram)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del postings[gram]
+        self._uids[doc_id] = None
+        self._nicknames[doc_id] = self._normalized[doc_id] = ""
+        self._free_ids.append(doc_id)
+
+    def _add_locked(self, uid: str, nickname: str):
+        normalized = normalize_nickname(nickname)
+        if not normalized:
+            return
+        if self._free_ids:
+            doc_id = self._free_ids.pop()
+            self._uids[doc_id], self._nicknames[doc_id], self._normalized[doc_id] = uid, nickname, normalized
+        else:
+            doc_id = len(self._uids)
+            self._uids.append(uid)
+            self._nicknames.append(nickname)
+            self._normalized.append(normalized)
+        self._doc_ids[uid] = doc_id
+        for postings, gram in self._postings_for(normalized):
+            postings.setdefault(gram, set()).add(doc_id)
+
+    def upsert(self, uid: str, nickname: str):
+        with self._lock:
+            doc_id = self._doc_ids.get(uid)
+            if doc_id is not None and self._nicknames[doc_id] == nickname:
+                return
+            self._remove_locked(uid)
+            self._add_locked(uid, nickname)
+
+    def remove(self, uid: str):
+        with self._lock:
+            self._remove_locked(uid)
+
+    def replace_all(self, players: List[Tuple[str, str]]):
+        """以 (uid, 暱稱) 清單整份重建索引。"""
+        fresh = NicknameSearchIndex()
+        for uid, nickname in players:
+            fresh._remove_locked(uid)
+            fresh._add_locked(uid, nickname)
+        with self._lock:
+            self._doc_ids, self._uids, self._nicknames = fresh._doc_ids, fresh._uids, fresh._nicknames
+            self._normalized, self._free_ids = fresh._normalized, fresh._free_ids
+            self._unigrams, self._bigrams = fresh._unigrams, fresh._bigrams
+            self.loaded_at = time.time()
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[Dict[str, Any]]:
+        """
+        依相符程度排序：完全相同 > 開頭相同 > 包含（越前面越優先）> 模糊相似（相似度越高越優先），
+        同級時暱稱較短者優先。
+        """
+        normalized = normalize_nickname(query)
+        if not normalized or limit <= 0:
+            return []
+        with self._lock:
+            if len(normalized) == 1:
+                candidates = self._unigrams.get(normalized, set())
+            else:
+                posting_sets = sorted((self._bigrams.get(gram, set()) for gram in set(_nickname_bigrams(normalized))), key=len)
+                candidates = set.intersection(*posting_sets) if posting_sets[0] else set()
+
+            ranked: List[Tuple[Any, ...]] = []
+            for doc_id in candidates:
+                name = self._normalized[doc_id]
+                position = name.find(normalized)
+                if position < 0:
+                    continue
+                tier = 0 if name == normalized else (1 if position == 0 else 2)
+                ranked.append((tier, position, -1.0, len(name), self._nicknames[doc_id], doc_id))
+            best = heapq.nsmallest(limit, ranked)
+
+            if fuzzy and len(best) < limit and len(normalized) > 1:
+                query_grams = _nickname_bigrams(normalized)
+                shared: Counter = Counter()
+                for gram in set(query_grams):
+                    shared.update(self._bigrams.get(gram, ()))
+                matched = {row[-1] for row in best}
+                fuzzy_rows = []
+                for doc_id, count in shared.most_common(NICKNAME_FUZZY_MAX_CANDIDATES):
+                    if doc_id in matched:
+                        continue
+                    name = self._normalized[doc_id]
+                    similarity = 2 * count / (len(set(query_grams)) + len(set(_nickname_bigrams(name))))
+                    if similarity >= NICKNAME_FUZZY_MIN_SIMILARITY:
+                        fuzzy_rows.append((3, 0, -similarity, len(name), self._nicknames[doc_id], doc_id))
+                best += heapq.nsmallest(limit - len(best), fuzzy_rows)
+
+            return [
+                {"uid": self._uids[row[-1]], "nickname": self._nicknames[row[-1]], "match": ("exact", "prefix", "substring", "fuzzy")[row[0]]}
+                for row in best
+            ]
+
+
+nickname_index = NicknameSearchIndex()
+_nickname_index_refresh_lock = threading.Lock()
+
+
+def warm_player_search_index() -> Tuple[int, Optional[str]]:
+    """從 users 集合只讀取暱稱欄位，整份重建暱稱搜尋索引。回傳 (索引的玩家數, 錯誤訊息)。"""
+    db = MD_firebase_config.db
+    if not db:
+        return 0, "Firestore 資料庫未初始化。"
+    try:
+        players = [
+            (doc.id, (doc.to_dict() or {}).get("nickname"))
+            for doc in db.collection('users').select(['nickname']).stream()
+        ]
+    except Exception as e:
+        leaderboard_search_services_logger.error(f"載入玩家暱稱索引時發生錯誤: {e}", exc_info=True)
+        return 0, "載入玩家暱稱索引時發生錯誤。"
+    players = [(uid, nickname) for uid, nickname in players if nickname]
+    nickname_index.replace_all(players)
+    leaderboard_search_services_logger.info(f"玩家暱稱索引已載入，共 {len(players)} 位玩家。")
+    return len(players), None
+
+
+def update_player_search_index(player_id: str, nickname: Optional[str]):
+    """玩家暱稱寫入 users 集合後同步更新索引。"""
+    if nickname:
+        nickname_index.upsert(player_id, nickname)
+    else:
+        nickname_index.remove(player_id)
+
+
 # --- 排行榜與玩家搜尋服務 ---
 # 移除此服務中獲取 NPC 怪獸的邏輯，使其僅處理玩家怪獸
 def get_all_player_selected_monsters_service(game_configs: GameConfigs) -> List[Monster]:
     """
-    獲取所有玩家設定為「出戰」的怪獸，用於排行榜。
+    獲取所有玩家設定為「出戰」的怪獸（會讀取每位玩家的完整資料，供錦標賽等批次作業使用）。
     """
     if not MD_firebase_config.db:
         leaderboard_search_services_logger.error("Firestore 資料庫未初始化 (get_all_player_selected_monsters_service 內部)。")
@@ -50,52 +601,15 @@ def get_all_player_selected_monsters_service(game_configs: GameConfigs) -> List[
 
     all_selected_monsters: List[Monster] = []
     try:
-        users_ref = db.collection('users')
-        
-        # --- 核心修改處 START ---
-        # 預先載入所有 DNA 範本，並轉換成以 ID 為鍵的字典，以便快速查找
-        all_dna_templates_list = game_configs.get("dna_fragments", [])
-        dna_templates_map = {dna['id']: dna for dna in all_dna_templates_list}
-        # --- 核心修改處 END ---
-
-        for user_doc in users_ref.stream(): 
-            game_data_doc_ref = user_doc.reference.collection('gameData').document('main')
-            game_data_doc = game_data_doc_ref.get()
+        dna_templates_map = get_config_index(game_configs).dna_by_id
+        for user_doc in db.collection('users').stream(): 
+            game_data_doc = user_doc.reference.collection('gameData').document('main').get()
             if game_data_doc.exists:
                 player_game_data = game_data_doc.to_dict()
                 if player_game_data:
-                    selected_monster_id = player_game_data.get("selectedMonsterId")
-                    farmed_monsters = player_game_data.get("farmedMonsters", [])
-                    player_nickname = player_game_data.get("nickname", user_doc.id)
-
-                    if selected_monster_id:
-                        for monster_dict in farmed_monsters:
-                            if monster_dict.get("id") == selected_monster_id:
-                                monster_copy = copy.deepcopy(monster_dict)
-                                monster_copy["owner_nickname"] = player_nickname # type: ignore
-                                monster_copy["owner_id"] = user_doc.id # type: ignore
-                                
-                                # --- 核心修改處 START ---
-                                # 優化查詢頭像 DNA 的邏輯
-                                head_dna_info = { "type": "無", "rarity": "普通" } 
-                                constituent_ids = monster_copy.get("constituent_dna_ids", [])
-                                
-                                if constituent_ids:
-                                    head_dna_id = constituent_ids[0]
-                                    # 直接從預載的 map 中查找，效率更高
-                                    head_dna_template = dna_templates_map.get(head_dna_id)
-                                    if head_dna_template:
-                                        head_dna_info["type"] = head_dna_template.get("type", "無")
-                                        head_dna_info["rarity"] = head_dna_template.get("rarity", "普通")
-                                
-                                monster_copy["head_dna_info"] = head_dna_info # type: ignore
-                                # --- 核心修改處 END ---
-
-                                if "farmStatus" not in monster_copy:
-                                    monster_copy["farmStatus"] = {"isTraining": False, "isBattling": False} # type: ignore
-                                
-                                all_selected_monsters.append(monster_copy) # type: ignore
-                                break
+                    monster_entry = _build_selected_monster_entry(user_doc.id, player_game_data, dna_templates_map)
+                    if monster_entry:
+                        all_selected_monsters.append(monster_entry)
         
         leaderboard_search_services_logger.info(f"成功獲取 {len(all_selected_monsters)} 隻玩家出戰怪獸。")
         return all_selected_monsters
@@ -104,47 +618,79 @@ def get_all_player_selected_monsters_service(game_configs: GameConfigs) -> List[
         return []
 
 def get_monster_leaderboard_service(game_configs: GameConfigs, top_n: int = 10) -> List[Monster]:
-    """
-    獲取怪獸排行榜 (不再返回 NPC 怪獸，因為需求是所有怪獸都歸玩家所有)。
-    此函數現在為空實現，等待 MD_routes.py 中調用 get_all_player_selected_monsters_service。
-    """
-    leaderboard_search_services_logger.info("根據需求，排行榜不再包含 NPC 怪獸。此服務返回空列表。")
-    return []
+    """獲取怪獸排行榜：優先使用行程內排名，尚未載入時從排行榜集合依出戰怪獸分數取前 top_n 名。"""
+    if _ensure_rankings_fresh(monster_rankings):
+        return monster_rankings.page(top_n)[0] # type: ignore
+    if not MD_firebase_config.db:
+        leaderboard_search_services_logger.error("Firestore 資料庫未初始化 (get_monster_leaderboard_service 內部)。")
+        return []
+
+    db = MD_firebase_config.db
+    try:
+        query = db.collection(LEADERBOARD_COLLECTION).order_by("monster_score", direction=firestore.Query.DESCENDING).limit(top_n)
+        entries = (doc.to_dict() or {} for doc in query.stream())
+        return [entry["monster"] for entry in entries if entry.get("monster")]
+    except Exception as e:
+        leaderboard_search_services_logger.error(f"獲取怪獸排行榜時發生錯誤: {e}", exc_info=True)
+        return []
 
 def get_player_leaderboard_service(game_configs: GameConfigs, top_n: int = 10) -> List[PlayerStats]:
-    """獲取玩家排行榜。"""
+    """獲取玩家排行榜：優先使用行程內排名，尚未載入時從排行榜集合依玩家分數取前 top_n 名。"""
+    if _ensure_rankings_fresh(player_rankings):
+        return player_rankings.page(top_n)[0] # type: ignore
     if not MD_firebase_config.db:
         leaderboard_search_services_logger.error("Firestore 資料庫未初始化 (get_player_leaderboard_service 內部)。")
         return []
     
     db = MD_firebase_config.db
-
-    all_player_stats: List[PlayerStats] = []
     try:
-        users_ref = db.collection('users')
-        for user_doc in users_ref.stream():
-            game_data_doc_ref = user_doc.reference.collection('gameData').document('main')
-            game_data_doc = game_data_doc_ref.get()
-            if game_data_doc.exists:
-                player_game_data = game_data_doc.to_dict()
-                if player_game_data and player_game_data.get("playerStats"):
-                    stats: PlayerStats = player_game_data["playerStats"] # type: ignore
-                    if "nickname" not in stats or not stats["nickname"]:
-                        stats["nickname"] = player_game_data.get("nickname", user_doc.id) # type: ignore
-                    stats["uid"] = user_doc.id # 新增：將 UID 加入到 stats 物件中
-                    all_player_stats.append(stats)
-
-        all_player_stats.sort(key=lambda ps: ps.get("score", 0), reverse=True)
-        return all_player_stats[:top_n]
+        query = db.collection(LEADERBOARD_COLLECTION).order_by("player_score", direction=firestore.Query.DESCENDING).limit(top_n)
+        entries = (doc.to_dict() or {} for doc in query.stream())
+        return [entry["player_stats"] for entry in entries if entry.get("player_stats")]
     except Exception as e:
         leaderboard_search_services_logger.error(f"獲取玩家排行榜時發生錯誤: {e}", exc_info=True)
         return []
 
-import firebase_admin
-from firebase_admin import firestore
+def _get_rankings(board: str) -> Optional[RankedLeaderboard]:
+    return {"players": player_rankings, "monsters": monster_rankings}.get(board)
+
+def get_leaderboard_page_service(board: str, limit: int, cursor: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    以游標分頁讀取排行榜 (board 為 "players" 或 "monsters")。
+    回傳 ({"entries": [...], "next_cursor": ...}, 錯誤訊息)。
+    """
+    rankings = _get_rankings(board)
+    if rankings is None:
+        return None, f"未知的排行榜類型: {board}"
+    position = None
+    if cursor:
+        position = decode_leaderboard_cursor(cursor)
+        if position is None:
+            return None, "無效的分頁游標。"
+    if not _ensure_rankings_fresh(rankings):
+        return None, "排行榜排名尚在載入中，請稍後再試。"
+    entries, next_cursor = rankings.page(max(1, min(limit, MAX_LEADERBOARD_PAGE_SIZE)), position)
+    return {"entries": entries, "next_cursor": next_cursor}, None
+
+def get_leaderboard_rank_service(board: str, player_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """查詢玩家在排行榜上的名次，回傳 ({"rank", "total", "score", "entry"}, 錯誤訊息)。"""
+    rankings = _get_rankings(board)
+    if rankings is None:
+        return None, f"未知的排行榜類型: {board}"
+    if not _ensure_rankings_fresh(rankings):
+        return None, "排行榜排名尚在載入中，請稍後再試。"
+    rank_info = rankings.rank_of(player_id)
+    if rank_info is None:
+        return None, "該玩家不在排行榜上。"
+    return rank_info, None
 
 def search_players_service(nickname_query: str, limit: int = 10) -> List[Dict[str, str]]:
-    """根據暱稱搜尋玩家。"""
+    """
+    根據暱稱搜尋玩家：優先使用行程內的暱稱索引（支援子字串與模糊比對），
+    索引尚未載入時改用 Firestore 的暱稱前綴範圍查詢。
+    """
+    if nickname_query and _ensure_fresh(nickname_index, warm_player_search_index, _nickname_index_refresh_lock, "player-search-index-refresh"):
+        return nickname_index.search(nickname_query, limit)
     if not MD_firebase_config.db:
         leaderboard_search_services_logger.error("Firestore 資料庫未初始化 (search_players_service 內部)。")
         return []
@@ -28,7 +28,7 @@ def get_mailbox_route():
         return error_response
 
     game_configs = _get_game_configs_data_from_app_context()
-    player_data, _ = get_player_data_service(user_id, None, game_configs)
+    player_data, _ = get_player_data_service(user_id, None, game_configs, sections=("mailbox",))
 
     if not player_data:
         return jsonify({"error": "找不到玩家資料。"}), 404
@@ -48,7 +48,7 @@ def delete_mail_route(mail_id: str):
         return error_response
 
     game_configs = _get_game_configs_data_from_app_context()
-    player_data, _ = get_player_data_service(user_id, None, game_configs)
+    player_data, _ = get_player_data_service(user_id, None, game_configs, sections=("mailbox",))
     if not player_data:
         return jsonify({"error": "找不到玩家資料。"}), 404
 
@@ -70,7 +70,7 @@ def mark_as_read_route(mail_id: str):
         return error_response
 
     game_configs = _get_game_configs_data_from_app_context()
-    player_data, _ = get_player_data_service(user_id, None, game_configs)
+    player_data, _ = get_player_data_service(user_id, None, game_configs, sections=("mailbox",))
     if not player_data:
         return jsonify({"error": "找不到玩家資料。"}), 404
 
@@ -129,7 +129,7 @@ def claim_attachments_route(mail_id: str):
         return error_response
 
     game_configs = _get_game_configs_data_from_app_context()
-    player_data, _ = get_player_data_service(user_id, nickname, game_configs)
+    player_data, _ = get_player_data_service(user_id, nickname, game_configs, sections=("mailbox",))
     if not player_data:
         return jsonify({"error": "找不到玩家資料。"}), 404
 
@@ -64,7 +64,7 @@ def send_mail_to_player_service(
     """
     處理一個玩家向另一個玩家或系統發送信件的邏輯。
     """
-    from .player_services import save_player_data_service, get_player_data_service
+    from .player_services import save_player_data_service, get_player_data_service, track_player_read
     
     db = MD_firebase_config.db
     if not db:
@@ -104,7 +104,8 @@ def send_mail_to_player_service(
                 mail_logger.error(f"寄信失敗：找不到收件人 {recipient_id} 的遊戲資料。")
                 return False, "找不到指定的收件人。"
 
-            recipient_data: 'PlayerGameData' = recipient_doc.to_dict() # type: ignore
+            # 收件人的信箱不需讀出，新信件在存檔時併入既有信箱；存檔時以這裡讀到的版本比對
+            recipient_data: 'PlayerGameData' = track_player_read(recipient_id, recipient_doc) # type: ignore
 
             sender_data_modified = False
             sender_data = None
@@ -30,7 +30,8 @@ from backend.exchange_routes import exchange_bp
 from backend.tournament_routes import tournament_bp
 
 from backend import MD_firebase_config
-from backend.MD_config_services import load_all_game_configs_from_firestore
+from backend.MD_config_services import game_config_provider, start_config_watcher, CONFIG_SOURCE, ConfigLoadError
+from backend.leaderboard_search_services import warm_leaderboard_rankings, warm_player_search_index
 
 setup_logging()
 app_logger = logging.getLogger(__name__)
@@ -129,20 +130,31 @@ else:
     app_logger.error("因 Firebase Admin SDK 初始化問題，無法獲取 Firestore 客戶端。")
     firebase_app_initialized = False
 
-if firebase_app_initialized and MD_firebase_config.db is not None:
+# MD_CONFIG_SOURCE=local 時設定直接從本地原始檔載入，不需要 Firestore
+if CONFIG_SOURCE == "local" or (firebase_app_initialized and MD_firebase_config.db is not None):
     with app.app_context():
-        app.config['MD_GAME_CONFIGS'] = load_all_game_configs_from_firestore()
-        if app.config.get('MD_GAME_CONFIGS'):
+        try:
+            game_config_provider.reload()
+        except ConfigLoadError:
+            pass
+        if game_config_provider.is_loaded:
             app_logger.info("遊戲設定已成功載入到 Flask 應用程式配置中。")
         else:
             app_logger.error("遊戲設定載入失敗或為空。")
+    # 每個 worker 各自在背景監看設定版本，後台修改後自動換上新設定
+    start_config_watcher(float(os.environ.get('MD_CONFIG_WATCH_INTERVAL', '5')))
 else:
     app_logger.warning("由於 Firebase 初始化或 Firestore 客戶端設定問題 (MD_firebase_config.db is None)，未載入遊戲設定。")
 
+# 啟動時先載入行程內的排行榜排名與暱稱搜尋索引，之後由存檔與暱稱更新流程即時更新
+if firebase_app_initialized and MD_firebase_config.db is not None:
+    warm_leaderboard_rankings()
+    warm_player_search_index()
+
 
 @app.route('/')
 def index():
-    game_configs_loaded = bool(app.config.get('MD_GAME_CONFIGS'))
+    game_configs_loaded = game_config_provider.is_loaded
     firebase_status = "已初始化" if firebase_app_initialized and MD_firebase_config.db is not None else "初始化失敗或 Firestore 客戶端未設定"
     return jsonify({
         "message": "怪獸養成後端服務運行中！",
@@ -14,6 +14,7 @@ from .MD_models import (
 )
 # 從 MD_firebase_config 導入 db 實例
 from . import MD_firebase_config
+from .MD_config_services import get_config_index
 # 從 utils_services 導入 calculate_dna_value (如果它被定義為通用輔助函數的話)
 # 或者如果 calculate_dna_value 僅在 healing/recharge 中使用，那麼就不要在這裡導入
 
@@ -102,12 +103,13 @@ def absorb_defeated_monster_service(
 
     absorption_cfg: AbsorptionConfig = game_configs.get("absorption_config", DEFAULT_GAME_CONFIGS_FOR_ABSORPTION["absorption_config"]) # type: ignore
     all_dna_templates: List[DNAFragment] = game_configs.get("dna_fragments", DEFAULT_GAME_CONFIGS_FOR_ABSORPTION["dna_fragments"]) # type: ignore
+    dna_templates_by_id = get_config_index(game_configs).dna_by_id
     extracted_dna_templates: List[DNAFragment] = []
 
     defeated_constituent_ids = defeated_monster_snapshot.get("constituent_dna_ids", [])
     if defeated_constituent_ids:
         for dna_template_id in defeated_constituent_ids:
-            dna_template = next((t for t in all_dna_templates if t.get("id") == dna_template_id), None)
+            dna_template = dna_templates_by_id.get(dna_template_id)
             if dna_template:
                 extraction_chance = absorption_cfg.get("dna_extraction_chance_base", 0.75)
                 rarity_modifier = absorption_cfg.get("dna_extraction_rarity_modifier", {}).get(dna_template.get("rarity", "普通"), 1.0) # type: ignore
@@ -12,9 +12,10 @@ import re # 導入 re 模組
 
 # 從專案的其他模組導入必要的模型
 from .MD_models import PlayerGameData, Monster, GameConfigs, ChatHistoryEntry, Skill
-from .player_services import get_player_data_service
+from .player_services import get_player_data_service, MONSTER_DETAILS_SECTION
 # 從共用函式庫導入感情值計算工具
 from .utils_services import update_bond_with_diminishing_returns
+from .MD_config_services import get_config_index
 
 # --- 核心修改處 START ---
 # 從 MD_ai_services 的導入列表中，移除會導致錯誤的 DEFAULT_CHAT_REPLY
@@ -55,7 +56,7 @@ def handle_skill_toggle_request_service(
     """
     處理切換技能開關的請求，讓 AI 根據情境自行決定是否同意。
     """
-    player_data, _ = get_player_data_service(player_id, None, game_configs)
+    player_data, _ = get_player_data_service(player_id, None, game_configs, sections=(MONSTER_DETAILS_SECTION,))
     if not player_data:
         return {"success": False, "error": "找不到玩家資料。"}
 
@@ -146,7 +147,7 @@ def generate_monster_interaction_response_service(
     """
     生成怪獸對玩家物理互動的反應。
     """
-    player_data, _ = get_player_data_service(player_id, None, game_configs)
+    player_data, _ = get_player_data_service(player_id, None, game_configs, sections=(MONSTER_DETAILS_SECTION,))
     if not player_data:
         chat_logger.error(f"無法獲取玩家 {player_id} 的資料。")
         return None
@@ -242,7 +243,7 @@ def generate_monster_chat_response_service(
     """
     生成怪獸的聊天回應，並管理其對話歷史。
     """
-    player_data, _ = get_player_data_service(player_id, None, game_configs)
+    player_data, _ = get_player_data_service(player_id, None, game_configs, sections=(MONSTER_DETAILS_SECTION,))
     if not player_data:
         chat_logger.error(f"無法獲取玩家 {player_id} 的資料。")
         return None
@@ -263,7 +264,8 @@ def generate_monster_chat_response_service(
         monster_data=monster_to_chat,
         player_data=player_data,
         chat_history=chat_history,
-        player_message=player_message
+        player_message=player_message,
+        game_configs=game_configs
     )
 
     if not ai_reply_text:
@@ -290,7 +292,8 @@ def get_ai_chat_completion(
     monster_data: Monster,
     player_data: PlayerGameData,
     chat_history: List[ChatHistoryEntry],
-    player_message: str
+    player_message: str,
+    game_configs: GameConfigs
 ) -> Optional[str]:
     """
     根據怪獸的完整資料、玩家資訊和對話歷史，生成個人化的聊天回應。
@@ -306,8 +309,6 @@ def get_ai_chat_completion(
     bond_tone_instruction = _get_bond_level_tone_instruction(bond_points)
 
     try:
-        from .MD_config_services import load_all_game_configs_from_firestore
-        game_configs = load_all_game_configs_from_firestore()
         knowledge_context = _get_world_knowledge_context(player_message, game_configs, player_data, monster_data.get("id", ""))
     except Exception as e:
         ai_logger.error(f"查找世界知識時出錯: {e}", exc_info=True)
@@ -347,7 +348,8 @@ def get_ai_chat_completion(
             should_ask_question = True
 
         skills_with_desc = [f"「{s.get('name')}」" for s in monster_data.get("skills", [])]
-        dna_with_desc = [f"「{d.get('name')}」" for d in game_configs.get("dna_fragments", []) if d.get("id") in monster_data.get("constituent_dna_ids", [])]
+        dna_by_id = get_config_index(game_configs).dna_by_id
+        dna_with_desc = [f"「{dna_by_id[dna_id].get('name')}」" for dna_id in dict.fromkeys(monster_data.get("constituent_dna_ids", [])) if dna_id in dna_by_id]
 
         activity_log_entries = monster_data.get("activityLog", [])
         recent_activities_str = ""
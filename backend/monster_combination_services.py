@@ -20,6 +20,7 @@ from .MD_models import (
 from .MD_ai_services import generate_monster_ai_details
 from .player_services import _add_player_log
 from .utils_services import generate_monster_full_nickname, calculate_exp_to_next_level, get_effective_skill_with_level
+from .MD_config_services import get_config_index
 
 monster_combination_services_logger = logging.getLogger(__name__)
 
@@ -47,13 +48,8 @@ def _generate_combination_key(dna_template_ids: List[str]) -> str:
 
 def _calculate_final_resistances(base_resistances: Dict[str, int], game_configs: Dict[str, Any]) -> Dict[str, int]:
     """根據克制關係計算最終的元素抗性。"""
-    chart = game_configs.get("elemental_advantage_chart", {})
+    counter_pairs = get_config_index(game_configs).elemental_matrix.counter_pairs
     final_res = base_resistances.copy()
-    counter_pairs = []
-    for attacker, defender_map in chart.items():
-        for defender, multiplier in defender_map.items():
-            if multiplier > 1.0:
-                counter_pairs.append((attacker, defender))
     for _ in range(2):
         for stronger, weaker in counter_pairs:
             res_strong = final_res.get(stronger, 0)
@@ -87,11 +83,12 @@ def combine_dna_service(dna_objects_from_request: List[Dict[str, Any]], game_con
     combined_dnas_data: List[Dict[str, Any]] = []
     constituent_dna_template_ids: List[str] = []
     valid_dna_objects = [dna for dna in dna_objects_from_request if dna and isinstance(dna, dict)]
+    config_index = get_config_index(game_configs)
     
     for dna_obj in valid_dna_objects:
         template_id = dna_obj.get("baseId")
         if template_id and isinstance(template_id, str):
-            dna_template = next((f for f in game_configs.get("dna_fragments", []) if f.get("id") == template_id), None)
+            dna_template = config_index.dna_by_id.get(template_id)
             if dna_template:
                 combined_dnas_data.append(dna_template)
                 constituent_dna_template_ids.append(template_id)
@@ -175,7 +172,7 @@ def combine_dna_service(dna_objects_from_request: List[Dict[str, Any]], game_con
         highest_rarity_index = max((rarity_order.index(dna.get("rarity", "普通")) for dna in combined_dnas_data if dna.get("rarity") in rarity_order), default=0)
         monster_rarity_name = rarity_order[highest_rarity_index]
         
-        rarity_key = next((k for k, v in all_rarities_db.items() if v.get("name") == monster_rarity_name), "COMMON")
+        rarity_key = config_index.rarity_key_by_name.get(monster_rarity_name, "COMMON")
         monster_rarity_data = all_rarities_db.get(rarity_key, {})
 
         potential_skills = []
@@ -266,7 +263,7 @@ def combine_dna_service(dna_objects_from_request: List[Dict[str, Any]], game_con
         final_resistances = _calculate_final_resistances(dict(initial_resistances), game_configs)
         standard_monster_data["resistances"] = final_resistances
         
-        ai_details = generate_monster_ai_details(standard_monster_data)
+        ai_details = generate_monster_ai_details(standard_monster_data, game_configs)
         standard_monster_data.update(ai_details)
 
         score = (standard_monster_data["initial_max_hp"] // 10) + standard_monster_data["attack"] + standard_monster_data["defense"] + (standard_monster_data["speed"] // 2) + (standard_monster_data["crit"] * 2) + (len(standard_monster_data["skills"]) * 15) + (rarity_order.index(standard_monster_data["rarity"]) * 30)
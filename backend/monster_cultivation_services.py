@@ -20,6 +20,7 @@ from . import MD_firebase_config
 from .player_services import get_player_data_service, save_player_data_service
 # 新增：導入新的共用函式
 from .utils_services import calculate_exp_to_next_level, get_effective_skill_with_level
+from .MD_config_services import get_config_index
 
 monster_cultivation_services_logger = logging.getLogger(__name__)
 
@@ -281,17 +282,21 @@ def complete_cultivation_service(
             monster_rarity: RarityNames = monster_to_update.get("rarity", "普通")
             loot_table = cultivation_cfg.get("dna_find_loot_table", {}).get(monster_rarity, {"普通": 1.0})
             
-            all_dna_templates = game_configs.get("dna_fragments", [])
+            dna_by_element = get_config_index(game_configs).dna_by_element
             monster_elements = monster_to_update.get("elements", ["無"])
             dna_pool = []
-            if element_bias_list: dna_pool = [dna for dna in all_dna_templates if dna.get("type") in element_bias_list]
-            if not dna_pool: dna_pool = [dna for dna in all_dna_templates if dna.get("type") in monster_elements]
-            if not dna_pool: dna_pool = all_dna_templates
+            if element_bias_list: dna_pool = [dna for element in dict.fromkeys(element_bias_list) for dna in dna_by_element.get(element, ())]
+            if not dna_pool: dna_pool = [dna for element in dict.fromkeys(monster_elements) for dna in dna_by_element.get(element, ())]
+            if not dna_pool: dna_pool = game_configs.get("dna_fragments", [])
+            # 預先依稀有度分組，避免每次抽取都重掃整個 DNA 池
+            dna_pool_by_rarity: Dict[str, List[DNAFragment]] = {}
+            for dna in dna_pool:
+                dna_pool_by_rarity.setdefault(dna.get("rarity"), []).append(dna)
             for _ in range(min(num_items, len(dna_pool))):
                 if not dna_pool or not loot_table: break
                 rarity_pool, rarity_weights = zip(*loot_table.items())
                 chosen_rarity = random.choices(rarity_pool, weights=rarity_weights, k=1)[0]
-                quality_pool = [dna for dna in dna_pool if dna.get("rarity") == chosen_rarity]
+                quality_pool = dna_pool_by_rarity.get(chosen_rarity)
                 if quality_pool: items_obtained.append(random.choice(quality_pool))
     
     monster_name_for_story = monster_to_update.get('nickname', '一隻怪獸')
@@ -12,6 +12,7 @@ from .MD_models import (
 )
 # 從 MD_firebase_config 導入 db 實例
 from . import MD_firebase_config
+from .MD_config_services import get_config_index
 
 monster_disassembly_services_logger = logging.getLogger(__name__)
 
@@ -77,11 +78,12 @@ def disassemble_monster_service(
     returned_dna_templates: List[DNAFragment] = []
     constituent_ids = monster_to_disassemble.get("constituent_dna_ids", [])
     all_dna_templates: List[DNAFragment] = game_configs.get("dna_fragments", DEFAULT_GAME_CONFIGS_FOR_DISASSEMBLY["dna_fragments"]) # type: ignore
+    config_index = get_config_index(game_configs)
 
     if constituent_ids:
         # 如果怪獸有構成 DNA (即由組合而來)，則返回這些 DNA
         for template_id in constituent_ids:
-            found_template = next((t for t in all_dna_templates if t.get("id") == template_id), None)
+            found_template = config_index.dna_by_id.get(template_id)
             if found_template:
                 returned_dna_templates.append(found_template)
     else:
@@ -92,12 +94,12 @@ def disassemble_monster_service(
 
         # 嘗試返回與怪獸稀有度和元素相關的 DNA
         eligible_templates = [
-            t for t in all_dna_templates
-            if t.get("rarity") == monster_rarity and any(el == t.get("type") for el in monster_elements) # type: ignore
+            t for t in config_index.dna_by_rarity.get(monster_rarity, ())
+            if any(el == t.get("type") for el in monster_elements) # type: ignore
         ]
         if not eligible_templates:
             # 如果沒有匹配元素和稀有度的，則只按稀有度篩選
-            eligible_templates = [t for t in all_dna_templates if t.get("rarity") == monster_rarity]
+            eligible_templates = list(config_index.dna_by_rarity.get(monster_rarity, ()))
         if not eligible_templates:
             # 如果還是沒有，則從所有 DNA 中隨機選取
             eligible_templates = all_dna_templates
@@ -17,6 +17,7 @@ from .MD_models import (
 # 從 MD_firebase_config 導入 db 實例
 from . import MD_firebase_config
 from .utils_services import update_bond_with_diminishing_returns
+from .MD_config_services import get_config_index
 
 
 monster_healing_services_logger = logging.getLogger(__name__)
@@ -62,9 +63,9 @@ def calculate_dna_value(dna_instance: PlayerOwnedDNA, game_configs: GameConfigs)
     rarities_config: Dict[str, RarityDetail] = game_configs.get("rarities", DEFAULT_GAME_CONFIGS_FOR_HEALING["rarities"]) # type: ignore
     dna_rarity_name = dna_instance.get("rarity", "普通")
 
-    rarity_key_found = next((r_key for r_key, r_detail in rarities_config.items() if r_detail.get("name") == dna_rarity_name), None)
-    if rarity_key_found:
-        base_rarity_value = rarities_config[rarity_key_found].get("value_factor", 10) # type: ignore
+    rarity_detail_found = get_config_index(game_configs).rarity_by_name.get(dna_rarity_name)
+    if rarity_detail_found:
+        base_rarity_value = rarity_detail_found.get("value_factor", 10) # type: ignore
     else:
         base_rarity_value = rarities_config.get("COMMON", {}).get("value_factor", 10) # type: ignore
 
@@ -0,0 +1,204 @@
+# backend/player_migration_services.py
+# 玩家資料結構版本 (schema_version) 與依序執行的遷移步驟；讀取時只對舊版本文件執行，並提供離線批次遷移
+# 使用方式：python -m backend.player_migration_services [--workers 8]
+# 後台路由則以背景工作執行同一流程（admin_job_services）
+
+import os
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+from .utils_services import generate_monster_full_nickname
+from .MD_config_services import get_config_index
+
+player_migration_logger = logging.getLogger(__name__)
+
+# 批次遷移同時處理的玩家數；每位玩家主要是等待 Firestore 讀寫，適合以執行緒平行
+PLAYER_MIGRATION_WORKERS = int(os.environ.get("MD_PLAYER_MIGRATION_WORKERS", "8"))
+
+# 遷移步驟：(升級後的版本, 名稱, 函式)；函式直接修改傳入的遊戲資料，回傳是否有變更。
+# 每個步驟都必須可重複執行，版本號只增不減，新步驟一律加在最後。
+MigrationStep = Tuple[int, str, Callable[[Dict[str, Any], str, Dict[str, Any]], bool]]
+
+
+def _migrate_default_gold(game_data: Dict[str, Any], player_id: str, game_configs: Dict[str, Any]) -> bool:
+    player_stats = game_data.setdefault("playerStats", {})
+    if "gold" in player_stats:
+        return False
+    player_stats["gold"] = game_configs.get("value_settings", {}).get("starting_gold", 500)
+    return True
+
+
+def _migrate_default_pvp_points(game_data: Dict[str, Any], player_id: str, game_configs: Dict[str, Any]) -> bool:
+    player_stats = game_data.setdefault("playerStats", {})
+    if "pvp_points" in player_stats:
+        return False
+    player_stats["pvp_points"] = 1000
+    player_stats["pvp_tier"] = "尚未定位"
+    return True
+
+
+def _migrate_title_objects(game_data: Dict[str, Any], player_id: str, game_configs: Dict[str, Any]) -> bool:
+    """舊資料的稱號是名稱字串，轉換為設定中的稱號物件。"""
+    player_stats = game_data.setdefault("playerStats", {})
+    current_titles = player_stats.get("titles", [])
+    if not current_titles or not isinstance(current_titles[0], str):
+        return False
+    current_title_names = set(current_titles)
+    player_stats["titles"] = [t for t in game_configs.get("titles", []) if t.get("name") in current_title_names]
+    return True
+
+
+def _migrate_equipped_title(game_data: Dict[str, Any], player_id: str, game_configs: Dict[str, Any]) -> bool:
+    player_stats = game_data.setdefault("playerStats", {})
+    if "equipped_title_id" in player_stats:
+        return False
+    current_titles_obj = player_stats.get("titles", [])
+    default_equip_id = None
+    if current_titles_obj and isinstance(current_titles_obj[0], dict) and "id" in current_titles_obj[0]:
+        default_equip_id = current_titles_obj[0]["id"]
+    else:
+        default_title_obj = get_config_index(game_configs).titles_by_id.get("title_001")
+        if default_title_obj:
+            if "titles" not in player_stats or not isinstance(player_stats["titles"], list):
+                player_stats["titles"] = []
+            if not any(t.get("id") == default_title_obj["id"] for t in player_stats["titles"]):
+                player_stats["titles"].insert(0, default_title_obj)
+            default_equip_id = default_title_obj["id"]
+    if not default_equip_id:
+        return False
+    player_stats["equipped_title_id"] = default_equip_id
+    return True
+
+
+def _migrate_monster_nicknames(game_data: Dict[str, Any], player_id: str, game_configs: Dict[str, Any]) -> bool:
+    """舊版怪獸暱稱由稱號與成就組成，改為只以屬性暱稱重建。"""
+    naming_constraints = game_configs.get("naming_constraints", {})
+    changed = False
+    for monster in game_data.get("farmedMonsters", []) or []:
+        if "player_title_part" not in monster and "achievement_part" not in monster:
+            continue
+        if "player_title_part" not in monster:
+            monster["player_title_part"] = ""
+        if "achievement_part" not in monster:
+            monster["achievement_part"] = "新秀"
+        monster["nickname"] = generate_monster_full_nickname(
+            "",
+            "",
+            monster.get("element_nickname_part", monster.get("elements", ["無"])[0]),
+            naming_constraints
+        )
+        changed = True
+    return changed
+
+
+def _migrate_dna_base_ids(game_data: Dict[str, Any], player_id: str, game_configs: Dict[str, Any]) -> bool:
+    """舊版 DNA 的 id 就是模板 ID，改存到 baseId 並產生實例 ID。"""
+    changed = False
+    for dna_list_key in ["playerOwnedDNA", "dnaCombinationSlots"]:
+        for i, dna_item in enumerate(game_data.get(dna_list_key, []) or []):
+            if dna_item and isinstance(dna_item, dict) and "baseId" not in dna_item:
+                player_migration_logger.info(f"為玩家 {player_id} 的 DNA (ID: {dna_item.get('id', '')}) 進行 'baseId' 遷移。")
+                dna_item["baseId"] = dna_item.get("id", "")
+                dna_item["id"] = f"dna_inst_{player_id}_{int(time.time() * 1000)}_{i}"
+                changed = True
+    return changed
+
+
+PLAYER_MIGRATION_STEPS: List[MigrationStep] = [
+    (1, "default_gold", _migrate_default_gold),
+    (2, "default_pvp_points", _migrate_default_pvp_points),
+    (3, "title_objects", _migrate_title_objects),
+    (4, "equipped_title", _migrate_equipped_title),
+    (5, "monster_nicknames", _migrate_monster_nicknames),
+    (6, "dna_base_ids", _migrate_dna_base_ids),
+]
+PLAYER_SCHEMA_VERSION = PLAYER_MIGRATION_STEPS[-1][0]
+
+
+def needs_player_upgrade(game_data: Dict[str, Any]) -> bool:
+    return game_data.get("schema_version", 0) < PLAYER_SCHEMA_VERSION
+
+
+def upgrade_player_data(game_data: Dict[str, Any], player_id: str, game_configs: Dict[str, Any]) -> List[str]:
+    """
+    依序執行版本高於文件 schema_version 的遷移步驟並更新版本號，回傳實際有改動資料的步驟名稱。
+    """
+    current_version = game_data.get("schema_version", 0)
+    applied: List[str] = []
+    for version, name, migrate in PLAYER_MIGRATION_STEPS:
+        if version <= current_version:
+            continue
+        if migrate(game_data, player_id, game_configs):
+            applied.append(name)
+    game_data["schema_version"] = max(current_version, PLAYER_SCHEMA_VERSION)
+    if applied:
+        player_migration_logger.info(f"玩家 {player_id} 的資料已從版本 {current_version} 升級: {applied}")
+    return applied
+
+
+def _migrate_single_player(db: Any, player_id: str, game_configs: Dict[str, Any]) -> str:
+    """遷移單一玩家的主文件，回傳 "migrated" / "skipped" / "missing" / "failed"。"""
+    from .player_services import track_player_read, save_player_data_service, PLAYER_STORAGE_LAYOUT_VERSION
+    try:
+        main_doc = db.collection('users').document(player_id).collection('gameData').document('main').get()
+        if not main_doc.exists:
+            return "missing"
+        stored = main_doc.to_dict() or {}
+        if not needs_player_upgrade(stored) and stored.get("storageLayout", 1) >= PLAYER_STORAGE_LAYOUT_VERSION:
+            return "skipped"
+        # 以剛讀到的文件作為比對基準，存檔時只寫入遷移改動的欄位；內嵌的舊區塊會寫入子文件並從 main 刪除
+        game_data = track_player_read(player_id, main_doc)
+        upgrade_player_data(game_data, player_id, game_configs)
+        saved = save_player_data_service(player_id, game_data, touch_last_seen=False)
+        return "migrated" if saved else "failed"
+    except Exception as e:
+        player_migration_logger.error(f"遷移玩家 {player_id} 的資料時發生錯誤: {e}", exc_info=True)
+        return "failed"
+
+
+def migrate_all_players_service(
+    game_configs: Dict[str, Any], max_workers: Optional[int] = None
+) -> Tuple[Dict[str, int], Optional[str]]:
+    """
+    將所有玩家文件升級到目前的 schema_version 與分檔格式，已是最新的文件會略過，可重複執行。
+    回傳 ({"migrated", "skipped", "missing", "failed"}, 錯誤訊息)。
+    """
+    from .MD_firebase_config import db
+    counts = {"migrated": 0, "skipped": 0, "missing": 0, "failed": 0}
+    if not db:
+        return counts, "Firestore 資料庫未初始化。"
+    workers = max(1, max_workers or PLAYER_MIGRATION_WORKERS)
+    try:
+        # 只需要玩家 ID，不讀取 users 文件內容
+        player_ids = (doc.id for doc in db.collection('users').select([]).stream())
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="player-migration") as executor:
+            for outcome in executor.map(lambda player_id: _migrate_single_player(db, player_id, game_configs), player_ids):
+                counts[outcome] += 1
+        player_migration_logger.info(f"玩家資料遷移完成 (版本 {PLAYER_SCHEMA_VERSION}，worker {workers} 個): {counts}")
+        return counts, None
+    except Exception as e:
+        player_migration_logger.error(f"批次遷移玩家資料時發生錯誤: {e}", exc_info=True)
+        return counts, "遷移玩家資料時發生錯誤。"
+
+
+if __name__ == '__main__':
+    from .MD_config_services import game_config_provider, get_game_configs
+    from . import MD_firebase_config
+
+    parser = argparse.ArgumentParser(description="將所有玩家文件升級到目前的 schema_version 並轉換為分檔格式")
+    parser.add_argument("--workers", type=int, default=PLAYER_MIGRATION_WORKERS, help="同時處理的玩家數")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if not MD_firebase_config.db:
+        raise SystemExit("Firestore 資料庫未初始化，請設定 FIREBASE_SERVICE_ACCOUNT_KEY。")
+    game_config_provider.reload()
+
+    counts, error = migrate_all_players_service(get_game_configs(), max_workers=args.workers)
+    print(json.dumps({"schema_version": PLAYER_SCHEMA_VERSION, **counts}, ensure_ascii=False))
+    if error:
+        raise SystemExit(error)
@@ -1,19 +1,28 @@
 # backend/player_services.py
 # 處理玩家遊戲資料的初始化、獲取、保存功能
 
+import os
+import copy
+import functools
+import contextlib
 import time
 import logging
-from typing import List, Dict, Optional, Any, Tuple
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Tuple, Iterable
 import firebase_admin
 from firebase_admin import firestore
 from google.cloud.firestore_v1.field_path import FieldPath
+from google.api_core.exceptions import NotFound, FailedPrecondition, AlreadyExists
 import random 
 
 import math
 
 # 從 utils_services 導入共用函式
-from .utils_services import generate_monster_full_nickname, calculate_exp_to_next_level, get_effective_skill_with_level
+from .utils_services import calculate_exp_to_next_level, get_effective_skill_with_level
 from .mail_services import add_mail_to_player # 新增：導入郵件服務
+from .MD_config_services import get_config_index
+from .player_migration_services import PLAYER_SCHEMA_VERSION, needs_player_upgrade, upgrade_player_data
 
 # 將 _add_player_log 函式移回此檔案
 def _add_player_log(player_data: Dict[str, Any], category: str, message: str):
@@ -55,12 +64,390 @@ DEFAULT_GAME_CONFIGS_FOR_UTILS_PLAYER: Dict[str, Any] = {
 
 player_services_logger = logging.getLogger(__name__)
 
+
+# --- 玩家資料快取 ---
+# 快取最多保留的玩家數
+PLAYER_CACHE_MAX_ENTRIES = int(os.environ.get("MD_PLAYER_CACHE_SIZE", "2000"))
+# 快取內容的存活秒數；多個 worker 時，其他 worker 的寫入最多延遲這麼久才會被看見。
+# 因此快取只供唯讀的檢視使用，讀取後要修改並存檔的請求一律直接讀取 Firestore。
+PLAYER_CACHE_TTL_SECONDS = float(os.environ.get("MD_PLAYER_CACHE_TTL", "10"))
+# 同一玩家頂層 users 文件的 lastSeen / lastLogin 在此秒數內只更新一次
+LAST_SEEN_UPDATE_INTERVAL_SECONDS = 60
+# 逐玩家鎖以固定數量的鎖分段，記憶體用量不隨玩家數成長
+PLAYER_CACHE_LOCK_STRIPES = 64
+
+
+class _CachedPlayer:
+    __slots__ = ("profile", "game_data", "game_data_update_time", "sections", "expires_at", "last_seen_written_at")
+
+    def __init__(self):
+        self.profile: Optional[Dict[str, Any]] = None
+        self.game_data: Optional[Dict[str, Any]] = None
+        self.game_data_update_time: Any = None
+        # 已讀取或寫入過的子文件內容，鍵為區塊名稱
+        self.sections: Dict[str, Any] = {}
+        self.expires_at = 0.0
+        self.last_seen_written_at = 0.0
+
+
+class PlayerDataCache:
+    """
+    以玩家 uid 為鍵、有容量上限與存活時間的 LRU 快取，保存 users 文件與 gameData/main 文件最後一次讀到或寫入的內容。
+    每個 worker 各有一份，只會看到自己的寫入，所以遊戲資料只供唯讀檢視（公開資料、後台查看）使用；
+    要修改並存檔的讀取一律直接讀 Firestore（見 get_player_data_service 的 for_update）。
+    同一玩家的讀取與寫入以分段鎖串行化。
+    依路由統計命中、未命中與省下的 Firestore 讀寫次數。
+    """
+
+    def __init__(self, max_entries: int = PLAYER_CACHE_MAX_ENTRIES, ttl_seconds: float = PLAYER_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _CachedPlayer]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = [threading.RLock() for _ in range(PLAYER_CACHE_LOCK_STRIPES)]
+        self._metrics: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def key_lock(self, player_id: str) -> threading.RLock:
+        return self._key_locks[hash(player_id) % len(self._key_locks)]
+
+    def key_locks(self, player_ids: Iterable[str]) -> List[threading.RLock]:
+        """多位玩家的鎖，去除重複並依固定順序排列，依序取得時不會與其他請求互相等待。"""
+        indexes = sorted({hash(player_id) % len(self._key_locks) for player_id in player_ids})
+        return [self._key_locks[index] for index in indexes]
+
+    def record(self, metric: str, count: int = 1):
+        try:
+            from flask import has_request_context, request
+            route = (request.endpoint or request.path) if has_request_context() else "background"
+        except ImportError:
+            route = "background"
+        with self._lock:
+            route_metrics = self._metrics.setdefault(route, {})
+            route_metrics[metric] = route_metrics.get(metric, 0) + count
+
+    def get(self, player_id: str) -> Optional[_CachedPlayer]:
+        """取得未過期的快取項目，並移到 LRU 的最新端。"""
+        with self._lock:
+            entry = self._entries.get(player_id)
+            if entry is None:
+                return None
+            if entry.expires_at < time.time():
+                del self._entries[player_id]
+                return None
+            self._entries.move_to_end(player_id)
+            return entry
+
+    def _entry_for_write(self, player_id: str) -> _CachedPlayer:
+        with self._lock:
+            entry = self._entries.get(player_id)
+            if entry is None or entry.expires_at < time.time():
+                entry = _CachedPlayer()
+                self._entries[player_id] = entry
+            self._entries.move_to_end(player_id)
+            entry.expires_at = time.time() + self.ttl_seconds
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry
+
+    def put_profile(self, player_id: str, profile: Dict[str, Any]):
+        if self.enabled:
+            self._entry_for_write(player_id).profile = profile
+
+    def put_game_data(self, player_id: str, game_data: Dict[str, Any], update_time: Any = None):
+        if self.enabled:
+            entry = self._entry_for_write(player_id)
+            entry.game_data = game_data
+            entry.game_data_update_time = update_time
+
+    def put_section(self, player_id: str, section: str, value: Any):
+        if self.enabled:
+            self._entry_for_write(player_id).sections[section] = value
+
+    def mark_last_seen_written(self, player_id: str):
+        if self.enabled:
+            self._entry_for_write(player_id).last_seen_written_at = time.time()
+
+    def last_seen_is_recent(self, player_id: str) -> bool:
+        entry = self.get(player_id)
+        return bool(entry) and time.time() - entry.last_seen_written_at < LAST_SEEN_UPDATE_INTERVAL_SECONDS
+
+    def invalidate(self, player_id: str):
+        with self._lock:
+            self._entries.pop(player_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {route: dict(metrics) for route, metrics in self._metrics.items()}
+            size = len(self._entries)
+        totals: Dict[str, int] = {}
+        for metrics in routes.values():
+            for metric, count in metrics.items():
+                totals[metric] = totals.get(metric, 0) + count
+        return {"size": size, "max_entries": self.max_entries, "ttl_seconds": self.ttl_seconds, "totals": totals, "routes": routes}
+
+
+player_cache = PlayerDataCache()
+
+
+def invalidate_player_cache(player_id: str):
+    """繞過 save_player_data_service 直接寫入玩家文件（例如交易）後，須呼叫此函式讓快取失效。"""
+    player_cache.invalidate(player_id)
+
+
+def _load_user_profile(db: Any, player_id: str) -> Optional[Dict[str, Any]]:
+    """讀取頂層 users 文件（優先使用快取）；文件不存在時回傳 None。"""
+    with player_cache.key_lock(player_id):
+        entry = player_cache.get(player_id)
+        if entry is not None and entry.profile is not None:
+            player_cache.record("profile_hits")
+            player_cache.record("firestore_reads_saved")
+            return entry.profile
+        player_cache.record("profile_misses")
+        doc = db.collection('users').document(player_id).get()
+        if not doc.exists:
+            return None
+        profile = doc.to_dict() or {}
+        player_cache.put_profile(player_id, profile)
+        return profile
+
+
+class _PlayerReadVersion:
+    """這次請求讀到的 gameData/main 內容與 update_time，以及讀到的子文件內容；存檔時以此作為比對基準。"""
+    __slots__ = ("game_data", "update_time", "sections")
+
+    def __init__(self, game_data: Dict[str, Any], update_time: Any):
+        self.game_data = game_data
+        self.update_time = update_time
+        self.sections: Dict[str, Any] = {}
+
+
+_background_read_versions = threading.local()
+
+
+def _player_read_versions() -> Tuple[Dict[str, _PlayerReadVersion], bool]:
+    """
+    取得記錄讀取版本的字典，以及它是否屬於請求範圍。
+    請求中記錄在 flask.g，隨請求結束；背景工作（例如批次遷移）記錄在目前執行緒，存檔後即移除。
+    """
+    try:
+        from flask import g, has_request_context
+        if has_request_context():
+            if "player_read_versions" not in g:
+                g.player_read_versions = {}
+            return g.player_read_versions, True
+    except ImportError:
+        pass
+    if not hasattr(_background_read_versions, "versions"):
+        _background_read_versions.versions = {}
+    return _background_read_versions.versions, False
+
+
+def _remember_read_version(player_id: str, game_data: Dict[str, Any], update_time: Any) -> _PlayerReadVersion:
+    versions, _ = _player_read_versions()
+    previous = versions.get(player_id)
+    version = _PlayerReadVersion(game_data, update_time)
+    if previous is not None:
+        # 子文件與 gameData/main 是各自獨立的文件，先前讀到的內容仍可作為比對基準
+        version.sections = previous.sections
+    versions[player_id] = version
+    return version
+
+
+def _forget_read_version(player_id: str):
+    versions, _ = _player_read_versions()
+    versions.pop(player_id, None)
+
+
+def track_player_read(player_id: str, main_doc: Any) -> Dict[str, Any]:
+    """
+    直接讀取 gameData/main 並準備存檔的程式（例如寄信給其他玩家、批次遷移）以此登記讀到的版本，
+    回傳標記好未載入區塊、可直接修改後存檔的資料。
+    """
+    stored = main_doc.to_dict() or {}
+    _remember_read_version(player_id, stored, main_doc.update_time)
+    return mark_unloaded_sections(copy.deepcopy(stored))
+
+
+def _load_game_data(db: Any, player_id: str, use_cache: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    讀取 gameData/main 文件；文件不存在時回傳 None。讀到的內容會登記為這次請求的比對基準。
+    use_cache 只應在唯讀的檢視使用：快取可能落後其他 worker 的寫入。
+    回傳的是快取本身，需要修改時由呼叫端自行複製。
+    """
+    with player_cache.key_lock(player_id):
+        if use_cache:
+            entry = player_cache.get(player_id)
+            if entry is not None and entry.game_data is not None:
+                player_cache.record("game_data_hits")
+                player_cache.record("firestore_reads_saved")
+                _remember_read_version(player_id, entry.game_data, entry.game_data_update_time)
+                return entry.game_data
+            player_cache.record("game_data_misses")
+        doc = db.collection('users').document(player_id).collection('gameData').document('main').get()
+        if not doc.exists:
+            _forget_read_version(player_id)
+            return None
+        game_data = doc.to_dict() or {}
+        player_cache.put_game_data(player_id, game_data, doc.update_time)
+        _remember_read_version(player_id, game_data, doc.update_time)
+        return game_data
+
+
+# --- 玩家資料分檔 ---
+# gameData/main 帶有此版本號時，下列區塊已移到各自的文件；沒有版本號的舊文件仍內嵌這些欄位
+PLAYER_STORAGE_LAYOUT_VERSION = 2
+# 自 gameData/main 拆出的欄位：欄位名稱 -> 同一個 gameData 子集合中的文件 ID
+PLAYER_SECTION_DOCUMENTS = {"mailbox": "mailbox", "playerLogs": "logs", "adventure_progress": "adventure"}
+# 每隻怪獸的聊天紀錄與活動紀錄存放在 users/{uid}/monsterDetails/{怪獸ID}
+MONSTER_DETAILS_SECTION = "monsterDetails"
+MONSTER_DETAIL_FIELDS = ("chatHistory", "activityLog")
+ALL_PLAYER_SECTIONS = (*PLAYER_SECTION_DOCUMENTS, MONSTER_DETAILS_SECTION)
+# 以列表保存的紀錄欄位；值表示新項目是插在開頭 (True) 還是加在結尾 (False)
+PLAYER_ENTRY_LIST_FIELDS = {"mailbox": True, "playerLogs": False, "chatHistory": False, "activityLog": True}
+# 併入新項目後最多保留的項目數
+PLAYER_ENTRY_LIST_LIMITS = {"playerLogs": 50}
+
+
+class PendingEntries(list):
+    """
+    尚未載入的紀錄欄位：只包含這次請求新增的項目。
+    存檔時會併入子文件中既有的內容，而不是取代；在未載入的情況下誤以整個列表覆寫也因此不會發生。
+    """
+
+
+def _section_document_ref(db: Any, player_id: str, section: str) -> Any:
+    return db.collection('users').document(player_id).collection('gameData').document(PLAYER_SECTION_DOCUMENTS[section])
+
+
+def _monster_details_ref(db: Any, player_id: str, monster_id: str) -> Any:
+    return db.collection('users').document(player_id).collection(MONSTER_DETAILS_SECTION).document(monster_id)
+
+
+def _load_player_sections(db: Any, player_id: str, sections: Iterable[str], use_cache: bool = False) -> Dict[str, Any]:
+    """
+    讀取指定的子文件區塊，回傳 {區塊名稱: 內容}；讀到的內容會登記為這次請求的比對基準。
+    一般區塊以一次 get_all 讀取；monsterDetails 為 {怪獸ID: {聊天紀錄, 活動紀錄}}。
+    use_cache 只應在唯讀的檢視使用。回傳的是快取本身，需要修改時由呼叫端自行複製。
+    """
+    with player_cache.key_lock(player_id):
+        entry = player_cache.get(player_id) if use_cache else None
+        cached = entry.sections if entry is not None else {}
+        result: Dict[str, Any] = {}
+        missing_documents: List[str] = []
+        for section in dict.fromkeys(sections):
+            if section in cached:
+                result[section] = cached[section]
+                player_cache.record("section_hits")
+                player_cache.record("firestore_reads_saved")
+            elif section == MONSTER_DETAILS_SECTION:
+                player_cache.record("section_misses")
+                details = {
+                    doc.id: doc.to_dict() or {}
+                    for doc in db.collection('users').document(player_id).collection(MONSTER_DETAILS_SECTION).stream()
+                }
+                result[section] = details
+                player_cache.put_section(player_id, section, details)
+            else:
+                missing_documents.append(section)
+
+        if missing_documents:
+            player_cache.record("section_misses", len(missing_documents))
+            sections_by_doc_id = {PLAYER_SECTION_DOCUMENTS[section]: section for section in missing_documents}
+            found: Dict[str, Any] = {}
+            for doc in db.get_all([_section_document_ref(db, player_id, section) for section in missing_documents]):
+                if doc.exists:
+                    section = sections_by_doc_id[doc.id]
+                    found[section] = (doc.to_dict() or {}).get(section)
+            for section in missing_documents:
+                value = found.get(section)
+                if value is None and section in PLAYER_ENTRY_LIST_FIELDS:
+                    value = []
+                result[section] = value
+                player_cache.put_section(player_id, section, value)
+        version = _player_read_versions()[0].get(player_id)
+        if version is not None:
+            version.sections.update(result)
+        return result
+
+
+def _merge_entries(field: str, stored: Optional[List[Any]], new_entries: List[Any]) -> List[Any]:
+    prepend = PLAYER_ENTRY_LIST_FIELDS.get(field, False)
+    merged = list(new_entries) + list(stored or []) if prepend else list(stored or []) + list(new_entries)
+    limit = PLAYER_ENTRY_LIST_LIMITS.get(field)
+    if limit:
+        merged = merged[:limit] if prepend else merged[-limit:]
+    return merged
+
+
+def mark_unloaded_sections(game_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    為沒有帶入的紀錄欄位放上空的 PendingEntries，讓之後新增的項目在存檔時併入既有內容。
+    直接讀取 gameData/main 並準備存檔的程式（例如寄信給其他玩家）須先呼叫此函式。
+    """
+    for field in ("mailbox", "playerLogs"):
+        if field not in game_data:
+            game_data[field] = PendingEntries()
+    for monster in game_data.get("farmedMonsters", []) or []:
+        if isinstance(monster, dict):
+            for field in MONSTER_DETAIL_FIELDS:
+                if field not in monster:
+                    monster[field] = PendingEntries()
+    return game_data
+
+
+def _attach_player_sections(
+    db: Any, player_id: str, game_data: Dict[str, Any], sections: Iterable[str], use_cache: bool = False
+) -> Dict[str, Any]:
+    """把要求的子文件區塊放回由 gameData/main 複製出的資料，其餘紀錄欄位標記為未載入。"""
+    if game_data.get("storageLayout", 1) >= PLAYER_STORAGE_LAYOUT_VERSION:
+        requested = [section for section in sections if section in ALL_PLAYER_SECTIONS]
+        loaded = _load_player_sections(db, player_id, requested, use_cache) if requested else {}
+        for section in PLAYER_SECTION_DOCUMENTS:
+            if section in loaded:
+                game_data[section] = copy.deepcopy(loaded[section])
+        details = loaded.get(MONSTER_DETAILS_SECTION)
+        if details is not None:
+            for monster in game_data.get("farmedMonsters", []) or []:
+                if isinstance(monster, dict):
+                    monster_details = details.get(monster.get("id"), {})
+                    for field in MONSTER_DETAIL_FIELDS:
+                        monster[field] = copy.deepcopy(monster_details.get(field, []))
+    game_data.pop("storageLayout", None)
+    # 舊格式的文件內嵌了所有區塊，已在 game_data 中的欄位一律視為已載入
+    return mark_unloaded_sections(game_data)
+
+
+def append_player_entries(player_id: str, field: str, entries: List[Any]) -> bool:
+    """不載入整份玩家資料，直接把新項目併入玩家的 mailbox 或 playerLogs 子文件。"""
+    from .MD_firebase_config import db
+    if not db or not entries:
+        return False
+    try:
+        with player_cache.key_lock(player_id):
+            stored = _load_player_sections(db, player_id, [field])[field]
+            merged = _merge_entries(field, stored, entries)
+            _section_document_ref(db, player_id, field).set({field: merged})
+            player_cache.put_section(player_id, field, merged)
+        return True
+    except Exception as e:
+        player_cache.invalidate(player_id)
+        player_services_logger.error(f"寫入玩家 {player_id} 的 {field} 時發生錯誤: {e}", exc_info=True)
+        return False
+
 def initialize_new_player_data(player_id: str, nickname: str, game_configs: Dict[str, Any]) -> Dict[str, Any]:
     """為新玩家初始化遊戲資料。"""
     player_services_logger.info(f"為新玩家 {nickname} (ID: {player_id}) 初始化遊戲資料。")
     
-    all_titles_data = game_configs.get("titles", [])
-    default_title_object = next((t for t in all_titles_data if t.get("id") == "title_001"), None)
+    config_index = get_config_index(game_configs)
+    default_title_object = config_index.titles_by_id.get("title_001")
 
     if not default_title_object:
         default_title_object = {"id": "title_001", "name": "新手", "description": "踏入怪獸異世界的第一步。", "condition": {"type": "default", "value": 0}, "buffs": {}}
@@ -84,7 +471,7 @@ def initialize_new_player_data(player_id: str, nickname: str, game_configs: Dict
     num_initial_dna = 6
 
     if dna_fragments_templates:
-        common_dna_pool = [dna for dna in dna_fragments_templates if dna.get('rarity') == "普通"]
+        common_dna_pool = list(config_index.dna_by_rarity.get("普通", ()))
         
         selected_dna = []
         if common_dna_pool:
@@ -104,7 +491,7 @@ def initialize_new_player_data(player_id: str, nickname: str, game_configs: Dict
         "nickname": nickname, "lastSave": int(time.time()), "lastSeen": int(time.time()),
         "selectedMonsterId": None, "friends": [], "dnaCombinationSlots": [None] * 5,
         "mailbox": [], "playerNotes": [], "adventure_progress": None, "playerLogs": [],
-        "temporaryBackpack": []
+        "temporaryBackpack": [], "schema_version": PLAYER_SCHEMA_VERSION
     }
     
     _add_player_log(new_player_data, "系統", "帳號創建成功，歡迎來到怪獸異世界！")
@@ -139,8 +526,26 @@ def initialize_new_player_data(player_id: str, nickname: str, game_configs: Dict
     player_services_logger.info(f"新玩家 {nickname} 資料初始化完畢，獲得 {len([d for d in initial_dna_owned if d])} 個初始 DNA。")
     return new_player_data
 
-def get_player_data_service(player_id: str, nickname_from_auth: Optional[str], game_configs: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], bool]:
-    """獲取玩家遊戲資料，如果不存在則初始化並儲存。返回 (玩家資料, 是否為新玩家) 的元組。"""
+def get_player_data_service(
+    player_id: str, nickname_from_auth: Optional[str], game_configs: Dict[str, Any], sections: Iterable[str] = (),
+    for_update: bool = True
+) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    獲取玩家遊戲資料，如果不存在則初始化並儲存。返回 (玩家資料, 是否為新玩家) 的元組。
+    sections 指定要一併載入的子文件區塊（見 ALL_PLAYER_SECTIONS）；未載入的紀錄欄位為 PendingEntries。
+    for_update 為 False 的唯讀檢視可以使用快取；其餘一律直接讀取 Firestore，存檔時以讀到的版本比對。
+    在使用 PlayerUnitOfWork 的請求中，同一位玩家只讀取一次，之後都回傳同一份資料。
+    """
+    unit_of_work = current_player_unit_of_work()
+    if unit_of_work is not None:
+        return unit_of_work.get(player_id, nickname_from_auth, game_configs, sections, for_update)
+    return _fetch_player_data(player_id, nickname_from_auth, game_configs, sections, for_update)
+
+
+def _fetch_player_data(
+    player_id: str, nickname_from_auth: Optional[str], game_configs: Dict[str, Any], sections: Iterable[str] = (),
+    for_update: bool = True
+) -> Tuple[Optional[Dict[str, Any]], bool]:
     from .MD_firebase_config import db as firestore_db_instance
     if not firestore_db_instance:
         player_services_logger.error("Firestore 資料庫未初始化 (get_player_data_service 內部)。")
@@ -151,42 +556,54 @@ def get_player_data_service(player_id: str, nickname_from_auth: Optional[str], g
 
     try:
         user_profile_ref = db.collection('users').document(player_id)
-        user_profile_doc = user_profile_ref.get()
+        profile_data = _load_user_profile(db, player_id)
 
         authoritative_nickname = nickname_from_auth
         if not authoritative_nickname:
-            if user_profile_doc.exists:
-                profile_data = user_profile_doc.to_dict()
-                if profile_data and profile_data.get("nickname"):
-                    authoritative_nickname = profile_data["nickname"]
+            if profile_data and profile_data.get("nickname"):
+                authoritative_nickname = profile_data["nickname"]
             if not authoritative_nickname:
                 authoritative_nickname = "未知玩家"
 
-        if user_profile_doc.exists:
-            profile_data = user_profile_doc.to_dict()
+        if profile_data is not None:
             update_fields = {"lastLogin": firestore.SERVER_TIMESTAMP, "lastSeen": firestore.SERVER_TIMESTAMP}
-            if not profile_data or profile_data.get("nickname") != authoritative_nickname:
+            if profile_data.get("nickname") != authoritative_nickname:
                 update_fields["nickname"] = authoritative_nickname
                 player_services_logger.info(f"已更新玩家 {player_id} 在 Firestore users 集合中的暱稱為: {authoritative_nickname}")
-            try:
-                user_profile_ref.update(update_fields)
-            except Exception as e:
-                player_services_logger.error(f"更新玩家 {player_id} 的 profile 失敗: {e}", exc_info=True)
+            # 暱稱沒變且最近已更新過 lastSeen 時，不再寫入 users 文件
+            if "nickname" not in update_fields and player_cache.last_seen_is_recent(player_id):
+                player_cache.record("firestore_writes_saved")
+            else:
+                try:
+                    user_profile_ref.update(update_fields)
+                    player_cache.put_profile(player_id, {**profile_data, "nickname": authoritative_nickname})
+                    player_cache.mark_last_seen_written(player_id)
+                    if "nickname" in update_fields:
+                        from .leaderboard_search_services import update_player_search_index
+                        update_player_search_index(player_id, authoritative_nickname)
+                except Exception as e:
+                    player_cache.invalidate(player_id)
+                    player_services_logger.error(f"更新玩家 {player_id} 的 profile 失敗: {e}", exc_info=True)
         else:
             player_services_logger.info(f"Firestore 中找不到玩家 {player_id} 的 users 集合 profile。嘗試建立。")
             try:
                 user_profile_ref.set({"uid": player_id, "nickname": authoritative_nickname, "createdAt": firestore.SERVER_TIMESTAMP, "lastLogin": firestore.SERVER_TIMESTAMP, "lastSeen": firestore.SERVER_TIMESTAMP})
+                player_cache.put_profile(player_id, {"uid": player_id, "nickname": authoritative_nickname})
+                player_cache.mark_last_seen_written(player_id)
                 player_services_logger.info(f"成功為玩家 {player_id} 創建 Firestore users 集合中的 profile，暱稱: {authoritative_nickname}")
+                from .leaderboard_search_services import update_player_search_index
+                update_player_search_index(player_id, authoritative_nickname)
             except Exception as e:
                 player_services_logger.error(f"建立玩家 {player_id} 的 Firestore users 集合 profile 失敗: {e}", exc_info=True)
                 return None, False
 
-        game_data_ref = db.collection('users').document(player_id).collection('gameData').document('main')
-        game_data_doc = game_data_ref.get()
+        stored_game_data = _load_game_data(db, player_id, use_cache=not for_update)
 
-        if game_data_doc.exists:
-            player_game_data_dict = game_data_doc.to_dict()
-            if player_game_data_dict is None: player_game_data_dict = {}
+        if stored_game_data is not None:
+            # 後續的遷移與登入紀錄會修改資料，不能直接改動讀到的內容（可能是快取本身）
+            player_game_data_dict = _attach_player_sections(
+                db, player_id, copy.deepcopy(stored_game_data), sections, use_cache=not for_update
+            )
             
             player_services_logger.info(f"成功從 Firestore 獲取玩家遊戲資料：{player_id}")
             
@@ -234,6 +651,10 @@ def get_player_data_service(player_id: str, nickname_from_auth: Optional[str], g
                             mail_template = { "type": "reward", "title": mail_title, "content": mail_content }
 
                             mailbox = player_game_data_dict.get("mailbox", [])
+                            if isinstance(mailbox, PendingEntries):
+                                # 這次沒有讀取信箱時，另外讀出已存的信件來檢查是否已有未讀的俸祿信
+                                stored_mailbox = _load_player_sections(db, player_id, ["mailbox"])["mailbox"]
+                                mailbox = list(mailbox) + list(stored_mailbox or [])
                             unread_champion_mail_exists = any(
                                 mail.get("title") == mail_title and not mail.get("is_read")
                                 for mail in mailbox
@@ -245,81 +666,16 @@ def get_player_data_service(player_id: str, nickname_from_auth: Optional[str], g
                             else:
                                 player_services_logger.info(f"玩家 {player_id} 已有未讀的俸祿信件，本次不再重複發送。")
 
+            # 只有 schema_version 落後的文件才需要執行遷移步驟
             needs_migration_save = False
-            if "gold" not in player_stats:
-                player_stats["gold"] = game_configs.get("value_settings", {}).get("starting_gold", 500)
-                needs_migration_save = True
-            
-            if "pvp_points" not in player_stats:
-                player_stats["pvp_points"] = 1000
-                player_stats["pvp_tier"] = "尚未定位"
-                needs_migration_save = True
-            
-            if "nickname" not in player_stats or player_stats.get("nickname") != authoritative_nickname:
-                player_stats["nickname"] = authoritative_nickname
+            if needs_player_upgrade(player_game_data_dict):
+                upgrade_player_data(player_game_data_dict, player_id, game_configs)
                 needs_migration_save = True
 
-            current_titles = player_stats.get("titles", [])
-            if current_titles and isinstance(current_titles[0], str):
-                all_titles_config = game_configs.get("titles", [])
-                new_titles_list = [t for t in all_titles_config if t.get("name") in current_titles]
-                player_stats["titles"] = new_titles_list
+            if player_stats.get("nickname") != authoritative_nickname:
+                player_stats["nickname"] = authoritative_nickname
                 needs_migration_save = True
 
-            if "equipped_title_id" not in player_stats:
-                current_titles_obj = player_stats.get("titles", [])
-                default_equip_id = None
-                if current_titles_obj and isinstance(current_titles_obj[0], dict) and "id" in current_titles_obj[0]:
-                    default_equip_id = current_titles_obj[0]["id"]
-                else:
-                    all_titles_config = game_configs.get("titles", [])
-                    default_title_obj = next((t for t in all_titles_config if t.get("id") == "title_001"), None)
-                    if default_title_obj:
-                        if "titles" not in player_stats or not isinstance(player_stats["titles"], list):
-                            player_stats["titles"] = []
-                        if not any(t.get("id") == default_title_obj["id"] for t in player_stats["titles"]):
-                            player_stats["titles"].insert(0, default_title_obj)
-                        default_equip_id = default_title_obj["id"]
-                if default_equip_id:
-                    player_stats["equipped_title_id"] = default_equip_id
-                    needs_migration_save = True
-
-            farmed_monsters = player_game_data_dict.get("farmedMonsters", [])
-            if farmed_monsters:
-                naming_constraints = game_configs.get("naming_constraints", {})
-                
-                for monster in farmed_monsters:
-                    if "player_title_part" in monster or "achievement_part" in monster:
-                        needs_migration_save = True
-                        
-                        if "player_title_part" not in monster:
-                             monster["player_title_part"] = ""
-                        if "achievement_part" not in monster:
-                            monster["achievement_part"] = "新秀"
-                        
-                        monster["nickname"] = generate_monster_full_nickname(
-                            "", 
-                            "", 
-                            monster.get("element_nickname_part", monster.get("elements", ["無"])[0]),
-                            naming_constraints
-                        )
-            
-            for dna_list_key in ["playerOwnedDNA", "dnaCombinationSlots"]:
-                dna_list = player_game_data_dict.get(dna_list_key, [])
-                for i, dna_item in enumerate(dna_list):
-                    if dna_item and isinstance(dna_item, dict) and "baseId" not in dna_item:
-                        needs_migration_save = True
-                        player_services_logger.info(f"為玩家 {player_id} 的 DNA (ID: {dna_item.get('id', '')}) 進行 'baseId' 遷移。")
-                        dna_item["baseId"] = dna_item.get("id", "")
-                        dna_item["id"] = f"dna_inst_{player_id}_{int(time.time() * 1000)}_{i}"
-
-            if needs_migration_save:
-                try:
-                    player_game_data_dict["playerStats"] = player_stats
-                    save_player_data_service(player_id, player_game_data_dict)
-                except Exception as e:
-                    player_services_logger.error(f"為玩家 {player_id} 執行資料遷移時儲存失敗: {e}", exc_info=True)
-            
             loaded_dna = player_game_data_dict.get("playerOwnedDNA", [])
             max_inventory_slots = game_configs.get("value_settings", DEFAULT_GAME_CONFIGS_FOR_UTILS_PLAYER["value_settings"]).get("max_inventory_slots", 12)
             if len(loaded_dna) < max_inventory_slots: loaded_dna.extend([None] * (max_inventory_slots - len(loaded_dna)))
@@ -333,12 +689,18 @@ def get_player_data_service(player_id: str, nickname_from_auth: Optional[str], g
                 "selectedMonsterId": player_game_data_dict.get("selectedMonsterId", None),
                 "friends": player_game_data_dict.get("friends", []),
                 "dnaCombinationSlots": player_game_data_dict.get("dnaCombinationSlots", [None] * 5),
-                "mailbox": player_game_data_dict.get("mailbox", []),
+                "mailbox": player_game_data_dict["mailbox"],
                 "playerNotes": player_game_data_dict.get("playerNotes", []),
-                "adventure_progress": player_game_data_dict.get("adventure_progress"),
-                "playerLogs": player_game_data_dict.get("playerLogs", []),
-                "temporaryBackpack": player_game_data_dict.get("temporaryBackpack", [])
+                "playerLogs": player_game_data_dict["playerLogs"],
+                "temporaryBackpack": player_game_data_dict.get("temporaryBackpack", []),
+                "schema_version": player_game_data_dict.get("schema_version", 0)
             }
+            # 遠征進度只在有載入時才帶入，存檔時沒有這個欄位就不會改動
+            if "adventure_progress" in player_game_data_dict:
+                player_game_data["adventure_progress"] = player_game_data_dict["adventure_progress"]
+
+            if needs_migration_save and not save_player_data_service(player_id, player_game_data):
+                player_services_logger.error(f"為玩家 {player_id} 執行資料遷移時儲存失敗。")
             return player_game_data, False
         
         player_services_logger.info(f"在 Firestore 中找不到玩家 {player_id} 的遊戲資料，將初始化新玩家資料。")
@@ -354,92 +716,484 @@ def get_player_data_service(player_id: str, nickname_from_auth: Optional[str], g
         player_services_logger.error(f"獲取玩家資料時發生錯誤 ({player_id}): {e}", exc_info=True)
         return None, False
 
-def save_player_data_service(player_id: str, game_data: Dict[str, Any]) -> bool:
-    """儲存玩家遊戲資料到 Firestore，並同步更新頂層的 lastSeen。"""
+# 只有這些欄位變動時不算有變更（每次存檔都會更新）
+SAVE_TIMESTAMP_FIELDS = ("lastSave", "lastSeen")
+
+
+def diff_field_paths(previous: Dict[str, Any], new: Dict[str, Any], prefix: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    """
+    比較新舊文件，回傳 Firestore update() 需要的 {欄位路徑: 新值}。
+    兩邊都是 map 的欄位會逐層比較到實際變動的子欄位；陣列無法以路徑指定單一元素，變動時整個陣列寫入。
+    新文件中不存在的欄位以 DELETE_FIELD 刪除。
+    """
+    updates: Dict[str, Any] = {}
+    for key, value in new.items():
+        path = prefix + (key,)
+        if key not in previous:
+            updates[FieldPath(*path).to_api_repr()] = value
+            continue
+        old_value = previous[key]
+        if old_value == value:
+            continue
+        if isinstance(old_value, dict) and isinstance(value, dict) and value:
+            updates.update(diff_field_paths(old_value, value, path))
+        else:
+            updates[FieldPath(*path).to_api_repr()] = value
+    for key in previous:
+        if key not in new:
+            updates[FieldPath(*(prefix + (key,))).to_api_repr()] = firestore.DELETE_FIELD
+    return updates
+
+def _split_player_document(game_data: Dict[str, Any]) -> Tuple[List[Any], Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    拆出要寫入子文件的部分。回傳 (去除聊天與活動紀錄的怪獸列表, 有帶入的區塊, {怪獸ID: 有帶入的紀錄欄位})。
+    """
+    sections = {section: game_data[section] for section in PLAYER_SECTION_DOCUMENTS if section in game_data}
+    monsters: List[Any] = []
+    monster_details: Dict[str, Dict[str, Any]] = {}
+    for monster in game_data.get("farmedMonsters", []) or []:
+        if not isinstance(monster, dict):
+            monsters.append(monster)
+            continue
+        monsters.append({key: value for key, value in monster.items() if key not in MONSTER_DETAIL_FIELDS})
+        details = {field: monster[field] for field in MONSTER_DETAIL_FIELDS if field in monster}
+        if details and monster.get("id"):
+            monster_details[monster["id"]] = details
+    return monsters, sections, monster_details
+
+
+def _plan_section_writes(
+    db: Any, player_id: str, sections: Dict[str, Any], monster_details: Dict[str, Dict[str, Any]], monsters: List[Any],
+    known_sections: Dict[str, Any], previous_monsters: List[Any]
+) -> Tuple[List[Tuple[str, Any, Any]], Dict[str, Any]]:
+    """
+    比對這次請求讀到的子文件內容 (known_sections)，決定要寫入哪些子文件。
+    回傳 ([(操作, 文件參照, 內容)], 寫入成功後的子文件內容)。
+    PendingEntries 會先從 Firestore 讀出既有內容再併入；一般值在內容與讀到的相同時略過。
+    previous_monsters 為讀到的上一版農場，用來找出這次移除的怪獸。
+    """
+    cached = known_sections
+    writes: List[Tuple[str, Any, Any]] = []
+    cache_updates: Dict[str, Any] = {}
+
+    for section, value in sections.items():
+        if isinstance(value, PendingEntries):
+            if not value:
+                continue
+            stored = _load_player_sections(db, player_id, [section])[section]
+            value = _merge_entries(section, stored, value)
+        elif section in cached and cached[section] == value:
+            continue
+        writes.append(("set", _section_document_ref(db, player_id, section), {section: value}))
+        cache_updates[section] = value
+
+    stored_details = cached.get(MONSTER_DETAILS_SECTION)
+    new_details = dict(stored_details) if stored_details is not None else None
+    for monster_id, fields in monster_details.items():
+        if all(isinstance(value, PendingEntries) and not value for value in fields.values()):
+            continue
+        ref = _monster_details_ref(db, player_id, monster_id)
+        has_pending = any(isinstance(value, PendingEntries) and value for value in fields.values())
+        if stored_details is not None:
+            current = stored_details.get(monster_id, {})
+        elif has_pending:
+            doc = ref.get()
+            current = (doc.to_dict() or {}) if doc.exists else {}
+        else:
+            # 沒有既有內容可比對，只合併寫入有帶入的欄位
+            writes.append(("merge", ref, dict(fields)))
+            continue
+        merged = dict(current)
+        for field, value in fields.items():
+            if isinstance(value, PendingEntries):
+                if value:
+                    merged[field] = _merge_entries(field, current.get(field), value)
+            else:
+                merged[field] = value
+        if merged == current:
+            continue
+        writes.append(("set", ref, merged))
+        if new_details is not None:
+            new_details[monster_id] = merged
+
+    monster_ids = {monster.get("id") for monster in monsters if isinstance(monster, dict)}
+    if new_details is None:
+        # 沒有讀取詳細紀錄時，依上一版農場找出被移除的怪獸，刪除其詳細紀錄文件
+        removed_ids = {
+            monster.get("id") for monster in previous_monsters if isinstance(monster, dict) and monster.get("id")
+        } - monster_ids
+        for monster_id in sorted(removed_ids):
+            writes.append(("delete", _monster_details_ref(db, player_id, monster_id), None))
+    else:
+        # 已知的詳細紀錄中，怪獸已不在農場的文件一併刪除
+        for monster_id in list(new_details):
+            if monster_id not in monster_ids:
+                writes.append(("delete", _monster_details_ref(db, player_id, monster_id), None))
+                del new_details[monster_id]
+        if new_details != stored_details:
+            cache_updates[MONSTER_DETAILS_SECTION] = new_details
+    return writes, cache_updates
+
+
+class _PlayerSave:
+    """一位玩家這次存檔要寫入的內容，由 _plan_player_save 產生。"""
+    __slots__ = (
+        "player_id", "previous_data", "base_update_time", "data_to_save", "updates", "section_writes", "cache_updates", "touch_last_seen"
+    )
+
+    def __init__(self, player_id: str, previous_data: Optional[Dict[str, Any]], base_update_time: Any, data_to_save: Dict[str, Any],
+                 updates: Optional[Dict[str, Any]], section_writes: List[Tuple[str, Any, Any]], cache_updates: Dict[str, Any],
+                 touch_last_seen: bool):
+        self.player_id = player_id
+        self.previous_data = previous_data
+        # 讀到 previous_data 時文件的 update_time，作為 update() 的前置條件
+        self.base_update_time = base_update_time
+        self.data_to_save = data_to_save
+        self.updates = updates
+        self.section_writes = section_writes
+        self.cache_updates = cache_updates
+        self.touch_last_seen = touch_last_seen
+
+    @property
+    def has_changes(self) -> bool:
+        return self.updates is None or bool(self.section_writes) or any(path not in SAVE_TIMESTAMP_FIELDS for path in self.updates)
+
+
+def _release_champion_slot_if_needed(player_id: str, previous_data: Optional[Dict[str, Any]], game_data: Dict[str, Any]):
+    """出戰怪獸更換時，舊的出戰怪獸若佔有冠軍席位則移除。"""
+    try:
+        old_selected_id = previous_data.get("selectedMonsterId") if previous_data else None
+        new_selected_id = game_data.get("selectedMonsterId")
+
+        if old_selected_id and old_selected_id != new_selected_id:
+            player_services_logger.info(f"玩家 {player_id} 更換出戰怪獸：從 {old_selected_id} 更換為 {new_selected_id}。檢查冠軍席位...")
+            from .champion_services import get_champions_data, update_champions_document
+            champions_data = get_champions_data()
+            was_champion = False
+            for i in range(1, 5):
+                rank_key = f"rank{i}"
+                slot = champions_data.get(rank_key)
+                if slot and slot.get("monsterId") == old_selected_id:
+                    champions_data[rank_key] = None 
+                    was_champion = True
+                    player_services_logger.info(f"玩家 {player_id} 的舊出戰怪獸 {old_selected_id} 為第 {i} 名冠軍，已將其席位移除。")
+                    break
+            
+            if was_champion:
+                update_champions_document(champions_data) 
+
+    except Exception as e:
+        player_services_logger.error(f"儲存前檢查冠軍席位時發生錯誤: {e}", exc_info=True)
+
+
+def _plan_player_save(db: Any, player_id: str, game_data: Dict[str, Any], touch_last_seen: bool) -> _PlayerSave:
+    """整理要寫入 gameData/main 的內容，並與快取中的上一版比對出變動的欄位與子文件。呼叫端須持有該玩家的鎖。"""
+    # 以這次請求讀到的版本作為比對基準；沒有讀過時（例如直接組出資料的呼叫端）才重新讀取
+    version = _player_read_versions()[0].get(player_id)
+    if version is None:
+        _load_game_data(db, player_id)
+        version = _player_read_versions()[0].get(player_id)
+    previous_data = version.game_data if version is not None else None
+    known_sections = version.sections if version is not None else {}
+    _release_champion_slot_if_needed(player_id, previous_data, game_data)
+
+    current_time_unix = int(time.time())
+    monsters_to_save, sections_to_save, monster_details = _split_player_document(game_data)
+    data_to_save: Dict[str, Any] = {
+        "playerOwnedDNA": game_data.get("playerOwnedDNA", []), "farmedMonsters": monsters_to_save,
+        "playerStats": game_data.get("playerStats", {}), "nickname": game_data.get("nickname", "未知玩家"),
+        "lastSave": current_time_unix, "lastSeen": current_time_unix,
+        "selectedMonsterId": game_data.get("selectedMonsterId"), "friends": game_data.get("friends", []),
+        "dnaCombinationSlots": game_data.get("dnaCombinationSlots", [None] * 5),
+        "playerNotes": game_data.get("playerNotes", []),
+        "temporaryBackpack": game_data.get("temporaryBackpack", []),
+        "storageLayout": PLAYER_STORAGE_LAYOUT_VERSION,
+        "schema_version": game_data.get("schema_version", (previous_data or {}).get("schema_version", 0))
+    }
+
+    if isinstance(data_to_save["playerStats"], dict) and \
+       data_to_save["playerStats"].get("nickname") != data_to_save["nickname"]:
+        data_to_save["playerStats"]["nickname"] = data_to_save["nickname"]
+
+    # 已有文件時只寫入變動的欄位；子文件只寫入有帶入且有變動的區塊
+    updates = diff_field_paths(previous_data, data_to_save) if previous_data is not None else None
+    section_writes, cache_updates = _plan_section_writes(
+        db, player_id, sections_to_save, monster_details, monsters_to_save, known_sections,
+        (previous_data or {}).get("farmedMonsters") or []
+    )
+    base_update_time = version.update_time if version is not None else None
+    return _PlayerSave(player_id, previous_data, base_update_time, data_to_save, updates, section_writes, cache_updates, touch_last_seen)
+
+
+def _commit_player_writes(db: Any, saves: List[_PlayerSave], full_writes: bool = False) -> Dict[str, Any]:
+    """
+    以同一個 batch 寫入所有玩家的 gameData/main、各個子文件與頂層的 lastSeen，回傳 {玩家ID: gameData/main 寫入後的 update_time}。
+    欄位更新以讀到的 update_time 為前置條件，文件在讀取後被其他請求改過時整個 batch 失敗（FailedPrecondition）；
+    讀取時不存在的文件以 create() 寫入，期間被建立時同樣失敗（AlreadyExists）。
+    """
+    batch = db.batch()
+    operation_count = 0
+    main_write_indexes: Dict[str, int] = {}
+    for save in saves:
+        game_data_ref = db.collection('users').document(save.player_id).collection('gameData').document('main')
+        if full_writes:
+            batch.set(game_data_ref, save.data_to_save)
+            player_cache.record("full_writes")
+        elif save.updates is None:
+            batch.create(game_data_ref, save.data_to_save)
+            player_cache.record("full_writes")
+        elif any(path not in SAVE_TIMESTAMP_FIELDS for path in save.updates):
+            if save.base_update_time is not None:
+                batch.update(game_data_ref, save.updates, option=db.write_option(last_update_time=save.base_update_time))
+            else:
+                batch.update(game_data_ref, save.updates)
+            player_cache.record("field_updates")
+            player_cache.record("fields_written", len(save.updates))
+        else:
+            game_data_ref = None
+        if game_data_ref is not None:
+            main_write_indexes[save.player_id] = operation_count
+            operation_count += 1
+        for operation, ref, payload in save.section_writes:
+            if operation == "delete":
+                batch.delete(ref)
+            else:
+                batch.set(ref, payload, merge=(operation == "merge"))
+        operation_count += len(save.section_writes)
+        player_cache.record("section_writes", len(save.section_writes))
+        if save.touch_last_seen:
+            batch.set(db.collection('users').document(save.player_id), {"lastSeen": firestore.SERVER_TIMESTAMP}, merge=True)
+            operation_count += 1
+    results = batch.commit() or []
+    return {
+        player_id: getattr(results[index], "update_time", None) if index < len(results) else None
+        for player_id, index in main_write_indexes.items()
+    }
+
+
+def save_players_data_service(saves: List[Tuple[str, Dict[str, Any], bool]]) -> bool:
+    """
+    以一個 Firestore batch 儲存多位玩家的遊戲資料，saves 為 [(玩家ID, 遊戲資料, 是否更新 lastSeen)]。
+    每位玩家只寫入相對於這次請求讀到的版本有變動的欄位與子文件；全部都沒有變更時不寫入。
+    """
     from .MD_firebase_config import db as firestore_db_instance
     if not firestore_db_instance:
-        player_services_logger.error("Firestore 資料庫未初始化 (save_player_data_service 內部)。")
+        player_services_logger.error("Firestore 資料庫未初始化 (save_players_data_service 內部)。")
         return False
     
     db = firestore_db_instance
-    
+    player_ids = [player_id for player_id, _, _ in saves]
+    versions, request_scoped = _player_read_versions()
+
     try:
-        current_data_doc = db.collection('users').document(player_id).collection('gameData').document('main').get()
-        if current_data_doc.exists:
-            current_data = current_data_doc.to_dict()
-            old_selected_id = current_data.get("selectedMonsterId") if current_data else None
-            new_selected_id = game_data.get("selectedMonsterId")
-
-            if old_selected_id and old_selected_id != new_selected_id:
-                player_services_logger.info(f"玩家 {player_id} 更換出戰怪獸：從 {old_selected_id} 更換為 {new_selected_id}。檢查冠軍席位...")
-                from .champion_services import get_champions_data, update_champions_document
-                champions_data = get_champions_data()
-                was_champion = False
-                for i in range(1, 5):
-                    rank_key = f"rank{i}"
-                    slot = champions_data.get(rank_key)
-                    if slot and slot.get("monsterId") == old_selected_id:
-                        champions_data[rank_key] = None 
-                        was_champion = True
-                        player_services_logger.info(f"玩家 {player_id} 的舊出戰怪獸 {old_selected_id} 為第 {i} 名冠軍，已將其席位移除。")
-                        break
-                
-                if was_champion:
-                    update_champions_document(champions_data) 
+        with contextlib.ExitStack() as stack:
+            for lock in player_cache.key_locks(player_ids):
+                stack.enter_context(lock)
+            plans = [_plan_player_save(db, player_id, game_data, touch_last_seen) for player_id, game_data, touch_last_seen in saves]
+            pending = [plan for plan in plans if plan.has_changes]
+            for plan in plans:
+                if not plan.has_changes:
+                    player_cache.record("firestore_writes_saved")
+                    player_services_logger.info(f"玩家 {plan.player_id} 的遊戲資料沒有變更，略過寫入。")
+            if not pending:
+                return True
 
-    except Exception as e:
-        player_services_logger.error(f"儲存前檢查冠軍席位時發生錯誤: {e}", exc_info=True)
-    
-    current_time_unix = int(time.time())
+            for plan in pending:
+                # lastSeen 在節流時間內已更新過時不再寫入
+                if plan.touch_last_seen and player_cache.last_seen_is_recent(plan.player_id):
+                    plan.touch_last_seen = False
+                    player_cache.record("firestore_writes_saved")
 
-    try:
-        data_to_save: Dict[str, Any] = {
-            "playerOwnedDNA": game_data.get("playerOwnedDNA", []), "farmedMonsters": game_data.get("farmedMonsters", []),
-            "playerStats": game_data.get("playerStats", {}), "nickname": game_data.get("nickname", "未知玩家"),
-            "lastSave": current_time_unix, "lastSeen": current_time_unix,
-            "selectedMonsterId": game_data.get("selectedMonsterId"), "friends": game_data.get("friends", []),
-            "dnaCombinationSlots": game_data.get("dnaCombinationSlots", [None] * 5),
-            "playerNotes": game_data.get("playerNotes", []), "mailbox": game_data.get("mailbox", []),
-            "adventure_progress": game_data.get("adventure_progress"),
-            "playerLogs": game_data.get("playerLogs", []),
-            "temporaryBackpack": game_data.get("temporaryBackpack", [])
-        }
-
-        if isinstance(data_to_save["playerStats"], dict) and \
-           data_to_save["playerStats"].get("nickname") != data_to_save["nickname"]:
-            data_to_save["playerStats"]["nickname"] = data_to_save["nickname"]
-
-        game_data_ref = db.collection('users').document(player_id).collection('gameData').document('main')
-        game_data_ref.set(data_to_save) 
-        
-        try:
-            user_profile_ref = db.collection('users').document(player_id)
-            user_profile_ref.update({"lastSeen": firestore.SERVER_TIMESTAMP})
-            player_services_logger.info(f"已同步更新玩家 {player_id} 的頂層 lastSeen 時間戳。")
-        except Exception as e:
-            player_services_logger.error(f"同步更新玩家 {player_id} 的頂層 lastSeen 時間戳失敗: {e}", exc_info=True)
-            
-        player_services_logger.info(f"玩家 {player_id} 的遊戲資料已成功儲存到 Firestore。")
+            try:
+                try:
+                    update_times = _commit_player_writes(db, pending)
+                except NotFound:
+                    # 讀到之後文件已被刪除時改為整份寫入
+                    update_times = _commit_player_writes(db, pending, full_writes=True)
+            except (FailedPrecondition, AlreadyExists) as e:
+                # 其他請求（可能在其他 worker）在讀取後改過文件，不能以這份資料覆寫；由呼叫端回報失敗讓玩家重試
+                for player_id in player_ids:
+                    player_cache.invalidate(player_id)
+                    _forget_read_version(player_id)
+                player_cache.record("write_conflicts")
+                player_services_logger.warning(f"玩家 {', '.join(player_ids)} 的資料在讀取後已被其他請求修改，本次存檔取消: {e}")
+                return False
+            except Exception:
+                for player_id in player_ids:
+                    player_cache.invalidate(player_id)
+                    _forget_read_version(player_id)
+                raise
+            for plan in pending:
+                # 呼叫端之後仍可能修改傳入的資料，快取與比對基準保存寫入當下的副本
+                saved_data = copy.deepcopy(plan.data_to_save)
+                # 這次沒有寫入 gameData/main 時，文件版本仍是讀到的版本
+                update_time = update_times.get(plan.player_id, plan.base_update_time)
+                player_cache.put_game_data(plan.player_id, saved_data, update_time)
+                for section, value in plan.cache_updates.items():
+                    player_cache.put_section(plan.player_id, section, copy.deepcopy(value))
+                if plan.touch_last_seen:
+                    player_cache.mark_last_seen_written(plan.player_id)
+                version = _remember_read_version(plan.player_id, saved_data, update_time)
+                version.sections.update(copy.deepcopy(plan.cache_updates))
+
+        for plan in pending:
+            try:
+                # 分數或出戰怪獸有變化時，同步更新排行榜集合
+                from .leaderboard_search_services import sync_leaderboard_entry
+                sync_leaderboard_entry(plan.player_id, plan.data_to_save)
+            except Exception as e:
+                player_services_logger.error(f"同步更新玩家 {plan.player_id} 的排行榜資料失敗: {e}", exc_info=True)
+            player_services_logger.info(f"玩家 {plan.player_id} 的遊戲資料已成功儲存到 Firestore。")
         return True
     except Exception as e:
-        player_services_logger.error(f"儲存玩家遊戲資料到 Firestore 時發生錯誤 ({player_id}): {e}", exc_info=True)
+        player_services_logger.error(f"儲存玩家遊戲資料到 Firestore 時發生錯誤 ({', '.join(player_ids)}): {e}", exc_info=True)
         return False
+    finally:
+        if not request_scoped:
+            # 背景工作沒有請求結束的時機，存檔後就移除，避免逐一處理大量玩家時佔用記憶體
+            for player_id in player_ids:
+                versions.pop(player_id, None)
+
+
+def save_player_data_service(player_id: str, game_data: Dict[str, Any], touch_last_seen: bool = True) -> bool:
+    """
+    儲存玩家遊戲資料到 Firestore（已有文件時只更新變動的欄位），並同步更新頂層的 lastSeen。
+    信箱、紀錄、遠征進度與怪獸的聊天/活動紀錄寫入各自的子文件；資料中沒有的區塊不會改動。
+    在使用 PlayerUnitOfWork 的請求中只標記為待寫入，請求結束時與其他玩家一起寫入。
+    """
+    unit_of_work = current_player_unit_of_work()
+    if unit_of_work is not None:
+        unit_of_work.stage(player_id, game_data, touch_last_seen)
+        return True
+    return save_players_data_service([(player_id, game_data, touch_last_seen)])
+
+# --- 請求範圍的工作單元 ---
+def _fill_unloaded_sections(db: Any, player_id: str, game_data: Dict[str, Any], sections: Iterable[str]) -> Dict[str, Any]:
+    """把之前未載入的子文件區塊補進已載入的玩家資料；期間以 PendingEntries 新增的項目併入既有內容。"""
+    monsters = [monster for monster in game_data.get("farmedMonsters", []) or [] if isinstance(monster, dict)]
+    missing: List[str] = []
+    for section in dict.fromkeys(sections):
+        if section in PLAYER_SECTION_DOCUMENTS:
+            if section not in game_data or isinstance(game_data[section], PendingEntries):
+                missing.append(section)
+        elif section == MONSTER_DETAILS_SECTION:
+            if any(isinstance(monster.get(field), PendingEntries) for monster in monsters for field in MONSTER_DETAIL_FIELDS):
+                missing.append(section)
+    if not missing:
+        return game_data
+
+    loaded = _load_player_sections(db, player_id, missing)
+    for section in PLAYER_SECTION_DOCUMENTS:
+        if section in loaded:
+            pending = game_data.get(section)
+            stored = copy.deepcopy(loaded[section])
+            game_data[section] = _merge_entries(section, stored, pending) if isinstance(pending, PendingEntries) else stored
+    details = loaded.get(MONSTER_DETAILS_SECTION)
+    if details is not None:
+        for monster in monsters:
+            monster_details = details.get(monster.get("id"), {})
+            for field in MONSTER_DETAIL_FIELDS:
+                pending = monster.get(field)
+                if isinstance(pending, PendingEntries):
+                    monster[field] = _merge_entries(field, copy.deepcopy(monster_details.get(field)), pending)
+    return game_data
+
+
+class PlayerUnitOfWork:
+    """
+    單一請求內的玩家資料工作單元。
+    同一位玩家只讀取一次，之後的 get_player_data_service 都回傳同一份資料；
+    save_player_data_service 只把玩家標記為待寫入，flush 時以一個 batch 寫入所有被標記的玩家。
+    """
+
+    def __init__(self):
+        self._players: Dict[str, Dict[str, Any]] = {}
+        # 待寫入的玩家 -> 是否更新頂層 lastSeen
+        self._dirty: Dict[str, bool] = {}
+        self._staged_saves = 0
+
+    def get(
+        self, player_id: str, nickname_from_auth: Optional[str], game_configs: Dict[str, Any], sections: Iterable[str] = (),
+        for_update: bool = True
+    ) -> Tuple[Optional[Dict[str, Any]], bool]:
+        game_data = self._players.get(player_id)
+        if game_data is None:
+            game_data, is_new_player = _fetch_player_data(player_id, nickname_from_auth, game_configs, sections, for_update)
+            if game_data is not None:
+                self._players[player_id] = game_data
+            return game_data, is_new_player
+
+        player_cache.record("unit_of_work_hits")
+        from .MD_firebase_config import db
+        if db:
+            _fill_unloaded_sections(db, player_id, game_data, sections)
+        return game_data, False
+
+    def stage(self, player_id: str, game_data: Dict[str, Any], touch_last_seen: bool = True):
+        self._players[player_id] = game_data
+        self._dirty[player_id] = self._dirty.get(player_id, False) or touch_last_seen
+        self._staged_saves += 1
+
+    def flush(self) -> bool:
+        """寫入所有待寫入的玩家；沒有待寫入的玩家時不做任何事。"""
+        if not self._dirty:
+            return True
+        saves = [(player_id, self._players[player_id], touch_last_seen) for player_id, touch_last_seen in self._dirty.items()]
+        # 同一位玩家在請求中多次存檔，只算一次寫入
+        player_cache.record("firestore_writes_saved", self._staged_saves - len(saves))
+        self._dirty = {}
+        self._staged_saves = 0
+        return save_players_data_service(saves)
 
-def draw_free_dna() -> Optional[List[Dict[str, Any]]]:
+
+def current_player_unit_of_work() -> Optional[PlayerUnitOfWork]:
+    """目前請求使用中的工作單元；不在請求中或路由沒有使用時為 None。"""
+    try:
+        from flask import g, has_request_context
+    except ImportError:
+        return None
+    if not has_request_context():
+        return None
+    return g.get("player_unit_of_work")
+
+
+def with_player_unit_of_work(view):
+    """
+    路由裝飾器：請求期間的玩家讀取與存檔都經由同一個 PlayerUnitOfWork，路由回傳後再一次寫入。
+    路由拋出例外時不寫入；寫入失敗時改為回傳 500。
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from flask import g, jsonify
+        if current_player_unit_of_work() is not None:
+            return view(*args, **kwargs)
+        unit_of_work = PlayerUnitOfWork()
+        g.player_unit_of_work = unit_of_work
+        try:
+            response = view(*args, **kwargs)
+        finally:
+            g.pop("player_unit_of_work", None)
+        if not unit_of_work.flush():
+            return jsonify({"error": "玩家資料儲存失敗，請稍後再試。"}), 500
+        return response
+    return wrapper
+
+
+def draw_free_dna(game_configs: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
     """執行免費的 DNA 抽取。"""
     player_services_logger.info("正在執行免費 DNA 抽取...")
     try:
-        from .MD_config_services import load_all_game_configs_from_firestore
-        game_configs = load_all_game_configs_from_firestore()
+        if game_configs is None:
+            from .MD_config_services import get_game_configs
+            game_configs = get_game_configs()
 
         if not game_configs or 'dna_fragments' not in game_configs:
             player_services_logger.error("無法載入 DNA 碎片設定，抽取失敗。")
             return None
 
-        all_dna_fragments = game_configs['dna_fragments']
-        
         allowed_rarities = {"普通"}
-        filtered_pool = [dna for dna in all_dna_fragments if dna.get('rarity') in allowed_rarities]
+        config_index = get_config_index(game_configs)
+        filtered_pool = [dna for rarity in allowed_rarities for dna in config_index.dna_by_rarity.get(rarity, ())]
 
         if not filtered_pool:
             player_services_logger.error("篩選後的 DNA 卡池為空，無法抽取。")
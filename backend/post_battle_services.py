@@ -12,6 +12,7 @@ from .monster_absorption_services import absorb_defeated_monster_service
 from .champion_services import get_champions_data, update_champions_document
 from .mail_services import add_mail_to_player
 from .tournament_services import calculate_pvp_points_update
+from .MD_config_services import get_config_index
 
 post_battle_logger = logging.getLogger(__name__)
 
@@ -41,82 +42,90 @@ def _check_and_award_titles(player_data: PlayerGameData, game_configs: GameConfi
     if not player_stats:
         return player_data, []
 
-    all_titles = game_configs.get("titles", [])
+    titles_by_condition_type = get_config_index(game_configs).titles_by_condition_type
     owned_title_ids = {t.get("id") for t in player_stats.get("titles", [])}
     newly_awarded_titles = []
     
     farmed_monsters = player_data.get("farmedMonsters", [])
 
-    for title in all_titles:
-        title_id = title.get("id")
-        if not title_id or title_id in owned_title_ids:
+    # 依條件類型分組檢查，每種條件的統計值只計算一次，而非每個稱號都重掃農場
+    unlocked_titles = []
+    for cond_type, titles_of_type in titles_by_condition_type.items():
+        pending_titles = [t for t in titles_of_type if t.get("id") and t.get("id") not in owned_title_ids]
+        if not pending_titles:
             continue
 
-        condition = title.get("condition", {})
-        cond_type = condition.get("type")
-        cond_value = condition.get("value")
-
-        unlocked = False
-        if cond_type == "wins" and player_stats.get("wins", 0) >= cond_value:
-            unlocked = True
-        elif cond_type == "monsters_owned" and len(farmed_monsters) >= cond_value:
-            unlocked = True
+        if cond_type == "wins":
+            wins = player_stats.get("wins", 0)
+            unlocked_titles.extend(t for t in pending_titles if wins >= t["condition"].get("value"))
+        elif cond_type == "monsters_owned":
+            unlocked_titles.extend(t for t in pending_titles if len(farmed_monsters) >= t["condition"].get("value"))
         elif cond_type == "monster_elements_count":
-            if any(len(monster.get("elements", [])) >= cond_value for monster in farmed_monsters):
-                unlocked = True
+            max_elements = max((len(monster.get("elements", [])) for monster in farmed_monsters), default=None)
+            unlocked_titles.extend(t for t in pending_titles if max_elements is not None and max_elements >= t["condition"].get("value"))
         elif cond_type == "own_elemental_monsters":
-            cond_element = condition.get("element")
-            count = sum(1 for monster in farmed_monsters if monster.get("elements") and monster["elements"][0] == cond_element)
-            if count >= cond_value:
-                unlocked = True
+            primary_element_counts: Dict[str, int] = {}
+            for monster in farmed_monsters:
+                if monster.get("elements"):
+                    primary_element = monster["elements"][0]
+                    primary_element_counts[primary_element] = primary_element_counts.get(primary_element, 0) + 1
+            unlocked_titles.extend(t for t in pending_titles if primary_element_counts.get(t["condition"].get("element"), 0) >= t["condition"].get("value"))
         elif cond_type == "max_skill_level":
-            if any(skill.get("level", 0) >= cond_value for monster in farmed_monsters for skill in monster.get("skills", [])):
-                unlocked = True
+            max_skill_level = max((skill.get("level", 0) for monster in farmed_monsters for skill in monster.get("skills", [])), default=None)
+            unlocked_titles.extend(t for t in pending_titles if max_skill_level is not None and max_skill_level >= t["condition"].get("value"))
         elif cond_type == "monster_stat_reach":
-            stat_to_check = condition.get("stat")
-            if any(monster.get(stat_to_check, 0) >= cond_value for monster in farmed_monsters):
-                unlocked = True
+            stat_max_cache: Dict[str, Any] = {}
+            for title in pending_titles:
+                stat_to_check = title["condition"].get("stat")
+                if stat_to_check not in stat_max_cache:
+                    stat_max_cache[stat_to_check] = max((monster.get(stat_to_check, 0) for monster in farmed_monsters), default=None)
+                if stat_max_cache[stat_to_check] is not None and stat_max_cache[stat_to_check] >= title["condition"].get("value"):
+                    unlocked_titles.append(title)
         elif cond_type == "friends_count":
-            if len(player_data.get("friends", [])) >= cond_value:
-                unlocked = True
-
-        if unlocked:
-            player_stats.get("titles", []).insert(0, title)
-            newly_awarded_titles.append(title)
-            post_battle_logger.info(f"玩家 {player_data.get('nickname')} 達成條件，授予新稱號: {title.get('name')}")
-            
-            mail_title = f"🏆 榮譽加身！獲得新稱號：{title.get('name')}"
-            
-            buffs_text = ""
-            if title.get("buffs"):
-                buff_parts = []
-                stat_name_map = {
-                    'hp': 'HP', 'mp': 'MP', 'attack': '攻擊', 'defense': '防禦', 'speed': '速度', 'crit': '爆擊率',
-                    'cultivation_item_find_chance': '修煉物品發現率', 'elemental_damage_boost': '元素傷害',
-                    'score_gain_boost': '積分獲取', 'evasion': '閃避率',
-                    'fire_resistance': '火抗性', 'water_resistance': '水抗性', 'wood_resistance': '木抗性',
-                    'gold_resistance': '金抗性', 'earth_resistance': '土抗性', 'light_resistance': '光抗性',
-                    'dark_resistance': '暗抗性', 'poison_damage_boost': '毒素傷害',
-                    'cultivation_exp_gain': '修煉經驗獲取', 'cultivation_time_reduction': '修煉時間縮短',
-                    'dna_return_rate_on_disassemble': '分解DNA返還率', 'leech_skill_effect': '生命吸取效果',
-                    'mp_regen_per_turn': 'MP每回合恢復'
-                }
-                for stat, value in title["buffs"].items():
-                    name = stat_name_map.get(stat, stat)
-                    display_value = f"+{value * 100:.0f}%" if 0 < value < 1 else f"+{value}"
-                    buff_parts.append(f"{name}{display_value}")
-                buffs_text = f" 稱號效果：{ '、'.join(buff_parts) }"
+            friends_count = len(player_data.get("friends", []))
+            unlocked_titles.extend(t for t in pending_titles if friends_count >= t["condition"].get("value"))
 
-            mail_content = f"恭喜您！由於您的卓越表現，您已成功解鎖了新的稱號：「{title.get('name')}」。 描述：{title.get('description', '無')}{buffs_text}"
+    # 依設定中的稱號順序授予，與逐一檢查每個稱號時的授予順序相同
+    title_positions = {id(title): position for position, title in enumerate(game_configs.get("titles") or [])}
+    unlocked_titles.sort(key=lambda title: title_positions[id(title)])
 
-            mail_template = {
-                "type": "reward",
-                "title": mail_title,
-                "content": mail_content,
-                "sender_name": "系統通知",
-                "payload": {"reward_type": "title", "title_data": title}
+    for title in unlocked_titles:
+        player_stats.get("titles", []).insert(0, title)
+        newly_awarded_titles.append(title)
+        post_battle_logger.info(f"玩家 {player_data.get('nickname')} 達成條件，授予新稱號: {title.get('name')}")
+        
+        mail_title = f"🏆 榮譽加身！獲得新稱號：{title.get('name')}"
+        
+        buffs_text = ""
+        if title.get("buffs"):
+            buff_parts = []
+            stat_name_map = {
+                'hp': 'HP', 'mp': 'MP', 'attack': '攻擊', 'defense': '防禦', 'speed': '速度', 'crit': '爆擊率',
+                'cultivation_item_find_chance': '修煉物品發現率', 'elemental_damage_boost': '元素傷害',
+                'score_gain_boost': '積分獲取', 'evasion': '閃避率',
+                'fire_resistance': '火抗性', 'water_resistance': '水抗性', 'wood_resistance': '木抗性',
+                'gold_resistance': '金抗性', 'earth_resistance': '土抗性', 'light_resistance': '光抗性',
+                'dark_resistance': '暗抗性', 'poison_damage_boost': '毒素傷害',
+                'cultivation_exp_gain': '修煉經驗獲取', 'cultivation_time_reduction': '修煉時間縮短',
+                'dna_return_rate_on_disassemble': '分解DNA返還率', 'leech_skill_effect': '生命吸取效果',
+                'mp_regen_per_turn': 'MP每回合恢復'
             }
-            add_mail_to_player(player_data, mail_template)
+            for stat, value in title["buffs"].items():
+                name = stat_name_map.get(stat, stat)
+                display_value = f"+{value * 100:.0f}%" if 0 < value < 1 else f"+{value}"
+                buff_parts.append(f"{name}{display_value}")
+            buffs_text = f" 稱號效果：{ '、'.join(buff_parts) }"
+
+        mail_content = f"恭喜您！由於您的卓越表現，您已成功解鎖了新的稱號：「{title.get('name')}」。 描述：{title.get('description', '無')}{buffs_text}"
+
+        mail_template = {
+            "type": "reward",
+            "title": mail_title,
+            "content": mail_content,
+            "sender_name": "系統通知",
+            "payload": {"reward_type": "title", "title_data": title}
+        }
+        add_mail_to_player(player_data, mail_template)
 
     if newly_awarded_titles:
         player_data["playerStats"] = player_stats
@@ -173,8 +182,7 @@ def process_battle_results(
                 dna_match = re.search(r'隨機(.+?)系DNA', reward_text)
                 if dna_match:
                     element = dna_match.group(1)
-                    all_dna = game_configs.get("dna_fragments", [])
-                    dna_pool = [d for d in all_dna if d.get("type") == element]
+                    dna_pool = list(get_config_index(game_configs).dna_by_element.get(element, ()))
                     if dna_pool:
                         dna_reward = random.choice(dna_pool)
                         main_inventory = player_data.get("playerOwnedDNA", [])
@@ -1,8 +1,9 @@
 # backend/tournament_routes.py
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify
 from .auth_middleware import firebase_auth_required
 from .tournament_services import find_ladder_opponent_service
 from .player_services import get_player_data_service
+from .MD_config_services import get_game_configs
 
 tournament_bp = Blueprint('tournament_bp', __name__, url_prefix='/api/MD/tournament')
 
@@ -17,7 +18,7 @@ def find_match_route(player_id):
     match_type = data.get('match_type', 'equal') # 預設為 'equal'
 
     if player_pvp_points is None:
-        game_configs = current_app.config.get('MD_GAME_CONFIGS', {})
+        game_configs = get_game_configs()
         player_data, _ = get_player_data_service(player_id, None, game_configs)
         if not player_data:
             return jsonify({"success": False, "error": "無法獲取玩家資料"}), 500
@@ -0,0 +1,368 @@
+# backend/tournament_runner_services.py
+# 全服錦標賽：以所有玩家的出戰怪獸（或指定的種子名單）進行循環賽或單淘汰賽，
+# 對戰交給行程池以戰鬥引擎平行模擬（不產生 AI 戰報與文字日誌），最後以批次寫入一次保存戰績
+# 使用方式：python -m backend.tournament_runner_services --format round_robin --seed 0 [--seed-list id1,id2,...]
+# 後台路由則以背景工作執行同一流程（admin_job_services）
+
+import argparse
+import json
+import time
+import uuid
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from firebase_admin import firestore
+
+from . import MD_firebase_config
+from .MD_models import Monster, GameConfigs
+from .battle_services import simulate_battle_full
+from .battle_simulation_services import _init_simulation_worker, SIMULATION_WORKERS
+from .leaderboard_search_services import get_all_player_selected_monsters_service
+
+tournament_runner_logger = logging.getLogger(__name__)
+
+TOURNAMENT_COLLECTION = "MD_Tournaments"
+TOURNAMENT_FORMAT_ROUND_ROBIN = "round_robin"
+TOURNAMENT_FORMAT_SINGLE_ELIMINATION = "single_elimination"
+TOURNAMENT_FORMATS = (TOURNAMENT_FORMAT_ROUND_ROBIN, TOURNAMENT_FORMAT_SINGLE_ELIMINATION)
+
+# 每個工作單位包含的對戰數，攤平行程間傳遞資料的成本
+TOURNAMENT_CHUNK_SIZE = 200
+# 對戰數少於此值時直接在目前行程執行
+MIN_MATCHES_FOR_POOL = 500
+# 循環賽的積分：勝 3、和 1、敗 0
+POINTS_WIN, POINTS_DRAW = 3, 1
+# 淘汰賽平手時最多重賽的次數，仍平手則由種子序較前者晉級
+ELIMINATION_MAX_REMATCHES = 2
+# Firestore 單一批次寫入的上限
+FIRESTORE_BATCH_LIMIT = 500
+
+# 行程池中每個 worker 各自持有一份設定與參賽名單，工作單位只需傳遞索引
+_worker_game_configs: Optional[GameConfigs] = None
+_worker_entrants: Optional[List[Monster]] = None
+
+
+def _init_tournament_worker(game_configs: GameConfigs, entrants: List[Monster]):
+    global _worker_game_configs, _worker_entrants
+    _init_simulation_worker(game_configs)
+    _worker_game_configs = game_configs
+    _worker_entrants = entrants
+
+
+def _run_match_chunk(
+    matches: List[Tuple[int, int, int]], game_configs: Optional[GameConfigs] = None, entrants: Optional[List[Monster]] = None
+) -> List[Tuple[int, int, Optional[int], int]]:
+    """
+    執行一批對戰 (參賽者 a, 參賽者 b, 種子)，回傳 (a, b, 勝者索引或 None, 回合數)。
+    """
+    game_configs = game_configs if game_configs is not None else _worker_game_configs
+    entrants = entrants if entrants is not None else _worker_entrants
+
+    results = []
+    for a, b, seed in matches:
+        monster_a, monster_b = entrants[a], entrants[b]
+        result = simulate_battle_full(monster_a, monster_b, game_configs, generate_ai_report=False, include_log=False, seed=seed)
+        if result["winner_id"] == monster_a.get("id"):
+            winner = a
+        elif result["winner_id"] == monster_b.get("id"):
+            winner = b
+        else:
+            winner = None
+        turns = sum(1 for event in result.get("battle_events", []) if event["type"] == "turn_start")
+        results.append((a, b, winner, turns))
+    return results
+
+
+class _MatchRunner:
+    """依對戰數量決定在目前行程或行程池中執行；同一場錦標賽的多輪對戰共用同一個行程池。"""
+
+    def __init__(self, entrants: List[Monster], game_configs: GameConfigs, max_workers: Optional[int], expected_matches: int):
+        self.entrants = entrants
+        self.game_configs = game_configs
+        workers = max(1, max_workers or SIMULATION_WORKERS)
+        self.executor: Optional[ProcessPoolExecutor] = None
+        if expected_matches >= MIN_MATCHES_FOR_POOL and workers > 1:
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_tournament_worker, initargs=(game_configs, entrants)
+            )
+
+    def run(self, matches: List[Tuple[int, int, int]]) -> List[Tuple[int, int, Optional[int], int]]:
+        chunks = [matches[i:i + TOURNAMENT_CHUNK_SIZE] for i in range(0, len(matches), TOURNAMENT_CHUNK_SIZE)]
+        if self.executor is None or len(chunks) == 1:
+            return [r for chunk in chunks for r in _run_match_chunk(chunk, self.game_configs, self.entrants)]
+        futures = [self.executor.submit(_run_match_chunk, chunk) for chunk in chunks]
+        return [r for future in futures for r in future.result()]
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+def _new_standing(entrant: Monster, seed_position: int) -> Dict[str, Any]:
+    return {
+        "seed": seed_position,
+        "monster_id": entrant.get("id"),
+        "monster_nickname": entrant.get("nickname"),
+        "owner_id": entrant.get("owner_id"),
+        "owner_nickname": entrant.get("owner_nickname"),
+        "played": 0, "wins": 0, "losses": 0, "draws": 0, "points": 0,
+        "total_turns": 0,
+    }
+
+
+def _record_result(standings: List[Dict[str, Any]], a: int, b: int, winner: Optional[int], turns: int):
+    for i in (a, b):
+        standings[i]["played"] += 1
+        standings[i]["total_turns"] += turns
+    if winner is None:
+        for i in (a, b):
+            standings[i]["draws"] += 1
+            standings[i]["points"] += POINTS_DRAW
+    else:
+        loser = b if winner == a else a
+        standings[winner]["wins"] += 1
+        standings[winner]["points"] += POINTS_WIN
+        standings[loser]["losses"] += 1
+
+
+def _run_round_robin(runner: _MatchRunner, standings: List[Dict[str, Any]], seed: int) -> int:
+    n = len(standings)
+    matches = []
+    for a in range(n):
+        for b in range(a + 1, n):
+            matches.append((a, b, seed + len(matches)))
+    for a, b, winner, turns in runner.run(matches):
+        _record_result(standings, a, b, winner, turns)
+    return len(matches)
+
+
+def _bracket_order(size: int) -> List[int]:
+    """標準種子排位：第 1 種子與最後一個種子對戰，且前兩種子只會在決賽相遇。"""
+    order = [0]
+    while len(order) < size:
+        round_size = len(order) * 2
+        order = [x for seed_index in order for x in (seed_index, round_size - 1 - seed_index)]
+    return order
+
+
+def _run_single_elimination(runner: _MatchRunner, standings: List[Dict[str, Any]], seed: int) -> int:
+    n = len(standings)
+    bracket_size = 1
+    while bracket_size < n:
+        bracket_size *= 2
+    # 超出參賽人數的位置為輪空，對上輪空者直接晉級
+    slots: List[Optional[int]] = [i if i < n else None for i in _bracket_order(bracket_size)]
+
+    match_count = 0
+    round_number = 0
+    while len(slots) > 1:
+        round_number += 1
+        pairs = [(slots[i], slots[i + 1]) for i in range(0, len(slots), 2)]
+        winners: Dict[int, int] = {}
+        pending = [(k, a, b) for k, (a, b) in enumerate(pairs) if a is not None and b is not None]
+        for attempt in range(ELIMINATION_MAX_REMATCHES + 1):
+            if not pending:
+                break
+            matches = []
+            for k, a, b in pending:
+                matches.append((a, b, seed + match_count))
+                match_count += 1
+            still_tied = []
+            for (k, a, b), (_, _, winner, turns) in zip(pending, runner.run(matches)):
+                _record_result(standings, a, b, winner, turns)
+                if winner is not None:
+                    winners[k] = winner
+                elif attempt == ELIMINATION_MAX_REMATCHES:
+                    winners[k] = min(a, b)
+                else:
+                    still_tied.append((k, a, b))
+            pending = still_tied
+
+        next_slots: List[Optional[int]] = []
+        for k, (a, b) in enumerate(pairs):
+            if a is not None and b is not None:
+                advancing = winners[k]
+                standings[a if advancing == b else b]["eliminated_in_round"] = round_number
+            else:
+                advancing = a if a is not None else b
+            next_slots.append(advancing)
+        slots = next_slots
+
+    if slots and slots[0] is not None:
+        standings[slots[0]]["champion"] = True
+    return match_count
+
+
+def _rank_standings(standings: List[Dict[str, Any]], tournament_format: str) -> List[Dict[str, Any]]:
+    if tournament_format == TOURNAMENT_FORMAT_SINGLE_ELIMINATION:
+        # 冠軍第一，其餘依淘汰輪次（越晚越前），同輪再依勝場與種子序
+        key = lambda s: (not s.get("champion", False), -s.get("eliminated_in_round", 0), -s["wins"], s["seed"])
+    else:
+        key = lambda s: (-s["points"], -s["wins"], s["losses"], s["seed"])
+    ranked = sorted(standings, key=key)
+    for rank, standing in enumerate(ranked, start=1):
+        standing["rank"] = rank
+    return ranked
+
+
+def order_entrants_by_seed_list(entrants: List[Monster], seed_list: List[str]) -> List[Monster]:
+    """依種子名單（玩家 ID 或怪獸 ID）排序參賽者；不在名單上的參賽者不參加。"""
+    by_key: Dict[str, Monster] = {}
+    for entrant in entrants:
+        for key in (entrant.get("owner_id"), entrant.get("id")):
+            if key:
+                by_key.setdefault(key, entrant)
+    ordered, seen = [], set()
+    for key in seed_list:
+        entrant = by_key.get(key)
+        if entrant is not None and id(entrant) not in seen:
+            ordered.append(entrant)
+            seen.add(id(entrant))
+    return ordered
+
+
+def run_tournament(
+    entrants: List[Monster],
+    game_configs: GameConfigs,
+    tournament_format: str = TOURNAMENT_FORMAT_ROUND_ROBIN,
+    seed: int = 0,
+    max_workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    進行一場錦標賽並回傳結果（不寫入資料庫）。entrants 的順序即種子序。
+    每場對戰使用種子 seed + 對戰序號，相同的名單與種子必定得到相同的戰績。
+    """
+    if tournament_format not in TOURNAMENT_FORMATS:
+        raise ValueError(f"不支援的賽制：{tournament_format}。")
+    if len(entrants) < 2:
+        raise ValueError("錦標賽至少需要兩位參賽者。")
+
+    n = len(entrants)
+    expected_matches = n * (n - 1) // 2 if tournament_format == TOURNAMENT_FORMAT_ROUND_ROBIN else n - 1
+    standings = [_new_standing(entrant, i + 1) for i, entrant in enumerate(entrants)]
+
+    started_at = time.perf_counter()
+    runner = _MatchRunner(entrants, game_configs, max_workers, expected_matches)
+    try:
+        if tournament_format == TOURNAMENT_FORMAT_ROUND_ROBIN:
+            match_count = _run_round_robin(runner, standings, seed)
+        else:
+            match_count = _run_single_elimination(runner, standings, seed)
+    finally:
+        runner.close()
+    elapsed = time.perf_counter() - started_at
+
+    ranked = _rank_standings(standings, tournament_format)
+    tournament_runner_logger.info(f"錦標賽完成：{tournament_format}，參賽 {n} 位，對戰 {match_count} 場，耗時 {elapsed:.1f} 秒。")
+    return {
+        "tournament_id": uuid.uuid4().hex,
+        "format": tournament_format,
+        "seed": seed,
+        "entrant_count": n,
+        "match_count": match_count,
+        "seconds": round(elapsed, 2),
+        "standings": ranked,
+    }
+
+
+def save_tournament_results(tournament: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+    """
+    以批次寫入保存錦標賽摘要與每位參賽者的戰績（MD_Tournaments/{id}/standings）。
+    參賽者少於批次上限時只需一次提交；超過時依 Firestore 的上限分批提交。
+    """
+    db = MD_firebase_config.db
+    if not db:
+        return False, "Firestore 資料庫未初始化，無法保存錦標賽結果。"
+
+    try:
+        tournament_ref = db.collection(TOURNAMENT_COLLECTION).document(tournament["tournament_id"])
+        summary = {key: value for key, value in tournament.items() if key != "standings"}
+        summary["top_standings"] = tournament["standings"][:10]
+        summary["created_at"] = firestore.SERVER_TIMESTAMP
+
+        writes: List[Tuple[Any, Dict[str, Any]]] = [(tournament_ref, summary)]
+        for standing in tournament["standings"]:
+            doc_id = standing.get("monster_id") or f"seed_{standing['seed']}"
+            writes.append((tournament_ref.collection("standings").document(doc_id), standing))
+
+        for start in range(0, len(writes), FIRESTORE_BATCH_LIMIT):
+            batch = db.batch()
+            for doc_ref, data in writes[start:start + FIRESTORE_BATCH_LIMIT]:
+                batch.set(doc_ref, data)
+            batch.commit()
+        return True, None
+    except Exception as e:
+        tournament_runner_logger.error(f"保存錦標賽 {tournament.get('tournament_id')} 結果時發生錯誤: {e}", exc_info=True)
+        return False, "保存錦標賽結果時發生錯誤。"
+
+
+def run_server_tournament_service(
+    game_configs: GameConfigs,
+    tournament_format: str = TOURNAMENT_FORMAT_ROUND_ROBIN,
+    seed_list: Optional[List[str]] = None,
+    seed: int = 0,
+    max_workers: Optional[int] = None,
+    persist: bool = True
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    以所有玩家目前的出戰怪獸進行全服錦標賽。
+    提供 seed_list 時只讓名單上的參賽者依名單順序參加，否則依怪獸分數排定種子序。
+    回傳 (錦標賽結果, 錯誤訊息)。
+    """
+    entrants = get_all_player_selected_monsters_service(game_configs)
+    if seed_list:
+        entrants = order_entrants_by_seed_list(entrants, seed_list)
+    else:
+        entrants.sort(key=lambda m: m.get("score", 0), reverse=True)
+
+    try:
+        tournament = run_tournament(entrants, game_configs, tournament_format, seed, max_workers)
+    except ValueError as e:
+        return None, str(e)
+
+    if persist:
+        success, error = save_tournament_results(tournament)
+        if not success:
+            return tournament, error
+    return tournament, None
+
+
+def summarize_tournament(tournament: Dict[str, Any], top: int = 10) -> Dict[str, Any]:
+    """錦標賽摘要：除完整戰績外的欄位，加上前幾名的戰績。"""
+    summary = {key: value for key, value in tournament.items() if key != "standings"}
+    summary["top_standings"] = tournament["standings"][:top]
+    return summary
+
+
+def run_server_tournament_job(
+    game_configs: GameConfigs,
+    tournament_format: str = TOURNAMENT_FORMAT_ROUND_ROBIN,
+    seed_list: Optional[List[str]] = None,
+    seed: int = 0
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """供後台背景工作與命令列使用：執行並保存全服錦標賽，回傳 (錦標賽摘要, 錯誤訊息)。"""
+    tournament, error = run_server_tournament_service(game_configs, tournament_format, seed_list, seed)
+    return (summarize_tournament(tournament) if tournament else None), error
+
+
+if __name__ == '__main__':
+    from .MD_config_services import game_config_provider, get_game_configs
+
+    parser = argparse.ArgumentParser(description="以所有玩家的出戰怪獸進行全服錦標賽並保存戰績")
+    parser.add_argument("--format", choices=TOURNAMENT_FORMATS, default=TOURNAMENT_FORMAT_ROUND_ROBIN, help="賽制")
+    parser.add_argument("--seed", type=int, default=0, help="亂數種子")
+    parser.add_argument("--seed-list", help="以逗號分隔的玩家或怪獸 ID，只讓名單上的參賽者依序參加")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if not MD_firebase_config.db:
+        raise SystemExit("Firestore 資料庫未初始化，請設定 FIREBASE_SERVICE_ACCOUNT_KEY。")
+    game_config_provider.reload()
+
+    seed_list = [item.strip() for item in args.seed_list.split(",") if item.strip()] if args.seed_list else None
+    summary, error = run_server_tournament_job(get_game_configs(), args.format, seed_list, args.seed)
+    if summary:
+        print(json.dumps(summary, ensure_ascii=False, indent=2, default=str))
+    if error:
+        raise SystemExit(error)
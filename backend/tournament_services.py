@@ -1,14 +1,157 @@
 # backend/tournament_services.py
+import time
+import bisect
+import random
 import logging
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Optional, List, Tuple
 
 from . import MD_firebase_config
 
 tournament_logger = logging.getLogger(__name__)
 
+# 排行榜集合中可供範圍查詢的天梯欄位（只有設定出戰怪獸的玩家才有）
+LADDER_POINTS_FIELD = "pvp_points"
+LADDER_MONSTER_FIELD = "selected_monster_id"
+DEFAULT_PVP_POINTS = 1000
+# 索引尚未載入、改查 Firestore 時，挑戰強者/弱者最多取回的候選人數
+LADDER_QUERY_CANDIDATES = 50
+
+
+class LadderIndex:
+    """
+    依天梯積分排序的行程內索引，鍵為 (積分, uid)。
+    以二分搜尋找出積分最接近、更高或更低的對手，不需要掃描整個玩家集合。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: List[Tuple[int, str]] = []
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def _remove_locked(self, uid: str):
+        existing = self._entries.pop(uid, None)
+        if existing:
+            key = (existing["pvp_points"], uid)
+            i = bisect.bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+
+    def upsert(self, uid: str, pvp_points: int, nickname: str, selected_monster_id: str):
+        with self._lock:
+            self._remove_locked(uid)
+            bisect.insort(self._keys, (pvp_points, uid))
+            self._entries[uid] = {"id": uid, "nickname": nickname, "pvp_points": pvp_points, "selectedMonsterId": selected_monster_id}
+
+    def remove(self, uid: str):
+        with self._lock:
+            self._remove_locked(uid)
+
+    def replace_all(self, opponents: List[Dict[str, Any]]):
+        entries = {opponent["id"]: opponent for opponent in opponents}
+        keys = sorted((opponent["pvp_points"], uid) for uid, opponent in entries.items())
+        with self._lock:
+            self._keys = keys
+            self._entries = entries
+            self.loaded_at = time.time()
+
+    def find(self, player_id: str, player_pvp_points: int, match_type: str, rng: Any = random) -> Optional[Dict[str, Any]]:
+        """
+        equal: 積分差最小的對手；strong / weak: 積分嚴格高於 / 低於自己的對手中隨機一位。
+        """
+        with self._lock:
+            keys = self._keys
+            if match_type == 'strong':
+                low, high = bisect.bisect_right(keys, (player_pvp_points, "\U0010ffff")), len(keys)
+            elif match_type == 'weak':
+                low, high = 0, bisect.bisect_left(keys, (player_pvp_points, ""))
+            else:
+                i = bisect.bisect_left(keys, (player_pvp_points, ""))
+                best: Optional[Tuple[int, str]] = None
+                # 往兩側各找到第一個不是自己的玩家，再取積分差較小者
+                for step in (-1, 1):
+                    j = i - 1 if step < 0 else i
+                    while 0 <= j < len(keys) and keys[j][1] == player_id:
+                        j += step
+                    if 0 <= j < len(keys) and (best is None or abs(keys[j][0] - player_pvp_points) < abs(best[0] - player_pvp_points)):
+                        best = keys[j]
+                return dict(self._entries[best[1]]) if best else None
+
+            self_entry = self._entries.get(player_id)
+            self_index = None
+            if self_entry:
+                self_key = (self_entry["pvp_points"], player_id)
+                k = bisect.bisect_left(keys, self_key)
+                if low <= k < high and keys[k] == self_key:
+                    self_index = k
+            size = high - low - (1 if self_index is not None else 0)
+            if size <= 0:
+                return None
+            pick = low + rng.randrange(size)
+            if self_index is not None and pick >= self_index:
+                pick += 1
+            return dict(self._entries[keys[pick][1]])
+
+
+ladder_index = LadderIndex()
+
+
+def apply_leaderboard_entry_to_ladder(entry: Dict[str, Any]):
+    """排行榜文件更新時同步天梯索引；沒有出戰怪獸的玩家不列入。"""
+    if LADDER_POINTS_FIELD in entry and entry.get(LADDER_MONSTER_FIELD):
+        nickname = (entry.get("player_stats") or {}).get("nickname", "未知玩家")
+        ladder_index.upsert(entry["uid"], entry[LADDER_POINTS_FIELD], nickname, entry[LADDER_MONSTER_FIELD])
+    else:
+        ladder_index.remove(entry["uid"])
+
+
+def ladder_opponent_from_entry(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if LADDER_POINTS_FIELD not in entry or not entry.get(LADDER_MONSTER_FIELD):
+        return None
+    return {
+        "id": entry["uid"],
+        "nickname": (entry.get("player_stats") or {}).get("nickname", "未知玩家"),
+        "pvp_points": entry[LADDER_POINTS_FIELD],
+        "selectedMonsterId": entry[LADDER_MONSTER_FIELD],
+    }
+
+
+def _query_ladder_opponent(db: Any, player_id: str, player_pvp_points: int, match_type: str) -> Optional[Dict[str, Any]]:
+    """索引尚未載入時，以排行榜集合的積分欄位做範圍查詢。"""
+    from firebase_admin import firestore
+    from .leaderboard_search_services import LEADERBOARD_COLLECTION
+
+    collection = db.collection(LEADERBOARD_COLLECTION)
+    ascending, descending = firestore.Query.ASCENDING, firestore.Query.DESCENDING
+
+    def fetch(op: str, direction: str, limit: int) -> List[Dict[str, Any]]:
+        query = collection.where(LADDER_POINTS_FIELD, op, player_pvp_points).order_by(LADDER_POINTS_FIELD, direction=direction).limit(limit)
+        opponents = (ladder_opponent_from_entry(doc.to_dict() or {}) for doc in query.stream() if doc.id != player_id)
+        return [opponent for opponent in opponents if opponent]
+
+    if match_type == 'strong':
+        candidates = fetch(">", ascending, LADDER_QUERY_CANDIDATES)
+        return random.choice(candidates) if candidates else None
+    if match_type == 'weak':
+        candidates = fetch("<", descending, LADDER_QUERY_CANDIDATES)
+        return random.choice(candidates) if candidates else None
+    # 多取一筆，以免其中一筆是自己
+    candidates = fetch(">=", ascending, 2)[:1] + fetch("<", descending, 2)[:1]
+    return min(candidates, key=lambda opponent: abs(opponent["pvp_points"] - player_pvp_points)) if candidates else None
+
+
 def find_ladder_opponent_service(player_id: str, player_pvp_points: int, match_type: str = 'equal') -> Dict[str, Any]:
     """
     為玩家尋找一個天梯對手。
+    優先使用行程內的天梯索引；索引尚未載入時改以排行榜集合的積分欄位做範圍查詢。
 
     Args:
         player_id: 發起挑戰的玩家ID。
@@ -23,55 +166,14 @@ def find_ladder_opponent_service(player_id: str, player_pvp_points: int, match_t
         return {"success": False, "error": "資料庫服務異常。"}
 
     try:
-        users_ref = db.collection("users")
-        all_players_docs = users_ref.stream()
-
-        potential_opponents = []
-        for doc in all_players_docs:
-            if doc.id == player_id:
-                continue
-
-            game_data_ref = doc.reference.collection("gameData").document("main")
-            game_data_doc = game_data_ref.get()
-
-            if game_data_doc.exists:
-                player_data = game_data_doc.to_dict()
-                player_stats = player_data.get("playerStats", {})
-                opponent_pvp_points = player_stats.get("pvp_points", 1000)
-                
-                # 根據匹配類型篩選
-                if match_type == 'strong' and opponent_pvp_points <= player_pvp_points:
-                    continue
-                if match_type == 'weak' and opponent_pvp_points >= player_pvp_points:
-                    continue
-                
-                if player_data.get("selectedMonsterId"):
-                    potential_opponents.append({
-                        "id": doc.id,
-                        "nickname": player_stats.get("nickname", "未知玩家"),
-                        "pvp_points": opponent_pvp_points,
-                        "selectedMonsterId": player_data.get("selectedMonsterId")
-                    })
-
-        if not potential_opponents:
-            return {"success": False, "error": f"找不到任何符合條件的對手 (類型: {match_type})。"}
-
-        # 根據不同類型，選擇最佳對手
-        best_opponent = None
-        if match_type == 'equal':
-            # 找積分差最小的
-            min_diff = float('inf')
-            for opponent in potential_opponents:
-                diff = abs(player_pvp_points - opponent["pvp_points"])
-                if diff < min_diff:
-                    min_diff = diff
-                    best_opponent = opponent
+        from .leaderboard_search_services import ensure_ladder_index_fresh
+        if ensure_ladder_index_fresh():
+            best_opponent = ladder_index.find(player_id, player_pvp_points, match_type)
         else:
-            # 挑戰強者/弱者時，隨機選一個即可
-            best_opponent = random.choice(potential_opponents)
+            best_opponent = _query_ladder_opponent(db, player_id, player_pvp_points, match_type)
 
         if not best_opponent:
-            return {"success": False, "error": "在計算後未能找到最佳對手。"}
+            return {"success": False, "error": f"找不到任何符合條件的對手 (類型: {match_type})。"}
         
         tournament_logger.info(f"為玩家 {player_id} (積分: {player_pvp_points}, 類型: {match_type}) 匹配到對手 {best_opponent['id']} (積分: {best_opponent['pvp_points']})")
         
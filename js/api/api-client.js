@@ -152,6 +152,108 @@ async function simulateBattle(battleRequestData) {
     });
 }
 
+/**
+ * 串流模擬戰鬥：伺服器每模擬完一回合就送出該回合的事件與日誌，不必等整場戰鬥與戰後處理完成
+ * @param {object} battleRequestData - 與 simulateBattle 相同的請求內容
+ * @param {function} [onTurn] - 每收到一回合時呼叫，參數為 { turn, events, log }
+ * @param {function} [onStart] - 收到戰鬥開始資訊時呼叫，參數為 { battle_id, seed, names }
+ * @returns {Promise<object>} 與 simulateBattle 相同格式的最終結果
+ */
+async function simulateBattleStream(battleRequestData, onTurn, onStart) {
+    if (!battleRequestData || !battleRequestData.player_monster_data || !battleRequestData.opponent_monster_data) {
+        throw new Error("simulateBattleStream 函數需要一個包含 player_monster_data 和 opponent_monster_data 的物件。");
+    }
+    const headers = { 'Content-Type': 'application/json' };
+    const token = await getCurrentUserToken();
+    if (token) {
+        headers['Authorization'] = `Bearer ${token}`;
+    }
+
+    const response = await fetch(`${API_BASE_URL}/battle/simulate/stream`, {
+        method: 'POST',
+        headers,
+        body: JSON.stringify(battleRequestData),
+    });
+    if (!response.ok || !response.body) {
+        let errorData;
+        try {
+            errorData = await response.json();
+        } catch (e) {
+            errorData = { message: response.statusText || 'Unknown error', status: response.status };
+        }
+        const error = new Error(errorData.error || errorData.message || `HTTP error ${response.status}`);
+        error.status = response.status;
+        error.data = errorData;
+        throw error;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let finalResult = null;
+
+    const handleLine = (line) => {
+        if (!line.trim()) return;
+        const chunk = JSON.parse(line);
+        if (chunk.type === 'start' && onStart) {
+            onStart(chunk);
+        } else if (chunk.type === 'turn' && onTurn) {
+            onTurn(chunk);
+        } else if (chunk.type === 'result') {
+            finalResult = chunk;
+        } else if (chunk.type === 'error') {
+            throw new Error(chunk.error || '模擬戰鬥時發生錯誤。');
+        }
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.forEach(handleLine);
+    }
+    handleLine(buffer);
+
+    if (!finalResult) {
+        throw new Error('戰鬥串流在結果送達前中斷。');
+    }
+    return finalResult;
+}
+
+/**
+ * 取回背景產生的 AI 戰報
+ * @param {string} battleId 戰鬥結果中的 battle_id
+ * @returns {Promise<object>} 包含 status ('pending' | 'ready' | 'failed') 與 report 的物件
+ */
+async function getBattleReport(battleId) {
+    return fetchAPI(`/battle/report/${encodeURIComponent(battleId)}`, {
+        method: 'GET',
+    });
+}
+
+/**
+ * 取回戰鬥重播（完整日誌、亮點與事件流），只有參戰的玩家可以取得
+ * 重播在伺服器背景寫入，剛結束的戰鬥可能暫時回應 404，會間隔重試幾次
+ * @param {string} replayId 戰鬥結果中的 replay_id
+ * @param {number} maxAttempts 最多嘗試次數
+ * @param {number} intervalMs 每次重試的間隔毫秒數
+ * @returns {Promise<object>} 包含 replay 的物件
+ */
+async function getBattleReplay(replayId, maxAttempts = 5, intervalMs = 500) {
+    for (let attempt = 1; ; attempt++) {
+        try {
+            return await fetchAPI(`/battle/replay/${encodeURIComponent(replayId)}`, {
+                method: 'GET',
+            });
+        } catch (error) {
+            if (error.status !== 404 || attempt >= maxAttempts) throw error;
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+        }
+    }
+}
+
 /**
  * 為怪獸生成 AI 描述
  * @param {object} monsterData 怪獸的基礎數據
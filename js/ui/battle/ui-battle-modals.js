@@ -11,6 +11,20 @@ function showBattleLogModal(battleResult, playerMonsterData, opponentMonsterData
         return;
     }
 
+    // 伺服器已保存重播時，戰鬥結果只附 replay_id，先取回完整日誌再顯示
+    if (!battleResult.raw_full_log && battleResult.replay_id) {
+        getBattleReplay(battleResult.replay_id)
+            .then(result => {
+                const rawFullLog = (result && result.replay && result.replay.raw_full_log) || [];
+                showBattleLogModal({ ...battleResult, raw_full_log: rawFullLog }, playerMonsterData, opponentMonsterData, customFooterActions);
+            })
+            .catch(error => {
+                console.error(`取回戰鬥重播 ${battleResult.replay_id} 失敗:`, error);
+                showBattleLogModal({ ...battleResult, raw_full_log: [] }, playerMonsterData, opponentMonsterData, customFooterActions);
+            });
+        return;
+    }
+
     DOMElements.battleLogArea.innerHTML = ''; 
 
     const battleReportContent = battleResult.ai_battle_report_content;
@@ -372,4 +386,42 @@ function showBattleLogModal(battleResult, playerMonsterData, opponentMonsterData
 
     DOMElements.battleLogArea.scrollTop = 0;
     showModal('battle-log-modal');
+
+    // AI 戰報改由伺服器背景撰寫，若尚未完成則定時查詢並在完成後補上
+    if (battleReportContent.status === 'pending' && battleResult.battle_id) {
+        pollBattleReport(battleResult.battle_id, (report) => {
+            const summaryEl = reportContainer.querySelector('.battle-summary-text');
+            if (summaryEl) {
+                summaryEl.innerHTML = formatBasicText(applyDynamicStylingToBattleReport(report.battle_summary, playerMonsterData, opponentMonsterData));
+            }
+        }, () => {
+            const summaryEl = reportContainer.querySelector('.battle-summary-text');
+            if (summaryEl) {
+                summaryEl.textContent = '戰地記者這次沒能完成戰報，請參考本場的戰鬥紀錄。';
+            }
+        });
+    }
+}
+
+/**
+ * 定時查詢背景撰寫的戰報，最多查詢 maxAttempts 次；
+ * 戰報失敗或超過次數仍未完成時呼叫 onGiveUp，彈窗關閉後則直接停止
+ */
+async function pollBattleReport(battleId, onReady, onGiveUp = null, maxAttempts = 20, intervalMs = 3000) {
+    for (let attempt = 0; attempt < maxAttempts; attempt++) {
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+        if (!DOMElements.battleLogModal || DOMElements.battleLogModal.style.display === 'none') return;
+        try {
+            const result = await getBattleReport(battleId);
+            if (result && result.status === 'ready' && result.report) {
+                onReady(result.report);
+                return;
+            }
+            if (result && result.status === 'failed') break;
+        } catch (error) {
+            // 其他 worker 尚未寫入時會回應 404，視為仍在撰寫中
+            console.warn(`查詢戰報 ${battleId} 失敗:`, error);
+        }
+    }
+    if (onGiveUp) onGiveUp();
 }
@@ -662,6 +662,17 @@ function showBattleLogModal(battleResult) {
         return;
     }
 
+    // 伺服器已保存重播時，戰鬥結果只附 replay_id，先取回完整日誌再顯示
+    if (!battleResult.raw_full_log && battleResult.replay_id) {
+        getBattleReplay(battleResult.replay_id)
+            .then(result => showBattleLogModal({ ...battleResult, raw_full_log: (result && result.replay && result.replay.raw_full_log) || [] }))
+            .catch(error => {
+                console.error(`取回戰鬥重播 ${battleResult.replay_id} 失敗:`, error);
+                showBattleLogModal({ ...battleResult, raw_full_log: [] });
+            });
+        return;
+    }
+
     DOMElements.battleLogArea.innerHTML = ''; // 清空舊內容
 
     const battleReportContent = battleResult.ai_battle_report_content;
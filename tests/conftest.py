@@ -0,0 +1,45 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import MD_firebase_config, champion_services, leaderboard_search_services  # noqa: E402
+from backend import player_services  # noqa: E402
+from backend.MD_local_config_services import load_all_game_configs_from_local_files  # noqa: E402
+
+from tests.fake_firestore import FakeFirestore  # noqa: E402
+
+TEST_GAME_CONFIGS = {
+    "titles": [{"id": "title_001", "name": "新手"}],
+    "naming_constraints": {},
+    "value_settings": {"starting_gold": 500},
+}
+
+
+@pytest.fixture
+def game_configs():
+    return TEST_GAME_CONFIGS
+
+
+@pytest.fixture(scope="session")
+def local_game_configs(tmp_path_factory):
+    """由 backend 內的本地設定檔組成的完整遊戲設定；快取寫到暫存目錄，不動到 backend/.config_cache。"""
+    return load_all_game_configs_from_local_files(cache_dir=str(tmp_path_factory.mktemp("config_cache")))
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """把全域的 Firestore 用戶端換成記憶體內的 FakeFirestore，並清空玩家快取。"""
+    db = FakeFirestore()
+    previous_db = MD_firebase_config.db
+    MD_firebase_config.set_firestore_client(db)
+    player_services.player_cache.clear()
+    monkeypatch.setattr(champion_services, "get_champions_data", lambda: {})
+    # 排行榜同步有自己的流程，這裡只驗證玩家資料的寫入
+    monkeypatch.setattr(leaderboard_search_services, "sync_leaderboard_entry", lambda *args, **kwargs: False)
+    yield db
+    player_services.player_cache.clear()
+    MD_firebase_config.set_firestore_client(previous_db)
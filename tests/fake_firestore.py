@@ -0,0 +1,223 @@
+# tests/fake_firestore.py
+# 測試用的記憶體內 Firestore：只實作玩家資料存取會用到的 API（文件讀寫、批次寫入、update_time 前置條件）
+
+import copy
+from typing import Any, Dict, List, Optional
+
+from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition, NotFound
+from google.cloud.firestore_v1.field_path import FieldPath
+
+
+class FakeWriteResult:
+    def __init__(self, update_time: int):
+        self.update_time = update_time
+
+
+class FakeSnapshot:
+    def __init__(self, client: "FakeFirestore", path: str):
+        self._client = client
+        self._path = path
+        self._data = copy.deepcopy(client.documents.get(path))
+        self.update_time = client.update_times.get(path)
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    @property
+    def id(self) -> str:
+        return self._path.rsplit("/", 1)[-1]
+
+    @property
+    def reference(self) -> "FakeDocumentReference":
+        return FakeDocumentReference(self._client, self._path)
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data)
+
+
+class FakeDocumentReference:
+    def __init__(self, client: "FakeFirestore", path: str):
+        self._client = client
+        self.path = path
+
+    @property
+    def id(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    def collection(self, name: str) -> "FakeCollectionReference":
+        return FakeCollectionReference(self._client, f"{self.path}/{name}")
+
+    def get(self, transaction: Any = None) -> FakeSnapshot:
+        self._client.reads += 1
+        return FakeSnapshot(self._client, self.path)
+
+    def set(self, data: Dict[str, Any], merge: bool = False) -> FakeWriteResult:
+        self._client.check_failure()
+        return self._client.apply_set(self.path, data, merge)
+
+    def update(self, data: Dict[str, Any], option: Any = None) -> FakeWriteResult:
+        self._client.check_failure()
+        return self._client.apply_update(self.path, data, option)
+
+    def delete(self):
+        self._client.check_failure()
+        self._client.apply_delete(self.path)
+
+
+class FakeQuery:
+    def __init__(self, collection: "FakeCollectionReference", filters: List[Any]):
+        self._collection = collection
+        self._filters = filters
+
+    def where(self, field: str, op: str, value: Any) -> "FakeQuery":
+        return FakeQuery(self._collection, self._filters + [(field, op, value)])
+
+    def select(self, fields: List[str]) -> "FakeQuery":
+        return self
+
+    def stream(self) -> List[FakeSnapshot]:
+        compare = {"==": lambda a, b: a == b, ">": lambda a, b: a > b, ">=": lambda a, b: a >= b}
+        results = []
+        for snapshot in self._collection.list_documents():
+            data = snapshot.to_dict() or {}
+            if all(field in data and compare[op](data[field], value) for field, op, value in self._filters):
+                results.append(snapshot)
+        return results
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, client: "FakeFirestore", path: str):
+        super().__init__(self, [])
+        self._client = client
+        self.path = path
+
+    def document(self, document_id: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self._client, f"{self.path}/{document_id}")
+
+    def list_documents(self) -> List[FakeSnapshot]:
+        prefix = self.path + "/"
+        return [
+            FakeSnapshot(self._client, path) for path in sorted(self._client.documents)
+            if path.startswith(prefix) and "/" not in path[len(prefix):]
+        ]
+
+
+class FakeWriteBatch:
+    def __init__(self, client: "FakeFirestore"):
+        self._client = client
+        self._writes: List[Any] = []
+
+    def create(self, ref: FakeDocumentReference, data: Dict[str, Any]):
+        self._writes.append(("create", ref.path, data, None))
+
+    def set(self, ref: FakeDocumentReference, data: Dict[str, Any], merge: bool = False):
+        self._writes.append(("set", ref.path, data, merge))
+
+    def update(self, ref: FakeDocumentReference, data: Dict[str, Any], option: Any = None):
+        self._writes.append(("update", ref.path, data, option))
+
+    def delete(self, ref: FakeDocumentReference):
+        self._writes.append(("delete", ref.path, None, None))
+
+    def commit(self) -> List[FakeWriteResult]:
+        """全部寫入成功或全部不寫入，與 Firestore 的批次寫入相同。"""
+        client = self._client
+        client.check_failure()
+        client.commits += 1
+        snapshot = (copy.deepcopy(client.documents), dict(client.update_times), client.clock)
+        results = []
+        try:
+            for operation, path, data, extra in self._writes:
+                if operation == "create":
+                    if path in client.documents:
+                        raise AlreadyExists(path)
+                    results.append(client.apply_set(path, data, False))
+                elif operation == "set":
+                    results.append(client.apply_set(path, data, extra))
+                elif operation == "update":
+                    results.append(client.apply_update(path, data, extra))
+                else:
+                    client.apply_delete(path)
+                    results.append(FakeWriteResult(client.clock))
+        except Exception:
+            client.documents, client.update_times, client.clock = snapshot
+            raise
+        return results
+
+
+class FakeFirestore:
+    """
+    以 {文件路徑: 內容} 保存資料的 Firestore 用戶端。
+    每次寫入都會讓 clock 加一並作為文件的 update_time；fail_next_write 為 True 時下一次寫入會失敗。
+    """
+
+    def __init__(self):
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.update_times: Dict[str, int] = {}
+        self.clock = 0
+        self.reads = 0
+        self.writes = 0
+        self.commits = 0
+        self.fail_next_write = False
+
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, name)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def get_all(self, refs: List[FakeDocumentReference]) -> List[FakeSnapshot]:
+        self.reads += len(refs)
+        return [FakeSnapshot(self, ref.path) for ref in refs]
+
+    def write_option(self, last_update_time: Any = None) -> Any:
+        return last_update_time
+
+    def document_data(self, path: str) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self.documents.get(path))
+
+    def check_failure(self):
+        if self.fail_next_write:
+            self.fail_next_write = False
+            raise RuntimeError("模擬的 Firestore 寫入失敗")
+
+    def _touch(self, path: str) -> FakeWriteResult:
+        self.clock += 1
+        self.writes += 1
+        self.update_times[path] = self.clock
+        return FakeWriteResult(self.clock)
+
+    def _resolve(self, value: Any) -> Any:
+        return self.clock + 1 if value is firestore.SERVER_TIMESTAMP else copy.deepcopy(value)
+
+    def apply_set(self, path: str, data: Dict[str, Any], merge: bool) -> FakeWriteResult:
+        resolved = {key: self._resolve(value) for key, value in data.items()}
+        if merge and path in self.documents:
+            self.documents[path].update(resolved)
+        else:
+            self.documents[path] = resolved
+        return self._touch(path)
+
+    def apply_update(self, path: str, data: Dict[str, Any], option: Any) -> FakeWriteResult:
+        if path not in self.documents:
+            raise NotFound(path)
+        if option is not None and self.update_times.get(path) != option:
+            raise FailedPrecondition(path)
+        document = self.documents[path]
+        for field_path, value in data.items():
+            parts = FieldPath.from_api_repr(field_path).parts
+            target = document
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            if value is firestore.DELETE_FIELD:
+                target.pop(parts[-1], None)
+            else:
+                target[parts[-1]] = self._resolve(value)
+        return self._touch(path)
+
+    def apply_delete(self, path: str):
+        self.documents.pop(path, None)
+        self.update_times.pop(path, None)
+        self.writes += 1
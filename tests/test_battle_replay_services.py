@@ -0,0 +1,97 @@
+# tests/test_battle_replay_services.py
+# 戰鬥重播：事件流的壓縮與還原、相同種子的重現性、查看權限
+
+import pytest
+
+from backend.battle_benchmark import build_fixture_monsters
+from backend.battle_replay_services import (
+    attach_battle_replay, build_replay_record, can_view_replay, get_replay_record, pack_battle_events, render_replay,
+    unpack_battle_events
+)
+from backend.battle_services import simulate_battle_full
+
+
+@pytest.fixture(scope="module")
+def fixture_monsters(local_game_configs):
+    return build_fixture_monsters(local_game_configs)
+
+
+def _simulate(game_configs, monsters, seed):
+    return simulate_battle_full(monsters[0], monsters[1], game_configs, generate_ai_report=False, seed=seed)
+
+
+# --- pack_battle_events / unpack_battle_events ---
+
+def test_pack_and_unpack_round_trip_every_event_type():
+    sides = {
+        "player": {"name": "火焰獸", "hp": 80, "max_hp": 100, "mp": 10, "max_mp": 20, "status": []},
+        "opponent": {"name": "水靈", "hp": 90, "max_hp": 90, "mp": 5, "max_mp": 15, "status": ["中毒"]},
+    }
+    events = [
+        {"turn": 1, "type": "turn_start", "sides": sides},
+        {"turn": 1, "type": "action", "actor": "player", "skill": "火球", "level": 2},
+        {"turn": 1, "type": "crit", "actor": "player"},
+        {"turn": 1, "type": "damage", "actor": "player", "target": "opponent", "amount": 12, "element_multiplier": 1.5, "crit": True},
+        {"turn": 1, "type": "status_applied", "target": "opponent", "status_id": "poison", "status": "中毒", "duration": 3, "message": None},
+        {"turn": 1, "type": "miss", "actor": "opponent", "target": "player"},
+        {"turn": 2, "type": "turn_start", "sides": sides},
+        {"turn": 2, "type": "weather_start", "weather": "rain", "duration": 2, "message": "下雨了"},
+        {"turn": 2, "type": "stat_change", "target": "player", "stats": ["attack"], "amounts": [3], "message": "攻擊提升"},
+        {"turn": 2, "type": "battle_end", "winner": "player"},
+    ]
+    assert unpack_battle_events(pack_battle_events(events)) == events
+
+
+def test_pack_round_trips_a_simulated_battle(local_game_configs, fixture_monsters):
+    events = _simulate(local_game_configs, fixture_monsters, seed=7)["battle_events"]
+    assert events
+    assert unpack_battle_events(pack_battle_events(events)) == events
+
+
+def test_unpack_of_an_empty_event_stream_is_empty():
+    assert unpack_battle_events(pack_battle_events([])) == []
+
+
+# --- 重現性 ---
+
+def test_same_seed_produces_the_same_battle(local_game_configs, fixture_monsters):
+    first = _simulate(local_game_configs, fixture_monsters, seed=7)
+    second = _simulate(local_game_configs, fixture_monsters, seed=7)
+    assert first["battle_events"] == second["battle_events"]
+    assert first["raw_full_log"] == second["raw_full_log"]
+    assert first["winner_id"] == second["winner_id"]
+    assert first["input_hash"] == second["input_hash"]
+
+
+def test_replay_renders_the_same_log_as_the_battle(local_game_configs, fixture_monsters):
+    battle_result = _simulate(local_game_configs, fixture_monsters, seed=11)
+    record = build_replay_record(battle_result, fixture_monsters[0], fixture_monsters[1], ["u1"])
+    replay = render_replay(record, local_game_configs)
+    assert replay["battle_events"] == battle_result["battle_events"]
+    assert replay["raw_full_log"] == battle_result["raw_full_log"]
+
+
+# --- 查看權限 ---
+
+def test_only_participants_can_view_a_replay():
+    record = {"participant_ids": ["u1", "u2"]}
+    assert can_view_replay(record, "u1")
+    assert can_view_replay(record, "u2")
+    assert not can_view_replay(record, "u3")
+
+
+def test_records_without_participants_are_not_viewable():
+    assert not can_view_replay({}, "u1")
+    assert not can_view_replay({"participant_ids": []}, "u1")
+
+
+def test_attached_replay_is_readable_before_and_after_the_write(fake_db, local_game_configs, fixture_monsters):
+    battle_result = _simulate(local_game_configs, fixture_monsters, seed=3)
+    battle_id = battle_result["battle_id"]
+    future = attach_battle_replay(battle_result, fixture_monsters[0], fixture_monsters[1], ["u1", None])
+
+    assert battle_result["replay_id"] == battle_id
+    assert "battle_events" not in battle_result and "raw_full_log" not in battle_result
+    assert get_replay_record(battle_id)["participant_ids"] == ["u1"]
+    assert future.result(timeout=5)
+    assert fake_db.document_data(f"MD_BattleReplays/{battle_id}")["participant_ids"] == ["u1"]
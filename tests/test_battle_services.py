@@ -0,0 +1,58 @@
+# tests/test_battle_services.py
+# 技能決策表：累積權重加二分搜尋的抽選必須與舊版在展開的加權列表上 random.choice 的結果相同
+
+import random
+from collections import Counter
+
+import pytest
+
+from backend.battle_services import LOW_HP_SKILL_MULTIPLIERS, SkillDecisionTable
+
+SKILLS = [
+    {"name": "猛擊", "skill_category": "近戰"},
+    {"name": "火球", "skill_category": "魔法"},
+    {"name": "治療", "skill_category": "輔助"},
+    {"name": "威嚇", "skill_category": "變化"},
+    {"name": "亂抓", "skill_category": "其他"},
+]
+PREFERENCES = {"近戰": 1.6, "魔法": 0.8, "輔助": 0.5, "變化": 1.2}
+
+
+def _expanded_weighted_list(skills, skill_preferences, is_low_hp):
+    """舊版的做法：每個技能依權重重複放入列表。"""
+    weighted_skills = []
+    for skill in skills:
+        skill_category = skill.get("skill_category", "其他")
+        multiplier = LOW_HP_SKILL_MULTIPLIERS.get(skill_category, 1.0) if is_low_hp else 1.0
+        weighted_skills.extend([skill] * int(skill_preferences.get(skill_category, 1.0) * multiplier * 10))
+    return weighted_skills
+
+
+@pytest.mark.parametrize("is_low_hp", [False, True])
+def test_pick_matches_choice_on_the_expanded_list_for_the_same_seed(is_low_hp):
+    table = SkillDecisionTable(SKILLS, PREFERENCES)
+    weighted_skills = _expanded_weighted_list(SKILLS, PREFERENCES, is_low_hp)
+    table_rng, list_rng = random.Random(2024), random.Random(2024)
+
+    for _ in range(2000):
+        assert table.pick(table_rng, is_low_hp) is list_rng.choice(weighted_skills)
+
+
+@pytest.mark.parametrize("is_low_hp", [False, True])
+def test_pick_distribution_follows_the_skill_weights(is_low_hp):
+    table = SkillDecisionTable(SKILLS, PREFERENCES)
+    weighted_skills = _expanded_weighted_list(SKILLS, PREFERENCES, is_low_hp)
+    expected = Counter(skill["name"] for skill in weighted_skills)
+    rng = random.Random(7)
+    draws = 50000
+
+    counts = Counter(table.pick(rng, is_low_hp)["name"] for _ in range(draws))
+
+    for name, weight in expected.items():
+        assert counts[name] / draws == pytest.approx(weight / len(weighted_skills), abs=0.01)
+
+
+def test_pick_falls_back_to_a_uniform_choice_when_every_weight_is_zero():
+    table = SkillDecisionTable(SKILLS, {category: 0 for category in ("近戰", "魔法", "輔助", "變化", "其他")})
+    rng = random.Random(1)
+    assert {table.pick(rng, False)["name"] for _ in range(500)} == {skill["name"] for skill in SKILLS}
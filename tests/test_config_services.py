@@ -0,0 +1,225 @@
+# tests/test_config_services.py
+# 遊戲設定快照與索引、帶版本號的設定提供者與監看執行緒、本地設定檔的二進位快取
+
+import copy
+import json
+import os
+import pickle
+import shutil
+
+import pytest
+
+from backend import MD_local_config_services
+from backend.MD_config_services import (
+    ConfigLoadError, ConfigReloadWatcher, GameConfigIndex, GameConfigProvider, GameConfigSnapshot, get_config_index
+)
+from backend.MD_local_config_services import (
+    BACKEND_DIR, CONFIG_CACHE_FILE_PREFIX, LOCAL_CONFIG_SOURCE_DIRS, compute_local_config_hash,
+    load_all_game_configs_from_local_files
+)
+
+CONFIGS = {
+    "skills": {
+        "火": [{"name": "火球", "power": 30}, {"name": "猛擊", "power": 10}],
+        "水": [{"name": "火球", "power": 99}, {"name": "水槍", "power": 20}],
+    },
+    "dna_fragments": [
+        {"id": "dna_1", "rarity": "普通", "type": "火"},
+        {"id": "dna_2", "rarity": "稀有", "type": "火"},
+    ],
+    "titles": [
+        {"id": "title_001", "name": "新手", "condition": {"type": "default"}},
+        {"id": "title_002", "name": "常勝", "condition": {"type": "wins", "value": 10}},
+    ],
+    "rarities": {"COMMON": {"name": "普通"}},
+}
+
+
+# --- GameConfigSnapshot / GameConfigIndex ---
+
+@pytest.mark.parametrize("mutate", [
+    lambda s: s.__setitem__("titles", []),
+    lambda s: s.__delitem__("titles"),
+    lambda s: s.update({"titles": []}),
+    lambda s: s.setdefault("new_key", 1),
+    lambda s: s.pop("titles"),
+    lambda s: s.popitem(),
+    lambda s: s.clear(),
+])
+def test_snapshot_rejects_every_mutation(mutate):
+    snapshot = GameConfigSnapshot(CONFIGS)
+    with pytest.raises(TypeError):
+        mutate(snapshot)
+    assert dict(snapshot) == CONFIGS
+
+
+def test_snapshot_pickles_and_deep_copies_through_its_constructor():
+    snapshot = GameConfigSnapshot(CONFIGS)
+    for restored in (pickle.loads(pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)), copy.deepcopy(snapshot)):
+        assert type(restored) is GameConfigSnapshot
+        assert dict(restored) == CONFIGS
+        assert isinstance(restored.index, GameConfigIndex)
+        assert restored.index.skills_by_name["水槍"]["power"] == 20
+
+
+def test_index_keeps_the_first_entry_for_duplicate_names():
+    index = GameConfigSnapshot(CONFIGS).index
+    assert index.skills_by_name["火球"]["power"] == 30
+    assert [dna["id"] for dna in index.dna_by_element["火"]] == ["dna_1", "dna_2"]
+    assert index.dna_by_rarity_element[("稀有", "火")] == ({"id": "dna_2", "rarity": "稀有", "type": "火"},)
+    assert index.titles_by_condition_type["wins"][0]["id"] == "title_002"
+    assert index.rarity_key_by_name["普通"] == "COMMON"
+
+
+def test_index_lookups_are_read_only():
+    index = GameConfigSnapshot(CONFIGS).index
+    with pytest.raises(TypeError):
+        index.skills_by_name["新技能"] = {}
+
+
+def test_get_config_index_reuses_the_snapshot_index_and_builds_one_for_plain_dicts():
+    snapshot = GameConfigSnapshot(CONFIGS)
+    assert get_config_index(snapshot) is snapshot.index
+    assert get_config_index(CONFIGS).skills_by_name["猛擊"]["power"] == 10
+    assert len(get_config_index({}).skills_by_name) == 0
+
+
+# --- GameConfigProvider / ConfigReloadWatcher ---
+
+class _Source:
+    """可控制的設定來源：configs 為下次載入的結果，version 為發佈的版本號。"""
+
+    def __init__(self, configs, version=1):
+        self.configs = configs
+        self.version = version
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return GameConfigSnapshot(self.configs)
+
+    def read_version(self):
+        return self.version
+
+
+def test_reload_installs_a_new_snapshot_with_the_published_version():
+    source = _Source(CONFIGS, version=3)
+    provider = GameConfigProvider(source.load, source.read_version)
+    assert provider.reload() == 1
+    assert provider.get() == CONFIGS
+    assert provider.source_version == 3
+
+
+def test_reload_keeps_the_last_good_snapshot_when_the_load_is_empty():
+    source = _Source(CONFIGS, version=1)
+    provider = GameConfigProvider(source.load, source.read_version)
+    provider.reload()
+    good_snapshot = provider.get()
+
+    source.configs, source.version = {}, 2
+    with pytest.raises(ConfigLoadError):
+        provider.reload()
+
+    assert provider.get() is good_snapshot
+    assert provider.version == 1
+    assert provider.source_version == 1
+
+
+def test_set_configs_rejects_an_empty_snapshot():
+    provider = GameConfigProvider(_Source(CONFIGS).load, lambda: None)
+    with pytest.raises(ConfigLoadError):
+        provider.set_configs({})
+    assert not provider.is_loaded
+
+
+def test_watcher_reloads_on_a_new_published_version_and_retries_after_a_failed_load():
+    source = _Source(CONFIGS, version=1)
+    provider = GameConfigProvider(source.load, source.read_version)
+    provider.reload()
+    watcher = ConfigReloadWatcher(provider, watched_paths=[])
+    assert not watcher.check_once()
+
+    source.configs, source.version = {}, 2
+    with pytest.raises(ConfigLoadError):
+        watcher.check_once()
+    assert provider.source_version == 1
+
+    source.configs = {**CONFIGS, "value_settings": {"starting_gold": 1}}
+    assert watcher.check_once()
+    assert provider.source_version == 2
+    assert provider.get()["value_settings"] == {"starting_gold": 1}
+
+
+def test_watcher_reloads_when_a_watched_file_changes(tmp_path):
+    watched = tmp_path / "game_mechanics.json"
+    watched.write_text("{}", encoding="utf-8")
+    source = _Source(CONFIGS)
+    provider = GameConfigProvider(source.load, source.read_version)
+    provider.reload()
+    watcher = ConfigReloadWatcher(provider, watched_paths=[str(watched)])
+
+    os.utime(watched, (1, 1))
+    assert watcher.check_once()
+    assert source.loads == 2
+    assert not watcher.check_once()
+
+
+# --- 本地設定檔的二進位快取 ---
+
+@pytest.fixture
+def local_config_dir(tmp_path):
+    """複製一份本地設定原始檔，讓測試可以修改內容。"""
+    base_dir = tmp_path / "backend"
+    for source_dir in LOCAL_CONFIG_SOURCE_DIRS:
+        source_path = os.path.join(BACKEND_DIR, source_dir)
+        if os.path.isdir(source_path):
+            shutil.copytree(source_path, base_dir / source_dir)
+    return base_dir
+
+
+def _cache_files(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.startswith(CONFIG_CACHE_FILE_PREFIX))
+
+
+def test_unchanged_sources_load_from_the_cache(local_config_dir, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    first = load_all_game_configs_from_local_files(str(local_config_dir), cache_dir)
+    assert first and _cache_files(cache_dir)
+
+    def _fail_rebuild(*args, **kwargs):
+        raise AssertionError("原始檔未變更時不應重新組合設定")
+    monkeypatch.setattr(MD_local_config_services, "build_game_config_documents", _fail_rebuild)
+    second = load_all_game_configs_from_local_files(str(local_config_dir), cache_dir)
+
+    assert type(second) is GameConfigSnapshot
+    assert second == first
+
+
+def test_changing_a_source_file_invalidates_the_cache(local_config_dir, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    load_all_game_configs_from_local_files(str(local_config_dir), cache_dir)
+    old_hash = compute_local_config_hash(str(local_config_dir))
+    old_files = _cache_files(cache_dir)
+
+    titles_path = local_config_dir / "system" / "titles.json"
+    titles = json.loads(titles_path.read_text(encoding="utf-8"))
+    titles.append({"id": "title_test", "name": "測試稱號", "condition": {"type": "test"}})
+    titles_path.write_text(json.dumps(titles, ensure_ascii=False), encoding="utf-8")
+
+    assert compute_local_config_hash(str(local_config_dir)) != old_hash
+    reloaded = load_all_game_configs_from_local_files(str(local_config_dir), cache_dir)
+    assert reloaded.index.titles_by_id["title_test"]["name"] == "測試稱號"
+    new_files = _cache_files(cache_dir)
+    assert len(new_files) == 1 and new_files != old_files
+
+
+def test_a_corrupt_cache_file_is_rebuilt(local_config_dir, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    expected = load_all_game_configs_from_local_files(str(local_config_dir), cache_dir)
+    cache_path = os.path.join(cache_dir, _cache_files(cache_dir)[0])
+    with open(cache_path, "wb") as f:
+        f.write(b"not a pickle")
+
+    assert load_all_game_configs_from_local_files(str(local_config_dir), cache_dir) == expected
+    with open(cache_path, "rb") as f:
+        assert pickle.load(f) == expected
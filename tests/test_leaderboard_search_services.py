@@ -0,0 +1,136 @@
+# tests/test_leaderboard_search_services.py
+# 行程內排行榜的游標分頁、同分排序與名次查詢，以及暱稱搜尋索引的中文子字串與模糊比對
+
+from backend.leaderboard_search_services import (
+    NicknameSearchIndex, RankedLeaderboard, decode_leaderboard_cursor, encode_leaderboard_cursor
+)
+
+
+def _leaderboard(scores):
+    board = RankedLeaderboard("player")
+    board.replace_all([(uid, score, {"uid": uid, "score": score}) for uid, score in scores.items()])
+    return board
+
+
+def _uids(payloads):
+    return [payload["uid"] for payload in payloads]
+
+
+def _all_pages(board, limit):
+    pages, cursor = [], None
+    while True:
+        payloads, next_cursor = board.page(limit, decode_leaderboard_cursor(cursor) if cursor else None)
+        pages.append(_uids(payloads))
+        if next_cursor is None:
+            return pages
+        cursor = next_cursor
+
+
+# --- RankedLeaderboard ---
+
+def test_page_orders_by_score_and_breaks_ties_by_uid():
+    board = _leaderboard({"c": 50, "a": 80, "b": 50, "d": 10})
+    payloads, _ = board.page(10)
+    assert _uids(payloads) == ["a", "b", "c", "d"]
+
+
+def test_cursor_paging_visits_every_entry_once():
+    board = _leaderboard({f"p{i:02d}": i // 3 for i in range(10)})
+    pages = _all_pages(board, 3)
+    assert [len(page) for page in pages] == [3, 3, 3, 1]
+    assert sum(pages, []) == _uids(board.page(100)[0])
+
+
+def test_last_page_has_no_cursor_even_when_it_is_full():
+    board = _leaderboard({"a": 3, "b": 2, "c": 1, "d": 0})
+    _, cursor = board.page(2)
+    payloads, next_cursor = board.page(2, decode_leaderboard_cursor(cursor))
+    assert _uids(payloads) == ["c", "d"]
+    assert next_cursor is None
+
+
+def test_cursor_stays_valid_when_entries_change_between_pages():
+    board = _leaderboard({"a": 40, "b": 30, "c": 20, "d": 10})
+    _, cursor = board.page(2)
+    board.upsert("e", 100, {"uid": "e", "score": 100})
+    board.remove("c")
+    payloads, _ = board.page(2, decode_leaderboard_cursor(cursor))
+    assert _uids(payloads) == ["d"]
+
+
+def test_upsert_moves_an_existing_entry():
+    board = _leaderboard({"a": 30, "b": 20, "c": 10})
+    board.upsert("c", 50, {"uid": "c", "score": 50})
+    assert _uids(board.page(10)[0]) == ["c", "a", "b"]
+    assert len(board) == 3
+
+
+def test_rank_of_counts_ties_by_uid_order():
+    board = _leaderboard({"a": 30, "b": 20, "c": 20, "d": 5})
+    assert board.rank_of("a") == {"rank": 1, "total": 4, "score": 30, "entry": {"uid": "a", "score": 30}}
+    assert board.rank_of("b")["rank"] == 2
+    assert board.rank_of("c")["rank"] == 3
+    assert board.rank_of("missing") is None
+
+
+def test_removed_entries_leave_the_ranking():
+    board = _leaderboard({"a": 30, "b": 20})
+    board.remove("a")
+    assert board.rank_of("a") is None
+    assert board.rank_of("b")["rank"] == 1
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_leaderboard_cursor(encode_leaderboard_cursor(12.5, "玩家")) == (12.5, "玩家")
+    assert decode_leaderboard_cursor("not-a-cursor") is None
+    assert decode_leaderboard_cursor(encode_leaderboard_cursor("12", "a")) is None
+
+
+# --- NicknameSearchIndex ---
+
+def _index(players):
+    index = NicknameSearchIndex()
+    index.replace_all(list(players.items()))
+    return index
+
+
+def test_search_finds_chinese_characters_in_the_middle_of_a_nickname():
+    index = _index({"u1": "小火龍王", "u2": "水之精靈", "u3": "龍騎士"})
+    assert {row["uid"] for row in index.search("火龍", fuzzy=False)} == {"u1"}
+    assert {row["uid"] for row in index.search("龍", fuzzy=False)} == {"u1", "u3"}
+
+
+def test_search_ranks_exact_then_prefix_then_substring():
+    index = _index({"u1": "小火龍", "u2": "火龍王者", "u3": "火龍", "u4": "火龍王"})
+    results = index.search("火龍", fuzzy=False)
+    assert [row["uid"] for row in results] == ["u3", "u4", "u2", "u1"]
+    assert [row["match"] for row in results] == ["exact", "prefix", "prefix", "substring"]
+
+
+def test_search_ignores_case_and_full_width_characters():
+    index = _index({"u1": "DragonＫｉｎｇ"})
+    assert [row["uid"] for row in index.search("dragonking")] == ["u1"]
+    assert index.search("ＤＲＡＧＯＮ")[0]["nickname"] == "DragonＫｉｎｇ"
+
+
+def test_fuzzy_matches_fill_in_after_substring_matches():
+    index = _index({"u1": "暗影刺客大師", "u2": "暗影剌客大師", "u3": "光明聖騎士"})
+    results = index.search("暗影刺客大師")
+    assert [(row["uid"], row["match"]) for row in results] == [("u1", "exact"), ("u2", "fuzzy")]
+    assert [row["uid"] for row in index.search("暗影剌客", fuzzy=False)] == ["u2"]
+
+
+def test_fuzzy_matching_can_be_disabled_and_respects_the_limit():
+    index = _index({f"u{i}": f"火焰戰士{i}" for i in range(5)})
+    assert index.search("火焰戰土", fuzzy=False) == []
+    assert len(index.search("火焰戰士", limit=3)) == 3
+
+
+def test_renamed_and_removed_players_leave_the_index():
+    index = _index({"u1": "火焰獸", "u2": "冰霜獸"})
+    index.upsert("u1", "雷電獸")
+    index.remove("u2")
+    assert index.search("火焰", fuzzy=False) == []
+    assert index.search("冰霜", fuzzy=False) == []
+    assert [row["uid"] for row in index.search("雷電", fuzzy=False)] == ["u1"]
+    assert len(index) == 1
@@ -0,0 +1,251 @@
+# tests/test_player_services.py
+# 玩家資料的欄位差異寫入、紀錄欄位合併、舊格式分檔與請求範圍工作單元
+
+import pytest
+from flask import Flask, jsonify
+from firebase_admin import firestore
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from backend import champion_services
+from backend.player_migration_services import PLAYER_SCHEMA_VERSION
+from backend.player_services import (
+    PLAYER_STORAGE_LAYOUT_VERSION, PendingEntries, _add_player_log, _merge_entries, diff_field_paths,
+    get_player_data_service, save_player_data_service, with_player_unit_of_work
+)
+
+PLAYER_ID = "player_1"
+MAIN_PATH = f"users/{PLAYER_ID}/gameData/main"
+
+
+def _seed_player(db, game_data, extra_documents=None):
+    db.collection("users").document(PLAYER_ID).set({"uid": PLAYER_ID, "nickname": "測試玩家"})
+    db.collection("users").document(PLAYER_ID).collection("gameData").document("main").set(game_data)
+    for path, data in (extra_documents or {}).items():
+        db.apply_set(path, data, False)
+
+
+def _current_game_data(**overrides):
+    game_data = {
+        "nickname": "測試玩家",
+        "schema_version": PLAYER_SCHEMA_VERSION,
+        "storageLayout": PLAYER_STORAGE_LAYOUT_VERSION,
+        "playerStats": {
+            "nickname": "測試玩家", "gold": 100, "pvp_points": 1000, "pvp_tier": "尚未定位",
+            "titles": [{"id": "title_001", "name": "新手"}], "equipped_title_id": "title_001",
+        },
+        "farmedMonsters": [{"id": "m1", "nickname": "火焰獸", "elements": ["火"]}],
+        "playerOwnedDNA": [],
+        "dnaCombinationSlots": [None] * 5,
+    }
+    game_data.update(overrides)
+    return game_data
+
+
+# --- diff_field_paths ---
+
+def test_diff_field_paths_unchanged_document_has_no_updates():
+    document = {"playerStats": {"gold": 1}, "farmedMonsters": [{"id": "m1"}]}
+    assert diff_field_paths(document, {"playerStats": {"gold": 1}, "farmedMonsters": [{"id": "m1"}]}) == {}
+
+
+def test_diff_field_paths_writes_only_changed_nested_fields():
+    previous = {"playerStats": {"gold": 1, "score": 5, "achievements": {"first_win": True}}}
+    new = {"playerStats": {"gold": 2, "score": 5, "achievements": {"first_win": True, "ten_wins": True}}}
+    assert diff_field_paths(previous, new) == {
+        "playerStats.gold": 2,
+        "playerStats.achievements.ten_wins": True,
+    }
+
+
+def test_diff_field_paths_deletes_removed_fields_at_any_depth():
+    previous = {"nickname": "a", "legacyField": 1, "playerStats": {"gold": 1, "oldStat": 3}}
+    updates = diff_field_paths(previous, {"nickname": "a", "playerStats": {"gold": 1}})
+    assert updates == {"legacyField": firestore.DELETE_FIELD, "playerStats.oldStat": firestore.DELETE_FIELD}
+
+
+def test_diff_field_paths_quotes_keys_that_are_not_simple_identifiers():
+    previous = {"playerStats": {"dna-slot": 1, "稱號": "a"}}
+    updates = diff_field_paths(previous, {"playerStats": {"dna-slot": 2, "稱號": "b"}})
+    assert updates == {
+        FieldPath("playerStats", "dna-slot").to_api_repr(): 2,
+        FieldPath("playerStats", "稱號").to_api_repr(): "b",
+    }
+    assert FieldPath.from_api_repr(FieldPath("playerStats", "dna-slot").to_api_repr()).parts == ("playerStats", "dna-slot")
+
+
+def test_diff_field_paths_replaces_whole_lists_and_emptied_maps():
+    previous = {"farmedMonsters": [{"id": "m1"}], "adventure_progress": {"floor": 3}}
+    new = {"farmedMonsters": [{"id": "m1"}, {"id": "m2"}], "adventure_progress": {}}
+    assert diff_field_paths(previous, new) == {
+        "farmedMonsters": [{"id": "m1"}, {"id": "m2"}],
+        "adventure_progress": {},
+    }
+
+
+# --- _merge_entries / PendingEntries ---
+
+def test_merge_entries_appends_player_logs_and_keeps_the_newest_fifty():
+    stored = [{"message": f"log {i}"} for i in range(50)]
+    merged = _merge_entries("playerLogs", stored, [{"message": "new"}])
+    assert len(merged) == 50
+    assert merged[0] == {"message": "log 1"}
+    assert merged[-1] == {"message": "new"}
+
+
+def test_merge_entries_prepends_mail_without_a_limit():
+    stored = [{"id": f"mail_{i}"} for i in range(60)]
+    merged = _merge_entries("mailbox", stored, [{"id": "mail_new"}])
+    assert len(merged) == 61
+    assert merged[0] == {"id": "mail_new"}
+
+
+def test_merge_entries_treats_missing_stored_list_as_empty():
+    assert _merge_entries("activityLog", None, [{"id": "a"}]) == [{"id": "a"}]
+
+
+def test_pending_player_logs_are_merged_into_the_stored_logs_document(fake_db, game_configs):
+    stored_logs = [{"message": f"log {i}"} for i in range(50)]
+    _seed_player(fake_db, _current_game_data(), {f"users/{PLAYER_ID}/gameData/logs": {"playerLogs": stored_logs}})
+
+    with Flask(__name__).test_request_context("/"):
+        game_data, _ = get_player_data_service(PLAYER_ID, None, game_configs)
+        assert isinstance(game_data["playerLogs"], PendingEntries)
+        _add_player_log(game_data, "系統", "new")
+        assert save_player_data_service(PLAYER_ID, game_data)
+
+    logs = fake_db.document_data(f"users/{PLAYER_ID}/gameData/logs")["playerLogs"]
+    assert len(logs) == 50
+    assert logs[0] == {"message": "log 1"}
+    assert logs[-1]["message"] == "new"
+    assert "playerLogs" not in fake_db.document_data(MAIN_PATH)
+
+
+def test_unloaded_sections_are_left_untouched_when_nothing_was_added(fake_db, game_configs):
+    _seed_player(fake_db, _current_game_data(), {f"users/{PLAYER_ID}/gameData/mailbox": {"mailbox": [{"id": "mail_1"}]}})
+
+    with Flask(__name__).test_request_context("/"):
+        game_data, _ = get_player_data_service(PLAYER_ID, None, game_configs)
+        game_data["playerStats"]["gold"] = 150
+        assert save_player_data_service(PLAYER_ID, game_data)
+
+    assert fake_db.document_data(f"users/{PLAYER_ID}/gameData/mailbox") == {"mailbox": [{"id": "mail_1"}]}
+    assert fake_db.document_data(MAIN_PATH)["playerStats"]["gold"] == 150
+
+
+def test_removing_a_monster_deletes_its_details_even_when_details_were_not_loaded(fake_db, game_configs):
+    _seed_player(fake_db, _current_game_data(), {f"users/{PLAYER_ID}/monsterDetails/m1": {"chatHistory": [{"text": "hi"}]}})
+
+    with Flask(__name__).test_request_context("/"):
+        game_data, _ = get_player_data_service(PLAYER_ID, None, game_configs)
+        game_data["farmedMonsters"] = []
+        assert save_player_data_service(PLAYER_ID, game_data)
+
+    assert fake_db.document_data(MAIN_PATH)["farmedMonsters"] == []
+    assert fake_db.document_data(f"users/{PLAYER_ID}/monsterDetails/m1") is None
+
+
+def test_champion_reward_mail_is_not_sent_again_when_the_mailbox_was_not_loaded(fake_db, game_configs, monkeypatch):
+    mail_title = "🏆 冠軍殿堂每日俸祿"
+    _seed_player(fake_db, _current_game_data(), {
+        f"users/{PLAYER_ID}/gameData/mailbox": {"mailbox": [{"id": "mail_1", "title": mail_title, "is_read": False}]},
+    })
+    monkeypatch.setattr(champion_services, "get_champions_data", lambda: {
+        "rank1": {"ownerId": PLAYER_ID, "monsterId": "m1", "occupiedTimestamp": 0},
+    })
+
+    with Flask(__name__).test_request_context("/"):
+        game_data, _ = get_player_data_service(PLAYER_ID, "測試玩家", game_configs)
+        assert game_data["playerStats"]["gold"] > 100
+        assert save_player_data_service(PLAYER_ID, game_data)
+
+    mailbox = fake_db.document_data(f"users/{PLAYER_ID}/gameData/mailbox")["mailbox"]
+    assert [mail["id"] for mail in mailbox] == ["mail_1"]
+
+
+# --- 舊格式的內嵌區塊 ---
+
+def test_saving_a_legacy_document_moves_inline_sections_to_their_own_documents(fake_db, game_configs):
+    legacy = _current_game_data(
+        mailbox=[{"id": "mail_1"}],
+        playerLogs=[{"message": "old log"}],
+        adventure_progress={"is_active": False},
+        farmedMonsters=[{"id": "m1", "nickname": "火焰獸", "elements": ["火"], "chatHistory": [{"text": "hi"}], "activityLog": [{"event": "born"}]}],
+    )
+    del legacy["storageLayout"]
+    _seed_player(fake_db, legacy)
+
+    with Flask(__name__).test_request_context("/"):
+        game_data, _ = get_player_data_service(PLAYER_ID, None, game_configs)
+        assert game_data["mailbox"] == [{"id": "mail_1"}]
+        assert save_player_data_service(PLAYER_ID, game_data)
+
+    main = fake_db.document_data(MAIN_PATH)
+    assert main["storageLayout"] == PLAYER_STORAGE_LAYOUT_VERSION
+    for section in ("mailbox", "playerLogs", "adventure_progress"):
+        assert section not in main
+    assert main["farmedMonsters"] == [{"id": "m1", "nickname": "火焰獸", "elements": ["火"]}]
+    assert fake_db.document_data(f"users/{PLAYER_ID}/gameData/mailbox") == {"mailbox": [{"id": "mail_1"}]}
+    assert fake_db.document_data(f"users/{PLAYER_ID}/gameData/logs") == {"playerLogs": [{"message": "old log"}]}
+    assert fake_db.document_data(f"users/{PLAYER_ID}/gameData/adventure") == {"adventure_progress": {"is_active": False}}
+    assert fake_db.document_data(f"users/{PLAYER_ID}/monsterDetails/m1") == {
+        "chatHistory": [{"text": "hi"}], "activityLog": [{"event": "born"}],
+    }
+
+
+# --- 請求範圍的工作單元 ---
+
+@pytest.fixture
+def gold_app(fake_db, game_configs):
+    """一個在同一次請求中讀取並存檔兩次的路由；fail_flush 為 True 時讓最後的批次寫入失敗。"""
+    app = Flask(__name__)
+    app.config["fail_flush"] = False
+    app.config["raise_in_view"] = False
+
+    @app.route("/spend", methods=["POST"])
+    @with_player_unit_of_work
+    def spend_gold():
+        game_data, _ = get_player_data_service(PLAYER_ID, None, game_configs)
+        game_data["playerStats"]["gold"] -= 10
+        save_player_data_service(PLAYER_ID, game_data)
+
+        same_data, _ = get_player_data_service(PLAYER_ID, None, game_configs, sections=("mailbox",))
+        assert same_data is game_data
+        same_data["playerStats"]["gold"] -= 5
+        save_player_data_service(PLAYER_ID, same_data)
+
+        if app.config["raise_in_view"]:
+            raise RuntimeError("路由處理失敗")
+        fake_db.fail_next_write = app.config["fail_flush"]
+        return jsonify({"success": True, "gold": same_data["playerStats"]["gold"]}), 200
+
+    _seed_player(fake_db, _current_game_data())
+    return app
+
+
+def test_unit_of_work_coalesces_saves_into_one_batch(gold_app, fake_db):
+    commits_before = fake_db.commits
+    response = gold_app.test_client().post("/spend")
+
+    assert response.status_code == 200
+    assert response.get_json() == {"success": True, "gold": 85}
+    assert fake_db.commits - commits_before == 1
+    assert fake_db.document_data(MAIN_PATH)["playerStats"]["gold"] == 85
+
+
+def test_unit_of_work_returns_500_when_the_flush_fails(gold_app, fake_db):
+    gold_app.config["fail_flush"] = True
+    response = gold_app.test_client().post("/spend")
+
+    assert response.status_code == 500
+    assert "error" in response.get_json()
+    assert fake_db.document_data(MAIN_PATH)["playerStats"]["gold"] == 100
+
+
+def test_unit_of_work_does_not_write_when_the_view_raises(gold_app, fake_db):
+    gold_app.config["raise_in_view"] = True
+    commits_before = fake_db.commits
+    response = gold_app.test_client().post("/spend")
+
+    assert response.status_code == 500
+    assert fake_db.commits == commits_before
+    assert fake_db.document_data(MAIN_PATH)["playerStats"]["gold"] == 100
@@ -0,0 +1,39 @@
+# tests/test_post_battle_services.py
+# 戰後稱號檢查：依條件類型分組計算，但授予順序與設定中的稱號順序相同
+
+from backend.MD_config_services import GameConfigSnapshot
+from backend.post_battle_services import _check_and_award_titles
+
+TITLES = [
+    {"id": "t_friends", "name": "社交達人", "condition": {"type": "friends_count", "value": 1}},
+    {"id": "t_wins", "name": "常勝", "condition": {"type": "wins", "value": 5}},
+    {"id": "t_owned", "name": "牧場主", "condition": {"type": "monsters_owned", "value": 1}},
+    {"id": "t_wins_more", "name": "百戰", "condition": {"type": "wins", "value": 100}},
+    {"id": "t_fire", "name": "火之友", "condition": {"type": "own_elemental_monsters", "element": "火", "value": 1}},
+    {"id": "t_wins_few", "name": "初勝", "condition": {"type": "wins", "value": 1}},
+]
+
+
+def _player_data():
+    return {
+        "nickname": "測試玩家",
+        "playerStats": {"wins": 10, "titles": [{"id": "t_owned", "name": "牧場主"}]},
+        "farmedMonsters": [{"id": "m1", "elements": ["火"]}],
+        "friends": [{"uid": "friend_1"}],
+        "mailbox": [],
+    }
+
+
+def test_titles_are_awarded_in_config_order():
+    player_data, awarded = _check_and_award_titles(_player_data(), GameConfigSnapshot({"titles": TITLES}))
+
+    assert [title["id"] for title in awarded] == ["t_friends", "t_wins", "t_fire", "t_wins_few"]
+    assert [title["id"] for title in player_data["playerStats"]["titles"]] == ["t_wins_few", "t_fire", "t_wins", "t_friends", "t_owned"]
+    assert len(player_data["mailbox"]) == 4
+
+
+def test_owned_titles_are_not_awarded_again():
+    player_data = _player_data()
+    player_data["playerStats"]["titles"] = [{"id": title["id"]} for title in TITLES]
+    _, awarded = _check_and_award_titles(player_data, {"titles": TITLES})
+    assert awarded == []